@@ -0,0 +1,138 @@
+"""
+病人安全事件分析核心（不依賴 Streamlit）
+
+資料載入、單位階層、篩選條件（FilterSpec）、月份前綴和、
+發生率物化表與 KPI 彙總皆為純函數；app.py 只負責快取與繪圖，
+同一組函數也可在批次工作或基準測試中直接呼叫：
+
+    from analytics import FilterSpec, load_workbook, build_month_prefix
+    df, db, df_fall = load_workbook(EXCEL_PATH)
+    px   = build_month_prefix(df, db)
+    spec = FilterSpec("2025-01", "2025-06", cat="跌倒")
+    prefix_count(px, spec)
+"""
+from .admission import (ADMIT_BINS, ADMIT_MAX_DAY, ADMIT_MIN_N, ADMIT_STRATA, ADMIT_WINDOW,
+                        AGE_BANDS, admission_counts, admission_curves,
+                        build_admission_cube, day_bin_counts, median_day,
+                        window_counts)
+from .bootstrap import BOOT_N, BOOT_SEED, bootstrap_deltas
+from .constants import (ALL_CATS, ALL_DEPTS, ALL_UNITS, CATEGORY_MAP,
+                        DEPT_COL, DRUG_FACTORS, FALL_FEATURES, HARM_TYPES, HIGH_SAC,
+                        INJ_COL_DET, INJ_COL_SUM, INJ_LABEL_MAP,
+                        INJURY_OUTCOMES, MID_ABOVE, RISK_FACTORS, RISK_FLAG_PREFIX,
+                        SAC_LEVELS, TIMESLOT_MAP, TIMESLOT_ORDER)
+from .features import (LOC_FEATS, feature_counts, feature_unit_counts,
+                       location_injury_frame, location_injury_pivot,
+                       top_units)
+from .filters import FilterSpec, filter_events, filter_falls, in_window
+from .forecast import (FC_HISTORY, build_forecasts, fit_forecasts, forecast_series,
+                       future_months, season_design, seasonal_forecast,
+                       update_forecasts, year_total)
+from .funnel import (FUNNEL_Z, eb_gamma_poisson, funnel_limits, gamma_quantile,
+                     unit_rate_frame)
+from .hierarchy import (DEFAULT_HIERARCHY, PSYCH_ROLE, UNIT_LEVELS,
+                        index_unit_hierarchy, load_unit_hierarchy,
+                        role_members, rows_in_wards, unit_members, unit_path)
+from .injury_model import (MODEL_PATH, MODEL_SCHEMA, fit_logistic, injury_design,
+                           load_injury_model, odds_ratio_frame, save_injury_model,
+                           train_injury_model)
+from .intervals import (CI_ALPHA, CI_Z, ci_text, interval_batch,
+                        poisson_interval, wilson_interval)
+from .its import (DEFAULT_INTERVENTIONS, build_its, fit_its, its_design,
+                  its_effects, its_series_effects, load_interventions)
+from .loader import (classify_dx, extract_fall_features, load_drug_sheet,
+                     load_harm_sheet, load_workbook, normalize_category,
+                     risk_factor_flags)
+from .metrics import (category_counts, inj_parts, inj_rate, kpi_summary,
+                      mid_above_parts, mid_above_rate, psych_parts, psych_pct,
+                      safe_pct, unit_counts)
+from .monitor import (CUSUM_H, CUSUM_K, EWMA_L, EWMA_LAMBDA, build_monitor,
+                      ewma_limit, monitor_frame, monitor_step, update_monitor)
+from .paging import PAGE_SIZE, keyword_mask, page_frame
+from .periods import (PERIOD_DIMS, PERIOD_HIST_N, baseline_periods,
+                      build_period_cube, default_periods, period_counts, period_elapsed,
+                      period_kpi_parts, period_label, period_month_labels,
+                      period_months)
+from .prefix import (build_month_prefix, prefix_bed_by_unit, prefix_bed_days,
+                     prefix_bed_monthly, prefix_count, prefix_monthly,
+                     prefix_rate)
+from .rates import (RATE_ALL_CAT, RATE_KEYS, bed_day_frame,
+                    materialize_rate_table, monthly_rate_frame,
+                    split_rate_series, update_rate_table)
+from .rules import (RULE_MAX_LEN, RULE_MIN_COUNT, fall_item_matrix, fall_rules,
+                    frequent_itemsets, outcome_rules, pack_bits, popcount)
+from .sections import (dept_fall_profile, dx_injury_summary, feature_pareto,
+                       risk_factor_matrix)
+from .spc import (NELSON_RULES, SPC_MIN_N, build_spc_cube, nelson_alerts,
+                  nelson_board, u_chart_frame, u_chart_window, u_limits,
+                  u_zscores)
+
+__all__ = [
+    # admission
+    "ADMIT_BINS", "ADMIT_MAX_DAY", "ADMIT_MIN_N", "ADMIT_STRATA", "ADMIT_WINDOW",
+    "AGE_BANDS", "admission_counts", "admission_curves", "build_admission_cube",
+    "day_bin_counts", "median_day", "window_counts",
+    # bootstrap
+    "BOOT_N", "BOOT_SEED", "bootstrap_deltas",
+    # constants
+    "ALL_CATS", "ALL_DEPTS", "ALL_UNITS", "CATEGORY_MAP", "DEPT_COL",
+    "DRUG_FACTORS", "FALL_FEATURES", "HARM_TYPES", "HIGH_SAC", "INJ_COL_DET",
+    "INJ_COL_SUM", "INJ_LABEL_MAP", "INJURY_OUTCOMES", "MID_ABOVE", "RISK_FACTORS",
+    "RISK_FLAG_PREFIX", "SAC_LEVELS", "TIMESLOT_MAP", "TIMESLOT_ORDER",
+    # features
+    "LOC_FEATS", "feature_counts", "feature_unit_counts", "location_injury_frame",
+    "location_injury_pivot", "top_units",
+    # filters
+    "FilterSpec", "filter_events", "filter_falls", "in_window",
+    # forecast
+    "FC_HISTORY", "build_forecasts", "fit_forecasts", "forecast_series",
+    "future_months", "season_design", "seasonal_forecast", "update_forecasts",
+    "year_total",
+    # funnel
+    "FUNNEL_Z", "eb_gamma_poisson", "funnel_limits", "gamma_quantile",
+    "unit_rate_frame",
+    # hierarchy
+    "DEFAULT_HIERARCHY", "PSYCH_ROLE", "UNIT_LEVELS", "index_unit_hierarchy",
+    "load_unit_hierarchy", "role_members", "rows_in_wards", "unit_members",
+    "unit_path",
+    # injury_model
+    "MODEL_PATH", "MODEL_SCHEMA", "fit_logistic", "injury_design",
+    "load_injury_model", "odds_ratio_frame", "save_injury_model",
+    "train_injury_model",
+    # intervals
+    "CI_ALPHA", "CI_Z", "ci_text", "interval_batch", "poisson_interval",
+    "wilson_interval",
+    # its
+    "DEFAULT_INTERVENTIONS", "build_its", "fit_its", "its_design", "its_effects",
+    "its_series_effects", "load_interventions",
+    # loader
+    "classify_dx", "extract_fall_features", "load_drug_sheet", "load_harm_sheet",
+    "load_workbook", "normalize_category", "risk_factor_flags",
+    # metrics
+    "category_counts", "inj_parts", "inj_rate", "kpi_summary", "mid_above_parts",
+    "mid_above_rate", "psych_parts", "psych_pct", "safe_pct", "unit_counts",
+    # monitor
+    "CUSUM_H", "CUSUM_K", "EWMA_L", "EWMA_LAMBDA", "build_monitor", "ewma_limit",
+    "monitor_frame", "monitor_step", "update_monitor",
+    # paging
+    "PAGE_SIZE", "keyword_mask", "page_frame",
+    # periods
+    "PERIOD_DIMS", "PERIOD_HIST_N", "baseline_periods", "build_period_cube",
+    "default_periods", "period_counts", "period_elapsed", "period_kpi_parts",
+    "period_label", "period_month_labels", "period_months",
+    # prefix
+    "build_month_prefix", "prefix_bed_by_unit", "prefix_bed_days",
+    "prefix_bed_monthly", "prefix_count", "prefix_monthly", "prefix_rate",
+    # rates
+    "RATE_ALL_CAT", "RATE_KEYS", "bed_day_frame", "materialize_rate_table",
+    "monthly_rate_frame", "split_rate_series", "update_rate_table",
+    # rules
+    "RULE_MAX_LEN", "RULE_MIN_COUNT", "fall_item_matrix", "fall_rules",
+    "frequent_itemsets", "outcome_rules", "pack_bits", "popcount",
+    # sections
+    "dept_fall_profile", "dx_injury_summary", "feature_pareto",
+    "risk_factor_matrix",
+    # spc
+    "NELSON_RULES", "SPC_MIN_N", "build_spc_cube", "nelson_alerts", "nelson_board",
+    "u_chart_frame", "u_chart_window", "u_limits", "u_zscores",
+]
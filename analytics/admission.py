@@ -0,0 +1,129 @@
+# ════════════════════════════════════════════════════════════
+#  入院後天數風險分析（離散時間 hazard / Kaplan–Meier 型曲線）
+#  載入時把傷害事件一次累加成前綴和陣列（同 analytics.prefix）：
+#  cube[單位, 年齡層, 傷害類型, 住院後天數, k] = 前 k 個月的累計件數
+#  任意月份區間 × 病房 × 分層的逐日件數只需兩個切片相減 ——
+#  切換分層或拖動區間不重新掃描事件列。
+#  資料只有事件、沒有每個住院日的在院人數，風險集合是「最終發生事件者」：
+#  h(t) = 第 t 天件數 / 第 t 天（含）以後件數，S(t) = Π(1 − h)
+#  （無設限時即 1 − 經驗 CDF）。用來比較各分層事件集中於入院早期
+#  （72 小時窗口）的程度，不是發生率
+# ════════════════════════════════════════════════════════════
+import numpy as np
+import pandas as pd
+
+from .constants import HARM_TYPES
+from .intervals import wilson_interval
+from .periods import MISSING_LABEL
+
+ADMIT_DAY_COL = "住院後天數"
+ADMIT_AGE_COL = "發生者資料-年齡"
+ADMIT_WINDOW  = 3             # 72 小時高風險窗口 = 入院第 0–3 天
+ADMIT_MAX_DAY = 90            # 逐日曲線到第 90 天；更晚的事件併入最後一格
+ADMIT_MIN_N   = 5             # 件數少於此的分層不畫曲線
+ALL_HARM      = "全部傷害"
+ADMIT_STRATA  = ("傷害類型", "年齡層", "單位")
+# 分組顯示：標籤 → 起始天（含），最後一組含 ADMIT_MAX_DAY 以後
+ADMIT_BINS = {"0-3天(72h内)": 0, "4-7天": 4, "8-14天": 8, "15-30天": 15, "31天以上": 31}
+# 年齡層：標籤 → 起始歲（含）
+AGE_BANDS  = {"0-18歲": 0, "18-40歲": 18, "40-60歲": 40, "60歲以上": 60}
+
+
+def age_band_codes(age):
+    """年齡 → AGE_BANDS 的索引；缺值或負值 → len(AGE_BANDS)（MISSING_LABEL）"""
+    age = pd.to_numeric(pd.Series(age), errors="coerce").to_numpy(float)
+    code = np.searchsorted(list(AGE_BANDS.values()), age, side="right") - 1
+    return np.where(np.isnan(age) | (code < 0), len(AGE_BANDS), code)
+
+
+def build_admission_cube(df):
+    """
+    傷害資料 → 前綴和陣列 dict（呼叫端視為唯讀）：months、units、ages、types
+    （第 0 個為 ALL_HARM，其餘同 HARM_TYPES；一件事件可屬多個類型）、
+    cube (單位, 年齡層, 類型, ADMIT_MAX_DAY + 2, 月數 + 1)。
+    住院後天數缺值或為負（日期登打錯誤）的事件不計入
+    """
+    months = sorted(df["年月"].dropna().unique())
+    units  = sorted(df["單位"].dropna().unique())
+    ages   = list(AGE_BANDS) + [MISSING_LABEL]
+    types  = [ALL_HARM] + list(HARM_TYPES)
+
+    m_i  = pd.Index(months).get_indexer(df["年月"])
+    u_i  = pd.Index(units).get_indexer(df["單位"])
+    a_i  = (age_band_codes(df[ADMIT_AGE_COL]) if ADMIT_AGE_COL in df.columns
+            else np.full(len(df), len(AGE_BANDS)))
+    day  = pd.to_numeric(df[ADMIT_DAY_COL], errors="coerce").to_numpy(float)
+    ok   = (m_i >= 0) & (u_i >= 0) & (day >= 0)
+    d_i  = np.minimum(np.nan_to_num(day, nan=-1), ADMIT_MAX_DAY + 1).astype(int)
+    flag = np.column_stack([np.ones(len(df), dtype=bool)] + [
+        df[c].fillna(0).to_numpy() == 1 if c in df.columns else np.zeros(len(df), dtype=bool)
+        for c in HARM_TYPES.values()])
+
+    e, t = np.nonzero(flag & ok[:, None])
+    cube = np.zeros((len(units), len(ages), len(types), ADMIT_MAX_DAY + 2,
+                     len(months) + 1), dtype=np.int32)
+    np.add.at(cube, (u_i[e], a_i[e], t, d_i[e], m_i[e] + 1), 1)
+    np.cumsum(cube, axis=-1, out=cube)
+    return {"months": months, "units": units, "ages": ages, "types": types, "cube": cube}
+
+
+def admission_counts(adm, start, end, wards=None, by=None):
+    """
+    [start, end] 月份區間、wards 病房（None = 全院）的逐日件數。
+    by：None → 全部傷害一列；"傷害類型" / "年齡層" / "單位" → 各分層一列
+    （年齡層、單位只計全部傷害）。回傳 (分層標籤 list, 件數 (S, ADMIT_MAX_DAY + 2))，
+    最後一欄為 ADMIT_MAX_DAY 以後
+    """
+    lo = int(np.searchsorted(adm["months"], start, side="left"))
+    hi = max(int(np.searchsorted(adm["months"], end, side="right")), lo)
+    units = adm["units"]
+    u_sel = (np.arange(len(units)) if wards is None
+             else np.flatnonzero(np.isin(units, list(wards))))
+    cube = adm["cube"]                  # 先切月份軸，避免複製整個 (U, A, T, D, M+1)
+    win = cube[u_sel, ..., hi] - cube[u_sel, ..., lo]                  # (U, A, T, D)
+    if by == "傷害類型":
+        return list(adm["types"]), win.sum((0, 1))
+    if by == "年齡層":
+        return list(adm["ages"]), win[:, :, 0].sum(0)
+    if by == "單位":
+        return [units[i] for i in u_sel], win[:, :, 0].sum(1)
+    return [ALL_HARM], win[:, :, 0].sum((0, 1))[None, :]
+
+
+def admission_curves(counts):
+    """
+    逐日件數 (S, D) → 各分層的離散 hazard 與累積發生比例：
+    days、events / at_risk / hazard (S, D − 1)、cum / lo / hi（第 t 天以前發生的
+    比例 1 − S(t)，95% Wilson 區間；無設限時 KM 估計即二項比例）、n (S,)
+    """
+    counts = np.asarray(counts, dtype=float)
+    at_risk = counts[:, ::-1].cumsum(1)[:, ::-1]
+    n = at_risk[:, 0]
+    d, r = counts[:, :-1], at_risk[:, :-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hazard = np.where(r > 0, d / r, 0.0)
+        cum = 1 - np.cumprod(1 - hazard, axis=1)
+    k = d.cumsum(1)
+    lo, hi = wilson_interval(k, np.broadcast_to(n[:, None], k.shape), per=1.0)
+    return {"days": np.arange(d.shape[1]), "events": d, "at_risk": r,
+            "hazard": hazard, "cum": np.where(n[:, None] > 0, cum, np.nan),
+            "lo": lo, "hi": hi, "n": n}
+
+
+def day_bin_counts(counts):
+    """逐日件數 (S, D) → ADMIT_BINS 各組件數 (S, |ADMIT_BINS|)"""
+    return np.add.reduceat(np.asarray(counts), list(ADMIT_BINS.values()), axis=1)
+
+
+def window_counts(counts, window=ADMIT_WINDOW):
+    """逐日件數 (S, D) → (窗口內, 窗口後) 件數，各為 (S,)"""
+    counts = np.asarray(counts)
+    early = counts[:, :window + 1].sum(1)
+    return early, counts.sum(1) - early
+
+
+def median_day(curves):
+    """各分層累積比例達 50% 的第一天；超過 ADMIT_MAX_DAY 或無事件為 NaN"""
+    cum = np.nan_to_num(curves["cum"], nan=0.0)
+    hit = cum >= 0.5
+    return np.where(hit.any(1), hit.argmax(1), np.nan)
@@ -0,0 +1,85 @@
+# ════════════════════════════════════════════════════════════
+#  兩期差異的 bootstrap 信賴區間（年度比較 KPI）
+#  kind="mean"：以事件為單位重抽（整批索引 rng.integers (B, n)），
+#               統計量 = 指標值平均
+#  kind="prop"：0/1 指標只需 (分子, 分母) —— 事件重抽的分子即 Binomial(n, k/n)，
+#               與 mean 同分布，但不必展開成事件陣列
+#  kind="count"：件數以 Poisson 重抽（事件本身固定時件數沒有變異），
+#               可乘比例（如年化 12 / 已過月數）
+#  B 次重抽切成固定大小的區塊，每塊一個由 SeedSequence 衍生的獨立種子
+#  —— 結果與 worker 數、排程順序無關；可交給 process pool 平行計算
+# ════════════════════════════════════════════════════════════
+import numpy as np
+
+BOOT_N     = 4000          # 重抽次數
+BOOT_CHUNK = 500           # 每個工作區塊的重抽次數
+BOOT_SEED  = 20240101
+BOOT_ALPHA = 0.05
+
+
+def _stat(kind, x, scale):
+    """原始統計量：mean → 平均；prop → 分子 / 分母；count → 件數 × scale"""
+    if kind == "mean":
+        return float(np.mean(x)) * scale if len(x) else np.nan
+    if kind == "prop":
+        k, n = x
+        return k / n * scale if n > 0 else np.nan
+    return float(x) * scale
+
+
+def _draw(kind, x, scale, size, rng):
+    """一個區塊的 size 次重抽統計量 (size,)"""
+    if kind == "mean":
+        x = np.asarray(x, dtype=float)
+        if len(x) == 0:
+            return np.full(size, np.nan)
+        idx = rng.integers(0, len(x), size=(size, len(x)))
+        return x[idx].mean(axis=1) * scale
+    if kind == "prop":
+        k, n = x
+        if n <= 0:
+            return np.full(size, np.nan)
+        return rng.binomial(int(n), k / n, size=size) / n * scale
+    return rng.poisson(float(x), size=size) * scale
+
+
+def _boot_chunk(job):
+    """process pool 的工作單元：(kind, a, b, scale_a, scale_b, size, seed) → b − a 的重抽差異"""
+    kind, a, b, scale_a, scale_b, size, seed = job
+    rng = np.random.default_rng(seed)
+    return _draw(kind, b, scale_b, size, rng) - _draw(kind, a, scale_a, size, rng)
+
+
+def bootstrap_deltas(specs, n_boot=BOOT_N, seed=BOOT_SEED, alpha=BOOT_ALPHA,
+                     executor=None):
+    """
+    specs：{名稱: (kind, a, b) 或 (kind, a, b, scale_a, scale_b)}，a 為前期、b 為後期；
+    mean 的 a / b 為事件層級指標值陣列，prop 為 (分子, 分母)，count 為件數。
+    回傳 {名稱: {"diff", "lo", "hi", "p"}}，diff = 後期 − 前期，
+    p = 雙尾 bootstrap p 值（差異分布跨過 0 的比例 × 2）。
+    executor 有 map() 即可（ProcessPoolExecutor）；None 時於本行程依序計算
+    """
+    names = list(specs)
+    n_chunks = -(-n_boot // BOOT_CHUNK)
+    seeds = np.random.SeedSequence(seed).spawn(len(names) * n_chunks)
+    jobs, base = [], {}
+    for i, name in enumerate(names):
+        kind, a, b, *scale = specs[name]
+        sa, sb = scale if scale else (1.0, 1.0)
+        base[name] = _stat(kind, b, sb) - _stat(kind, a, sa)
+        for c in range(n_chunks):
+            size = min(BOOT_CHUNK, n_boot - c * BOOT_CHUNK)
+            jobs.append((kind, a, b, sa, sb, size, seeds[i * n_chunks + c]))
+
+    draws = list((executor.map if executor is not None else map)(_boot_chunk, jobs))
+    out = {}
+    for i, name in enumerate(names):
+        d = np.concatenate(draws[i * n_chunks:(i + 1) * n_chunks])
+        d = d[np.isfinite(d)]
+        if len(d) == 0 or not np.isfinite(base[name]):
+            out[name] = {"diff": base[name], "lo": np.nan, "hi": np.nan, "p": np.nan}
+            continue
+        lo, hi = np.quantile(d, [alpha / 2, 1 - alpha / 2])
+        p = min(1.0, 2 * min((d <= 0).mean(), (d >= 0).mean()))
+        out[name] = {"diff": base[name], "lo": float(lo), "hi": float(hi), "p": float(p)}
+    return out
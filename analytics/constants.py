@@ -0,0 +1,101 @@
+# ── 分析核心共用常數（欄位名稱、代碼對照）──────────────────────
+# 與 Streamlit 無關；app.py 與批次工作、基準測試共用同一份定義
+
+TIMESLOT_MAP = {
+    "00:01-02:00":"00-02時","00:00-02:00":"00-02時",
+    "02:01-04:00":"02-04時","02:00-04:00":"02-04時",
+    "04:01-06:00":"04-06時","04:00-06:00":"04-06時",
+    "06:01-08:00":"06-08時","06:00-08:00":"06-08時",
+    "08:01-10:00":"08-10時","08:00-10:00":"08-10時",
+    "10:01-12:00":"10-12時","10:00-12:00":"10-12時",
+    "12:01-14:00":"12-14時","12:00-14:00":"12-14時",
+    "14:01-16:00":"14-16時","14:00-16:00":"14-16時",
+    "16:01-18:00":"16-18時","16:00-18:00":"16-18時",
+    "18:01-20:00":"18-20時","18:00-20:00":"18-20時",
+    "20:01-22:00":"20-22時","20:00-22:00":"20-22時",
+    "22:01-24:00":"22-24時","22:00-24:00":"22-24時",
+}
+TIMESLOT_ORDER = [
+    "00-02時","02-04時","04-06時","06-08時","08-10時","10-12時",
+    "12-14時","14-16時","16-18時","18-20時","20-22時","22-24時",
+]
+CATEGORY_MAP = {
+    "跌倒事件":"跌倒","藥物事件":"藥物","管路事件":"管路",
+    "傷害行為":"傷害","醫療事件":"醫療","治安事件":"治安",
+    "手術事件":"醫療","麻醉事件":"醫療","輸血事件":"醫療",
+    "不預期心跳停止":"醫療","檢查檢驗":"其他","檢驗檢查":"其他",
+    "公共意外":"其他","其他事件":"其他",
+}
+INJ_LABEL_MAP = {
+    "無傷害": "無傷害", "輕度": "輕度", "中度": "中度",
+    "重度": "重度", "極重度": "極重度", "死亡": "死亡",
+    "無法判定傷害嚴重程度": "無法判定",
+}
+HIGH_SAC = [1, 2]
+SAC_LEVELS = [0, 1, 2, 3, 4]          # 0 = SAC 未填 / INC
+
+# ── 篩選預設值（「不篩選」的代表值）─────────────────────────
+ALL_UNITS = "全院"
+ALL_CATS  = "全部"
+ALL_DEPTS = "全部科別"
+
+# ── 欄位名稱 ─────────────────────────────────────────────────
+DEPT_COL    = "病人/住民-所在科別"
+INJ_COL_SUM = "病人/住民-事件發生後對病人健康的影響程度(彙總)"
+INJ_COL_DET = "病人/住民-事件發生後對病人健康的影響程度"
+MID_ABOVE   = ["中度", "重度", "極重度", "死亡"]
+
+# ── 跌倒傷害結果：名稱 → (欄位, 成立的值) ─────────────────────
+INJURY_OUTCOMES = {
+    "有傷害":     (INJ_COL_SUM, ["有傷害"]),
+    "中度以上傷害": (INJ_COL_DET, MID_ABOVE),
+}
+
+# ── 跌倒高風險因子：名稱 → (欄位, 成立的值) ───────────────────
+# 熱力矩陣、關聯規則與傷害風險模型共用同一份定義
+RISK_FACTORS = {
+    "鎮靜安眠藥":   ("可能原因-鎮靜安眠藥", [1]),
+    "執意自行下床": ("可能原因-高危險群病人執意自行下床或活動", [1]),
+    "步態不穩":    ("可能原因-步態不穩", [1]),
+    "意識混亂":    ("跌倒事件發生對象-當事人當時意識狀況", ["意識混亂", "嗜睡"]),
+    "無陪伴者":    ("跌倒事件發生對象-事件發生時有無陪伴者", ["無"]),
+    "跌倒高危群":  ("跌倒事件發生對象-事件發生前是否為跌倒高危險群", ["是"]),
+    "曾跌倒史":    ("跌倒事件發生對象-最近一年是否曾經跌倒", ["有"]),
+}
+RISK_FLAG_PREFIX = "風險_"   # 載入時預先算好的因子布林欄：風險_<名稱>
+# 跌倒相關藥物：名稱 → 可能原因欄位（0/1）
+DRUG_FACTORS = {
+    "鎮靜安眠藥": "可能原因-鎮靜安眠藥",
+    "降壓藥":    "可能原因-降壓藥",
+    "止痛麻醉劑": "可能原因-止痛麻醉劑",
+    "降血糖藥":  "可能原因-降血糖藥",
+    "抗癲癇藥":  "可能原因-抗癲癇藥",
+    "肌肉鬆弛劑": "可能原因-肌肉鬆弛劑",
+}
+
+# ── 傷害行為類型：顯示名稱 → 0/1 欄位 ───────────────────────
+HARM_TYPES = {
+    "身體攻擊": "傷害類型-身體攻擊",
+    "自傷":     "傷害類型-自傷",
+    "言語衝突": "傷害類型-言語衝突",
+    "自殺企圖": "傷害類型-自殺/企圖自殺",
+}
+
+# ── 跌倒事件說明關鍵字特徵 ───────────────────────────────────
+FALL_FEATURES = {
+    "地點_床邊下床":     ["下床","床邊","起床","離床","坐起"],
+    "地點_浴廁":        ["廁所","洗手間","浴室","如廁","洗澡"],
+    "地點_走廊行走":     ["走廊","走路","行走","散步"],
+    "地點_椅子輪椅":     ["椅子","輪椅","便盆椅"],
+    "機轉_滑倒":        ["滑","打滑","濕"],
+    "機轉_頭暈血壓低":   ["頭暈","暈","血壓低","姿位性"],
+    "機轉_自行起身未告知":["自行","未按鈴","未通知","未叫護"],
+    "機轉_站不穩腳軟":   ["站不穩","腳軟","無力","腿軟"],
+    "發現_護理人員巡視":  ["巡房","巡視","護士發現","護理師發現"],
+    "發現_聲響":        ["聲音","聲響","跌倒聲"],
+    "傷害_頭部":        ["頭","額頭","頭皮"],
+    "傷害_下肢":        ["腳","膝蓋","足部","下肢","腳踝"],
+    "傷害_臀髖":        ["臀","髖"],
+    "病況_精神症狀":     ["幻覺","妄想","躁動","激動","衝動"],
+    "病況_約束相關":     ["約束","保護帶","掙脫","解開"],
+}
@@ -0,0 +1,67 @@
+# ── 跌倒事件說明特徵：件數、單位分佈、地點 × 傷害程度 ──────────
+# 全部以布林特徵欄一次向量化計算，供圖表與下鑽共用
+import numpy as np
+import pandas as pd
+
+from .constants import INJ_COL_DET, INJ_LABEL_MAP
+
+LOC_FEATS = {
+    "床邊下床": "地點_床邊下床",
+    "浴廁":    "地點_浴廁",
+    "走廊行走": "地點_走廊行走",
+    "椅子輪椅": "地點_椅子輪椅",
+}
+INJ_ORDER_HM = ["無傷害","輕度","中度","重度","極重度","無法判定傷害嚴重程度"]
+
+
+def feature_counts(df, features):
+    """各特徵件數與佔比（%），依佔比由低到高（水平長條圖高者在上）"""
+    feats = [f for f in features if f in df.columns]
+    cnt = df[feats].sum().astype(int)
+    pct = (cnt / len(df) * 100).round(2) if len(df) else cnt * 0.0
+    return (pd.DataFrame({"特徵": feats, "件數": cnt.values, "佔比": pct.values})
+            .sort_values("佔比", ascending=True)
+            .reset_index(drop=True))
+
+
+def feature_unit_counts(df, features, col="單位"):
+    """單位 × 特徵 件數矩陣（一次 groupby），下鑽時直接取欄"""
+    feats = [f for f in features if f in df.columns]
+    return df.groupby(col)[feats].sum().astype(int)
+
+
+def top_units(matrix, feat, n=20):
+    """矩陣中某特徵件數最多的前 n 個單位（遞增排列，供水平圖使用）"""
+    col = matrix[feat]
+    col = col[col > 0].sort_values(ascending=False, kind="stable").head(n)
+    return (col.rename("件數").rename_axis(matrix.index.name).reset_index()
+            .sort_values("件數", ascending=True))
+
+
+def location_injury_frame(df):
+    """
+    回傳有地點、有傷害程度的跌倒列，附「地點」（依 LOC_FEATS 順序取第一個成立的特徵）
+    與「傷害程度顯示」欄
+    """
+    cols = [feat for feat in LOC_FEATS.values() if feat in df.columns]
+    labels = [lbl for lbl, feat in LOC_FEATS.items() if feat in df.columns]
+    out = df.copy()
+    if cols:
+        hits = out[cols].fillna(False).astype(bool).to_numpy()
+        out["地點"] = np.where(hits.any(axis=1),
+                              np.array(labels, dtype=object)[hits.argmax(axis=1)],
+                              None)
+    else:
+        out["地點"] = None
+    out["傷害程度顯示"] = out[INJ_COL_DET].map(INJ_LABEL_MAP).fillna(out[INJ_COL_DET])
+    return out[out["地點"].notna() & out[INJ_COL_DET].notna()].copy()
+
+
+def location_injury_pivot(hm_data):
+    """傷害程度（列）× 地點（欄）件數表，列依 INJ_ORDER_HM 只保留出現過的等級"""
+    inj_order = [INJ_LABEL_MAP.get(i, i) for i in INJ_ORDER_HM
+                 if INJ_LABEL_MAP.get(i, i) in hm_data["傷害程度顯示"].unique()]
+    return (hm_data.groupby(["地點", "傷害程度顯示"]).size()
+            .unstack("地點")
+            .reindex(index=inj_order, columns=list(LOC_FEATS))
+            .fillna(0).astype(int))
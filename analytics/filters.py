@@ -0,0 +1,53 @@
+# ── 全域篩選條件 ─────────────────────────────────────────────
+# FilterSpec 為不可變、可雜湊的值物件：可直接當快取鍵，
+# 也可在 Streamlit 以外（批次、基準測試）建立後呼叫分析函數
+from dataclasses import dataclass, replace
+from typing import Optional, Tuple
+
+from .constants import ALL_CATS, ALL_DEPTS, ALL_UNITS, DEPT_COL
+from .hierarchy import rows_in_wards, unit_members
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    start: str                              # 起始年月（含），如 "2024-01"
+    end: str                                # 結束年月（含）
+    unit: str = ALL_UNITS                   # 階層節點名稱（顯示用）
+    cat: str = ALL_CATS                     # 事件大類
+    dept: str = ALL_DEPTS                   # 病人所在科別
+    wards: Optional[Tuple[str, ...]] = None  # unit 展開後的病房；None = 全院
+
+    @classmethod
+    def resolve(cls, index, start, end, unit=ALL_UNITS, cat=ALL_CATS,
+                dept=ALL_DEPTS):
+        """依單位階層把 unit 展開成病房清單後建立"""
+        members = unit_members(index, unit)
+        return cls(start, end, unit, cat, dept,
+                   None if members is None else tuple(members))
+
+    def window(self, start, end=None):
+        """同一篩選條件、換成另一個月份區間（end 省略 = 單月）"""
+        return replace(self, start=start, end=start if end is None else end)
+
+
+def in_window(df, spec):
+    """只套用月份區間（藥物 / 傷害 / 精神科等專屬資料表使用）"""
+    return df[(df["年月"] >= spec.start) & (df["年月"] <= spec.end)]
+
+
+def filter_events(df, spec):
+    """事件主表：月份區間 + 單位 + 事件大類 + 科別"""
+    out = rows_in_wards(in_window(df, spec), spec.wards)
+    if spec.cat != ALL_CATS and "事件大類" in out.columns:
+        out = out[out["事件大類"] == spec.cat]
+    if spec.dept != ALL_DEPTS and DEPT_COL in out.columns:
+        out = out[out[DEPT_COL] == spec.dept]
+    return out.copy()
+
+
+def filter_falls(df, spec):
+    """跌倒深度分析表：只套用月份區間與科別（單位 / 類別不適用）"""
+    out = in_window(df, spec)
+    if spec.dept != ALL_DEPTS and DEPT_COL in out.columns:
+        out = out[out[DEPT_COL] == spec.dept]
+    return out.copy()
@@ -0,0 +1,153 @@
+# ════════════════════════════════════════════════════════════
+#  季節性預測：Poisson / 負二項 GLM
+#  log E[件數] = 水準 + 月份效果（2–12 月相對 1 月）
+#  各月概似以半衰期 FC_HALFLIFE 個月指數衰減加權 —— 水準跟隨近期、
+#  季節型態借用多年資料（類似 Holt-Winters；線性趨勢外推在回測中誤差大，不採用）
+#  月份效果加 ridge 先驗（標準差 FC_SEASON_SD）；
+#  每條序列 (單位, 事件大類) 取最近 FC_HISTORY 個月，共用設計矩陣批次 IRLS
+#  （analytics.its._irls）；過度離散的序列改 NB2。資料更新時以前次 β 為起點
+#  只需少數迭代。預測區間以參數抽樣（β ~ N(β̂, Σ)）+ 計數抽樣模擬，
+#  年度總數區間 = 已發生件數 + 剩餘月份模擬路徑加總
+# ════════════════════════════════════════════════════════════
+import numpy as np
+
+from .its import NB_DISPERSION, _irls, _month_no
+
+FC_HISTORY    = 48          # 擬合視窗（月）
+FC_HALFLIFE   = 12          # 概似權重半衰期（月）
+FC_SEASON_SD  = 0.5         # 月份效果的先驗標準差（log 尺度）；零事件月份不致發散
+FC_MIN_EVENTS = 12          # 視窗內件數太少 → 只用加權月平均（無季節效果）
+FC_SIMS       = 2000
+FC_SEED       = 20250101
+FC_LEVEL      = 0.95
+
+
+def season_design(months):
+    """月份 → 設計矩陣 (M, 12)：截距 + 2–12 月虛擬變數"""
+    moy = np.array([int(m[5:7]) for m in months], dtype=int)
+    dummies = (moy[:, None] == np.arange(2, 13)[None, :]).astype(float)
+    return np.column_stack([np.ones(len(moy)), dummies])
+
+
+def recency_weights(months, halflife=FC_HALFLIFE):
+    """最後一個月權重 1，往前每 halflife 個月減半（以日曆月計）"""
+    no = np.array([_month_no(m) for m in months], dtype=float)
+    return 0.5 ** ((no.max() - no) / halflife) if len(no) else no
+
+
+def fit_forecasts(count, months, beta0=None):
+    """
+    count：(S, M) 月件數；months：對應月份（最近 FC_HISTORY 個月即可）。
+    回傳 dict：months、beta / cov、alpha（NB2 離散，Poisson 為 0）、
+    ok（足量序列）、mean（各序列加權月平均，ok=False 時的預測）
+    """
+    count = np.asarray(count, dtype=float)
+    months = list(months)
+    X = season_design(months)
+    w = recency_weights(months)
+    S, p = count.shape[0], X.shape[1]
+    pen = np.r_[0.0, np.full(p - 1, FC_SEASON_SD ** -2)]
+    mask = np.ones_like(count, dtype=bool)
+    ok = count.sum(1) >= FC_MIN_EVENTS
+
+    beta  = np.full((S, p), np.nan)
+    cov   = np.zeros((S, p, p))
+    alpha = np.zeros(S)
+    if ok.any():
+        y, off = count[ok], np.zeros((ok.sum(), len(months)))
+        b0 = beta0[ok] if beta0 is not None else None
+        b, c, mu = _irls(y, off, X, mask[ok], np.zeros(ok.sum()), beta0=b0, weights=w,
+                         penalty=pen)
+        # 有效自由度：加權樣本數 − 懲罰後的有效參數數 tr((X'WX + P)⁻¹ X'WX)
+        edf = np.einsum("sij,sji->s", c, np.einsum("sm,mi,mj->sij", w * mu, X, X))
+        dof = np.maximum(w.sum() - edf, 1.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pearson = (w * (y - mu) ** 2 / mu).sum(1) / dof
+            a = (w * ((y - mu) ** 2 - y) / mu ** 2).sum(1) / dof
+        nb = (pearson > NB_DISPERSION) & (a > 0)
+        if nb.any():
+            b[nb], c[nb], _ = _irls(y[nb], off[nb], X, mask[ok][nb], a[nb],
+                                    beta0=b[nb], weights=w, penalty=pen)
+        beta[ok], cov[ok] = b, c
+        alpha[np.flatnonzero(ok)[nb]] = a[nb]
+        ok[ok] = np.isfinite(b).all(1)
+    mean = (count * w).sum(1) / w.sum() if months else np.zeros(S)
+    return {"months": months, "beta": beta, "cov": cov,
+            "alpha": alpha, "ok": ok, "mean": mean}
+
+
+def build_forecasts(cube, prev=None):
+    """
+    SPC 矩陣（build_spc_cube）所有序列的季節模型。prev 為前次結果時，
+    同序列以其 β 為 IRLS 起點（新增月份後通常 2–3 次迭代即收斂）
+    """
+    lo = max(len(cube["months"]) - FC_HISTORY, 0)
+    beta0 = None
+    if prev is not None:
+        old = np.array([prev["pos"].get(s, -1) for s in cube["series"]])
+        beta0 = np.full((len(old), prev["beta"].shape[1]), np.nan)
+        beta0[old >= 0] = prev["beta"][old[old >= 0]]
+    fit = fit_forecasts(cube["count"][:, lo:], cube["months"][lo:], beta0)
+    return {**fit, "series": cube["series"], "pos": cube["pos"]}
+
+
+def update_forecasts(prev, cube):
+    """資料更新：沿用 prev 的 β 為起點重擬合（視窗隨最新月份前移）"""
+    return build_forecasts(cube, prev)
+
+
+def future_months(last, end):
+    """last 之後到 end 的月份（皆 YYYY-MM）；last 已到 end 或更晚時為空 list"""
+    n = _month_no(end) - _month_no(last)
+    out = []
+    for k in range(1, n + 1):
+        y, m = divmod(_month_no(last) + k, 12)
+        out.append(f"{y}-{m + 1:02d}")
+    return out
+
+
+def _simulate(fit, i, future, n_sims, seed, level):
+    """第 i 條序列於 future 各月的預測：mean / lo / hi (H,) 與模擬路徑 (n_sims, H)"""
+    H = len(future)
+    rng = np.random.default_rng(seed)
+    if not fit["ok"][i]:
+        mu = np.full((n_sims, H), fit["mean"][i])
+        point = np.full(H, fit["mean"][i])
+    else:
+        Xf = season_design(future)
+        b, c = fit["beta"][i], fit["cov"][i]
+        draws = rng.multivariate_normal(b, c, size=n_sims, method="cholesky")
+        mu = np.exp(np.clip(draws @ Xf.T, -30, 30))
+        point = np.exp(Xf @ b)
+    a = fit["alpha"][i]
+    if a > 0:
+        mu = rng.gamma(1 / a, mu * a)
+    paths = rng.poisson(mu).astype(float)
+    q = (1 - level) / 2
+    lo, hi = (np.quantile(paths, [q, 1 - q], axis=0) if H
+              else (np.zeros(0), np.zeros(0)))
+    return {"months": list(future), "mean": point, "lo": lo, "hi": hi, "paths": paths}
+
+
+def seasonal_forecast(fc, key, future, n_sims=FC_SIMS, seed=FC_SEED, level=FC_LEVEL):
+    """預先擬合結果中 key 序列的預測；序列不存在時回傳 None"""
+    if key not in fc["pos"]:
+        return None
+    return _simulate(fc, fc["pos"][key], future, n_sims, seed, level)
+
+
+def forecast_series(count, months, future, n_sims=FC_SIMS, seed=FC_SEED, level=FC_LEVEL):
+    """單一序列（連續月份的件數）即時擬合並預測；月份取最近 FC_HISTORY 個"""
+    count, months = list(count)[-FC_HISTORY:], list(months)[-FC_HISTORY:]
+    fit = fit_forecasts(np.asarray(count, dtype=float)[None, :], months)
+    return _simulate(fit, 0, future, n_sims, seed, level)
+
+
+def year_total(observed, fcst, level=FC_LEVEL):
+    """年度總數推估：(點估計, 下限, 上限) = 已發生件數 + 剩餘月份預測"""
+    if fcst is None or not fcst["months"]:
+        return float(observed), float(observed), float(observed)
+    tot = observed + fcst["paths"].sum(1)
+    q = (1 - level) / 2
+    lo, hi = np.quantile(tot, [q, 1 - q])
+    return float(observed + fcst["mean"].sum()), float(lo), float(hi)
@@ -0,0 +1,96 @@
+# ════════════════════════════════════════════════════════════
+#  單位發生率的公平比較：經驗貝氏（gamma-Poisson）收縮 + 漏斗圖
+#  件數 y_i ~ Poisson(n_i·θ_i)，θ_i ~ Gamma(α, β)；α、β 以動差法
+#  （Marshall 1991）由全部單位一次估計，後驗平均 (y_i + α) / (n_i + β)。
+#  住院人日數少的病房向全院平均收縮，不再因小樣本名次大幅跳動
+#  漏斗圖界限以全院合併發生率為中心，對任意人日數向量化計算
+# ════════════════════════════════════════════════════════════
+import numpy as np
+import pandas as pd
+
+from .constants import ALL_UNITS
+from .filters import FilterSpec
+from .metrics import EXCLUDE_UNITS
+from .prefix import prefix_bed_by_unit, prefix_count
+
+FUNNEL_PER = 1000.0                     # ‰（每千住院人日）
+FUNNEL_Z   = {"95%": 1.959964, "99.8%": 3.090232}
+
+
+def gamma_quantile(shape, rate, z):
+    """Gamma(shape, rate) 分位數（Wilson–Hilferty 近似；z 為標準常態分位數）"""
+    shape = np.asarray(shape, dtype=float)
+    c = 1.0 / (9.0 * shape)
+    return shape * np.maximum(1 - c + z * np.sqrt(c), 0.0) ** 3 / rate
+
+
+def eb_gamma_poisson(count, exposure):
+    """
+    count / exposure：各單位件數與暴露量（向量）。回傳 dict：
+    pooled（合併率）、alpha / beta（先驗）、post（後驗平均率）、
+    lo / hi（95% 可信區間）、weight（向合併率收縮的權重 β / (n + β)）。
+    單位間變異不顯著（動差估計 ≤ 0）時全部收縮到合併率
+    """
+    y = np.asarray(count, dtype=float)
+    n = np.asarray(exposure, dtype=float)
+    m = y.sum() / n.sum()
+    s2 = (n * (y / n - m) ** 2).sum() / n.sum()
+    between = s2 - m / n.mean()
+    if between <= 0:
+        alpha, beta = np.inf, np.inf
+        post = np.full_like(y, m)
+        lo = hi = post
+        weight = np.ones_like(y)
+    else:
+        alpha, beta = m * m / between, m / between
+        post   = (y + alpha) / (n + beta)
+        lo     = gamma_quantile(y + alpha, n + beta, -FUNNEL_Z["95%"])
+        hi     = gamma_quantile(y + alpha, n + beta, FUNNEL_Z["95%"])
+        weight = beta / (n + beta)
+    return {"pooled": m, "alpha": alpha, "beta": beta, "post": post,
+            "lo": lo, "hi": hi, "weight": weight}
+
+
+def funnel_limits(exposure, pooled, z, per=FUNNEL_PER):
+    """
+    合併率 pooled 下、暴露量 exposure 的漏斗界限（率，已乘 per）。
+    件數以平方根轉換近似 Poisson 分位數：(√μ ± z/2)²，μ = pooled · n
+    """
+    n  = np.asarray(exposure, dtype=float)
+    mu = pooled * n
+    lo = np.maximum(np.sqrt(mu) - z / 2, 0.0) ** 2
+    hi = (np.sqrt(mu) + z / 2) ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return lo / n * per, hi / n * per
+
+
+def unit_rate_frame(px, spec, per=FUNNEL_PER):
+    """
+    spec 月份區間 / 事件大類 / 科別下，所有有住院人日數的病房（不套用單位篩選）：
+    件數、住院人日數、粗發生率、EB 發生率與 95% 可信區間、收縮權重、
+    漏斗位置（高於 99.8% / 高於 95% / 界限內 / 低於 95% / 低於 99.8%）、EB 排名
+    """
+    allw = FilterSpec(spec.start, spec.end, ALL_UNITS, spec.cat, spec.dept)
+    days = prefix_bed_by_unit(px, allw)
+    days = days[(days > 0) & ~days.index.isin([ALL_UNITS, *EXCLUDE_UNITS])]
+    cols = ["單位", "件數", "住院人日數", "粗發生率", "EB發生率", "EB下限", "EB上限",
+            "收縮權重", "漏斗位置", "EB排名"]
+    if days.empty:
+        return pd.DataFrame(columns=cols), np.nan
+    cnt = prefix_count(px, allw, by="單位").reindex(days.index, fill_value=0)
+
+    eb = eb_gamma_poisson(cnt.to_numpy(), days.to_numpy())
+    raw = cnt.to_numpy() / days.to_numpy() * per
+    lo95, hi95 = funnel_limits(days, eb["pooled"], FUNNEL_Z["95%"], per)
+    lo99, hi99 = funnel_limits(days, eb["pooled"], FUNNEL_Z["99.8%"], per)
+    pos = np.select([raw > hi99, raw > hi95, raw < lo99, raw < lo95],
+                    ["高於 99.8%", "高於 95%", "低於 99.8%", "低於 95%"], "界限內")
+    out = pd.DataFrame({
+        "單位": days.index, "件數": cnt.to_numpy().astype(int),
+        "住院人日數": days.to_numpy(), "粗發生率": raw,
+        "EB發生率": eb["post"] * per, "EB下限": np.asarray(eb["lo"]) * per,
+        "EB上限": np.asarray(eb["hi"]) * per, "收縮權重": eb["weight"],
+        "漏斗位置": pos,
+    }).sort_values("EB發生率", ascending=False, kind="stable").reset_index(drop=True)
+    out["EB排名"] = np.arange(1, len(out) + 1)
+    return out, eb["pooled"] * per
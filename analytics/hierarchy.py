@@ -0,0 +1,86 @@
+# ── 單位階層（全院 → 部門 → 病房群組 → 病房）───────────────
+# 設定檔節點為 {"name","level","children"}，病房可直接寫成字串。
+# 節點可加 "role" 標記供專屬頁面使用（如 "psych" = 精神科深度分析），
+# 程式不依賴節點名稱。根節點固定為「全院」，未列入設定的單位掛在全院下
+import json
+import os
+
+from .constants import ALL_UNITS
+
+UNIT_LEVELS = ["hospital", "department", "group", "ward"]
+PSYCH_ROLE  = "psych"
+DEFAULT_HIERARCHY = {
+    "name": ALL_UNITS, "level": "hospital",
+    "children": [{"name": "W11+W12（精神科）", "level": "group", "role": PSYCH_ROLE,
+                  "children": ["W11", "W12"]}],
+}
+
+
+def load_unit_hierarchy(path):
+    """讀取單位階層設定；檔案不存在時使用預設（僅 W11+W12 群組）"""
+    if not os.path.exists(path):
+        return DEFAULT_HIERARCHY
+    with open(path, encoding="utf-8") as f:
+        tree = json.load(f)
+    return {**tree, "name": ALL_UNITS, "level": "hospital"}
+
+
+def index_unit_hierarchy(tree):
+    """
+    先序走訪階層，回傳：
+      groups  — 非根、非病房節點 → 所轄病房（已展開至葉節點）
+      parents — 節點 → 上層節點
+      depth   — 非病房節點 → 深度（側邊欄縮排用）
+      roles   — "role" 標記 → 節點（同一標記重複時取先序第一個；根節點不計）
+    """
+    groups, parents, depth, roles = {}, {}, {}, {}
+
+    def walk(node, parent, d):
+        if not isinstance(node, str) and node.get("role") and parent is not None:
+            roles.setdefault(node["role"], node["name"])
+        if isinstance(node, str) or node.get("level") == "ward":
+            name = node if isinstance(node, str) else node["name"]
+            parents[name] = parent
+            return [name]
+        name = node["name"]
+        parents[name] = parent
+        depth[name] = d
+        leaves = [w for child in node.get("children", [])
+                  for w in walk(child, name, d + 1)]
+        if parent is not None:
+            groups[name] = leaves
+        return leaves
+
+    walk(tree, None, 0)
+    return {"root": tree["name"], "groups": groups,
+            "parents": parents, "depth": depth, "roles": roles}
+
+
+def unit_members(index, unit):
+    """節點 → 所轄病房 list；全院回傳 None（不篩選）"""
+    if unit == index["root"]:
+        return None
+    return index["groups"].get(unit, [unit])
+
+
+def role_members(index, role):
+    """標記為 role 的節點所轄病房 list；設定檔未標記該節點時回傳 None"""
+    node = index["roles"].get(role)
+    return None if node is None else unit_members(index, node)
+
+
+def unit_path(index, unit):
+    """節點 → 自全院起的路徑（含自身）"""
+    path = [unit]
+    while index["parents"].get(path[-1]) is not None:
+        path.append(index["parents"][path[-1]])
+    if path[-1] != index["root"]:
+        path.append(index["root"])
+    return path[::-1]
+
+
+def rows_in_wards(df, wards, col="單位"):
+    """依病房清單篩選事件列（wards=None = 全院，不篩選）"""
+    if wards is None or col not in df.columns:
+        return df
+    return df[df[col].isin(wards)]
@@ -0,0 +1,200 @@
+# ════════════════════════════════════════════════════════════
+#  跌倒傷害風險模型（離線訓練，儀表板只讀檔）
+#  懲罰式 logistic 迴歸：結果 = 有傷害 / 中度以上傷害（INJURY_OUTCOMES）；
+#  自變數 = 高風險因子、藥物因子、事件說明特徵（不含「傷害_」部位 ——
+#  那是結果本身的描述）、科別與班別。兩個結果共用設計矩陣，
+#  以批次 Newton-Raphson 同時求解；非截距係數加 ridge 懲罰，
+#  稀少因子（完全分離）時係數仍有限。係數、共變異矩陣與訓練摘要寫成
+#  JSON（MODEL_SCHEMA 版本號；欄位定義變動時版本不符即視為需重新訓練）。
+#  離線訓練：python -m analytics.train_injury_model 資料檔.xlsx [injury_model.json]
+# ════════════════════════════════════════════════════════════
+import json
+import math
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .constants import (DEPT_COL, DRUG_FACTORS, FALL_FEATURES, INJURY_OUTCOMES,
+                        RISK_FACTORS)
+from .intervals import CI_Z
+
+MODEL_SCHEMA   = 1
+MODEL_PATH     = "injury_model.json"
+MODEL_RIDGE    = 1.0          # L2 懲罰 ≈ log 勝算比的 N(0, 1) 先驗
+MODEL_MIN_DEPT = 20           # 件數不足的科別併入「其他科別」
+MODEL_FOLDS    = 5            # 交叉驗證 AUC
+MODEL_SEED     = 20240601
+MODEL_ITER     = 50
+MODEL_TOL      = 1e-8
+OTHER_DEPT     = "其他科別"
+# 班別（參考組 = 白班 08–16 時）；時段未填者各班別欄皆為 0
+SHIFTS = {
+    "小夜(16–24時)": ["16-18時", "18-20時", "20-22時", "22-24時"],
+    "大夜(00–08時)": ["00-02時", "02-04時", "04-06時", "06-08時"],
+}
+
+
+def _factor_columns():
+    """(群組, 名稱, 欄位, 成立的值)：高風險因子 → 藥物（去除重複欄位）→ 事件說明特徵"""
+    out, seen = [], set()
+    for name, (col, vals) in RISK_FACTORS.items():
+        out.append(("高風險因子", name, col, vals))
+        seen.add(col)
+    for name, col in DRUG_FACTORS.items():
+        if col not in seen:
+            out.append(("藥物", name, col, [1]))
+    for f in FALL_FEATURES:
+        if not f.startswith("傷害_"):
+            out.append(("事件特徵", f, f, [True]))
+    return out
+
+
+def dept_levels(df, min_n=MODEL_MIN_DEPT):
+    """科別水準：件數 ≥ min_n 的科別依件數遞減，第一個（最大科）為參考組"""
+    cnt = df[DEPT_COL].value_counts()
+    return [d for d in cnt.index if cnt[d] >= min_n and d != OTHER_DEPT]
+
+
+def injury_design(df, depts):
+    """
+    跌倒資料 → (X (N, P) float，第一欄為截距, 欄名 list, 群組 list)。
+    depts 為訓練時的科別水準（depts[0] 為參考組）；其他科別併入 OTHER_DEPT；
+    欄位缺漏的因子記 0
+    """
+    n = len(df)
+    cols, names, groups = [np.ones(n)], ["截距"], ["截距"]
+    for group, name, col, vals in _factor_columns():
+        x = df[col].isin(vals).to_numpy(float) if col in df.columns else np.zeros(n)
+        cols.append(x)
+        names.append(name)
+        groups.append(group)
+    dept = df[DEPT_COL].where(df[DEPT_COL].isin(depts), OTHER_DEPT).to_numpy()
+    for d in list(depts[1:]) + [OTHER_DEPT]:
+        cols.append((dept == d).astype(float))
+        names.append(d)
+        groups.append("科別")
+    slot = df["時段標準"] if "時段標準" in df.columns else pd.Series(index=df.index, dtype=object)
+    for name, slots in SHIFTS.items():
+        cols.append(slot.isin(slots).to_numpy(float))
+        names.append(name)
+        groups.append("班別")
+    return np.column_stack(cols), names, groups
+
+
+def injury_outcomes(df):
+    """結果矩陣 Y (K, N) 0/1，列順序同 INJURY_OUTCOMES"""
+    return np.vstack([df[col].isin(vals).to_numpy(float) if col in df.columns
+                      else np.zeros(len(df))
+                      for col, vals in INJURY_OUTCOMES.values()])
+
+
+def fit_logistic(X, Y, ridge=MODEL_RIDGE, n_iter=MODEL_ITER, tol=MODEL_TOL):
+    """
+    批次 ridge logistic：X (N, P)（第一欄截距，不懲罰）、Y (K, N)。
+    K 個結果同時以 Newton-Raphson 迭代；回傳 (β (K, P), 共變異 (K, P, P))，
+    共變異 = 懲罰後 Hessian 的反矩陣
+    """
+    K, P = Y.shape[0], X.shape[1]
+    pen = np.diag(np.r_[0.0, np.full(P - 1, ridge)])
+    beta = np.zeros((K, P))
+    for _ in range(n_iter):
+        p = 1.0 / (1.0 + np.exp(-np.clip(beta @ X.T, -30, 30)))
+        H = np.einsum("kn,ni,nj->kij", p * (1 - p), X, X) + pen
+        g = (Y - p) @ X - beta @ pen
+        step = np.linalg.solve(H, g[..., None])[..., 0]
+        beta += step
+        if np.abs(step).max() < tol:
+            break
+    p = 1.0 / (1.0 + np.exp(-np.clip(beta @ X.T, -30, 30)))
+    H = np.einsum("kn,ni,nj->kij", p * (1 - p), X, X) + pen
+    return beta, np.linalg.inv(H)
+
+
+def auc(y, score):
+    """ROC 曲線下面積（Mann-Whitney 秩和；同分取平均秩）"""
+    y = np.asarray(y, dtype=bool)
+    n1, n0 = y.sum(), (~y).sum()
+    if n1 == 0 or n0 == 0:
+        return float("nan")
+    ranks = pd.Series(score).rank().to_numpy()
+    return float((ranks[y].sum() - n1 * (n1 + 1) / 2) / (n1 * n0))
+
+
+def cv_auc(X, Y, folds=MODEL_FOLDS, seed=MODEL_SEED, ridge=MODEL_RIDGE):
+    """K 折交叉驗證 AUC（各結果一個值），評估模型的樣本外鑑別力"""
+    fold = np.random.default_rng(seed).permutation(len(X)) % folds
+    score = np.zeros(Y.shape)
+    for f in range(folds):
+        tr = fold != f
+        beta, _ = fit_logistic(X[tr], Y[:, tr], ridge)
+        score[:, ~tr] = beta @ X[~tr].T
+    return [auc(y, s) for y, s in zip(Y, score)]
+
+
+def train_injury_model(df, source="", ridge=MODEL_RIDGE):
+    """跌倒資料 → 可寫成 JSON 的模型 dict（係數、共變異、訓練摘要）"""
+    depts = dept_levels(df)
+    X, names, groups = injury_design(df, depts)
+    Y = injury_outcomes(df)
+    beta, cov = fit_logistic(X, Y, ridge)
+    cv = cv_auc(X, Y, ridge=ridge)
+    months = df["年月"].dropna()
+    return {
+        "schema": MODEL_SCHEMA,
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+        "source": os.path.basename(source),
+        "period": [months.min(), months.max()] if len(months) else [None, None],
+        "n": int(len(df)),
+        "ridge": ridge,
+        "depts": depts,
+        "features": names,
+        "groups": groups,
+        "exposed": X.sum(0).astype(int).tolist(),
+        "outcomes": {
+            name: {"events": int(Y[k].sum()), "coef": beta[k].tolist(),
+                   "cov": cov[k].tolist(), "auc": auc(Y[k], beta[k] @ X.T),
+                   "cv_auc": cv[k]}
+            for k, name in enumerate(INJURY_OUTCOMES)
+        },
+    }
+
+
+def save_injury_model(model, path=MODEL_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(model, f, ensure_ascii=False)
+
+
+def load_injury_model(path=MODEL_PATH):
+    """
+    讀取模型檔；不存在或 schema / 欄位定義與目前程式不符時回傳 None
+    （需重新執行離線訓練）
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        model = json.load(f)
+    names = ["截距"] + [name for _, name, _, _ in _factor_columns()]
+    if (model.get("schema") != MODEL_SCHEMA
+            or model["features"][:len(names)] != names):
+        return None
+    return model
+
+
+def odds_ratio_frame(model, outcome, z=CI_Z):
+    """
+    模型 → 調整後勝算比表（不含截距）：群組 / 因子 / 件數 / 勝算比 / 下限 / 上限 / p 值，
+    95% Wald 區間取自懲罰後共變異矩陣
+    """
+    m = model["outcomes"][outcome]
+    b = np.asarray(m["coef"])[1:]
+    se = np.sqrt(np.diag(np.asarray(m["cov"])))[1:]
+    p = [math.erfc(abs(x) / math.sqrt(2)) for x in b / se]
+    return pd.DataFrame({
+        "群組": model["groups"][1:], "因子": model["features"][1:],
+        "件數": model["exposed"][1:],
+        "勝算比": np.exp(b), "下限": np.exp(b - z * se), "上限": np.exp(b + z * se),
+        "p值": p,
+    })
+
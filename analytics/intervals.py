@@ -0,0 +1,92 @@
+# ════════════════════════════════════════════════════════════
+#  指標信賴區間（95%）
+#  比例（有傷害率、科別占比…）：Wilson score 區間，小分母時不會超出 0–100%
+#  發生率 / 件數：精確 Poisson（Garwood）區間 —— 以 Poisson 累積機率
+#  對 μ 二分搜尋求解，不依賴 scipy；整批指標以 NumPy 陣列一次計算
+# ════════════════════════════════════════════════════════════
+import numpy as np
+
+CI_ALPHA = 0.05
+CI_Z     = 1.959964          # 雙尾 95%
+
+
+def wilson_interval(k, n, per=100.0, z=CI_Z):
+    """
+    k / n：事件數與分母（可為陣列）。回傳 (下限, 上限)，已乘 per；
+    n ≤ 0 的位置為 NaN
+    """
+    k = np.asarray(k, dtype=float)
+    n = np.asarray(n, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p      = k / n
+        denom  = 1 + z ** 2 / n
+        center = (p + z ** 2 / (2 * n)) / denom
+        half   = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denom
+    ok = n > 0
+    lo = np.where(ok, np.clip(center - half, 0.0, 1.0) * per, np.nan)
+    hi = np.where(ok, np.clip(center + half, 0.0, 1.0) * per, np.nan)
+    return lo, hi
+
+
+def _poisson_cdf(k, mu, log_fact):
+    """
+    P(X ≤ k | μ)，k / mu：(N,)，μ 須在 k ± (10√k + 10) 內（_solve_mu 的搜尋範圍）。
+    只加總 k 往下 20√k + 60 項 —— 已涵蓋 μ 的 ±6σ，更遠的項可忽略；
+    以對數機率避免溢位
+    """
+    width = (20 * np.sqrt(k) + 60).astype(int)
+    i = k[:, None].astype(int) - np.arange(width.max() + 1)
+    ok = (i >= 0) & (np.arange(width.max() + 1) <= width[:, None])
+    i = np.where(ok, i, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lp = i * np.log(mu)[:, None] - mu[:, None] - log_fact[i]
+    lp = np.where(ok, np.where(i == 0, -mu[:, None], lp), -np.inf)   # μ = 0：P(X=0) = 1
+    top = lp.max(axis=1, keepdims=True)
+    return np.exp(top[:, 0]) * np.exp(lp - top).sum(axis=1)
+
+
+def _solve_mu(k, target, log_fact, n_iter=60):
+    """二分搜尋 P(X ≤ k | μ) = target 的 μ（累積機率隨 μ 單調遞減）"""
+    lo = np.maximum(k - 10 * np.sqrt(k) - 10, 0.0)
+    hi = k + 10 * np.sqrt(k) + 10
+    for _ in range(n_iter):
+        mid = (lo + hi) / 2
+        above = _poisson_cdf(k, mid, log_fact) > target
+        lo = np.where(above, mid, lo)
+        hi = np.where(above, hi, mid)
+    return (lo + hi) / 2
+
+
+def poisson_interval(k, exposure=1.0, per=1000.0, alpha=CI_ALPHA):
+    """
+    k 件、exposure 暴露量（住院人日數；件數本身的區間給 1）→ 精確 Poisson
+    (下限, 上限) × per / exposure。k = 0 時下限為 0；exposure ≤ 0 為 NaN
+    """
+    k = np.rint(np.atleast_1d(np.asarray(k, dtype=float)))
+    e = np.broadcast_to(np.asarray(exposure, dtype=float), k.shape)
+    kmax = int(k.max()) if k.size else 0
+    log_fact = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, kmax + 1)))])
+    mu_hi = _solve_mu(k, alpha / 2, log_fact)
+    mu_lo = np.where(k > 0, _solve_mu(np.maximum(k - 1, 0), 1 - alpha / 2, log_fact), 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = np.where(e > 0, per / e, np.nan)
+    return mu_lo * scale, mu_hi * scale
+
+
+def interval_batch(kind, k, n):
+    """
+    整批指標的區間：kind = "prop"（Wilson，%）或 "rate"（精確 Poisson，
+    n 為住院人日數，‰）或 "count"（件數本身，n 不使用）。回傳 (下限, 上限) 陣列
+    """
+    if kind == "prop":
+        return wilson_interval(k, n)
+    if kind == "rate":
+        return poisson_interval(k, n)
+    return poisson_interval(k, 1.0, per=1.0)
+
+
+def ci_text(lo, hi, unit="%", digits=1):
+    """區間 → 「95% CI a–b%」；NaN 時回傳空字串"""
+    if not (np.isfinite(lo) and np.isfinite(hi)):
+        return ""
+    return f"95% CI {lo:.{digits}f}–{hi:.{digits}f}{unit}"
@@ -0,0 +1,191 @@
+# ════════════════════════════════════════════════════════════
+#  政策介入的中斷時間序列（ITS）分析：分段迴歸
+#  log E[件數] = log(住院人日數) + β0 + β1·t + Σ_k (γ_k·介入後_k + δ_k·介入後月數_k)
+#  γ_k = 水準變化（IRR = e^γ），δ_k = 斜率變化（每月 e^δ − 1）
+#  所有序列共用同一設計矩陣，以批次 IRLS 一次擬合；Pearson 離散度 > NB_DISPERSION
+#  的序列改以負二項（NB2，矩估計 α）重新擬合。介入清單由 interventions.json 設定
+# ════════════════════════════════════════════════════════════
+import json
+import os
+
+import numpy as np
+
+from .constants import ALL_CATS, ALL_DEPTS
+from .rates import RATE_ALL_CAT
+
+DEFAULT_INTERVENTIONS = [
+    {"month": "2025-05", "label": "住院看護費用補助辦法"},
+]
+ITS_MIN_SEG    = 6        # 每一段（介入前、各介入後）至少幾個有效月份
+ITS_MIN_EVENTS = 10       # 全期件數太少的序列不擬合
+NB_DISPERSION  = 1.2      # Pearson χ²/df 超過此值改用負二項
+ITS_Z          = 1.959964 # 95% 信賴區間
+
+
+def load_interventions(path):
+    """
+    讀取介入清單 [{"month": "YYYY-MM", "label": "..."}]，依月份排序；
+    檔案不存在時使用 DEFAULT_INTERVENTIONS
+    """
+    if not os.path.exists(path):
+        items = DEFAULT_INTERVENTIONS
+    else:
+        with open(path, encoding="utf-8") as f:
+            items = json.load(f)
+    return tuple(sorted(((str(i["month"]), str(i["label"])) for i in items)))
+
+
+def _month_no(month):
+    """YYYY-MM 字串 → 連續月序號"""
+    return int(month[:4]) * 12 + int(month[5:7]) - 1
+
+
+def its_design(months, interventions):
+    """
+    月份軸 + 介入清單 → (設計矩陣 (M, 2+2K), 實際納入的介入)。
+    時間以日曆月計（月份軸可有缺口）；只納入前後都有資料的介入
+    """
+    months = list(months)
+    t = np.array([_month_no(m) for m in months], dtype=float)
+    t -= t[0] if len(t) else 0.0
+    cols, used = [np.ones_like(t), t / 12.0], []
+    for month, label in interventions:
+        k = int(np.searchsorted(months, month, side="left"))
+        if 0 < k < len(months):
+            t0 = _month_no(month) - _month_no(months[0])
+            cols += [(t >= t0).astype(float), np.maximum(t - t0, 0.0)]
+            used.append((month, label, k))
+    return np.column_stack(cols), used
+
+
+def _irls(y, offset, X, mask, alpha, n_iter=30, tol=1e-8, beta0=None, weights=None,
+          penalty=None):
+    """
+    批次 IRLS（Poisson：alpha=0；NB2：alpha>0）。y / offset / mask：(S, M)，
+    X：(M, p)；beta0 (S, p) 給定時由此起算（增量更新只需少數迭代）；
+    weights (M,) 為各月的概似權重（預設 1）；penalty (p,) 為係數的
+    ridge 精確度（以 0 為中心的常態先驗，0 = 不懲罰）。
+    回傳 (β (S, p), 共變異數 (S, p, p), μ (S, M))
+    """
+    S, p = y.shape[0], X.shape[1]
+    w_y = np.where(mask, y, 0.0)
+    w_e = np.where(mask, np.exp(offset), 0.0)
+    beta = np.zeros((S, p))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        beta[:, 0] = np.log(np.maximum(w_y.sum(1), 0.5) / w_e.sum(1))
+    if beta0 is not None:
+        beta = np.where(np.isfinite(beta0), beta0, beta)
+    ridge = 1e-8 * np.eye(p)
+    if penalty is not None:
+        ridge = ridge + np.diag(penalty)
+    a = alpha[:, None]
+    if weights is not None:
+        mask = mask * np.asarray(weights, dtype=float)[None, :]
+    for _ in range(n_iter):
+        eta = np.clip(X @ beta.T, -30, 30).T + offset
+        mu  = np.exp(eta)
+        W   = mask * mu / (1 + a * mu)
+        z   = eta - offset + (y - mu) / mu
+        XtWX = np.einsum("sm,mi,mj->sij", W, X, X) + ridge
+        XtWz = np.einsum("sm,mi,sm->si", W, X, np.where(mask, z, 0.0))
+        new  = np.linalg.solve(XtWX, XtWz[..., None])[..., 0]
+        done = np.nanmax(np.abs(new - beta)) < tol
+        beta = new
+        if done:
+            break
+    eta = np.clip(X @ beta.T, -30, 30).T + offset
+    mu  = np.exp(eta)
+    W   = mask * mu / (1 + a * mu)
+    cov = np.linalg.inv(np.einsum("sm,mi,mj->sij", W, X, X) + ridge)
+    return beta, cov, mu
+
+
+def fit_its(count, days, months, interventions):
+    """
+    count / days：(S, M) 件數與住院人日數（如 build_spc_cube 的矩陣）。
+    回傳 dict：interventions（實際納入者，含月份索引）、beta / se (S, p)、
+    model（"Poisson" / "NB"）、alpha、ok（資料足夠且收斂的序列）
+    """
+    X, used = its_design(months, interventions)
+    S = count.shape[0]
+    mask = days > 0
+    with np.errstate(divide="ignore"):
+        offset = np.where(mask, np.log(np.where(mask, days, 1.0)), 0.0)
+
+    # 每一段都要有足夠有效月份
+    bounds = [0] + [k for _, _, k in used] + [count.shape[1]]
+    seg_ok = np.all([mask[:, lo:hi].sum(1) >= ITS_MIN_SEG
+                     for lo, hi in zip(bounds[:-1], bounds[1:])], axis=0)
+    ok = seg_ok & (np.where(mask, count, 0).sum(1) >= ITS_MIN_EVENTS)
+
+    p = X.shape[1]
+    beta = np.full((S, p), np.nan)
+    se   = np.full((S, p), np.nan)
+    alpha = np.zeros(S)
+    model = np.full(S, "Poisson", dtype=object)
+    if ok.any():
+        y, off, m = count[ok], offset[ok], mask[ok]
+        b, cov, mu = _irls(y, off, X, m, np.zeros(ok.sum()))
+        dof = np.maximum(m.sum(1) - p, 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pearson = np.where(m, (y - mu) ** 2 / mu, 0.0).sum(1) / dof
+            a = np.where(m, ((y - mu) ** 2 - y) / mu ** 2, 0.0).sum(1) / dof
+        nb = (pearson > NB_DISPERSION) & (a > 0)
+        if nb.any():
+            b_nb, cov_nb, _ = _irls(y[nb], off[nb], X, m[nb], a[nb])
+            b[nb], cov[nb] = b_nb, cov_nb
+        beta[ok] = b
+        se[ok]   = np.sqrt(np.clip(np.diagonal(cov, axis1=1, axis2=2), 0, None))
+        alpha[np.flatnonzero(ok)[nb]] = a[nb]
+        model[np.flatnonzero(ok)[nb]] = "NB"
+        ok[ok] = np.isfinite(b).all(1)
+    return {"interventions": used, "beta": beta, "se": se,
+            "alpha": alpha, "model": model, "ok": ok}
+
+
+def build_its(cube, interventions):
+    """SPC 矩陣中所有序列的 ITS 擬合；結果附 series / pos 供查詢"""
+    fit = fit_its(cube["count"], cube["days"], cube["months"], interventions)
+    return {**fit, "series": cube["series"], "pos": cube["pos"]}
+
+
+def _effects(fit, i):
+    """第 i 條序列各介入的 水準 IRR 與 斜率變化（每月 %）含 95% CI"""
+    out = []
+    if not fit["ok"][i]:
+        return out
+    b, se = fit["beta"][i], fit["se"][i]
+    for j, (month, label, _) in enumerate(fit["interventions"]):
+        g, d = 2 + 2 * j, 3 + 2 * j
+        out.append({
+            "month": month, "label": label, "model": fit["model"][i],
+            "level_irr": np.exp(b[g]),
+            "level_lo": np.exp(b[g] - ITS_Z * se[g]),
+            "level_hi": np.exp(b[g] + ITS_Z * se[g]),
+            "slope_pct": np.expm1(b[d]) * 100,
+            "slope_lo": np.expm1(b[d] - ITS_Z * se[d]) * 100,
+            "slope_hi": np.expm1(b[d] + ITS_Z * se[d]) * 100,
+        })
+    return out
+
+
+def its_series_effects(count, days, months, interventions):
+    """單一序列擬合並回傳各介入效果；days 全給 1 即為單純月件數模型"""
+    fit = fit_its(np.asarray(count, dtype=float)[None, :],
+                  np.asarray(days, dtype=float)[None, :], list(months), interventions)
+    return _effects(fit, 0)
+
+
+def its_effects(fits, mc, spec, interventions):
+    """
+    目前篩選序列的介入效果 list（每個介入一筆 dict）；資料不足時為空 list。
+    科別=全部科別 → 查預先擬合結果；指定科別 → 以 mc 的件數 / 人日數單獨擬合
+    （mc 須為 monthly_rate_frame(..., zeros=True)，含零事件月）
+    """
+    key = (spec.unit, RATE_ALL_CAT if spec.cat == ALL_CATS else spec.cat)
+    if spec.dept == ALL_DEPTS and key in fits["pos"]:
+        return _effects(fits, fits["pos"][key])
+    if mc.empty:
+        return []
+    return its_series_effects(mc["件數"], mc["住院人日數"].fillna(0),
+                              mc["年月"], interventions)
@@ -0,0 +1,217 @@
+# ── 資料載入與清理 ───────────────────────────────────────────
+# 讀 Excel 後即完成欄位衍生與 normalize_category，
+# 回傳的表可直接交給 prefix / rates / metrics 使用
+import pandas as pd
+
+from .constants import (CATEGORY_MAP, FALL_FEATURES, INJ_COL_DET,
+                        INJ_LABEL_MAP, RISK_FACTORS, RISK_FLAG_PREFIX,
+                        TIMESLOT_MAP)
+
+NORM_COLS_ALL = [
+    "事件大類", "事件類別", "單位",
+    "病人/住民-所在科別",
+    "病人/住民-事件發生後對病人健康的影響程度",
+    "病人/住民-事件發生後對病人健康的影響程度(彙總)",
+    "通報者資料-工作年資", "SAC",
+]
+NORM_COLS_FALL = [
+    "病人/住民-所在科別",
+    "病人/住民-事件發生後對病人健康的影響程度",
+    "病人/住民-事件發生後對病人健康的影響程度(彙總)",
+    "跌倒事件發生對象-事件發生時有無陪伴者",
+    "跌倒事件發生對象-事件發生前是否為跌倒高危險群",
+    "跌倒事件發生對象-最近一年是否曾經跌倒",
+    "跌倒事件發生對象-當事人當時意識狀況",
+]
+
+
+def normalize_category(df, col, missing_label="未填/其他"):
+    """把 NaN、空字串、'undefined'、'nan'、None 統一成 missing_label"""
+    if col not in df.columns:
+        return df
+    df = df.copy()
+    df[col] = (df[col].astype(str)
+               .str.strip()
+               .replace({"nan": missing_label,
+                         "none": missing_label,
+                         "None": missing_label,
+                         "undefined": missing_label,
+                         "Undefined": missing_label,
+                         "": missing_label,
+                         "NaN": missing_label}))
+    df[col] = df[col].where(df[col].notna(), missing_label)
+    return df
+
+
+def classify_dx(text):
+    """診斷文字 → 診斷分類（關鍵字比對，先符合者優先）"""
+    if pd.isna(text): return "其他"
+    t = str(text).lower()
+    if any(k in t for k in ["思覺失調","精神病","psycho","schizo"]):
+        return "思覺失調/精神病"
+    if any(k in t for k in ["雙相","躁症","bipolar","manic"]):
+        return "雙相/躁症"
+    if any(k in t for k in ["憂鬱","depression","depressive"]):
+        return "憂鬱症"
+    if any(k in t for k in ["失智","dementia"]):
+        return "失智症"
+    if any(k in t for k in ["帕金森","parkinson"]):
+        return "帕金森氏症"
+    if any(k in t for k in ["腦梗","中風","stroke","i63","i64",
+                              "腦血管","腦出血","ich"]):
+        return "腦血管病"
+    if any(k in t for k in ["骨折","fr.","fracture"," # "]):
+        return "骨折相關"
+    if any(k in t for k in ["糖尿病","diabetes"," dm","dm ","dm,","dm."]):
+        return "糖尿病"
+    if any(k in t for k in ["腎病","ckd","腎衰","腎功能"]):
+        return "腎病"
+    if any(k in t for k in ["肝病","肝炎","肝硬化","肝衰"]):
+        return "肝病"
+    if any(k in t for k in ["心臟","心衰","心肌","冠狀動脈","心房","心室"]):
+        return "心臟病"
+    if any(k in t for k in ["肺炎","呼吸","copd","氣喘","支氣管"]):
+        return "呼吸系統"
+    if any(k in t for k in ["癌","腫瘤","惡性","malignant","carcinoma","lymphoma"]):
+        return "腫瘤/癌症"
+    return "其他"
+
+
+def extract_fall_features(text):
+    """事件說明 → {特徵: 是否出現任一關鍵字}"""
+    t = str(text) if not pd.isna(text) else ""
+    return {feat: any(k in t for k in kws)
+            for feat, kws in FALL_FEATURES.items()}
+
+
+def _add_inj_display(df):
+    if INJ_COL_DET in df.columns:
+        df["傷害程度顯示"] = df[INJ_COL_DET].map(
+            INJ_LABEL_MAP).fillna(df[INJ_COL_DET])
+    return df
+
+
+def risk_factor_flags(df):
+    """
+    RISK_FACTORS → 布林矩陣（欄名 RISK_FLAG_PREFIX + 因子名稱，索引同 df）；
+    欄位缺漏的因子整欄為 False。需在 normalize_category 之後計算
+    """
+    return pd.DataFrame({
+        RISK_FLAG_PREFIX + name: (df[col].isin(vals) if col in df.columns
+                                  else pd.Series(False, index=df.index))
+        for name, (col, vals) in RISK_FACTORS.items()
+    }, index=df.index)
+
+
+def load_workbook(path):
+    """
+    讀取主資料檔，回傳 (df_all, df_bed, df_fall)：
+      df_all  — 109-113全部（含 年月 / 年 / 月 / SAC_num / 單位 / 時段標準 / 事件大類 / 診斷分類）
+      df_bed  — 住院人日數（另加「全院」彙總列）
+      df_fall — 109-113跌倒（含 年月 / 年 / 月），merge 全部表的科別 / 影響程度 / 單位，
+                並附事件說明特徵與高風險因子布林欄（風險_*）
+    """
+    xl  = pd.ExcelFile(path)
+    df  = pd.read_excel(xl, sheet_name="109-113全部")
+    df["發生日期"] = pd.to_datetime(df["發生日期"], errors="coerce")
+    df  = df[df["發生日期"].notna()].copy()
+    df["年月"]    = df["發生日期"].dt.to_period("M").astype(str)
+    df["年"]      = df["發生日期"].dt.year.astype("int16")     # 期間比較用整數欄
+    df["月"]      = df["發生日期"].dt.month.astype("int8")
+    df["SAC_num"] = pd.to_numeric(df["SAC"], errors="coerce")
+    df["單位"]    = (df["通報者資料-通報者服務單位"]
+                     .astype(str).str.strip().str.upper()
+                     .replace({"NAN":"未知","":"未知"}))
+    df["時段標準"] = df["發生時段"].map(TIMESLOT_MAP)
+    df["事件大類"] = df["事件類別"].map(CATEGORY_MAP).fillna("其他")
+    df["診斷分類"] = df["發生者資料-診斷"].apply(classify_dx)
+
+    # ── 跌倒深度分析資料（跌倒工作表 merge 全部工作表科別與影響程度）
+    df_fall = pd.read_excel(xl, sheet_name="109-113跌倒")
+    df_fall["發生日期"] = pd.to_datetime(df_fall["發生日期"], errors="coerce")
+    df_fall = df_fall[df_fall["發生日期"].notna()].copy()
+    df_fall["年月"] = df_fall["發生日期"].dt.to_period("M").astype(str)
+    df_fall["年"]   = df_fall["發生日期"].dt.year.astype("int16")
+    df_fall["月"]   = df_fall["發生日期"].dt.month.astype("int8")
+    cols_from_all = [
+        "通報案號",
+        "病人/住民-所在科別",
+        "病人/住民-事件發生後對病人健康的影響程度",
+        "病人/住民-事件發生後對病人健康的影響程度(彙總)",
+        "單位",   # 供精神科下鑽篩選使用
+        "時段標準",  # 供共現因子分析（夜間）；已是標準代碼，不做去空白
+    ]
+    # 去除空白避免比對失敗
+    for col in cols_from_all[1:-1]:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.strip()
+    df_fall = df_fall.merge(df[cols_from_all], on="通報案號", how="left")
+
+    feat_df = df_fall["事件說明"].apply(
+        lambda x: pd.Series(extract_fall_features(x)))
+    df_fall = pd.concat([df_fall.reset_index(drop=True),
+                         feat_df.reset_index(drop=True)], axis=1)
+
+    db  = pd.read_excel(xl, sheet_name="住院人日數")
+    db["年月"] = pd.to_datetime(db["年月"]).dt.to_period("M").astype(str)
+    db["單位"] = db["單位"].astype(str).str.strip().str.upper()
+    tot = db.groupby("年月", as_index=False)["住院人日數"].sum()
+    tot["單位"] = "全院"
+    db  = pd.concat([db, tot], ignore_index=True)
+
+    for col in NORM_COLS_ALL:
+        df = normalize_category(df, col)
+    for col in NORM_COLS_FALL:
+        df_fall = normalize_category(df_fall, col)
+    df_fall = pd.concat([df_fall, risk_factor_flags(df_fall)], axis=1)
+    return _add_inj_display(df), db, _add_inj_display(df_fall)
+
+
+def load_drug_sheet(path):
+    """109-113藥物：年月、四個主流程 0/1 欄、高警訊藥物標記"""
+    xl_d = pd.ExcelFile(path)
+    df_d = pd.read_excel(xl_d, sheet_name="109-113藥物")
+    df_d["年月"] = (pd.to_datetime(df_d["發生日期"], errors="coerce")
+                    .dt.to_period("M").astype(str))
+    # 四個主流程欄（0/1 布林加總）
+    for _col, _key in [
+        ("_stage_order", "事件發生階段-醫囑開立與輸入-醫囑開立與輸入"),
+        ("_stage_disp",  "事件發生階段-藥局調劑-藥局調劑"),
+        ("_stage_trans", "事件發生階段-傳送過程-傳送過程"),
+        ("_stage_admin", "事件發生階段-給藥階段-給藥階段"),
+    ]:
+        df_d[_col] = df_d[_key].fillna(0).astype(int) if _key in df_d.columns else 0
+    # 高警訊藥物標記
+    _ha_kw = (r"insulin|Insulin|胰島素|Novomix|NovoRapid|Lantus|Humulin|"
+              r"Warfarin|warfarin|Heparin|heparin|enoxaparin|"
+              r"KCl|Kcl|potassium|MgSO4|"
+              r"Midazolam|midazolam|Lorazepam|Morphine|morphine")
+    df_d["高警訊"] = (df_d["藥物名稱-應給藥名"].fillna("")
+                      .str.contains(_ha_kw, case=False, regex=True))
+    return df_d
+
+
+def load_harm_sheet(path):
+    """109-113傷害：merge 全部表的單位 / 年齡 / 診斷等欄，並算出住院後天數"""
+    xl_h = pd.ExcelFile(path)
+    df_h  = pd.read_excel(xl_h, sheet_name="109-113傷害")
+    df_a  = pd.read_excel(xl_h, sheet_name="109-113全部")
+    df_a["單位"] = (df_a["通報者資料-通報者服務單位"]
+                    .astype(str).str.strip().str.upper())
+    df_a["年月"] = (pd.to_datetime(df_a["發生日期"], errors="coerce")
+                    .dt.to_period("M").astype(str))
+    _mc = [c for c in [
+        "通報案號","單位","年月",
+        "發生者資料-門診住院日","發生者資料-年齡",
+        "發生者資料-性別","發生者資料-診斷",
+        "病人/住民-事件發生後對病人健康的影響程度(彙總)","SAC",
+    ] if c in df_a.columns]
+    df_h = df_h.merge(df_a[_mc].drop_duplicates("通報案號"),
+                      on="通報案號", how="left")
+    df_h["年月"] = (pd.to_datetime(df_h["發生日期"], errors="coerce")
+                    .dt.to_period("M").astype(str))
+    df_h["發生日期_dt"] = pd.to_datetime(df_h["發生日期"], errors="coerce")
+    df_h["住院日_dt"]   = pd.to_datetime(
+        df_h["發生者資料-門診住院日"], errors="coerce")
+    df_h["住院後天數"]  = (df_h["發生日期_dt"] - df_h["住院日_dt"]).dt.days
+    return df_h
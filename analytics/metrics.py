@@ -0,0 +1,89 @@
+# ── KPI 與長條圖背後的彙總表 ─────────────────────────────────
+from .constants import DEPT_COL, HIGH_SAC, INJ_COL_DET, INJ_COL_SUM, MID_ABOVE
+from .prefix import prefix_bed_days, prefix_count, prefix_monthly, prefix_rate
+
+EXCLUDE_UNITS = ["未知", "未填/其他", "NAN", ""]
+
+
+def safe_pct(num, den):
+    return round(num / den * 100, 1) if den > 0 else 0.0
+
+
+def inj_parts(df):
+    """有傷害比例的 (分子, 分母)"""
+    if INJ_COL_SUM not in df.columns: return 0, 0
+    return int((df[INJ_COL_SUM] == "有傷害").sum()), len(df)
+
+
+def psych_parts(df):
+    """精神科佔比的 (分子, 分母)"""
+    if DEPT_COL not in df.columns: return 0, 0
+    return int((df[DEPT_COL] == "精神科").sum()), len(df)
+
+
+def mid_above_parts(df):
+    """內外科中度以上傷害比例的 (分子, 分母)"""
+    if INJ_COL_DET not in df.columns: return 0, 0
+    sub = df[df[DEPT_COL].isin(["外科","內科"])]
+    return int(sub[INJ_COL_DET].isin(MID_ABOVE).sum()), len(sub)
+
+
+def inj_rate(df):
+    """有傷害比例（%）"""
+    return safe_pct(*inj_parts(df))
+
+
+def psych_pct(df):
+    """精神科佔比（%）"""
+    return safe_pct(*psych_parts(df))
+
+
+def mid_above_rate(df):
+    """內外科中度以上傷害比例（%）"""
+    return safe_pct(*mid_above_parts(df))
+
+
+def kpi_summary(px, spec):
+    """
+    戰情室 Level 1 三卡數值：區間內最後兩個有事件月份的
+    件數、發生率（‰）與其住院人日數（信賴區間用）、SAC 1+2 件數
+    """
+    m_cnt  = prefix_monthly(px, spec)
+    months = m_cnt.index[m_cnt.values > 0].tolist()
+    last_m = months[-1] if months else None
+    prev_m = months[-2] if len(months) >= 2 else None
+
+    def count(month, sac=None):
+        return 0 if month is None else prefix_count(px, spec.window(month), sac)
+
+    def rate(month):
+        return 0.0 if month is None else prefix_rate(px, spec.window(month))
+
+    def days(month):
+        return 0.0 if month is None else prefix_bed_days(px, spec.window(month))
+
+    return {
+        "last_m": last_m, "prev_m": prev_m,
+        "n_last": count(last_m), "n_prev": count(prev_m),
+        "rate_last": rate(last_m), "rate_prev": rate(prev_m),
+        "days_last": days(last_m), "days_prev": days(prev_m),
+        "sac12_last": count(last_m, HIGH_SAC),
+        "sac12_prev": count(prev_m, HIGH_SAC),
+    }
+
+
+def category_counts(px, spec):
+    """事件大類件數（降冪），欄位：類別 / 件數"""
+    cc = prefix_count(px, spec, by="事件大類")
+    return (cc[cc > 0].rename_axis("類別").reset_index()
+            .sort_values("件數", ascending=False, kind="stable")
+            .reset_index(drop=True))
+
+
+def unit_counts(px, spec):
+    """各單位件數（降冪，排除未知 / 未填），欄位：單位 / 件數"""
+    uc = prefix_count(px, spec, by="單位")
+    uc = uc[uc > 0].rename_axis("單位").reset_index()
+    return (uc[~uc["單位"].isin(EXCLUDE_UNITS)]
+            .sort_values("件數", ascending=False, kind="stable")
+            .reset_index(drop=True))
@@ -0,0 +1,142 @@
+# ════════════════════════════════════════════════════════════
+#  CUSUM / EWMA 監測（比 Shewhart 界限更早偵測小幅持續偏移）
+#  每條序列 (單位, 事件大類) 的執行狀態只有一列 [EWMA, CUSUM+, CUSUM−, 步數]；
+#  基準 ū 於首次建立時凍結（Phase I），之後資料更新只從「已結算」狀態
+#  往後推進新月份 —— 每月 O(序列數)，不重算歷史；已結算月份的件數 / 人日數
+#  若有變動（補登、更正），自最早變動的月份重新推進
+#  輸入為 u 管制圖標準化值 z = (u − ū) / √(ū / 住院人日數)；無人日數的月份沿用前一狀態
+# ════════════════════════════════════════════════════════════
+import numpy as np
+import pandas as pd
+
+from .constants import ALL_CATS, ALL_DEPTS
+from .rates import RATE_ALL_CAT
+
+EWMA_LAMBDA = 0.2        # 平滑係數
+EWMA_L      = 3.0        # EWMA 管制界限倍數
+CUSUM_K     = 0.5        # 參考值（偵測 1σ 偏移）
+CUSUM_H     = 4.0        # 決策界限
+STATE_COLS  = ["EWMA", "CUSUM+", "CUSUM−", "步數"]
+
+
+def _baseline(count, days):
+    """各序列全期 ū（件 / 人日）；無有效月份為 NaN"""
+    valid = days > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (np.where(valid, count, 0).sum(axis=1)
+                / np.where(valid, days, 0).sum(axis=1))
+
+
+def _zscore(count, days, ubar):
+    """單月 (S,) 件數 / 人日數 → z；人日數或 ū 無效為 NaN"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (count / days - ubar) / np.sqrt(ubar / days)
+    return np.where((days > 0) & (ubar > 0), z, np.nan)
+
+
+def monitor_step(state, z, lam=EWMA_LAMBDA, k=CUSUM_K):
+    """(S, 4) 狀態 + 當月 (S,) z → 新狀態；z 為 NaN 的序列原樣保留"""
+    ok = ~np.isnan(z)
+    zz = np.where(ok, z, 0.0)
+    ewma, hi, lo, n = state.T
+    return np.column_stack([
+        np.where(ok, lam * zz + (1 - lam) * ewma, ewma),
+        np.where(ok, np.maximum(0.0, hi + zz - k), hi),
+        np.where(ok, np.maximum(0.0, lo - zz - k), lo),
+        n + ok,
+    ])
+
+
+def ewma_limit(n, lam=EWMA_LAMBDA, L=EWMA_L):
+    """第 n 步（已納入 n 個有效月份）的 EWMA 管制界限 ±L·σ_EWMA"""
+    n = np.asarray(n, dtype=float)
+    return L * np.sqrt(lam / (2 - lam) * (1 - (1 - lam) ** (2 * n)))
+
+
+def _advance(state, count, days, ubar):
+    """由 state 起依序推進 (S, M) 各月；回傳 (最終狀態, 各月狀態 (S, M, 4))"""
+    hist = np.empty(count.shape + (len(STATE_COLS),))
+    for m in range(count.shape[1]):
+        state = monitor_step(state, _zscore(count[:, m], days[:, m], ubar))
+        hist[:, m] = state
+    return state, hist
+
+
+def _pack(cube, ubar, hist, start_state):
+    """
+    監測狀態 dict；另存輸入的件數 / 人日數，供下次更新比對已結算月份是否變動
+    （最後一個月可能尚未結算，下次由 hist 倒數第二月接續）
+    """
+    series = cube["series"]
+    return {"series": list(series), "pos": {s: i for i, s in enumerate(series)},
+            "months": list(cube["months"]), "ubar": ubar, "hist": hist,
+            "count": cube["count"].copy(), "days": cube["days"].copy(),
+            "state": hist[:, -1] if hist.shape[1] else start_state}
+
+
+def build_monitor(cube):
+    """由 SPC 矩陣（build_spc_cube）從頭建立所有序列的監測狀態"""
+    ubar  = _baseline(cube["count"], cube["days"])
+    start = np.zeros((len(cube["series"]), len(STATE_COLS)))
+    _, hist = _advance(start, cube["count"], cube["days"], ubar)
+    return _pack(cube, ubar, hist, start)
+
+
+def update_monitor(prev, cube):
+    """
+    增量更新：沿用 prev 已結算月份的狀態與歷史，只推進其後的月份
+    （含上次可能未結算的最後一月）；既有序列的已結算月份件數或人日數有變動時，
+    改從最早變動的月份重新推進。新出現的序列以其現有資料建立基準並從頭推進；
+    月份軸與 prev 不一致（如重建物化表）時改為全量建立
+    """
+    if prev is None:
+        return build_monitor(cube)
+    k = max(len(prev["months"]) - 1, 0)                 # 已結算月數
+    if cube["months"][:k] != prev["months"][:k]:
+        return build_monitor(cube)
+
+    S    = len(cube["series"])
+    old  = np.array([prev["pos"].get(s, -1) for s in cube["series"]])
+    kept = old >= 0
+    ubar = _baseline(cube["count"], cube["days"])
+    ubar[kept] = prev["ubar"][old[kept]]                # 既有序列沿用凍結基準
+
+    changed = (~np.isclose(cube["count"][kept, :k], prev["count"][old[kept], :k])
+               | ~np.isclose(cube["days"][kept, :k], prev["days"][old[kept], :k])).any(axis=0)
+    r = int(changed.argmax()) if changed.any() else k   # 沿用前 r 個月的歷史
+
+    hist = np.zeros((S, len(cube["months"]), len(STATE_COLS)))
+    hist[kept, :r] = prev["hist"][old[kept], :r]
+    if (~kept).any() and r:                              # 新序列：沿用區段也要補算
+        _, hist[~kept, :r] = _advance(np.zeros(((~kept).sum(), len(STATE_COLS))),
+                                      cube["count"][~kept, :r],
+                                      cube["days"][~kept, :r], ubar[~kept])
+    state = hist[:, r - 1] if r else np.zeros((S, len(STATE_COLS)))
+
+    _, hist[:, r:] = _advance(state, cube["count"][:, r:], cube["days"][:, r:], ubar)
+    return _pack(cube, ubar, hist, state)
+
+
+def monitor_frame(monitor, mc, spec):
+    """
+    mc（monthly_rate_frame(..., zeros=True)，含零事件月）各月附上
+    EWMA / EWMA界限 / CUSUM+ / CUSUM− 欄與訊號旗標。
+    科別=全部科別 → 取全期累積的監測狀態；指定科別 → 以 mc 本身從區間起點重新推進
+    """
+    key = (spec.unit, RATE_ALL_CAT if spec.cat == ALL_CATS else spec.cat)
+    if spec.dept == ALL_DEPTS and key in monitor["pos"]:
+        at   = pd.Index(monitor["months"]).get_indexer(mc["年月"])
+        hist = monitor["hist"][monitor["pos"][key]][at]
+    else:
+        count = mc["件數"].to_numpy(dtype=float)[None, :]
+        days  = mc["住院人日數"].fillna(0).to_numpy(dtype=float)[None, :]
+        _, hist = _advance(np.zeros((1, len(STATE_COLS))), count, days,
+                           _baseline(count, days))
+        hist = hist[0]
+    lim = ewma_limit(hist[:, 3])
+    return mc.assign(**{
+        "EWMA": hist[:, 0], "EWMA界限": lim,
+        "CUSUM+": hist[:, 1], "CUSUM−": hist[:, 2],
+        "EWMA訊號": np.abs(hist[:, 0]) > lim,
+        "CUSUM訊號": (hist[:, 1] > CUSUM_H) | (hist[:, 2] > CUSUM_H),
+    })
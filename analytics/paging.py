@@ -0,0 +1,33 @@
+# ── 明細表伺服器端分頁：關鍵字篩選 → 排序 → 切頁 ─────────────
+# 在完整表上完成，只有當頁會被上色並送往瀏覽器
+import pandas as pd
+
+PAGE_SIZE = 50
+
+
+def keyword_mask(df, query):
+    """任一文字欄包含 query（不分大小寫、非正規式）即保留"""
+    mask = pd.Series(False, index=df.index)
+    for col in df.columns:
+        if df[col].dtype == object or pd.api.types.is_string_dtype(df[col]):
+            mask |= df[col].astype(str).str.contains(query, case=False,
+                                                     regex=False, na=False)
+    return mask
+
+
+def page_frame(df, page=1, page_size=PAGE_SIZE, sort_by=None, ascending=True,
+               query=""):
+    """
+    回傳 (當頁 DataFrame, 符合筆數, 總頁數, 實際頁次)。
+    sort_by=None 保留原順序；頁次超出範圍時夾回最後一頁
+    """
+    if query:
+        df = df[keyword_mask(df, query)]
+    if sort_by is not None and sort_by in df.columns:
+        df = df.sort_values(sort_by, ascending=ascending, kind="stable",
+                            na_position="last")
+    n_rows  = len(df)
+    n_pages = max(1, -(-n_rows // page_size))
+    page    = min(max(1, int(page)), n_pages)
+    lo      = (page - 1) * page_size
+    return df.iloc[lo:lo + page_size], n_rows, n_pages, page
@@ -0,0 +1,141 @@
+# ════════════════════════════════════════════════════════════
+#  期間比較引擎（曆年 / 會計年度）
+#  載入時已有整數欄「年」「月」（analytics.loader）；以 np.add.at 一次把事件
+#  累加成 期間 × 期內月序 × 維度… 的件數陣列（每個 data_version 建一次），
+#  任意年度組合的月分布、合計、占比都只是陣列切片與加總 —— 不複製原始資料表、
+#  不重新解析「年月」字串
+# ════════════════════════════════════════════════════════════
+import numpy as np
+import pandas as pd
+
+from .constants import DEPT_COL, INJ_COL_DET, INJ_COL_SUM, MID_ABOVE
+
+MISSING_LABEL = "（未填）"
+PERIOD_HIST_N = 4            # 歷年均值取比較期間之前幾個年度
+PERIOD_DIMS   = (DEPT_COL, INJ_COL_SUM, INJ_COL_DET)     # 跌倒件數陣列的維度
+
+
+def period_codes(year, month, start_month=1):
+    """
+    (年, 月) 整數陣列 → (期間, 期內月序 0–11)。start_month > 1 為會計年度，
+    以起始月所在年份命名（如 7 月制：2024-07 ～ 2025-06 = 2024）
+    """
+    year, month = np.asarray(year), np.asarray(month)
+    return year - (month < start_month), (month - start_month) % 12
+
+
+def build_period_cube(df, dims=(), start_month=1):
+    """
+    df 需有整數欄「年」「月」。回傳 dict（呼叫端視為唯讀）：
+    periods（遞增 int list）/ pos、start_month、dims（欄位 → 類別標籤 list，
+    缺值歸入 MISSING_LABEL）、count 陣列 (期間, 12, |維度 1|, |維度 2|, …)
+    """
+    p, mi = period_codes(df["年"].to_numpy(), df["月"].to_numpy(), start_month)
+    periods, p_i = np.unique(p, return_inverse=True)
+    index, shape, labels = [p_i, mi], [len(periods), 12], {}
+    for col in dims:
+        codes, uniq = pd.factorize(df[col], sort=True)
+        lab = list(uniq)
+        if (codes < 0).any():
+            codes = np.where(codes < 0, len(lab), codes)
+            lab.append(MISSING_LABEL)
+        index.append(codes)
+        shape.append(len(lab))
+        labels[col] = lab
+    count = np.zeros(shape, dtype=np.int64)
+    np.add.at(count, tuple(index), 1)
+    periods = [int(x) for x in periods]
+    return {"periods": periods, "pos": {x: i for i, x in enumerate(periods)},
+            "start_month": start_month, "dims": labels, "count": count}
+
+
+def period_counts(cube, periods, where=None, exclude=None, by=None, months=12):
+    """
+    指定期間的件數。where / exclude：{維度欄: 值 list}（保留 / 排除）；
+    months：只計期內前 months 個月（同期比較）。by：
+      None → (期間,) 合計；"月" → (期間, 12)；維度欄名 → (期間, |類別|)。
+    資料中沒有的期間回傳 0
+    """
+    arr = np.zeros((len(periods),) + cube["count"].shape[1:], dtype=np.int64)
+    for j, x in enumerate(periods):
+        if x in cube["pos"]:
+            arr[j] = cube["count"][cube["pos"][x]]
+    arr[:, months:] = 0
+    cols = list(cube["dims"])
+    for col, vals in (where or {}).items():
+        keep = np.isin(cube["dims"][col], list(vals))
+        arr = np.where(_along(keep, cols.index(col), arr.ndim), arr, 0)
+    for col, vals in (exclude or {}).items():
+        drop = np.isin(cube["dims"][col], list(vals))
+        arr = np.where(_along(~drop, cols.index(col), arr.ndim), arr, 0)
+    if by is None:
+        return arr.reshape(len(periods), -1).sum(1)
+    if by == "月":
+        return arr.reshape(len(periods), 12, -1).sum(2)
+    k = cols.index(by) + 2
+    return np.moveaxis(arr, k, 1).reshape(len(periods), arr.shape[k], -1).sum(2)
+
+
+def period_kpi_parts(cube, periods, exclude=None, months=12):
+    """
+    年度 KPI 的 (分子, 分母) 陣列（定義同 analytics.metrics 的 *_parts），
+    cube 需以 PERIOD_DIMS 建立。回傳 {"inj" / "psych" / "mid": (k, n)}
+    """
+    def cnt(where=None):
+        return period_counts(cube, periods, where, exclude, months=months)
+    n = cnt()
+    sub = {DEPT_COL: ["外科", "內科"]}
+    return {"inj":   (cnt({INJ_COL_SUM: ["有傷害"]}), n),
+            "psych": (cnt({DEPT_COL: ["精神科"]}), n),
+            "mid":   (cnt({**sub, INJ_COL_DET: MID_ABOVE}), cnt(sub))}
+
+
+def _along(mask, i, ndim):
+    """第 i 個維度欄的布林遮罩 → 可與 (期間, 12, 維度…) 陣列廣播的形狀"""
+    shape = [1] * ndim
+    shape[i + 2] = len(mask)
+    return mask.reshape(shape)
+
+
+def period_month_labels(start_month=1):
+    """期內月序 → 顯示標籤（如 7 月制：["7月", …, "6月"]）"""
+    return [f"{(start_month - 1 + k) % 12 + 1}月" for k in range(12)]
+
+
+def period_label(period, start_month=1):
+    """期間顯示名稱：曆年為 "2025"，會計年度為 "FY2025" """
+    return str(period) if start_month == 1 else f"FY{period}"
+
+
+def period_months(period, start_month=1):
+    """期間內 12 個月的 YYYY-MM"""
+    out = []
+    for k in range(12):
+        y, m = divmod(period * 12 + start_month - 1 + k, 12)
+        out.append(f"{y}-{m + 1:02d}")
+    return out
+
+
+def period_elapsed(period, last_month, start_month=1):
+    """資料截止月 last_month（YYYY-MM）時，period 已有資料的月數（0–12）"""
+    p, mi = period_codes(int(last_month[:4]), int(last_month[5:7]), start_month)
+    if period < p:
+        return 12
+    return int(mi) + 1 if period == p else 0
+
+
+def default_periods(cube):
+    """預設比較期間：資料中最近的兩個（跨年後自動前移，不必改程式）"""
+    return cube["periods"][-2:]
+
+
+def baseline_periods(cube, before, first_month, last_month, n_hist=PERIOD_HIST_N):
+    """
+    歷年均值基準：before 之前、12 個月都落在資料範圍 [first_month, last_month]
+    （YYYY-MM）內的最近 n_hist 個期間 —— 頭尾不完整的期間不拉低月平均
+    """
+    sm = cube["start_month"]
+    full = [p for p in cube["periods"] if p < before
+            and first_month <= period_months(p, sm)[0]
+            and period_months(p, sm)[-1] <= last_month]
+    return full[-n_hist:]
@@ -0,0 +1,134 @@
+# ════════════════════════════════════════════════════════════
+#  月份前綴和（prefix-sum）陣列
+#  cube[單位, 事件大類, 科別, SAC, k] = 前 k 個月的累計件數
+#  任意 (start, end) 區間件數 = cube[..., hi] - cube[..., lo]
+#  → 拖動月份滑桿時 KPI 不必重新掃描事件列
+# ════════════════════════════════════════════════════════════
+import numpy as np
+import pandas as pd
+
+from .constants import ALL_CATS, ALL_DEPTS, DEPT_COL, SAC_LEVELS
+
+PX_AXES = ["單位", "事件大類", "科別", "SAC"]
+
+
+def build_month_prefix(df, db):
+    """建立前綴和陣列；回傳 dict（呼叫端視為唯讀）"""
+    months = sorted(df["年月"].dropna().unique())
+    units  = sorted(df["單位"].unique())
+    cats   = sorted(df["事件大類"].unique())
+    depts  = sorted(df[DEPT_COL].unique())
+
+    m_i = pd.Index(months).get_indexer(df["年月"])
+    u_i = pd.Index(units).get_indexer(df["單位"])
+    c_i = pd.Index(cats).get_indexer(df["事件大類"])
+    d_i = pd.Index(depts).get_indexer(df[DEPT_COL])
+    s_i = (df["SAC_num"].where(df["SAC_num"].isin([1, 2, 3, 4]), 0)
+           .fillna(0).astype(int).to_numpy())
+    ok  = m_i >= 0
+
+    cube = np.zeros((len(units), len(cats), len(depts),
+                     len(SAC_LEVELS), len(months) + 1), dtype=np.int32)
+    np.add.at(cube, (u_i[ok], c_i[ok], d_i[ok], s_i[ok], m_i[ok] + 1), 1)
+    np.cumsum(cube, axis=-1, out=cube)
+
+    # 住院人日數：單位 × 月，對齊事件月份軸後累加（缺月以 0 計）
+    bed = (db.pivot_table(index="單位", columns="年月", values="住院人日數",
+                          aggfunc="sum")
+           .reindex(columns=months).fillna(0))
+    bed_cum = np.zeros((len(bed), len(months) + 1), dtype=np.float64)
+    bed_cum[:, 1:] = np.cumsum(bed.to_numpy(dtype=np.float64), axis=1)
+
+    return {
+        "months": months, "units": units, "cats": cats, "depts": depts,
+        "cube": cube,
+        "bed_units": bed.index.tolist(), "bed_cum": bed_cum,
+    }
+
+
+def _px_window(px, s, e):
+    """月份字串 → 前綴和索引 [lo, hi)"""
+    lo = int(np.searchsorted(px["months"], s, side="left"))
+    hi = int(np.searchsorted(px["months"], e, side="right"))
+    return lo, max(hi, lo)
+
+
+def _px_pick(labels, wanted):
+    """wanted=None → 全部；否則回傳存在於 labels 的索引"""
+    if wanted is None:
+        return np.arange(len(labels))
+    pos = {v: i for i, v in enumerate(labels)}
+    return np.array([pos[w] for w in wanted if w in pos], dtype=int)
+
+
+def _px_index(px, spec, sac=None):
+    return np.ix_(
+        _px_pick(px["units"], spec.wards),
+        _px_pick(px["cats"],  None if spec.cat == ALL_CATS else [spec.cat]),
+        _px_pick(px["depts"], None if spec.dept == ALL_DEPTS else [spec.dept]),
+        _px_pick(SAC_LEVELS,  None if sac is None else list(sac)),
+    )
+
+
+def prefix_count(px, spec, sac=None, by=None):
+    """
+    spec 區間件數，篩選語意與 filter_events 相同。
+    by=None 回傳整數；by="單位"/"事件大類"/"科別"/"SAC" 回傳該維度各值件數 Series
+    """
+    lo, hi = _px_window(px, spec.start, spec.end)
+    cube   = px["cube"]
+    window = cube[..., hi] - cube[..., lo]
+    idx    = _px_index(px, spec, sac)
+    sub    = window[idx]
+    if by is None:
+        return int(sub.sum())
+    axis   = PX_AXES.index(by)
+    labels = [px["units"], px["cats"], px["depts"], SAC_LEVELS][axis]
+    picked = idx[axis].ravel()
+    vals   = sub.sum(axis=tuple(i for i in range(4) if i != axis))
+    return pd.Series(vals, index=[labels[i] for i in picked], name="件數")
+
+
+def prefix_monthly(px, spec, sac=None):
+    """spec 區間逐月件數（由累計序列差分而得）"""
+    lo, hi = _px_window(px, spec.start, spec.end)
+    cum = (px["cube"][..., lo:hi + 1][_px_index(px, spec, sac)]
+           .sum(axis=(0, 1, 2, 3)))
+    return pd.Series(np.diff(cum), index=px["months"][lo:hi], name="件數")
+
+
+def _bed_rows(px, spec):
+    return _px_pick(px["bed_units"], list(spec.wards or ["全院"]))
+
+
+def prefix_bed_days(px, spec):
+    """spec 區間住院人日數；群組節點為所轄病房加總"""
+    lo, hi = _px_window(px, spec.start, spec.end)
+    rows = _bed_rows(px, spec)
+    if len(rows) == 0:
+        return 0.0
+    cum = px["bed_cum"][rows]
+    return float((cum[:, hi] - cum[:, lo]).sum())
+
+
+def prefix_bed_monthly(px, spec):
+    """spec 區間逐月住院人日數"""
+    lo, hi = _px_window(px, spec.start, spec.end)
+    cum  = px["bed_cum"][_bed_rows(px, spec), lo:hi + 1].sum(axis=0)
+    return pd.Series(np.diff(cum), index=px["months"][lo:hi], name="住院人日數")
+
+
+def prefix_bed_by_unit(px, spec):
+    """spec 區間各單位住院人日數（不套用 spec.wards，含「全院」列）"""
+    lo, hi = _px_window(px, spec.start, spec.end)
+    cum = px["bed_cum"]
+    return pd.Series(cum[:, hi] - cum[:, lo], index=px["bed_units"],
+                     name="住院人日數")
+
+
+def prefix_rate(px, spec):
+    """spec 區間發生率（‰）= 件數 ÷ 住院人日數 × 1000"""
+    days = prefix_bed_days(px, spec)
+    if days <= 0:
+        return 0.0
+    return round(prefix_count(px, spec) / days * 1000, 2)
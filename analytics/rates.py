@@ -0,0 +1,131 @@
+# ════════════════════════════════════════════════════════════
+#  單位 / 單位群組 月發生率物化表
+#  每列 = (單位, 事件大類, 年月)：件數、住院人日數、發生率(‰)
+#  單位含各病房、「全院」與階層內每個部門 / 群組節點；事件大類含「全部」
+#  資料更新時只重算有變動的月份（件數或住院人日數與舊表不同，含補登 /
+#  更正的舊月份）與最後已物化月份之後的列，其餘沿用
+# ════════════════════════════════════════════════════════════
+import numpy as np
+import pandas as pd
+
+from .constants import ALL_CATS, ALL_DEPTS
+from .prefix import prefix_bed_monthly, prefix_monthly
+
+RATE_ALL_CAT = ALL_CATS
+RATE_KEYS    = ["單位", "事件大類", "年月"]
+RATE_COLS    = ["年月", "件數", "住院人日數", "發生率"]
+
+
+def bed_day_frame(db, groups):
+    """單位 × 年月 住院人日數，含各群組節點（所轄病房加總）"""
+    beds = db[["單位", "年月", "住院人日數"]]
+    return pd.concat([beds] + [
+        beds[beds["單位"].isin(members)]
+        .groupby("年月", as_index=False)["住院人日數"].sum().assign(單位=name)
+        for name, members in groups.items()
+    ], ignore_index=True).groupby(["單位", "年月"], as_index=False)["住院人日數"].sum()
+
+
+def materialize_rate_table(df, db, groups, months=None):
+    """groups = {節點: 所轄病房}；months=None → 全量，否則只計算這些年月"""
+    if months is not None:
+        df = df[df["年月"].isin(months)]
+        db = db[db["年月"].isin(months)]
+
+    ev = df.groupby(RATE_KEYS).size().rename("件數").reset_index()
+    ev = pd.concat([
+        ev,
+        ev.groupby(["單位", "年月"], as_index=False)["件數"].sum()
+          .assign(事件大類=RATE_ALL_CAT),
+    ], ignore_index=True)
+    rollups = [ev.groupby(["事件大類", "年月"], as_index=False)["件數"].sum()
+                 .assign(單位="全院")]
+    for name, members in groups.items():
+        rollups.append(ev[ev["單位"].isin(members)]
+                       .groupby(["事件大類", "年月"], as_index=False)["件數"].sum()
+                       .assign(單位=name))
+    ev = pd.concat([ev, *rollups], ignore_index=True)
+
+    out = ev.merge(bed_day_frame(db, groups), on=["單位", "年月"], how="left")
+    out["發生率"] = (out["件數"] / out["住院人日數"] * 1000).round(2).fillna(0)
+    return out.sort_values(RATE_KEYS).reset_index(drop=True)
+
+
+def changed_months(prev, df, db, groups):
+    """
+    新資料與舊物化表不一致的月份：病房 × 事件大類件數不同（含補登、
+    更正、刪除），或任一列的住院人日數不同
+    """
+    raw = prev[~prev["單位"].isin([*groups, "全院"])
+               & (prev["事件大類"] != RATE_ALL_CAT)]
+    ev = (df.groupby(RATE_KEYS).size().rename("件數").reset_index()
+          .merge(raw[RATE_KEYS + ["件數"]], on=RATE_KEYS, how="outer",
+                 suffixes=("", "_舊")))
+    ev_diff = ev["件數"].fillna(0) != ev["件數_舊"].fillna(0)
+    bd = prev[["單位", "年月", "住院人日數"]].merge(
+        bed_day_frame(db, groups), on=["單位", "年月"], how="left", suffixes=("_舊", ""))
+    bd_diff = ~np.isclose(bd["住院人日數"].fillna(-1), bd["住院人日數_舊"].fillna(-1))
+    return set(ev.loc[ev_diff, "年月"]) | set(bd.loc[bd_diff, "年月"])
+
+
+def update_rate_table(prev, df, db, groups, rebuild=False):
+    """
+    prev 為上一版物化表。rebuild=True（如階層設定變更）或無舊表 → 全量重建；
+    否則重算 changed_months 與最後已物化月份（可能是未結算月）以後的月份，
+    其餘列沿用
+    """
+    if rebuild or prev is None or prev.empty:
+        return materialize_rate_table(df, db, groups)
+    since = prev["年月"].max()
+    months = (changed_months(prev, df, db, groups)
+              | set(df.loc[df["年月"] >= since, "年月"])
+              | set(db.loc[db["年月"] >= since, "年月"]))
+    return (pd.concat([prev[~prev["年月"].isin(months)],
+                       materialize_rate_table(df, db, groups, sorted(months))],
+                      ignore_index=True)
+            .sort_values(RATE_KEYS).reset_index(drop=True))
+
+
+def split_rate_series(table):
+    """物化表 → {(單位, 事件大類): 月序列}"""
+    return {k: g.drop(columns=["單位", "事件大類"]).reset_index(drop=True)
+            for k, g in table.groupby(["單位", "事件大類"])}
+
+
+def _with_zero_months(mc, days):
+    """mc 補上 days（逐月住院人日數）> 0 但沒有事件列的月份：件數 0、發生率 0"""
+    days = days[(days > 0) & ~days.index.isin(mc["年月"])]
+    if days.empty:
+        return mc
+    add = pd.DataFrame({"年月": days.index, "件數": 0,
+                        "住院人日數": days.to_numpy(), "發生率": 0.0})
+    return (pd.concat([mc, add], ignore_index=True)
+            .sort_values("年月").reset_index(drop=True))
+
+
+def monthly_rate_frame(series, px, spec, zeros=False):
+    """
+    回傳 spec 區間逐月 件數 / 住院人日數 / 發生率 表（mc）。
+    科別=全部科別 → 直接切物化序列；指定科別 → 由月份前綴和組出。
+    zeros=True → 有住院人日數的零事件月也列出（件數 0）；
+    u 管制圖與 EWMA / CUSUM 的 ū 要以此計算，否則會高估
+    """
+    if spec.dept == ALL_DEPTS:
+        sr = series.get((spec.unit,
+                         RATE_ALL_CAT if spec.cat == ALL_CATS else spec.cat))
+        if sr is None:
+            return pd.DataFrame(columns=RATE_COLS)
+        lo = sr["年月"].searchsorted(spec.start, side="left")
+        hi = sr["年月"].searchsorted(spec.end, side="right")
+        out = sr.iloc[lo:hi].reset_index(drop=True)
+        return _with_zero_months(out, prefix_bed_monthly(px, spec)) if zeros else out
+
+    cnt  = prefix_monthly(px, spec)
+    days = prefix_bed_monthly(px, spec).replace(0, np.nan)
+    out  = pd.DataFrame({"件數": cnt, "住院人日數": days})
+    keep = out["件數"] > 0
+    if zeros:
+        keep |= out["住院人日數"] > 0
+    out  = out[keep].rename_axis("年月").reset_index()
+    out["發生率"] = (out["件數"] / out["住院人日數"] * 1000).round(2).fillna(0)
+    return out
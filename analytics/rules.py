@@ -0,0 +1,174 @@
+# ════════════════════════════════════════════════════════════
+#  跌倒共現因子的關聯規則（Apriori，位元集合實作）
+#  每個布林因子（事件說明特徵、可能原因-*、情境欄位）打包成 uint64 位元列，
+#  itemset 的支持件數 = 各位元列 AND 後的 popcount —— 不展開交易清單。
+#  逐層擴充前項（只接比最後一項編號大的因子，不重複），件數 < min_count
+#  即剪枝（Apriori 性質：超集合件數不會更多）。規則只取「前項 → 結果」：
+#  結果為有傷害 / 中度以上 / 傷害部位，供 RCA 找出高增益的因子組合
+# ════════════════════════════════════════════════════════════
+import numpy as np
+import pandas as pd
+
+from .constants import FALL_FEATURES, INJURY_OUTCOMES, RISK_FACTORS
+
+RULE_MIN_COUNT = 5            # 規則（前項 + 結果同時成立）最少件數
+RULE_MAX_LEN   = 3            # 前項最多幾個因子
+RULE_MIN_CONF  = 0.3
+RULE_TOP_N     = 50           # 每個結果保留的規則數
+CAUSE_PREFIX   = "可能原因-"
+CAUSE_SKIP     = {"不知道", "其他"}
+NIGHT_SLOTS    = ["22-24時", "00-02時", "02-04時", "04-06時"]
+
+# 情境因子：顯示名稱 → (欄位, 成立的值)；可能原因類的高風險因子已在細項中
+RULE_CONTEXT = {
+    "夜間(22–06時)": ("時段標準", NIGHT_SLOTS),
+    **{k: v for k, v in RISK_FACTORS.items() if not v[0].startswith(CAUSE_PREFIX)},
+}
+# 結果（規則後項）：傷害程度（INJURY_OUTCOMES）+ 事件說明中的傷害部位
+OUTCOME_FEATURES = [f for f in FALL_FEATURES if f.startswith("傷害_")]
+
+
+def _is_cause_flag(col, s):
+    """可能原因-* 的 0/1 細項（排除文字欄、「與…相關」大類與不知道 / 其他）"""
+    name = col.removeprefix(CAUSE_PREFIX)
+    return (col.startswith(CAUSE_PREFIX) and pd.api.types.is_numeric_dtype(s)
+            and not (name.startswith("與") and name.endswith("相關"))
+            and name not in CAUSE_SKIP)
+
+
+def fall_item_matrix(df):
+    """
+    跌倒資料 → (因子名稱 list, 布林矩陣 (N, I), 是否為結果 (I,))。
+    傷害程度結果排最前（規則表依此順序分組）；欄位不存在的因子略過
+    """
+    names, cols, outcome = [], [], []
+
+    def add(name, col, is_outcome=False):
+        names.append(name)
+        cols.append(np.asarray(col, dtype=bool))
+        outcome.append(is_outcome)
+
+    for name, (col, vals) in INJURY_OUTCOMES.items():
+        if col in df.columns:
+            add(name, df[col].isin(vals), True)
+    for f in FALL_FEATURES:
+        if f in df.columns:
+            add(f, df[f].fillna(False), f in OUTCOME_FEATURES)
+    for c in df.columns:
+        if _is_cause_flag(c, df[c]):
+            add(c.removeprefix(CAUSE_PREFIX), df[c].eq(1))
+    for name, (col, vals) in RULE_CONTEXT.items():
+        if col in df.columns:
+            add(name, df[col].isin(vals))
+    mat = np.column_stack(cols) if cols else np.zeros((len(df), 0), dtype=bool)
+    return names, mat, np.array(outcome, dtype=bool)
+
+
+def pack_bits(mat):
+    """布林矩陣 (N, I) → 每個因子一列位元 (I, W) uint64"""
+    packed = np.packbits(mat, axis=0).T                # (I, ⌈N/8⌉) uint8
+    pad = (-packed.shape[1]) % 8
+    packed = np.pad(packed, ((0, 0), (0, pad)))
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+_POP8 = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(1)
+
+
+def popcount(bits):
+    """最後一維位元數加總（NumPy ≥ 2 用 bitwise_count，否則查表）"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits).sum(-1, dtype=np.int64)
+    return _POP8[bits.view(np.uint8)].sum(-1, dtype=np.int64)
+
+
+def frequent_itemsets(bits, min_count=RULE_MIN_COUNT, max_len=RULE_MAX_LEN):
+    """
+    bits：(I, W) 位元列。逐層回傳 [(itemsets (F, k) int, 位元 (F, W), 件數 (F,)), …]，
+    k = 1…max_len，只保留件數 ≥ min_count
+    """
+    cnt = popcount(bits)
+    keep = np.flatnonzero(cnt >= min_count)
+    levels = [(keep[:, None], bits[keep], cnt[keep])]
+    while len(levels) < max_len:
+        sets, sb, _ = levels[-1]
+        if not len(sets):
+            break
+        # 候選 = 每個 itemset × 編號大於其最後一項的頻繁單項
+        ext = keep[None, :] > sets[:, -1:]
+        pi, ji = np.nonzero(ext)
+        if not len(pi):
+            break
+        cb = sb[pi] & bits[keep[ji]]
+        cc = popcount(cb)
+        ok = cc >= min_count
+        levels.append((np.column_stack([sets[pi[ok]], keep[ji[ok]]]), cb[ok], cc[ok]))
+    return levels
+
+
+def _set_keys(sets, base):
+    """itemset (F, k) → 整數鍵（以 base 進位），供子集合查表"""
+    return (sets * base ** np.arange(sets.shape[1] - 1, -1, -1)).sum(1)
+
+
+def outcome_rules(names, mat, outcome, min_count=RULE_MIN_COUNT, max_len=RULE_MAX_LEN,
+                  min_conf=RULE_MIN_CONF, top_n=RULE_TOP_N):
+    """
+    「因子組合 → 結果」規則表，各結果取增益、件數最高的 top_n 條。欄位：
+    前項 / 後項 / 因子數 / 前項件數 / 規則件數 / 支持度 / 信賴度 / 基準率 (%) / 增益。
+    只保留增益 > 1，且信賴度高於其所有少一個因子的子規則者（去除冗餘組合）；
+    篩選與排序都在陣列上做，只替前 top_n 條組字串
+    """
+    n = len(mat)
+    cols = ["前項", "後項", "因子數", "前項件數", "規則件數",
+            "支持度", "信賴度", "基準率", "增益"]
+    if n == 0 or not outcome.any() or outcome.all():
+        return pd.DataFrame(columns=cols)
+    bits = pack_bits(mat)
+    ante, outs = np.flatnonzero(~outcome), np.flatnonzero(outcome)
+    base = popcount(bits[outs]) / n                      # 各結果的基準率
+    levels = frequent_itemsets(bits[ante], min_count, max_len)
+
+    found, prev = [], None
+    for sets, sb, sc in levels:
+        if not len(sets):
+            break
+        both = popcount(sb[:, None, :] & bits[outs][None, :, :])     # (F, O)
+        conf = both / sc[:, None]
+        # 子規則（少一個因子）的最高信賴度；子集合必然也是頻繁 itemset
+        parent = np.zeros_like(conf)
+        if prev is not None:
+            keys, order, pconf = prev
+            for i in range(sets.shape[1]):
+                sub = _set_keys(np.delete(sets, i, axis=1), len(ante))
+                parent = np.maximum(parent, pconf[order[np.searchsorted(keys, sub, sorter=order)]])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            lift = conf / base
+        ok = (both >= min_count) & (conf >= min_conf) & (lift > 1) & (conf > parent)
+        f, o = np.nonzero(ok)
+        found.append((sets[f], o, sc[f], both[f, o], conf[f, o], lift[f, o]))
+        keys = _set_keys(sets, len(ante))
+        prev = (keys, np.argsort(keys), conf)
+    if not found:
+        return pd.DataFrame(columns=cols)
+
+    lift = np.concatenate([x[5] for x in found])
+    both = np.concatenate([x[3] for x in found])
+    out  = np.concatenate([x[1] for x in found])
+    order = np.lexsort((-both, -lift, out))             # 依結果分組，組內增益 → 件數
+    first = np.searchsorted(out[order], out[order])     # 各組起點
+    top = order[np.arange(len(order)) - first < top_n]
+    flat = [(lvl, r) for lvl, x in enumerate(found) for r in range(len(x[1]))]
+    rows = []
+    for t in top:
+        lvl, r = flat[t]
+        sets, o, sc, bo, cf, lf = (x[r] for x in found[lvl])
+        rows.append((" + ".join(names[ante[i]] for i in sets), names[outs[o]], len(sets),
+                     int(sc), int(bo), bo / n * 100, cf * 100, base[o] * 100, lf))
+    return pd.DataFrame(rows, columns=cols)
+
+
+def fall_rules(df, **kw):
+    """跌倒資料 → 關聯規則表（fall_item_matrix + outcome_rules）"""
+    names, mat, outcome = fall_item_matrix(df)
+    return outcome_rules(names, mat, outcome, **kw)
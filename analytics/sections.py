@@ -0,0 +1,117 @@
+# ── 跌倒分頁重運算區塊的資料準備 ────────────────────────────
+# 診斷分類、科別交叉、高風險因子矩陣、特徵 Pareto；
+# 皆為純函數（只讀輸入），可放進背景執行緒與主畫面同時計算
+import pandas as pd
+
+from .constants import RISK_FACTORS, RISK_FLAG_PREFIX
+from .features import feature_counts, feature_unit_counts
+from .loader import risk_factor_flags
+
+
+def dx_injury_summary(dx_inj, order, inj_col, high_injury, min_n=3):
+    """
+    dx_inj：診斷分類 + 傷害程度兩欄。回傳 (df_dx_sum, inj2_pct, tot2)：
+    各診斷件數 / 中度以上傷害率（Treemap），以及件數 >= min_n 的診斷
+    傷害程度百分比表與總件數（依總件數升序）；無資料時後兩者為 None
+    """
+    dx_summary = []
+    for dx in order:
+        sub  = dx_inj[dx_inj["診斷分類"] == dx]
+        n    = len(sub)
+        if n == 0:
+            continue
+        hi   = sub[inj_col].isin(high_injury).sum()
+        rate = round(hi / n * 100, 1)
+        dx_summary.append({"診斷分類": dx, "件數": n,
+                           "中度以上傷害件數": hi, "傷害率": rate})
+    df_dx_sum = pd.DataFrame(dx_summary)
+
+    dx_valid = dx_inj.groupby("診斷分類").filter(lambda x: len(x) >= min_n)
+    if dx_valid.empty:
+        return df_dx_sum, None, None
+    inj2 = (dx_valid.groupby(["診斷分類", inj_col])
+            .size().reset_index(name="件數"))
+    inj2_piv = inj2.pivot(index="診斷分類", columns=inj_col, values="件數").fillna(0)
+    inj2_piv["_tot"] = inj2_piv.sum(axis=1)
+    inj2_piv = inj2_piv.sort_values("_tot", ascending=True)
+    tot2     = inj2_piv["_tot"].astype(int)
+    inj2_piv = inj2_piv.drop(columns="_tot")
+    return df_dx_sum, inj2_piv.div(inj2_piv.sum(axis=1), axis=0) * 100, tot2
+
+
+def dept_fall_profile(dff_fall, dept_col, injury_col, highrisk_col,
+                      mobility_col, consci_col, getup_col, min_n=5):
+    """
+    科別深度分析（只取件數 >= min_n 的科別）。回傳 dict：
+    dept_counts / valid_depts / df_dept，以及 df_dept 非空時的
+    inj_pct + totals（傷害程度百分比）、dept_order + df_feat（三項特徵比率）、
+    df_getup（執意自行下床比率）
+    """
+    dept_counts = dff_fall[dept_col].value_counts()
+    valid_depts = dept_counts[dept_counts >= min_n].index.tolist()
+    df_dept = dff_fall[dff_fall[dept_col].isin(valid_depts)].copy()
+    out = {"dept_counts": dept_counts, "valid_depts": valid_depts, "df_dept": df_dept}
+    if df_dept.empty:
+        return out
+
+    inj_cross = (df_dept.groupby([dept_col, injury_col])
+                 .size().reset_index(name="件數"))
+    inj_piv   = inj_cross.pivot(index=dept_col, columns=injury_col, values="件數").fillna(0)
+    inj_piv["_total"] = inj_piv.sum(axis=1)
+    inj_piv = inj_piv.sort_values("_total", ascending=True)
+    out["totals"]  = inj_piv["_total"].astype(int)
+    inj_piv        = inj_piv.drop(columns="_total")
+    out["inj_pct"] = inj_piv.div(inj_piv.sum(axis=1), axis=0) * 100
+
+    # 排序依總件數（讓大科在上方）
+    dept_order = dept_counts[dept_counts >= min_n].sort_values(ascending=True).index.tolist()
+    feat_data = []
+    for dept in dept_order:
+        sub = dff_fall[dff_fall[dept_col] == dept]
+        n   = len(sub)
+        if n == 0:
+            continue
+        r1 = (sub[highrisk_col] == "是").sum() / n * 100
+        r2 = (sub[mobility_col].isin(["需協助","完全依賴"])).sum() / n * 100
+        r3 = (sub[consci_col].isin(["意識混亂","嗜睡"])).sum() / n * 100
+        feat_data.append({"科別": dept, "跌倒高危險群": r1,
+                          "需協助/完全依賴": r2, "意識混亂/嗜睡": r3})
+    out["dept_order"] = dept_order
+    out["df_feat"]    = pd.DataFrame(feat_data)
+
+    getup_data = []
+    for dept in valid_depts:
+        sub = dff_fall[dff_fall[dept_col] == dept]
+        n   = len(sub)
+        if n == 0:
+            continue
+        rate = sub[getup_col].eq(1).sum() / n * 100
+        getup_data.append({"科別": dept, "比率": round(rate, 1), "總件數": n})
+    out["df_getup"] = (pd.DataFrame(getup_data)
+                       .sort_values("比率", ascending=True))   # 水平圖低→高由下而上
+    return out
+
+
+def risk_factor_matrix(dff_fall, dept_col, min_n=3):
+    """
+    科別 × 高風險因子比率（%），所有件數 ≥ min_n 的科別依件數遞減。
+    使用載入時預先算好的布林欄（風險_*，見 loader.risk_factor_flags），
+    一次 groupby 平均即得整個矩陣 —— 成本與科別數、因子數無關地只掃描一遍。
+    回傳 (valid_depts, hm_rows, hm_text)
+    """
+    cols  = [RISK_FLAG_PREFIX + f for f in RISK_FACTORS]
+    flags = (dff_fall[cols] if set(cols) <= set(dff_fall.columns)
+             else risk_factor_flags(dff_fall).reindex(columns=cols))
+    grp   = flags.astype(float).groupby(dff_fall[dept_col])
+    n     = grp.size()
+    rate  = (grp.mean() * 100).round(1)
+    keep  = n[n >= min_n].sort_values(ascending=False, kind="stable").index
+    rate, n = rate.loc[keep], n.loc[keep]
+    hm_text = [[f"{v:.2f}%<br>(n={k})" for v in row]
+               for row, k in zip(rate.to_numpy(), n.to_numpy())]
+    return list(keep), rate.to_numpy().tolist(), hm_text
+
+
+def feature_pareto(df, features):
+    """特徵件數表 + 單位 × 特徵矩陣（Pareto 圖與下鑽共用）"""
+    return feature_counts(df, features), feature_unit_counts(df, features)
@@ -0,0 +1,214 @@
+# ════════════════════════════════════════════════════════════
+#  統計製程管制（SPC）：u 管制圖
+#  物化發生率表 → 序列 (單位, 事件大類) × 月 的件數 / 住院人日數矩陣與前綴和；
+#  任意月份區間的中心線 ū = Σ件數 ÷ Σ住院人日數，逐點管制界限
+#  ū ± 3·√(ū / 住院人日數) —— 全部序列以 NumPy 廣播一次算完
+#  住院人日數缺漏（≤ 0）的月份不計入 ū，也不判定異常
+#  Nelson 八規則：以全期 ū 標準化各點（z 值），於建表時對所有序列
+#  以滑動視窗一次判定，結果為 (規則, 序列, 月) 布林陣列
+# ════════════════════════════════════════════════════════════
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .constants import ALL_CATS, ALL_DEPTS
+from .rates import RATE_ALL_CAT
+
+SPC_PER    = 1000.0      # 發生率單位：每千住院人日（‰）
+SPC_SIGMA  = 3.0
+SPC_MIN_N  = 3           # 區間內至少幾個有效月份才畫管制界限
+
+NELSON_RULES = {
+    1: "1 點超出 3σ",
+    2: "連續 9 點在中心線同側",
+    3: "連續 6 點遞增或遞減",
+    4: "連續 14 點上下交替",
+    5: "3 點中 2 點超出 2σ（同側）",
+    6: "5 點中 4 點超出 1σ（同側）",
+    7: "連續 15 點落在 1σ 內",
+    8: "連續 8 點落在 1σ 外（任一側）",
+}
+
+
+def _month_cumsum(a):
+    """(S, M) → (S, M+1) 前綴和；區間 [lo, hi) 合計 = cum[:, hi] - cum[:, lo]"""
+    out = np.zeros((a.shape[0], a.shape[1] + 1))
+    np.cumsum(a, axis=1, out=out[:, 1:])
+    return out
+
+
+def build_spc_cube(table, beds=None):
+    """
+    物化表（單位, 事件大類, 年月, 件數, 住院人日數）→ dict（呼叫端視為唯讀）：
+    series / pos（序列鍵 ↔ 列索引）、months、count / days 矩陣 (S, M)，
+    以及有效月份的件數 / 住院人日數 / 月數前綴和 (S, M+1)。
+    beds（bed_day_frame）給定時，物化表沒有的月份（當月 0 件）也以該單位
+    住院人日數計入，件數記 0 —— 否則零事件月會被當成缺漏
+    """
+    keys = pd.MultiIndex.from_frame(table[["單位", "事件大類"]])
+    s_i, series = pd.factorize(keys, sort=True)
+    m_i, months = pd.factorize(table["年月"], sort=True)
+
+    count = np.zeros((len(series), len(months)))
+    days  = np.zeros_like(count)
+    count[s_i, m_i] = table["件數"].to_numpy(dtype=float)
+    days[s_i, m_i]  = table["住院人日數"].fillna(0).to_numpy(dtype=float)
+    if beds is not None:
+        bm = (beds.pivot_table(index="單位", columns="年月", values="住院人日數",
+                               aggfunc="sum")
+              .reindex(index=series.get_level_values(0), columns=months)
+              .to_numpy(dtype=float))
+        days = np.where(np.isnan(bm), days, bm)
+
+    valid  = days > 0
+    series = list(series)
+    z      = u_zscores(count, days)
+    return {
+        "series": series, "pos": {k: i for i, k in enumerate(series)},
+        "months": list(months), "count": count, "days": days,
+        "cum_count": _month_cumsum(np.where(valid, count, 0)),
+        "cum_days":  _month_cumsum(np.where(valid, days, 0)),
+        "cum_n":     _month_cumsum(valid.astype(float)),
+        "z": z, "alerts": nelson_alerts(z),
+    }
+
+
+def u_zscores(count, days):
+    """(S, M) 件數 / 住院人日數 → 以各序列全期 ū 標準化的 z 值；無效月份為 NaN"""
+    valid = days > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cl = (np.where(valid, count, 0).sum(axis=1)
+              / np.where(valid, days, 0).sum(axis=1))[:, None]
+        z  = (count / days - cl) / np.sqrt(cl / days)
+    return np.where(valid & (cl > 0), z, np.nan)
+
+
+def _runs(mask, n):
+    """(S, M) 布林 → 以第 m 月結尾的連續 n 點皆為 True（前 n-1 月為 False）"""
+    out = np.zeros_like(mask)
+    if mask.shape[1] >= n:
+        out[:, n - 1:] = sliding_window_view(mask, n, axis=1).all(axis=-1)
+    return out
+
+
+def _at_least(mask, n, k):
+    """以第 m 月結尾的 n 點中至少 k 點為 True"""
+    out = np.zeros_like(mask)
+    if mask.shape[1] >= n:
+        out[:, n - 1:] = sliding_window_view(mask, n, axis=1).sum(axis=-1) >= k
+    return out
+
+
+def _shift(mask, k):
+    """差分類規則的結果對齊回原月份軸（前 k 月補 False）"""
+    out = np.zeros((mask.shape[0], mask.shape[1] + k), dtype=bool)
+    out[:, k:] = mask
+    return out
+
+
+def nelson_alerts(z):
+    """
+    z：(S, M) 標準化值。回傳 (8, S, M) 布林陣列；[r-1, s, m] = 規則 r
+    於序列 s 在第 m 月成立（以該月為視窗結尾）。NaN 會中斷連續類規則
+    """
+    ok    = ~np.isnan(z)
+    above = ok & (z > 0)
+    below = ok & (z < 0)
+    with np.errstate(invalid="ignore"):
+        d = np.diff(z, axis=1)                 # NaN 差分自然不成立
+        up, down = d > 0, d < 0
+        alt = (d[:, 1:] * d[:, :-1]) < 0
+    return np.stack([
+        ok & (np.abs(np.nan_to_num(z)) > 3),
+        _runs(above, 9) | _runs(below, 9),
+        _shift(_runs(up, 5) | _runs(down, 5), 1),
+        _shift(_runs(alt, 12), 2),
+        _at_least(ok & (z > 2), 3, 2) | _at_least(ok & (z < -2), 3, 2),
+        _at_least(ok & (z > 1), 5, 4) | _at_least(ok & (z < -1), 5, 4),
+        _runs(ok & (np.abs(np.nan_to_num(z)) < 1), 15),
+        _runs(ok & (np.abs(np.nan_to_num(z)) > 1), 8),
+    ])
+
+
+def nelson_board(cube, end, lookback=3):
+    """
+    全院訊號看板：以 end 月（含）往前 lookback 個月內成立過的規則。
+    回傳 DataFrame（單位, 事件大類, 規則=成立規則編號 tuple, 規則數），
+    只含視窗內有住院人日數的序列
+    """
+    hi = int(np.searchsorted(cube["months"], end, side="right"))
+    lo = max(hi - lookback, 0)
+    hit = cube["alerts"][:, :, lo:hi].any(axis=-1)          # (8, S)
+    ok  = (cube["days"][:, lo:hi] > 0).any(axis=1)
+    rules = np.array(list(NELSON_RULES))
+    rows = [(u, c, tuple(rules[hit[:, i]].tolist()))
+            for i, (u, c) in enumerate(cube["series"]) if ok[i]]
+    out = pd.DataFrame(rows, columns=["單位", "事件大類", "規則"])
+    out["規則數"] = out["規則"].map(len)
+    return out
+
+
+def u_limits(cl, days, per=SPC_PER, k=SPC_SIGMA):
+    """
+    cl：中心線 ū（件 / 人日），形狀 (...,)；days：住院人日數 (..., M)。
+    回傳逐點 (UCL, LCL)（已乘 per）；days ≤ 0 的點為 NaN
+    """
+    cl = np.asarray(cl, dtype=float)[..., None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sd = np.where(days > 0, np.sqrt(cl / days), np.nan)
+    return (cl + k * sd) * per, np.maximum(cl - k * sd, 0.0) * per
+
+
+def u_chart_window(cube, start, end, per=SPC_PER, k=SPC_SIGMA):
+    """
+    [start, end] 月份區間內所有序列的 u 管制圖。回傳 dict：
+    months、cl (S,)（‰）、n (S,) 有效月數、rate / ucl / lcl / signal (S, M)；
+    signal = 發生率超出 UCL 或低於 LCL（只在有效月份判定）
+    """
+    lo = int(np.searchsorted(cube["months"], start, side="left"))
+    hi = max(int(np.searchsorted(cube["months"], end, side="right")), lo)
+    c_sum = cube["cum_count"][:, hi] - cube["cum_count"][:, lo]
+    d_sum = cube["cum_days"][:, hi] - cube["cum_days"][:, lo]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cl = np.where(d_sum > 0, c_sum / d_sum, np.nan)
+
+    count, days = cube["count"][:, lo:hi], cube["days"][:, lo:hi]
+    ucl, lcl = u_limits(cl, days, per, k)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(days > 0, count / days * per, np.nan)
+    return {
+        "months": cube["months"][lo:hi], "cl": cl * per,
+        "n": cube["cum_n"][:, hi] - cube["cum_n"][:, lo],
+        "rate": rate, "ucl": ucl, "lcl": lcl,
+        "signal": (rate > ucl) | (rate < lcl),
+    }
+
+
+def u_chart_frame(cube, mc, spec, per=SPC_PER, k=SPC_SIGMA):
+    """
+    monthly_rate_frame(..., zeros=True) 的結果 mc 附上 CL / UCL / LCL / 異常點
+    欄（‰），有效月份不足 SPC_MIN_N 時回傳 None。
+    科別=全部科別 → 取預先建好的序列矩陣；指定科別 → 由 mc 本身的件數 / 人日數計算
+    """
+    key = (spec.unit, RATE_ALL_CAT if spec.cat == ALL_CATS else spec.cat)
+    if spec.dept == ALL_DEPTS and key in cube["pos"]:
+        w = u_chart_window(cube, spec.start, spec.end, per, k)
+        i = cube["pos"][key]
+        if w["n"][i] < SPC_MIN_N:
+            return None
+        at  = pd.Index(w["months"]).get_indexer(mc["年月"])
+        return mc.assign(CL=w["cl"][i],
+                         UCL=w["ucl"][i][at], LCL=w["lcl"][i][at],
+                         異常點=w["signal"][i][at])
+
+    count = mc["件數"].to_numpy(dtype=float)
+    days  = mc["住院人日數"].fillna(0).to_numpy(dtype=float)
+    valid = days > 0
+    if valid.sum() < SPC_MIN_N or count[valid].sum() == 0:     # 全為零事件月：不畫
+        return None
+    cl = count[valid].sum() / days[valid].sum()
+    ucl, lcl = u_limits(cl, days, per, k)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(valid, count / days * per, np.nan)
+    return mc.assign(CL=cl * per, UCL=ucl, LCL=lcl,
+                     異常點=(rate > ucl) | (rate < lcl))
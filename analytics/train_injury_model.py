@@ -0,0 +1,24 @@
+# ── 傷害風險模型離線訓練（見 analytics/injury_model.py）─────────────
+#     python -m analytics.train_injury_model 資料檔.xlsx [injury_model.json]
+# 儀表板只讀取輸出的 JSON；資料檔更新後重新執行即可
+import sys
+
+from .injury_model import MODEL_FOLDS, MODEL_PATH, save_injury_model, train_injury_model
+from .loader import load_workbook
+
+
+def main(argv):
+    if len(argv) < 2:
+        sys.exit("usage: python -m analytics.train_injury_model 資料檔.xlsx [injury_model.json]")
+    _, _, df_fall = load_workbook(argv[1])
+    out = argv[2] if len(argv) > 2 else MODEL_PATH
+    model = train_injury_model(df_fall, argv[1])
+    save_injury_model(model, out)
+    for name, m in model["outcomes"].items():
+        print(f"{name}: {m['events']}/{model['n']} 件，AUC {m['auc']:.3f}"
+              f"（{MODEL_FOLDS} 折 CV {m['cv_auc']:.3f}）")
+    print(f"→ {out}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -9,7 +9,44 @@ import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
+import logging
+import multiprocessing
+import os
+import threading
 import warnings
+from collections import OrderedDict
+from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor,
+                                TimeoutError as FutureTimeout)
+from concurrent.futures.process import BrokenProcessPool
+from figures import (FULL_WIDTH_PX, figure_cache_stats, figure_memo,
+                     new_figure_store, payload_bytes, register_house_template,
+                     trend_plan, trend_trace)
+from analytics import (
+    HIGH_SAC, INJ_LABEL_MAP, PSYCH_ROLE, TIMESLOT_ORDER,
+    FilterSpec, filter_events, filter_falls, in_window,
+    index_unit_hierarchy, load_unit_hierarchy, role_members, rows_in_wards,
+    unit_path,
+    load_drug_sheet, load_harm_sheet, load_workbook,
+    build_month_prefix, monthly_rate_frame, split_rate_series,
+    update_rate_table,
+    RATE_ALL_CAT, NELSON_RULES, build_spc_cube, nelson_board, u_chart_frame,
+    CUSUM_H, monitor_frame, update_monitor,
+    bed_day_frame, build_its, its_effects, its_series_effects, load_interventions,
+    FUNNEL_Z, funnel_limits, unit_rate_frame,
+    category_counts, kpi_summary, safe_pct, unit_counts,
+    PERIOD_DIMS, baseline_periods, build_period_cube, default_periods, period_counts,
+    period_elapsed, period_kpi_parts, period_label, period_month_labels, period_months,
+    ci_text, interval_batch, bootstrap_deltas,
+    forecast_series, future_months, seasonal_forecast, update_forecasts, year_total,
+    location_injury_frame, location_injury_pivot, top_units,
+    page_frame,
+    dept_fall_profile, dx_injury_summary, feature_pareto, risk_factor_matrix,
+    RULE_MAX_LEN, RULE_MIN_COUNT, fall_rules,
+    DRUG_FACTORS, RISK_FACTORS, MODEL_PATH, load_injury_model, odds_ratio_frame,
+    HARM_TYPES, ADMIT_BINS, ADMIT_MAX_DAY, ADMIT_MIN_N, ADMIT_STRATA, ADMIT_WINDOW,
+    admission_counts, admission_curves, build_admission_cube, day_bin_counts,
+    median_day, window_counts,
+)
 warnings.filterwarnings('ignore')
 
 st.set_page_config(
@@ -95,42 +132,40 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-# ── 軸標題統一樣式（深色，確保可讀）────────────────────────
-# 所有圖表軸標題使用此字典，確保顏色一致
-AXIS_TITLE_FONT  = dict(size=13, color="#1C2833", family="Arial")   # 深黑，最高對比
-AXIS_TICK_FONT   = dict(size=10, color="#2C3E50", family="Arial")   # 深藍灰
-TITLE_FONT       = dict(size=16, color="#2C3E50", family="Arial")
-GRID_COLOR       = "#EAECEE"
-ZERO_LINE_COLOR  = "#BDC3C7"
-PLOT_BG          = "#FFFFFF"
-PAPER_BG         = "#FFFFFF"
+# ── 圖表統一樣式：字型 / 底色 / 格線集中於院內樣板（figures.py）──
+register_house_template()
 
 # ── 常數 ─────────────────────────────────────────────────────
-TIMESLOT_MAP = {
-    "00:01-02:00":"00-02時","00:00-02:00":"00-02時",
-    "02:01-04:00":"02-04時","02:00-04:00":"02-04時",
-    "04:01-06:00":"04-06時","04:00-06:00":"04-06時",
-    "06:01-08:00":"06-08時","06:00-08:00":"06-08時",
-    "08:01-10:00":"08-10時","08:00-10:00":"08-10時",
-    "10:01-12:00":"10-12時","10:00-12:00":"10-12時",
-    "12:01-14:00":"12-14時","12:00-14:00":"12-14時",
-    "14:01-16:00":"14-16時","14:00-16:00":"14-16時",
-    "16:01-18:00":"16-18時","16:00-18:00":"16-18時",
-    "18:01-20:00":"18-20時","18:00-20:00":"18-20時",
-    "20:01-22:00":"20-22時","20:00-22:00":"20-22時",
-    "22:01-24:00":"22-24時","22:00-24:00":"22-24時",
-}
-TIMESLOT_ORDER = [
-    "00-02時","02-04時","04-06時","06-08時","08-10時","10-12時",
-    "12-14時","14-16時","16-18時","18-20時","20-22時","22-24時",
-]
 CATEGORY_COLORS = {
     "跌倒":"#003f5c","藥物":"#444e86","管路":"#955196",
     "傷害":"#dd5182","醫療":"#ff6e54","治安":"#ffa600","其他":"#7F8C8D",
 }
 SAC_DESC   = {1:"死亡", 2:"重大傷害", 3:"輕中度", 4:"無傷害"}
 SAC_COLORS = {1:"#7B241C", 2:"#C0392B", 3:"#F39C12", 4:"#1E8449"}
-HIGH_SAC   = [1, 2]
+
+# ── 單位階層（全院 → 部門 → 病房群組 → 病房）───────────────
+# 由 unit_hierarchy.json 載入（格式見 analytics/hierarchy.py）
+UNIT_HIERARCHY_PATH = "unit_hierarchy.json"
+UNIT_INDEX  = index_unit_hierarchy(load_unit_hierarchy(UNIT_HIERARCHY_PATH))
+UNIT_GROUPS = UNIT_INDEX["groups"]
+
+# ── 政策介入清單（趨勢圖標注 + 中斷時間序列分析，見 analytics/its.py）──
+INTERVENTIONS_PATH = "interventions.json"
+INTERVENTIONS = load_interventions(INTERVENTIONS_PATH)
+
+# ── 傷害風險模型（離線訓練，見 analytics/injury_model.py）；儀表板只讀檔 ──
+INJURY_MODEL_PATH = MODEL_PATH
+
+
+@st.cache_resource(show_spinner=False)
+def _injury_model(path, mtime):
+    """模型檔內容；檔案重新訓練（mtime 變更）時重讀"""
+    return load_injury_model(path)
+
+
+INJURY_MODEL = _injury_model(
+    INJURY_MODEL_PATH,
+    os.path.getmtime(INJURY_MODEL_PATH) if os.path.exists(INJURY_MODEL_PATH) else None)
 
 CTRL_CL_COLOR   = "#5D6D7E"
 CTRL_UCL_COLOR  = "#E74C3C"
@@ -140,118 +175,15 @@ OUTLIER_COLOR   = "#C0392B"
 
 # ── 資料載入 ─────────────────────────────────────────────────
 @st.cache_data(show_spinner="📂 載入資料中...")
-def load_data(path):
-    xl  = pd.ExcelFile(path)
-    df  = pd.read_excel(xl, sheet_name="109-113全部")
-    df["發生日期"] = pd.to_datetime(df["發生日期"], errors="coerce")
-    df  = df[df["發生日期"].notna()].copy()
-    df["年月"]    = df["發生日期"].dt.to_period("M").astype(str)
-    df["SAC_num"] = pd.to_numeric(df["SAC"], errors="coerce")
-    df["單位"]    = (df["通報者資料-通報者服務單位"]
-                     .astype(str).str.strip().str.upper()
-                     .replace({"NAN":"未知","":"未知"}))
-    df["時段標準"] = df["發生時段"].map(TIMESLOT_MAP)
-    cat_map = {
-        "跌倒事件":"跌倒","藥物事件":"藥物","管路事件":"管路",
-        "傷害行為":"傷害","醫療事件":"醫療","治安事件":"治安",
-        "手術事件":"醫療","麻醉事件":"醫療","輸血事件":"醫療",
-        "不預期心跳停止":"醫療","檢查檢驗":"其他","檢驗檢查":"其他",
-        "公共意外":"其他","其他事件":"其他",
-    }
-    df["事件大類"] = df["事件類別"].map(cat_map).fillna("其他")
-
-    # ── 診斷分類函數 (classify_dx) ──────────────────────────
-    def classify_dx(text):
-        if pd.isna(text): return "其他"
-        t = str(text).lower()
-        if any(k in t for k in ["思覺失調","精神病","psycho","schizo"]):
-            return "思覺失調/精神病"
-        if any(k in t for k in ["雙相","躁症","bipolar","manic"]):
-            return "雙相/躁症"
-        if any(k in t for k in ["憂鬱","depression","depressive"]):
-            return "憂鬱症"
-        if any(k in t for k in ["失智","dementia"]):
-            return "失智症"
-        if any(k in t for k in ["帕金森","parkinson"]):
-            return "帕金森氏症"
-        if any(k in t for k in ["腦梗","中風","stroke","i63","i64",
-                                  "腦血管","腦出血","ich"]):
-            return "腦血管病"
-        if any(k in t for k in ["骨折","fr.","fracture"," # "]):
-            return "骨折相關"
-        if any(k in t for k in ["糖尿病","diabetes"," dm","dm ","dm,","dm."]):
-            return "糖尿病"
-        if any(k in t for k in ["腎病","ckd","腎衰","腎功能"]):
-            return "腎病"
-        if any(k in t for k in ["肝病","肝炎","肝硬化","肝衰"]):
-            return "肝病"
-        if any(k in t for k in ["心臟","心衰","心肌","冠狀動脈","心房","心室"]):
-            return "心臟病"
-        if any(k in t for k in ["肺炎","呼吸","copd","氣喘","支氣管"]):
-            return "呼吸系統"
-        if any(k in t for k in ["癌","腫瘤","惡性","malignant","carcinoma","lymphoma"]):
-            return "腫瘤/癌症"
-        return "其他"
-
-    df["診斷分類"] = df["發生者資料-診斷"].apply(classify_dx)
-
-    # ── 跌倒深度分析資料（跌倒工作表 merge 全部工作表科別與影響程度）
-    df_fall = pd.read_excel(xl, sheet_name="109-113跌倒")
-    df_fall["發生日期"] = pd.to_datetime(df_fall["發生日期"], errors="coerce")
-    df_fall = df_fall[df_fall["發生日期"].notna()].copy()
-    df_fall["年月"] = df_fall["發生日期"].dt.to_period("M").astype(str)
-    cols_from_all = [
-        "通報案號",
-        "病人/住民-所在科別",
-        "病人/住民-事件發生後對病人健康的影響程度",
-        "病人/住民-事件發生後對病人健康的影響程度(彙總)",
-        "單位",   # 供精神科下鑽篩選使用
-    ]
-    # 去除空白避免比對失敗
-    for col in cols_from_all[1:]:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.strip()
-    df_fall = df_fall.merge(df[cols_from_all], on="通報案號", how="left")
-
-    # ── 事件說明特徵萃取 (extract_fall_features) ─────────────
-    FALL_FEATURES = {
-        "地點_床邊下床":     ["下床","床邊","起床","離床","坐起"],
-        "地點_浴廁":        ["廁所","洗手間","浴室","如廁","洗澡"],
-        "地點_走廊行走":     ["走廊","走路","行走","散步"],
-        "地點_椅子輪椅":     ["椅子","輪椅","便盆椅"],
-        "機轉_滑倒":        ["滑","打滑","濕"],
-        "機轉_頭暈血壓低":   ["頭暈","暈","血壓低","姿位性"],
-        "機轉_自行起身未告知":["自行","未按鈴","未通知","未叫護"],
-        "機轉_站不穩腳軟":   ["站不穩","腳軟","無力","腿軟"],
-        "發現_護理人員巡視":  ["巡房","巡視","護士發現","護理師發現"],
-        "發現_聲響":        ["聲音","聲響","跌倒聲"],
-        "傷害_頭部":        ["頭","額頭","頭皮"],
-        "傷害_下肢":        ["腳","膝蓋","足部","下肢","腳踝"],
-        "傷害_臀髖":        ["臀","髖"],
-        "病況_精神症狀":     ["幻覺","妄想","躁動","激動","衝動"],
-        "病況_約束相關":     ["約束","保護帶","掙脫","解開"],
-    }
-    def extract_fall_features(text):
-        t = str(text) if not pd.isna(text) else ""
-        return {feat: any(k in t for k in kws)
-                for feat, kws in FALL_FEATURES.items()}
-
-    feat_df = df_fall["事件說明"].apply(
-        lambda x: pd.Series(extract_fall_features(x)))
-    df_fall = pd.concat([df_fall.reset_index(drop=True),
-                         feat_df.reset_index(drop=True)], axis=1)
-
-    db  = pd.read_excel(xl, sheet_name="住院人日數")
-    db["年月"] = pd.to_datetime(db["年月"]).dt.to_period("M").astype(str)
-    db["單位"] = db["單位"].astype(str).str.strip().str.upper()
-    tot = db.groupby("年月", as_index=False)["住院人日數"].sum()
-    tot["單位"] = "全院"
-    db  = pd.concat([db, tot], ignore_index=True)
-    return df, db, df_fall
+def load_data(path, data_version):
+    """data_version 只作快取鍵：資料檔被替換後重新讀取"""
+    return load_workbook(path)
 
 EXCEL_PATH = "109-113全部_藥物跌倒管路傷害醫療治安__115_02_01.xlsx"
 try:
-    df_all, df_bed, df_fall_base = load_data(EXCEL_PATH)
+    # 資料版本：檔名 + 修改時間；讀檔與預計算快取皆以此為鍵，資料檔更新後自動重建
+    DATA_VERSION = f"{EXCEL_PATH}@{os.path.getmtime(EXCEL_PATH):.0f}"
+    df_all, df_bed, df_fall_base = load_data(EXCEL_PATH, DATA_VERSION)
 except FileNotFoundError:
     st.error(f"❌ 找不到資料檔：{EXCEL_PATH}，請確認與 app.py 在同一資料夾。")
     st.stop()
@@ -261,29 +193,9 @@ except Exception as e:
 
 
 # ════════════════════════════════════════════════════════════
-#  資料清理：讀檔後、任何 groupby 之前套用
-#  1) normalize_category：統一 NaN/空白/undefined/None
-#  2) label_map：代碼 → 顯示名稱
-#  3) 固定排序常數
+#  顯示用對照與排序（欄位清理已在 analytics.load_workbook 完成）
 # ════════════════════════════════════════════════════════════
 
-def normalize_category(df, col, missing_label="未填/其他"):
-    """把 NaN、空字串、'undefined'、'nan'、None 統一成 missing_label"""
-    if col not in df.columns:
-        return df
-    df = df.copy()
-    df[col] = (df[col].astype(str)
-               .str.strip()
-               .replace({"nan": missing_label,
-                         "none": missing_label,
-                         "None": missing_label,
-                         "undefined": missing_label,
-                         "Undefined": missing_label,
-                         "": missing_label,
-                         "NaN": missing_label}))
-    df[col] = df[col].where(df[col].notna(), missing_label)
-    return df
-
 # ── 顯示名稱映射（代碼 → 中文顯示名稱）─────────────────────
 LABEL_MAP = {
     # 傷害程度
@@ -318,43 +230,215 @@ def display_label(val, fallback=None):
 # ── 固定排序常數 ─────────────────────────────────────────────
 INJ_ORDER    = ["無傷害", "輕度", "中度", "重度", "極重度", "死亡", "無法判定"]
 SAC_ORDER    = [1, 2, 3, 4]
-INJ_LABEL_MAP = {
-    "無傷害": "無傷害", "輕度": "輕度", "中度": "中度",
-    "重度": "重度", "極重度": "極重度", "死亡": "死亡",
-    "無法判定傷害嚴重程度": "無法判定",
-}
 
-# ── 套用 normalize_category 到關鍵欄位 ──────────────────────
-_NORM_COLS_ALL = [
-    "事件大類", "事件類別", "單位",
-    "病人/住民-所在科別",
-    "病人/住民-事件發生後對病人健康的影響程度",
-    "病人/住民-事件發生後對病人健康的影響程度(彙總)",
-    "通報者資料-工作年資", "SAC",
-]
-for _col in _NORM_COLS_ALL:
-    df_all = normalize_category(df_all, _col)
-
-_NORM_COLS_FALL = [
-    "病人/住民-所在科別",
-    "病人/住民-事件發生後對病人健康的影響程度",
-    "病人/住民-事件發生後對病人健康的影響程度(彙總)",
-    "跌倒事件發生對象-事件發生時有無陪伴者",
-    "跌倒事件發生對象-事件發生前是否為跌倒高危險群",
-    "跌倒事件發生對象-最近一年是否曾經跌倒",
-    "跌倒事件發生對象-當事人當時意識狀況",
-]
-for _col in _NORM_COLS_FALL:
-    df_fall_base = normalize_category(df_fall_base, _col)
-
-# 傷害程度簡短標籤（顯示用）
-_inj_col = "病人/住民-事件發生後對病人健康的影響程度"
-if _inj_col in df_fall_base.columns:
-    df_fall_base["傷害程度顯示"] = df_fall_base[_inj_col].map(
-        INJ_LABEL_MAP).fillna(df_fall_base[_inj_col])
-if _inj_col in df_all.columns:
-    df_all["傷害程度顯示"] = df_all[_inj_col].map(
-        INJ_LABEL_MAP).fillna(df_all[_inj_col])
+# ════════════════════════════════════════════════════════════
+#  預計算結構（實作在 analytics.prefix / analytics.rates）
+#  month_px    — 月份前綴和陣列，依 data_version 建立一次
+#  rate_series — 單位 / 群組 × 事件大類 月發生率物化序列，增量更新
+#  spc_cube    — 同一批序列的 u 管制圖矩陣（analytics.spc），隨物化表重建
+#  monitor     — 同一批序列的 CUSUM / EWMA 執行狀態（analytics.monitor），只推進新月份
+#  its_fits    — 同一批序列對各政策介入的分段迴歸（analytics.its）
+#  forecasts   — 同一批序列的季節性預測模型（analytics.forecast），以前次係數為起點重擬合
+# ════════════════════════════════════════════════════════════
+@st.cache_resource(show_spinner=False)
+def _month_prefix(_df, _db, data_version):
+    """cache_resource 不複製；回傳陣列視為唯讀"""
+    return build_month_prefix(_df, _db)
+
+
+@st.cache_resource(show_spinner=False)
+def _rate_store():
+    import threading
+    return {"version": None, "groups": None, "table": None, "series": {},
+            "spc": None, "monitor": None, "forecast": None, "lock": threading.Lock()}
+
+
+def refresh_rate_table(df, db, data_version):
+    """
+    依 data_version 增量更新物化表；
+    回傳 ({(單位, 事件大類): 月序列}, SPC 矩陣, CUSUM / EWMA 監測狀態, 季節性預測模型)
+    """
+    store = _rate_store()
+    with store["lock"]:
+        if store["version"] != data_version or store["groups"] != UNIT_GROUPS:
+            # 階層設定變更 → 所有彙總列與監測狀態都要重建
+            rebuild = store["groups"] != UNIT_GROUPS
+            table = update_rate_table(store["table"], df, db, UNIT_GROUPS,
+                                      rebuild=rebuild)
+            store["table"]   = table
+            store["series"]  = split_rate_series(table)
+            store["spc"]     = build_spc_cube(table, bed_day_frame(db, UNIT_GROUPS))
+            store["monitor"] = update_monitor(None if rebuild else store["monitor"],
+                                              store["spc"])
+            store["forecast"] = update_forecasts(None if rebuild else store["forecast"],
+                                                 store["spc"])
+            store["version"] = data_version
+            store["groups"]  = dict(UNIT_GROUPS)
+    return store["series"], store["spc"], store["monitor"], store["forecast"]
+
+
+@st.cache_resource(show_spinner=False)
+def _its_fits(_cube, data_version, groups, interventions):
+    """所有序列的介入 ITS 擬合；資料、階層或介入清單變更時重算"""
+    return build_its(_cube, interventions)
+
+
+@st.cache_resource(show_spinner=False)
+def _period_cubes(_df, _df_fall, data_version, start_month):
+    """年度比較的件數陣列（analytics.periods）；資料或年度起始月變更時重建"""
+    return {"fall": build_period_cube(_df_fall, PERIOD_DIMS, start_month),
+            "all":  build_period_cube(_df, ("事件大類",), start_month)}
+
+
+@st.cache_resource(show_spinner=False)
+def _admission_cube(_df_harm, data_version):
+    """傷害事件的入院後天數前綴和陣列（analytics.admission）；資料變更時重建"""
+    return build_admission_cube(_df_harm)
+
+
+month_px = _month_prefix(df_all, df_bed, DATA_VERSION)
+rate_series, spc_cube, monitor, forecasts = refresh_rate_table(df_all, df_bed, DATA_VERSION)
+its_fits = _its_fits(spc_cube, DATA_VERSION, UNIT_GROUPS, INTERVENTIONS)
+
+
+@st.cache_data(show_spinner=False)
+def _intervals(kind, k, n):
+    """
+    整批指標的 95% 信賴區間（analytics.intervals）；k / n 為 tuple，
+    同一篩選條件下的重跑直接命中快取。回傳 (下限 list, 上限 list)
+    """
+    lo, hi = interval_batch(kind, k, n)
+    return lo.tolist(), hi.tolist()
+
+
+@st.cache_data(show_spinner=False)
+def _series_outlook(counts, months, future):
+    """單一月件數序列的季節性預測（analytics.forecast）；依輸入內容快取"""
+    return forecast_series(counts, months, future)
+
+
+@st.cache_resource(show_spinner=False)
+def _figure_store():
+    """跨 session 共用的序列化圖表快取（見 figures.py）"""
+    return new_figure_store()
+
+
+memo_figure = figure_memo(_figure_store())
+
+# ── 圖表輸出：統一經 show_chart，記錄每張圖送往瀏覽器的 JSON 大小 ──
+_payload_log = logging.getLogger("hps.payload")
+_payload     = []          # 本次 rerun 的 (圖名, bytes)
+
+
+def show_chart(fig, where=st, **kwargs):
+    """st.plotly_chart 統一出口；theme=None 才會套用院內樣板"""
+    name, size = payload_bytes(fig)
+    _payload.append((name or "(未命名)", size))
+    _payload_log.debug("figure %s: %d bytes", name, size)
+    return where.plotly_chart(fig, use_container_width=True, theme=None,
+                              **kwargs)
+
+
+# ── 明細表：伺服器端分頁（排序 / 關鍵字在完整表上做，只送出當頁）──
+TABLE_PAGE_SIZE = 50
+
+
+@st.fragment
+def paged_table(df, key, style=None, max_height=400, page_size=TABLE_PAGE_SIZE):
+    """
+    df 為已整理好的顯示用表；style(page_df) → Styler 只套用在當頁。
+    排序、篩選、換頁只重跑此區塊
+    """
+    _c1, _c2, _c3, _c4 = st.columns([2, 1, 2, 1])
+    _sort = _c1.selectbox("排序欄位", ["（原順序）"] + list(df.columns),
+                          key=f"{key}_sort")
+    _desc = _c2.toggle("遞減", key=f"{key}_desc",
+                       disabled=_sort == "（原順序）")
+    _q    = _c3.text_input("關鍵字篩選", key=f"{key}_q",
+                           placeholder="任一文字欄位包含…")
+    _sort_by = None if _sort == "（原順序）" else _sort
+
+    _page_key = f"{key}_page"
+    page, n_rows, n_pages, cur = page_frame(
+        df, st.session_state.get(_page_key, 1), page_size,
+        sort_by=_sort_by, ascending=not _desc, query=_q)
+    if st.session_state.get(_page_key, 1) != cur:
+        st.session_state[_page_key] = cur
+    _c4.number_input(f"頁次 / {n_pages}", min_value=1, max_value=n_pages,
+                     step=1, key=_page_key, disabled=n_pages == 1)
+
+    page = page.reset_index(drop=True)
+    st.dataframe(style(page) if style is not None else page,
+                 use_container_width=True,
+                 height=min(max_height, 35 * (len(page) + 1) + 3))
+    _lo = (cur - 1) * page_size
+    st.caption(f"第 {_lo + 1 if n_rows else 0}–{_lo + len(page)} 筆／"
+               f"符合 {n_rows} 筆（共 {len(df)} 筆）")
+
+
+# ── 重運算區塊：背景執行緒計算，主畫面先顯示 KPI / 趨勢 ──────────
+# 以 (區塊, 資料版本, 篩選條件…) 為鍵保留 future；逾時的區塊下次 rerun
+# 直接取用已完成的結果，不重算
+SECTION_TIMEOUT = 8.0        # 單一區塊最長等待秒數
+SECTION_JOBS_MAX = 64
+
+
+@st.cache_resource(show_spinner=False)
+def _section_pool():
+    return {"pool": ThreadPoolExecutor(max_workers=4,
+                                       thread_name_prefix="hps-section"),
+            "jobs": OrderedDict(), "lock": threading.Lock()}
+
+
+def submit_section(name, key, fn, *args):
+    """fn(*args) 只能做純資料計算（背景執行緒內不可呼叫 st.*）"""
+    res = _section_pool()
+    key = (name, key)
+    with res["lock"]:
+        fut = res["jobs"].get(key)
+        if fut is None or (fut.done() and fut.exception() is not None):
+            fut = res["pool"].submit(fn, *args)
+            res["jobs"][key] = fut
+            while len(res["jobs"]) > SECTION_JOBS_MAX:
+                res["jobs"].popitem(last=False)
+        else:
+            res["jobs"].move_to_end(key)
+    return fut
+
+
+@st.cache_resource(show_spinner=False)
+def _boot_pool():
+    """bootstrap 用 process pool；spawn 子行程不繼承 Streamlit 執行緒狀態（Windows 亦同）"""
+    return ProcessPoolExecutor(max_workers=min(4, os.cpu_count() or 1),
+                               mp_context=multiprocessing.get_context("spawn"))
+
+
+@st.cache_data(show_spinner="🔁 bootstrap 重抽中...")
+def _boot_deltas(specs):
+    """
+    年度比較差異的 bootstrap 信賴區間（analytics.bootstrap）；固定種子，
+    依輸入內容快取 —— 資料未變時 rerun 直接取結果。pool 異常時改在本行程計算
+    """
+    try:
+        return bootstrap_deltas(specs, executor=_boot_pool())
+    except BrokenProcessPool:
+        _boot_pool.clear()
+        return bootstrap_deltas(specs)
+
+
+def section_result(fut, label):
+    """等待背景結果；未完成時先放佔位提示，逾時回傳 None（結果留待下次 rerun）"""
+    if not fut.done():
+        _ph = st.empty()
+        _ph.info(f"⏳ {label}計算中…")
+        try:
+            fut.result(timeout=SECTION_TIMEOUT)
+        except FutureTimeout:
+            _ph.warning(f"⏳ {label}計算時間較長，完成後於下次操作時顯示。")
+            return None
+        _ph.empty()
+    return fut.result()
+
 
 # ════════════════════════════════════════════════════════════
 #  session_state 全域篩選器初始化
@@ -382,33 +466,16 @@ if _cur_e not in _all_months or _cur_e < _data_end:
     st.session_state["date_range"] = (_cur_s if _cur_s in _all_months else _data_start, _data_end)
 
 
-def filter_df(base_df=None, use_fall=False):
+def current_filter_spec():
     """
-    統一篩選函數 — 所有圖表都呼叫此函數，避免各圖重複過濾不一致。
-    base_df=None → 使用 df_all；use_fall=True → 使用 df_fall_base
+    由側邊欄 session_state 組出 FilterSpec — 全頁唯一讀取篩選狀態之處；
+    其後所有計算只接收 spec，不再直接讀 session_state
     """
-    src = (df_fall_base if use_fall else
-           (base_df if base_df is not None else df_all))
     s, e = st.session_state["date_range"]
-    df   = src[(src["年月"] >= s) & (src["年月"] <= e)].copy()
-
-    if not use_fall:
-        u = st.session_state["unit"]
-        if u == "W11+W12（精神科）" and "單位" in df.columns:
-            df = df[df["單位"].isin(["W11","W12"])]
-        elif u != "全院" and "單位" in df.columns:
-            df = df[df["單位"] == u]
-        cat = st.session_state["event_type"]
-        if cat != "全部" and "事件大類" in df.columns:
-            df = df[df["事件大類"] == cat]
-        # SAC 篩選固定全選（側邊欄已移除 SAC 篩選器）
-
-    dept = st.session_state["dept"]
-    dept_col = "病人/住民-所在科別"
-    if dept != "全部科別" and dept_col in df.columns:
-        df = df[df[dept_col] == dept]
-
-    return df
+    return FilterSpec.resolve(UNIT_INDEX, s, e,
+                              unit=st.session_state["unit"],
+                              cat=st.session_state["event_type"],
+                              dept=st.session_state["dept"])
 
 
 def render_breadcrumb():
@@ -419,8 +486,8 @@ def render_breadcrumb():
     feat = st.session_state.get("feature_tag", [])
     if dept != "全部科別":
         parts.append(f"🏬 {dept}")
-    if unit != "全院":
-        parts.append(f"🛏 {unit}")
+    for node in unit_path(UNIT_INDEX, unit)[1:]:
+        parts.append(f"{'🏢' if node in UNIT_GROUPS else '🛏'} {node}")
     if feat:
         parts.append(f"🔍 {' + '.join(feat[:2])}{'…' if len(feat)>2 else ''}")
     crumb_html = " <span style='color:#AEB6BF'>›</span> ".join(
@@ -451,12 +518,14 @@ with st.sidebar:
 
     st.markdown("---")
     st.markdown("### 🏬 發生單位")
-    unit_opts = ["全院", "W11+W12（精神科）"] + sorted(
+    # 階層節點（全院 / 部門 / 群組，依設定檔順序縮排）在前，單一病房在後
+    unit_opts = ["全院"] + list(UNIT_GROUPS) + sorted(
         [u for u in df_all["單位"].dropna().unique()
-         if u not in ["未知","未填/其他",""]])
+         if u not in ["未知","未填/其他",""] and u not in UNIT_GROUPS])
     _u = st.session_state["unit"]
     sel_unit = st.selectbox("單位", unit_opts,
         index=unit_opts.index(_u) if _u in unit_opts else 0,
+        format_func=lambda u: "　" * UNIT_INDEX["depth"].get(u, 0) + u,
         label_visibility="collapsed", key="_sb_unit")
     st.session_state["unit"] = sel_unit
 
@@ -531,26 +600,50 @@ with st.sidebar:
     st.markdown("---")
 
 
-# ── 過濾（使用 filter_df() 統一介面，同時保留舊變數名稱相容）────
-dff      = filter_df()
-dff_fall = filter_df(use_fall=True)
-dff_dx   = filter_df()   # 已含 sel_dept 篩選（filter_df 內處理）
-
-if sel_unit == "W11+W12（精神科）":
-    df_bed_f = (df_bed[df_bed["單位"].isin(["W11", "W12"])]
-                .groupby("年月", as_index=False)["住院人日數"].sum())
-else:
-    bed_key  = "全院" if sel_unit == "全院" else sel_unit
-    df_bed_f = df_bed[df_bed["單位"] == bed_key].copy()
-mc = dff.groupby("年月").size().reset_index(name="件數").sort_values("年月")
-mc = mc.merge(df_bed_f[["年月","住院人日數"]], on="年月", how="left")
-mc["發生率"] = (mc["件數"] / mc["住院人日數"] * 1000).round(2).fillna(0)
+# ── 過濾（所有圖表共用同一個 FilterSpec，避免各圖重複過濾不一致）────
+spec     = current_filter_spec()
+dff      = filter_events(df_all, spec)
+
+# 逐月件數 / 發生率：讀物化序列（不再每次重新分組合併住院人日數）
+mc = monthly_rate_frame(rate_series, month_px, spec)
 mc["年月顯示"] = mc["年月"].str.replace("-", "/", regex=False)
 dff["年月顯示"] = dff["年月"].str.replace("-", "/", regex=False)
+# u 管制圖（戰情室 UCL 警示卡與管制圖共用）；有效月份不足時為 None
+# u 管制圖與 EWMA / CUSUM 的 ū 要含零事件月，另取補零的逐月表
+mc_z = monthly_rate_frame(rate_series, month_px, spec, zeros=True)
+mc_z["年月顯示"] = mc_z["年月"].str.replace("-", "/", regex=False)
+mc_spc = u_chart_frame(spc_cube, mc_z, spec)
+mc_mon = monitor_frame(monitor, mc_z, spec) if not mc.empty else None
+
+
+def its_notes(x_values, effects):
+    """
+    趨勢圖的介入標注 [(x, 文字)]：只標落在目前 X 軸（年月顯示）內的介入，
+    有 ITS 估計者附 水準 IRR 與 斜率變化（95% CI）
+    """
+    est = {e["month"]: e for e in effects}
+    notes = []
+    for month, label in INTERVENTIONS:
+        x = month.replace("-", "/")
+        if x not in set(x_values):
+            continue
+        txt = f"▼ {label}"
+        e = est.get(month)
+        if e is not None:
+            txt += (f"<br>水準 IRR {e['level_irr']:.2f}（{e['level_lo']:.2f}–{e['level_hi']:.2f}）"
+                    f"<br>斜率 {e['slope_pct']:+.1f}%/月（{e['slope_lo']:+.1f}～{e['slope_hi']:+.1f}）"
+                    f"・{e['model']}")
+        notes.append((x, txt))
+    return notes
+
+
+# 指定科別時以補零的 mc_z 擬合（零事件月不能從 Poisson / NB 模型中省略）
+mc_its = its_notes(mc["年月顯示"], its_effects(its_fits, mc_z, spec, INTERVENTIONS))
 
 # ════════════════════════════════════════════════════════════
-#  📅 年度比較分析（2024 vs 2025）— 固定全院層級
-#  不受科別篩選器影響；使用 df_fall_base（全量跌倒資料）
+#  📅 年度比較分析（預設最近兩個年度，可自選）— 固定全院層級
+#  不受科別篩選器影響；使用全量跌倒資料的期間件數陣列（analytics.periods）
+#  範圍、年度起始月與比較年度留在側邊欄；指標只在「跌倒事件分析」分頁開啟時計算
 # ════════════════════════════════════════════════════════════
 
 # ── 住院 / 含護理之家 切換 ────────────────────────────────
@@ -560,62 +653,31 @@ with st.sidebar:
     inc_ltc = st.radio("跌倒統計範圍", ["只看住院", "含護理之家"],
                        index=0, horizontal=True,
                        label_visibility="collapsed")
+    yr_start = st.selectbox(
+        "年度起始月", list(range(1, 13)), index=0, key="_sb_yr_start",
+        format_func=lambda m: "1 月（曆年）" if m == 1 else f"{m} 月（會計年度）")
+    period_cubes = _period_cubes(df_all, df_fall_base, DATA_VERSION, yr_start)
+    _yr_default  = default_periods(period_cubes["fall"])
+    # 起始月不同，期間編號的意義也不同 → 各自一個 widget key
+    yr_periods = sorted(st.multiselect(
+        "比較年度", period_cubes["fall"]["periods"], default=_yr_default,
+        key=f"_ms_yr_periods_{yr_start}",
+        format_func=lambda p: period_label(p, yr_start)))
+    if len(yr_periods) < 2:
+        st.caption(f"⚠️ 至少選兩個年度；暫以 {' vs '.join(period_label(p, yr_start) for p in _yr_default)} 比較")
+        yr_periods = _yr_default
 
 EXCLUDE_DEPT = [] if inc_ltc == "含護理之家" else ["護理之家"]
-
-# 全量跌倒資料（含年份欄位）—— 年度比較專用
-_fb = df_fall_base.copy()
-_fb["年"]  = pd.to_datetime(_fb["年月"], format="%Y-%m").dt.year
-_fb["月"]  = pd.to_datetime(_fb["年月"], format="%Y-%m").dt.month
-if EXCLUDE_DEPT:
-    _fb = _fb[~_fb["病人/住民-所在科別"].isin(EXCLUDE_DEPT)]
-
-_fb24 = _fb[_fb["年"] == 2024]
-_fb25 = _fb[_fb["年"] == 2025]
-
 INJ_COL_SUM  = "病人/住民-事件發生後對病人健康的影響程度(彙總)"
 INJ_COL_DET  = "病人/住民-事件發生後對病人健康的影響程度"
 DEPT_COL_YR  = "病人/住民-所在科別"
-
-# 全院事件（傷害行為）
-_all_yr = df_all.copy()
-_all_yr["年"] = pd.to_datetime(
-    _all_yr["年月"], format="%Y-%m", errors="coerce").dt.year
-_all_yr["月"] = pd.to_datetime(
-    _all_yr["年月"], format="%Y-%m", errors="coerce").dt.month
-_harm24 = _all_yr[(_all_yr["年"]==2024) & (_all_yr["事件大類"]=="傷害")]
-_harm25 = _all_yr[(_all_yr["年"]==2025) & (_all_yr["事件大類"]=="傷害")]
-_harm25_last_m = int(_harm25["月"].max()) if not _harm25.empty else 1
-
-def _safe_pct(num, den):
-    return round(num / den * 100, 1) if den > 0 else 0.0
-
-def _inj_rate(df):
-    if INJ_COL_SUM not in df.columns: return 0.0
-    n = len(df)
-    return _safe_pct((df[INJ_COL_SUM] == "有傷害").sum(), n)
-
-def _psych_pct(df):
-    if DEPT_COL_YR not in df.columns: return 0.0
-    return _safe_pct((df[DEPT_COL_YR] == "精神科").sum(), len(df))
-
-def _mid_above_rate(df):
-    if INJ_COL_DET not in df.columns: return 0.0
-    sub = df[df[DEPT_COL_YR].isin(["外科","內科"])]
-    return _safe_pct(
-        sub[INJ_COL_DET].isin(["中度","重度","極重度","死亡"]).sum(),
-        len(sub))
-
-# 指標計算
-v24_inj    = _inj_rate(_fb24)
-v25_inj    = _inj_rate(_fb25)
-v24_psych  = _psych_pct(_fb24)
-v25_psych  = _psych_pct(_fb25)
-v24_mid    = _mid_above_rate(_fb24)
-v25_mid    = _mid_above_rate(_fb25)
-n24_harm   = len(_harm24)
-n25_harm   = len(_harm25)
-harm25_est = round(n25_harm / _harm25_last_m * 12) if _harm25_last_m > 0 else n25_harm
+# 年度比較配色（由舊到新，最後兩個固定為前期藍 / 本期紅）：(主色, 折線誤差線, 長條誤差線)
+YR_COLORS    = [("#7D3C98", "rgba(125,60,152,0.45)", "#4A235A"),
+                ("#148F77", "rgba(20,143,119,0.45)", "#0B5345"),
+                ("#B9770E", "rgba(185,119,14,0.45)", "#784212"),
+                ("#5D6D7E", "rgba(93,109,126,0.45)", "#2E4053"),
+                ("#2471A3", "rgba(36,113,163,0.45)", "#1B4F72"),
+                ("#C0392B", "rgba(192,57,43,0.45)",  "#78281F")]
 
 # ── 頁首 ─────────────────────────────────────────────────────
 st.markdown(f"""
@@ -636,42 +698,62 @@ if dff.empty:
     st.stop()
 
 
+# ── 分頁：只執行目前選取的分頁（st.tabs lazy 模式）────────────
+# on_change="rerun" → 切換分頁會重跑並記住選取；未選取分頁 .open 為 False，
+# 其計算與 Plotly 圖都不執行、不送到瀏覽器
 _tab1, _tab2, _tab3, _tab4 = st.tabs([
     "🎯 即時監控戰情室",
     "📈 跌倒事件分析",
     "💊 藥物安全分析",
     "⚠️ 傷害行為分析",
-])
+], key="_tabs_main", on_change="rerun")
+
+
+def lazy_tab(tab):
+    """
+    `for _ in lazy_tab(_tabN):` 取代 `with _tabN:` —
+    選取中的分頁才進入 with 區塊執行一次，其餘分頁整段略過
+    """
+    if tab.open:
+        with tab:
+            yield
 
-with _tab1:
+for _ in lazy_tab(_tab1):
 
 
     # ════════════════════════════════════════════════════════════
     #  PAGE 1 · Level 1：近一個月即時警示（Executive Summary）
     # ════════════════════════════════════════════════════════════
-    _all_m_sorted = sorted(dff["年月"].dropna().unique())
-    _last_m = _all_m_sorted[-1] if _all_m_sorted else None
-    _prev_m = _all_m_sorted[-2] if len(_all_m_sorted) >= 2 else None
+    # KPI 皆由月份前綴和查表取得（不掃描 dff）
+    _kpi = kpi_summary(month_px, spec)
+    _last_m, _prev_m = _kpi["last_m"], _kpi["prev_m"]
 
-    def _safe_count(df, month):
-        if month is None: return 0
-        sub = df[df["年月"] == month]
-        return int(sub["編號"].count()) if "編號" in sub.columns else len(sub)
-
-    _n_last = _safe_count(dff, _last_m)
-    _n_prev = _safe_count(dff, _prev_m)
+    _n_last = _kpi["n_last"]
+    _n_prev = _kpi["n_prev"]
     _mom_delta = _n_last - _n_prev
 
-    _rate_last = float(mc[mc["年月"]==_last_m]["發生率"].values[0]) if _last_m and _last_m in mc["年月"].values else 0.0
-    _rate_prev = float(mc[mc["年月"]==_prev_m]["發生率"].values[0]) if _prev_m and _prev_m in mc["年月"].values else 0.0
+    _rate_last = _kpi["rate_last"]
+    _rate_prev = _kpi["rate_prev"]
     _rate_delta = round(_rate_last - _rate_prev, 2)
-
-    _rates_clean = mc["發生率"].replace(0, np.nan).dropna()
-    _ucl_val = float(_rates_clean.mean() + 3*_rates_clean.std()) if len(_rates_clean) >= 3 else 9999.0
+    # 單月件數少時發生率波動大：附精確 Poisson 95% 信賴區間
+    _rate_lo, _rate_hi = _intervals("rate", (_n_last,), (_kpi["days_last"],))
+    _rate_ci = ci_text(_rate_lo[0], _rate_hi[0], unit="‰", digits=2)
+
+    # u 管制圖：逐月 UCL 依該月住院人日數而定，取最近有事件月份的界限
+    _ucl_val = 9999.0
+    if mc_spc is not None:
+        _ucl_last = mc_spc.loc[mc_spc["年月"] == _last_m, "UCL"].dropna()
+        if len(_ucl_last):
+            _ucl_val = float(_ucl_last.iloc[0])
     _breach_ucl = bool(_rate_last > _ucl_val)
+    # CUSUM / EWMA：最近有事件月份的累積偏移訊號（比單點 UCL 更早反映小幅持續上升）
+    _mon_last = (mc_mon.loc[mc_mon["年月"] == _last_m]
+                 if mc_mon is not None else pd.DataFrame())
+    _breach_cusum = bool(len(_mon_last) and
+                         (_mon_last["CUSUM訊號"].iloc[0] or _mon_last["EWMA訊號"].iloc[0]))
 
-    _sac12_last = int(dff[(dff["年月"]==_last_m) & (dff["SAC_num"].isin([1,2]))]["SAC_num"].count()) if _last_m else 0
-    _sac12_prev = int(dff[(dff["年月"]==_prev_m) & (dff["SAC_num"].isin([1,2]))]["SAC_num"].count()) if _prev_m else 0
+    _sac12_last = _kpi["sac12_last"]
+    _sac12_prev = _kpi["sac12_prev"]
 
     def _led(delta, up_is_bad=True):
         if delta > 0: return ("#C0392B","#FADBD8","▲") if up_is_bad else ("#1E8449","#D5F5E3","▲")
@@ -684,6 +766,14 @@ with _tab1:
     _ucl_led  = "#E74C3C" if _breach_ucl else "#27AE60"
     _ucl_bg   = "#FADBD8" if _breach_ucl else "#D5F5E3"
     _ucl_txt  = "⚠️ 突破 UCL！異常訊號" if _breach_ucl else "✅ 在管制界限內"
+    _mon_badge = ""
+    if len(_mon_last):
+        _mon_clr = "#B9770E" if _breach_cusum else "#5D6D7E"
+        _mon_badge = (f"<div style='font-size:10.5px;font-weight:600;color:{_mon_clr};margin-top:5px'>"
+                      f"{'⚠️ 累積偏移訊號' if _breach_cusum else 'CUSUM / EWMA 無訊號'}："
+                      f"CUSUM+ {_mon_last['CUSUM+'].iloc[0]:.1f}"
+                      f" / CUSUM− {_mon_last['CUSUM−'].iloc[0]:.1f}（h={CUSUM_H:g}）"
+                      f"・EWMA {_mon_last['EWMA'].iloc[0]:+.2f}σ</div>")
 
     st.markdown(f"""
     <div style='background:linear-gradient(135deg,#1a2e3d,#2C3E50);
@@ -711,11 +801,12 @@ with _tab1:
         st.markdown(f"""<div style='background:#FFFFFF;border-left:5px solid {_ucl_led};border-radius:10px;
             padding:16px 18px;box-shadow:0 2px 8px rgba(0,0,0,0.09)'>
       <div style='font-size:11px;color:#5D6D7E;font-weight:700'>📈 本月發生率（‰）</div>
-      <div style='font-size:34px;font-weight:900;color:#1C2833;margin:6px 0'>{_rate_last:.2f}‰</div>
+      <div style='font-size:34px;font-weight:900;color:#1C2833;margin:6px 0 0'>{_rate_last:.2f}‰</div>
+      <div style='font-size:10.5px;color:#85929E;margin-bottom:6px'>{_rate_ci}</div>
       <div style='font-size:11px;font-weight:700;color:{_ucl_led};background:{_ucl_bg};
                   border-radius:4px;padding:3px 8px;display:inline-block'>
         {_ucl_txt}（UCL={_ucl_val:.2f}‰）
-      </div></div>""", unsafe_allow_html=True)
+      </div>{_mon_badge}</div>""", unsafe_allow_html=True)
 
     with _c3:
         _sac_led = "#E74C3C" if _sac12_last>0 else "#27AE60"
@@ -732,6 +823,72 @@ with _tab1:
 
     st.markdown("<br>", unsafe_allow_html=True)
 
+    # ════════════════════════════════════════════════════════════
+    #  PAGE 1 · 全院 SPC 訊號看板（Nelson 八規則）
+    #  規則於資料載入時對所有 單位 × 事件大類 序列一次判定（analytics.spc），
+    #  此處只取區間末月往前 3 個月內成立的規則，不隨單位篩選重算
+    # ════════════════════════════════════════════════════════════
+    st.markdown('<p class="section-title">🚦 全院 SPC 訊號看板（Nelson 八規則，近 3 個月）</p>',
+                unsafe_allow_html=True)
+    st.caption(f"u 管制圖標準化值逐月判定；格內數字為 {end_m} 往前 3 個月內成立的規則編號，"
+               "顏色越深代表同時成立的規則越多（僅列有住院人日數的單位）")
+
+    _board = nelson_board(spc_cube, spec.end)
+    if not _board.empty:
+        _bd_cats  = [c for c in [RATE_ALL_CAT, *CATEGORY_COLORS]
+                     if c in set(_board["事件大類"])]
+        _bd_units = (_board.groupby("單位")["規則數"].sum()
+                     .sort_values(ascending=False, kind="stable").index.tolist())
+        _bd_n     = (_board.pivot(index="單位", columns="事件大類", values="規則數")
+                     .reindex(index=_bd_units, columns=_bd_cats))
+        _bd_rules = (_board.pivot(index="單位", columns="事件大類", values="規則")
+                     .reindex(index=_bd_units, columns=_bd_cats))
+        _bd_text  = [["·".join(map(str, r)) if isinstance(r, tuple) else ""
+                      for r in row] for row in _bd_rules.values]
+        _bd_hover = [["<br>".join(NELSON_RULES[i] for i in r)
+                      if isinstance(r, tuple) and r else "無訊號"
+                      for r in row] for row in _bd_rules.values]
+
+        @memo_figure
+        def _build_fig_nelson(_bd_n, _bd_text, _bd_hover):
+            fig_nelson = go.Figure(go.Heatmap(
+                z=_bd_n.values,
+                x=_bd_n.columns.tolist(),
+                y=_bd_n.index.tolist(),
+                text=_bd_text, customdata=_bd_hover,
+                texttemplate="%{text}",
+                textfont=dict(size=11, color="#1C2833", family="Arial Bold"),
+                colorscale=[[0.0, "#EAFAF1"], [0.25, "#F9E79F"],
+                            [0.6, "#F0B27A"], [1.0, "#C0392B"]],
+                zmin=0, zmax=max(3, int(np.nanmax(_bd_n.values))),
+                hovertemplate="<b>%{y}</b> × <b>%{x}</b><br>%{customdata}<extra></extra>",
+                colorbar=dict(
+                    title=dict(text="規則數", font=dict(size=11, color="#1C2833")),
+                    tickfont=dict(size=10), thickness=14, len=0.7,
+                ),
+                xgap=3, ygap=2,
+            ))
+            fig_nelson.update_layout(
+                height=max(300, len(_bd_n) * 26 + 100),
+                xaxis=dict(title=dict(text="事件類別"), side="top"),
+                yaxis=dict(title=dict(text="單位"), autorange="reversed",
+                           tickfont=dict(size=10)),
+                margin=dict(t=60, b=20, l=110, r=80),
+            )
+            return fig_nelson
+        fig_nelson = _build_fig_nelson(_bd_n, _bd_text, _bd_hover)
+        show_chart(fig_nelson)
+
+        _bd_hit = _board[_board["規則數"] > 0]
+        if not _bd_hit.empty:
+            st.markdown(f'<div style="background:#FFF3CD;border-left:4px solid #F39C12;padding:10px 14px;border-radius:4px;color:#7D4700;font-size:13px">🚦 共 <b>{len(_bd_hit)}</b> 條序列（{_bd_hit["單位"].nunique()} 個單位）近 3 個月出現 Nelson 規則訊號</div>', unsafe_allow_html=True)
+        with st.expander("📖 Nelson 規則說明"):
+            st.markdown("\n".join(f"- **規則 {i}**：{d}" for i, d in NELSON_RULES.items()))
+    else:
+        st.info("區間末月前 3 個月內無住院人日數資料，無法判定 SPC 訊號。")
+
+    st.markdown("<br>", unsafe_allow_html=True)
+
     # ════════════════════════════════════════════════════════════
     #  PAGE 1 · Level 2：系統安全與通報品質
     # ════════════════════════════════════════════════════════════
@@ -746,12 +903,7 @@ with _tab1:
     </div>""", unsafe_allow_html=True)
 
     # ── 計算事件類別統計（隨時間區間連動）───────────────────
-    _cc = (dff["事件大類"].value_counts()
-           .reset_index()
-           .rename(columns={"事件大類":"類別","count":"件數"}))
-    if "件數" not in _cc.columns:
-        _cc.columns = ["類別","件數"]
-    _cc = _cc.sort_values("件數", ascending=False).reset_index(drop=True)
+    _cc = category_counts(month_px, spec)
 
     # 前三名亮色，其他淡色
     _TOP3_BRIGHT = ["#E74C3C","#E67E22","#2471A3"]
@@ -771,36 +923,37 @@ with _tab1:
         st.caption("件數排序隨篩選時間區間即時更新；🔴🟠🔵 = 前三高發類別")
 
         _cc_bar = _cc.sort_values("件數", ascending=False).reset_index(drop=True)
-        fig_cat_bar = go.Figure(go.Bar(
-            x=_cc_bar["類別"],
-            y=_cc_bar["件數"],
-            marker_color=_bar_colors[:len(_cc_bar)],
-            marker_opacity=0.88,
-            text=_cc_bar["件數"],
-            textposition="outside",
-            textfont=dict(size=11, color="#1C2833", family="Arial Bold"),
-            hovertemplate="<b>%{x}</b>：%{y} 件<extra></extra>",
-        ))
-        fig_cat_bar.update_layout(
-            height=320,
-            plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-            xaxis=dict(
-                title=dict(text="事件類別", font=AXIS_TITLE_FONT),
-                tickfont=dict(size=11, color="#2C3E50", family="Arial"),
-                categoryorder="total descending",
-                showgrid=False,
-            ),
-            yaxis=dict(
-                title=dict(text="發生件數", font=AXIS_TITLE_FONT),
-                tickfont=AXIS_TICK_FONT,
-                gridcolor=GRID_COLOR, griddash="dot",
-                zeroline=True, zerolinecolor=ZERO_LINE_COLOR,
-                range=[0, _cc_bar["件數"].max() * 1.25],
-            ),
-            margin=dict(t=20, b=50, l=60, r=30),
-            bargap=0.3,
-        )
-        st.plotly_chart(fig_cat_bar, use_container_width=True)
+        @memo_figure
+        def _build_fig_cat_bar(_bar_colors, _cc_bar):
+            fig_cat_bar = go.Figure(go.Bar(
+                x=_cc_bar["類別"],
+                y=_cc_bar["件數"],
+                marker_color=_bar_colors[:len(_cc_bar)],
+                marker_opacity=0.88,
+                text=_cc_bar["件數"],
+                textposition="outside",
+                textfont=dict(size=11, color="#1C2833", family="Arial Bold"),
+                hovertemplate="<b>%{x}</b>：%{y} 件<extra></extra>",
+            ))
+            fig_cat_bar.update_layout(
+                height=320,
+                xaxis=dict(
+                    title=dict(text="事件類別"),
+                    tickfont=dict(size=11),
+                    categoryorder="total descending",
+                    showgrid=False,
+                ),
+                yaxis=dict(
+                    title=dict(text="發生件數"), griddash="dot",
+                    zeroline=True,
+                    range=[0, _cc_bar["件數"].max() * 1.25],
+                ),
+                margin=dict(t=20, b=50, l=60, r=30),
+                bargap=0.3,
+            )
+            return fig_cat_bar
+        fig_cat_bar = _build_fig_cat_bar(_bar_colors, _cc_bar)
+        show_chart(fig_cat_bar)
 
     with _l2b:
         # ── 事件類別甜甜圈（前三名亮色，其他淡色）────────────
@@ -809,31 +962,35 @@ with _tab1:
         st.caption("前三名事件以亮色凸顯，其餘淡色；檢視資源配置優先順序")
 
         _top3_labels = _cc["類別"].tolist()[:3]
-        fig_donut = go.Figure(go.Pie(
-            labels=_cc["類別"],
-            values=_cc["件數"],
-            hole=0.52,
-            marker=dict(
-                colors=_unified_colors,
-                line=dict(color="#FFFFFF", width=2),
-            ),
-            textinfo="label+percent",
-            textfont=dict(size=10, color="#1C2833"),
-            pull=[0.06 if i < 3 else 0 for i in range(len(_cc))],  # 前三名外凸
-            hovertemplate="<b>%{label}</b><br>%{value} 件（%{percent}）<extra></extra>",
-            sort=False,
-        ))
-        fig_donut.update_layout(
-            height=300, paper_bgcolor=PAPER_BG, showlegend=False,
-            margin=dict(t=10, b=10, l=10, r=10),
-            annotations=[dict(
-                text=f"TOP 3<br><span style='font-size:9px'>{' / '.join(_top3_labels[:3])}</span>",
-                x=0.5, y=0.5,
-                font=dict(size=10, color="#2C3E50"),
-                showarrow=False,
-            )],
-        )
-        st.plotly_chart(fig_donut, use_container_width=True)
+        @memo_figure
+        def _build_fig_donut(_cc, _top3_labels, _unified_colors):
+            fig_donut = go.Figure(go.Pie(
+                labels=_cc["類別"],
+                values=_cc["件數"],
+                hole=0.52,
+                marker=dict(
+                    colors=_unified_colors,
+                    line=dict(color="#FFFFFF", width=2),
+                ),
+                textinfo="label+percent",
+                textfont=dict(size=10, color="#1C2833"),
+                pull=[0.06 if i < 3 else 0 for i in range(len(_cc))],  # 前三名外凸
+                hovertemplate="<b>%{label}</b><br>%{value} 件（%{percent}）<extra></extra>",
+                sort=False,
+            ))
+            fig_donut.update_layout(
+                height=300, showlegend=False,
+                margin=dict(t=10, b=10, l=10, r=10),
+                annotations=[dict(
+                    text=f"TOP 3<br><span style='font-size:9px'>{' / '.join(_top3_labels[:3])}</span>",
+                    x=0.5, y=0.5,
+                    font=dict(size=10, color="#2C3E50"),
+                    showarrow=False,
+                )],
+            )
+            return fig_donut
+        fig_donut = _build_fig_donut(_cc, _top3_labels, _unified_colors)
+        show_chart(fig_donut)
 
         # 前三名圖例說明
         for i, lbl in enumerate(_top3_labels[:3]):
@@ -860,67 +1017,67 @@ with _tab1:
       </span>
     </div>""", unsafe_allow_html=True)
 
-    fig_a1 = make_subplots(specs=[[{"secondary_y": True}]])
-    fig_a1.add_trace(go.Bar(
-        x=mc["年月顯示"], y=mc["件數"], name="發生件數",
-        marker_color="#2C3E50", marker_opacity=0.75,
-        text=mc["件數"],
-        textposition="outside",
-        textfont=dict(size=8, color="#2C3E50", family="Arial"),
-        hovertemplate="<b>%{x}</b><br>件數：%{y} 件<extra></extra>",
-    ), secondary_y=False)
-    fig_a1.add_trace(go.Scatter(
-        x=mc["年月顯示"], y=mc["發生率"], name="發生率(‰)",
-        mode="lines+markers", line=dict(color="#E74C3C", width=2.5),
-        marker=dict(size=5, color="#E74C3C"),
-        hovertemplate="<b>%{x}</b><br>發生率：%{y:.2f}‰<extra></extra>",
-    ), secondary_y=True)
-    fig_a1.update_layout(
-        height=380, plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-        hovermode="x unified",
-        legend=dict(orientation="h", y=1.1, x=1, xanchor="right",
-                    font=dict(size=11, color="#2C3E50")),
-        xaxis=dict(
-            title=dict(text="年月", font=AXIS_TITLE_FONT),
-            tickangle=-45, showgrid=False, tickfont=AXIS_TICK_FONT,
-        ),
-        margin=dict(t=30, b=50),
-        uniformtext=dict(mode="hide", minsize=7),
-    )
-    fig_a1.update_yaxes(
-        title_text="發生件數", title_font=AXIS_TITLE_FONT,
-        tickfont=AXIS_TICK_FONT, secondary_y=False,
-        gridcolor=GRID_COLOR, griddash="dot",
-        zeroline=True, zerolinecolor=ZERO_LINE_COLOR,
-    )
-    fig_a1.update_yaxes(
-        title_text="發生率 (‰)",
-        title_font=dict(size=13, color="#C0392B", family="Arial"),
-        tickfont=dict(size=10, color="#C0392B", family="Arial"),
-        secondary_y=True,
-    )
-
-    # ── 政策介入標注：2025/05 住院看護費用補助辦法 ────────────
-    _POLICY_X  = "2025/05"
-    _POLICY_LBL = "住院看護費用補助辦法"
-    # 確認此月份存在於 X 軸資料中才加標注
-    if _POLICY_X in mc["年月顯示"].values:
-        fig_a1.add_vline(
-        x=_POLICY_X,
-        line_dash="dash", line_color="#1E8449", line_width=1.8,
+    @memo_figure
+    def _build_fig_a1(mc, notes):
+        fig_a1 = make_subplots(specs=[[{"secondary_y": True}]])
+        plan = trend_plan(mc["年月顯示"], [mc["件數"], mc["發生率"]])
+        fig_a1.add_trace(trend_trace(
+            x=mc["年月顯示"], y=mc["件數"], name="發生件數", kind="bar", plan=plan,
+            marker_color="#2C3E50", marker_opacity=0.75,
+            texttemplate="%{y}",
+            textposition="outside",
+            textfont=dict(size=8, color="#2C3E50", family="Arial"),
+            hovertemplate="<b>%{x}</b><br>件數：%{y} 件<extra></extra>",
+        ), secondary_y=False)
+        fig_a1.add_trace(trend_trace(
+            x=mc["年月顯示"], y=mc["發生率"], name="發生率(‰)", plan=plan,
+            mode="lines+markers", line=dict(color="#E74C3C", width=2.5),
+            marker=dict(size=5, color="#E74C3C"),
+            hovertemplate="<b>%{x}</b><br>發生率：%{y:.2f}‰<extra></extra>",
+        ), secondary_y=True)
+        fig_a1.update_layout(
+            height=380,
+            hovermode="x unified",
+            legend=dict(orientation="h", y=1.1, x=1, xanchor="right",
+                        font=dict(size=11, color="#2C3E50")),
+            xaxis=dict(
+                title=dict(text="年月"),
+                tickangle=-45, showgrid=False,
+            ),
+            margin=dict(t=30, b=50),
+            uniformtext=dict(mode="hide", minsize=7),
+        )
+        fig_a1.update_yaxes(
+            title_text="發生件數", secondary_y=False, griddash="dot",
+            zeroline=True,
         )
-        fig_a1.add_annotation(
-        x=_POLICY_X, y=0.95, xref="x", yref="paper",
-        text=f"▼ {_POLICY_LBL}",
-        showarrow=False,
-        font=dict(size=11, color="#1E8449", family="Arial"),
-        bgcolor="rgba(255,255,255,0.85)",
-        bordercolor="#1E8449", borderwidth=1,
-        borderpad=4,
-        xanchor="left", yanchor="top",
+        fig_a1.update_yaxes(
+            title_text="發生率 (‰)",
+            title_font=dict(size=13, color="#C0392B", family="Arial"),
+            tickfont=dict(size=10, color="#C0392B", family="Arial"),
+            secondary_y=True,
         )
 
-    st.plotly_chart(fig_a1, use_container_width=True)
+        # ── 政策介入標注（interventions.json）＋ ITS 水準 / 斜率變化估計 ──
+        for _x, _txt in notes:
+            fig_a1.add_vline(
+            x=_x,
+            line_dash="dash", line_color="#1E8449", line_width=1.8,
+            )
+            fig_a1.add_annotation(
+            x=_x, y=0.95, xref="x", yref="paper",
+            text=_txt, align="left",
+            showarrow=False,
+            font=dict(size=11, color="#1E8449", family="Arial"),
+            bgcolor="rgba(255,255,255,0.85)",
+            bordercolor="#1E8449", borderwidth=1,
+            borderpad=4,
+            xanchor="left", yanchor="top",
+            )
+        return fig_a1
+    fig_a1 = _build_fig_a1(mc, mc_its)
+
+    show_chart(fig_a1)
 
     st.markdown("<br>", unsafe_allow_html=True)
 
@@ -929,14 +1086,7 @@ with _tab1:
                 unsafe_allow_html=True)
     st.caption("隨左側時間區間與事件類別篩選連動；依件數降冪排列")
 
-    _unit_cnt = (dff["單位"].value_counts()
-                 .reset_index()
-                 .rename(columns={"單位":"單位","count":"件數"}))
-    if "件數" not in _unit_cnt.columns:
-        _unit_cnt.columns = ["單位","件數"]
-    _unit_cnt = _unit_cnt[
-        ~_unit_cnt["單位"].isin(["未知","未填/其他","NAN",""])
-    ].sort_values("件數", ascending=False).reset_index(drop=True)
+    _unit_cnt = unit_counts(month_px, spec)
 
     if not _unit_cnt.empty:
         _u_max = _unit_cnt["件數"].max()
@@ -947,35 +1097,127 @@ with _tab1:
             "#2471A3"
             for v in _unit_cnt["件數"]
         ]
-        fig_unit = go.Figure(go.Bar(
-            x=_unit_cnt["單位"],
-            y=_unit_cnt["件數"],
-            marker=dict(color=_u_colors, opacity=0.88, line=dict(width=0)),
-            text=_unit_cnt["件數"],
-            textposition="outside",
-            textfont=dict(size=10, color="#1C2833", family="Arial"),
-            hovertemplate="<b>%{x}</b>：%{y} 件<extra></extra>",
-        ))
-        fig_unit.update_layout(
-            height=320,
-            plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-            xaxis=dict(
-                title=dict(text="單位", font=AXIS_TITLE_FONT),
-                tickfont=dict(size=10, color="#2C3E50", family="Arial"),
-                showgrid=False,
-                categoryorder="total descending",
-            ),
-            yaxis=dict(
-                title=dict(text="件數", font=AXIS_TITLE_FONT),
-                tickfont=AXIS_TICK_FONT,
-                gridcolor=GRID_COLOR, griddash="dot",
-                zeroline=True, zerolinecolor=ZERO_LINE_COLOR,
-                range=[0, _u_max * 1.25],
-            ),
-            margin=dict(t=20, b=60, l=60, r=20),
-            bargap=0.25,
-        )
-        st.plotly_chart(fig_unit, use_container_width=True)
+        @memo_figure
+        def _build_fig_unit(_u_colors, _u_max, _unit_cnt):
+            fig_unit = go.Figure(go.Bar(
+                x=_unit_cnt["單位"],
+                y=_unit_cnt["件數"],
+                marker=dict(color=_u_colors, opacity=0.88, line=dict(width=0)),
+                text=_unit_cnt["件數"],
+                textposition="outside",
+                textfont=dict(size=10, color="#1C2833", family="Arial"),
+                hovertemplate="<b>%{x}</b>：%{y} 件<extra></extra>",
+            ))
+            fig_unit.update_layout(
+                height=320,
+                xaxis=dict(
+                    title=dict(text="單位"),
+                    tickfont=dict(size=10),
+                    showgrid=False,
+                    categoryorder="total descending",
+                ),
+                yaxis=dict(
+                    title=dict(text="件數"), griddash="dot",
+                    zeroline=True,
+                    range=[0, _u_max * 1.25],
+                ),
+                margin=dict(t=20, b=60, l=60, r=20),
+                bargap=0.25,
+            )
+            return fig_unit
+        fig_unit = _build_fig_unit(_u_colors, _u_max, _unit_cnt)
+        show_chart(fig_unit)
+
+    # ── 單位發生率公平比較：漏斗圖 + 經驗貝氏校正排名（analytics.funnel）──
+    st.markdown('<p class="section-title">🎯 病房發生率漏斗圖與經驗貝氏校正排名</p>',
+                unsafe_allow_html=True)
+    st.caption("以住院人日數為分母比較所有病房（不受單位篩選影響，目前單位以粗框標示）；"
+               "漏斗界限以全院合併發生率為中心，人日數越少界限越寬。"
+               "右圖為 gamma-Poisson 經驗貝氏校正後發生率（95% 可信區間），"
+               "小病房向全院平均收縮，排名較不受單月波動影響")
+
+    _urf, _u_pooled = unit_rate_frame(month_px, spec)
+    if not _urf.empty and _urf["件數"].sum() > 0:
+        _urf = _urf.assign(目前單位=_urf["單位"].isin(spec.wards or ()))
+        _fun_x = np.geomspace(max(_urf["住院人日數"].min(), 1.0),
+                              _urf["住院人日數"].max() * 1.05, 120)
+        _fun_lim = {lbl: funnel_limits(_fun_x, _u_pooled / 1000, z)
+                    for lbl, z in FUNNEL_Z.items()}
+        _FUN_CLR = {"高於 99.8%": "#C0392B", "高於 95%": "#E67E22", "界限內": "#2471A3",
+                    "低於 95%": "#27AE60", "低於 99.8%": "#1E8449"}
+
+        @memo_figure
+        def _build_fig_funnel(_urf, _u_pooled, _fun_x, _fun_lim):
+            fig_funnel = go.Figure()
+            for lbl, dash in (("99.8%", "dash"), ("95%", "dot")):
+                lo, hi = _fun_lim[lbl]
+                for y, nm in ((hi, f"{lbl} 上限"), (lo, f"{lbl} 下限")):
+                    fig_funnel.add_trace(go.Scatter(
+                        x=_fun_x, y=y, mode="lines", name=nm,
+                        line=dict(color="#E74C3C" if lbl == "99.8%" else "#F5B041",
+                                  width=1.4, dash=dash),
+                        showlegend=nm.endswith("上限"), hoverinfo="skip"))
+            fig_funnel.add_hline(y=_u_pooled, line_color="#5D6D7E", line_width=1.5,
+                annotation_text=f"  全院 {_u_pooled:.2f}‰", annotation_position="right",
+                annotation_font=dict(size=11, color="#5D6D7E"))
+            fig_funnel.add_trace(go.Scatter(
+                x=_urf["住院人日數"], y=_urf["粗發生率"], mode="markers+text",
+                text=_urf["單位"], textposition="top center",
+                textfont=dict(size=9, color="#2C3E50"),
+                marker=dict(size=np.where(_urf["目前單位"], 14, 9),
+                            color=_urf["漏斗位置"].map(_FUN_CLR),
+                            line=dict(width=np.where(_urf["目前單位"], 2.5, 1),
+                                      color=np.where(_urf["目前單位"], "#1C2833", "white"))),
+                customdata=np.column_stack([_urf["件數"], _urf["EB發生率"], _urf["漏斗位置"]]),
+                hovertemplate=("<b>%{text}</b><br>住院人日數：%{x:,.0f}<br>"
+                               "件數：%{customdata[0]}　粗發生率：%{y:.2f}‰<br>"
+                               "EB 校正：%{customdata[1]:.2f}‰<br>%{customdata[2]}<extra></extra>"),
+                name="病房", showlegend=False))
+            fig_funnel.update_layout(
+                height=420,
+                legend=dict(orientation="h", y=1.1, x=1, xanchor="right",
+                            font=dict(size=10, color="#2C3E50")),
+                xaxis=dict(title=dict(text="住院人日數（對數）"), type="log", showgrid=False),
+                yaxis=dict(title=dict(text="發生率 (‰)"), griddash="dot", rangemode="tozero"),
+                margin=dict(t=50, b=50, l=60, r=90))
+            return fig_funnel
+
+        @memo_figure
+        def _build_fig_eb(_urf, _u_pooled):
+            _d = _urf.iloc[::-1]                      # 水平圖：排名第 1 在上
+            fig_eb = go.Figure()
+            fig_eb.add_trace(go.Scatter(
+                x=_d["EB發生率"], y=_d["單位"], mode="markers",
+                marker=dict(size=np.where(_d["目前單位"], 12, 8),
+                            color=_d["漏斗位置"].map(_FUN_CLR)),
+                error_x=dict(type="data", symmetric=False,
+                             array=_d["EB上限"] - _d["EB發生率"],
+                             arrayminus=_d["EB發生率"] - _d["EB下限"],
+                             color="#AAB7B8", thickness=1.5, width=3),
+                customdata=np.column_stack([_d["粗發生率"], _d["收縮權重"] * 100, _d["EB排名"]]),
+                hovertemplate=("<b>%{y}</b>（第 %{customdata[2]} 名）<br>"
+                               "EB 校正：%{x:.2f}‰　粗發生率：%{customdata[0]:.2f}‰<br>"
+                               "收縮權重：%{customdata[1]:.0f}%<extra></extra>"),
+                showlegend=False))
+            fig_eb.add_vline(x=_u_pooled, line_color="#5D6D7E", line_dash="dot")
+            fig_eb.update_layout(
+                height=420,
+                xaxis=dict(title=dict(text="EB 校正發生率 (‰)"), griddash="dot",
+                           rangemode="tozero"),
+                yaxis=dict(tickfont=dict(size=10)),
+                margin=dict(t=50, b=50, l=60, r=20))
+            return fig_eb
+
+        _fcol1, _fcol2 = st.columns([3, 2])
+        fig_funnel = _build_fig_funnel(_urf, _u_pooled, _fun_x, _fun_lim)
+        show_chart(fig_funnel, where=_fcol1)
+        fig_eb = _build_fig_eb(_urf, _u_pooled)
+        show_chart(fig_eb, where=_fcol2)
+        _fun_hi = _urf[_urf["漏斗位置"] == "高於 99.8%"]["單位"].tolist()
+        if _fun_hi:
+            st.markdown(f'<div style="background:#FFF3CD;border-left:4px solid #F39C12;padding:10px 14px;border-radius:4px;color:#7D4700;font-size:13px">⚠️ 發生率高於漏斗 99.8% 界限：<b>{"、".join(_fun_hi)}</b></div>', unsafe_allow_html=True)
+    else:
+        st.info("目前篩選條件下無可比較的病房（需有住院人日數與事件）。")
 
     st.markdown("<br>", unsafe_allow_html=True)
 
@@ -1025,40 +1267,42 @@ with _tab1:
             sec_peak   = ts_no_peak.idxmax()
             sec_peak_v = int(ts_no_peak.max())
 
-            fig_c = go.Figure(go.Bar(
-                x=TIMESLOT_ORDER, y=ts_cnt.values,
-                marker_color=clrs, marker_line=dict(width=0),
-                text=ts_cnt.values, textposition="outside",
-                textfont=dict(size=11, color="#1C2833"),
-                hovertemplate="<b>%{x}</b><br>%{y} 件<extra></extra>",
-            ))
-            # 最高峰標註
-            fig_c.add_annotation(
-                x=peak, y=peak_v, text=f"▲ 高峰<br>{peak}",
-                showarrow=True, arrowhead=2, arrowcolor="#E74C3C",
-                font=dict(size=11, color="#7B241C", family="Arial Bold"),
-                yshift=25, ax=0, ay=-45)
-            # 次高峰標註
-            fig_c.add_annotation(
-                x=sec_peak, y=sec_peak_v, text=f"△ 次高峰<br>{sec_peak}",
-                showarrow=True, arrowhead=2, arrowcolor="#F39C12",
-                font=dict(size=10, color="#7D6608", family="Arial Bold"),
-                yshift=25, ax=0, ay=-45)
-            fig_c.update_layout(
-                height=460, plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-                xaxis=dict(
-                    title=dict(text="發生時段", font=AXIS_TITLE_FONT),
-                    tickangle=-30, tickfont=AXIS_TICK_FONT, showgrid=False,
-                ),
-                yaxis=dict(
-                    title=dict(text="事件件數", font=AXIS_TITLE_FONT),
-                    tickfont=AXIS_TICK_FONT,
-                    gridcolor=GRID_COLOR, griddash="dot",
-                    range=[0, peak_v * 1.45],   # 加大上界，讓兩個標註都有空間
-                    zeroline=True, zerolinecolor=ZERO_LINE_COLOR,
-                ),
-                margin=dict(t=30, b=60, l=60, r=20), bargap=0.18)
-            st.plotly_chart(fig_c, use_container_width=True)
+            @memo_figure
+            def _build_fig_c(clrs, peak, peak_v, sec_peak, sec_peak_v, ts_cnt):
+                fig_c = go.Figure(go.Bar(
+                    x=TIMESLOT_ORDER, y=ts_cnt.values,
+                    marker_color=clrs, marker_line=dict(width=0),
+                    text=ts_cnt.values, textposition="outside",
+                    textfont=dict(size=11, color="#1C2833"),
+                    hovertemplate="<b>%{x}</b><br>%{y} 件<extra></extra>",
+                ))
+                # 最高峰標註
+                fig_c.add_annotation(
+                    x=peak, y=peak_v, text=f"▲ 高峰<br>{peak}",
+                    showarrow=True, arrowhead=2, arrowcolor="#E74C3C",
+                    font=dict(size=11, color="#7B241C", family="Arial Bold"),
+                    yshift=25, ax=0, ay=-45)
+                # 次高峰標註
+                fig_c.add_annotation(
+                    x=sec_peak, y=sec_peak_v, text=f"△ 次高峰<br>{sec_peak}",
+                    showarrow=True, arrowhead=2, arrowcolor="#F39C12",
+                    font=dict(size=10, color="#7D6608", family="Arial Bold"),
+                    yshift=25, ax=0, ay=-45)
+                fig_c.update_layout(
+                    height=460,
+                    xaxis=dict(
+                        title=dict(text="發生時段"),
+                        tickangle=-30, showgrid=False,
+                    ),
+                    yaxis=dict(
+                        title=dict(text="事件件數"), griddash="dot",
+                        range=[0, peak_v * 1.45],   # 加大上界，讓兩個標註都有空間
+                        zeroline=True,
+                    ),
+                    margin=dict(t=30, b=60, l=60, r=20), bargap=0.18)
+                return fig_c
+            fig_c = _build_fig_c(clrs, peak, peak_v, sec_peak, sec_peak_v, ts_cnt)
+            show_chart(fig_c)
 
     with col_d:
         st.markdown('<p class="section-title">⚠️ SAC 嚴重度分佈</p>',
@@ -1077,28 +1321,32 @@ with _tab1:
             # pull：讓 SAC 1（死亡）扇形稍微突出，強調最高嚴重度
             pull_vals = [0.06 if int(k)==1 else 0 for k in sc.index]
 
-            fig_d = go.Figure(go.Pie(
-                labels=lbls, values=sc.values, hole=0.52,
-                pull=pull_vals,
-                marker=dict(colors=clrs, line=dict(color="white", width=3)),
-                textinfo="percent+label",
-                textfont=dict(size=10, color="#1C2833", family="Arial"),
-                hovertemplate="<b>%{label}</b><br>%{value} 件 (%{percent})<extra></extra>",
-                direction="clockwise", sort=False,
-                insidetextorientation="horizontal",
-                textposition="outside",          # 所有標籤統一放外側，不被截斷
-            ))
-            fig_d.add_annotation(
-                text=f"<b>SAC 1+2</b><br>死亡+重大<br>{hp:.2f}%",
-                x=0.5, y=0.5,
-                font=dict(size=12, color="#7B241C", family="Arial Bold"),
-                showarrow=False)
-            fig_d.update_layout(
-                height=480, paper_bgcolor=PAPER_BG,
-                legend=dict(orientation="h", y=-0.12, xanchor="center", x=0.5,
-                            font=dict(size=10, color="#2C3E50")),
-                margin=dict(t=40, b=80, l=80, r=80))   # 四周充足空間
-            st.plotly_chart(fig_d, use_container_width=True)
+            @memo_figure
+            def _build_fig_d(clrs, hp, lbls, pull_vals, sc):
+                fig_d = go.Figure(go.Pie(
+                    labels=lbls, values=sc.values, hole=0.52,
+                    pull=pull_vals,
+                    marker=dict(colors=clrs, line=dict(color="white", width=3)),
+                    textinfo="percent+label",
+                    textfont=dict(size=10, color="#1C2833", family="Arial"),
+                    hovertemplate="<b>%{label}</b><br>%{value} 件 (%{percent})<extra></extra>",
+                    direction="clockwise", sort=False,
+                    insidetextorientation="horizontal",
+                    textposition="outside",          # 所有標籤統一放外側，不被截斷
+                ))
+                fig_d.add_annotation(
+                    text=f"<b>SAC 1+2</b><br>死亡+重大<br>{hp:.2f}%",
+                    x=0.5, y=0.5,
+                    font=dict(size=12, color="#7B241C", family="Arial Bold"),
+                    showarrow=False)
+                fig_d.update_layout(
+                    height=480,
+                    legend=dict(orientation="h", y=-0.12, xanchor="center", x=0.5,
+                                font=dict(size=10, color="#2C3E50")),
+                    margin=dict(t=40, b=80, l=80, r=80))   # 四周充足空間
+                return fig_d
+            fig_d = _build_fig_d(clrs, hp, lbls, pull_vals, sc)
+            show_chart(fig_d)
 
     st.markdown("<br>", unsafe_allow_html=True)
 
@@ -1123,44 +1371,48 @@ with _tab1:
         _hm_text = [[str(v) if v>0 else "" for v in row]
                     for row in _hm_piv.values]
 
-        fig_hm_slot = go.Figure(go.Heatmap(
-            z=_hm_piv.values,
-            x=_hm_piv.columns.tolist(),
-            y=_hm_piv.index.tolist(),
-            text=_hm_text,
-            texttemplate="%{text}",
-            textfont=dict(size=11, color="white", family="Arial Bold"),
-            colorscale=[
-                [0.0, "#F4F6F6"],
-                [0.2, "#AED6F1"],
-                [0.5, "#2471A3"],
-                [1.0, "#1A5276"],
-            ],
-            hovertemplate=(
-                "<b>%{y} · %{x}</b><br>件數：%{z}<extra></extra>"
-            ),
-            colorbar=dict(
-                title=dict(text="件數", font=dict(size=11, color="#1C2833")),
-                tickfont=dict(size=10, color="#2C3E50"),
-                thickness=14, len=0.7,
-            ),
-            xgap=3, ygap=2,
-        ))
-        fig_hm_slot.update_layout(
-            height=400, paper_bgcolor=PAPER_BG, plot_bgcolor=PAPER_BG,
-            xaxis=dict(
-                title=dict(text="事件類別", font=AXIS_TITLE_FONT),
-                tickfont=dict(size=11, color="#2C3E50", family="Arial"),
-                side="bottom",
-            ),
-            yaxis=dict(
-                title=dict(text="發生時段", font=AXIS_TITLE_FONT),
-                tickfont=dict(size=10, color="#2C3E50", family="Arial"),
-                automargin=True,
-            ),
-            margin=dict(t=20, b=60, l=90, r=80),
-        )
-        st.plotly_chart(fig_hm_slot, use_container_width=True)
+        @memo_figure
+        def _build_fig_hm_slot(_hm_piv, _hm_text):
+            fig_hm_slot = go.Figure(go.Heatmap(
+                z=_hm_piv.values,
+                x=_hm_piv.columns.tolist(),
+                y=_hm_piv.index.tolist(),
+                text=_hm_text,
+                texttemplate="%{text}",
+                textfont=dict(size=11, color="white", family="Arial Bold"),
+                colorscale=[
+                    [0.0, "#F4F6F6"],
+                    [0.2, "#AED6F1"],
+                    [0.5, "#2471A3"],
+                    [1.0, "#1A5276"],
+                ],
+                hovertemplate=(
+                    "<b>%{y} · %{x}</b><br>件數：%{z}<extra></extra>"
+                ),
+                colorbar=dict(
+                    title=dict(text="件數", font=dict(size=11, color="#1C2833")),
+                    tickfont=dict(size=10),
+                    thickness=14, len=0.7,
+                ),
+                xgap=3, ygap=2,
+            ))
+            fig_hm_slot.update_layout(
+                height=400,
+                xaxis=dict(
+                    title=dict(text="事件類別"),
+                    tickfont=dict(size=11),
+                    side="bottom",
+                ),
+                yaxis=dict(
+                    title=dict(text="發生時段"),
+                    tickfont=dict(size=10),
+                    automargin=True,
+                ),
+                margin=dict(t=20, b=60, l=90, r=80),
+            )
+            return fig_hm_slot
+        fig_hm_slot = _build_fig_hm_slot(_hm_piv, _hm_text)
+        show_chart(fig_hm_slot)
     else:
         st.info("目前篩選條件下無時段資料。")
 
@@ -1193,43 +1445,46 @@ with _tab1:
         _uc_text = [[str(v) if v > 0 else "" for v in row]
                     for row in _uc_piv.values]
 
-        fig_uc_hm = go.Figure(go.Heatmap(
-            z=_uc_piv.values,
-            x=_uc_piv.columns.tolist(),
-            y=_uc_piv.index.tolist(),
-            text=_uc_text,
-            texttemplate="%{text}",
-            textfont=dict(size=11, color="white", family="Arial Bold"),
-            colorscale=[
-                [0.0, "#F4F6F6"],
-                [0.15, "#AED6F1"],
-                [0.5,  "#2471A3"],
-                [1.0,  "#1A5276"],
-            ],
-            hovertemplate="<b>%{y}</b> × <b>%{x}</b><br>件數：%{z}<extra></extra>",
-            colorbar=dict(
-                title=dict(text="件數", font=dict(size=11, color="#1C2833")),
-                tickfont=dict(size=10, color="#2C3E50"),
-                thickness=14, len=0.7,
-            ),
-            xgap=3, ygap=2,
-        ))
-        fig_uc_hm.update_layout(
-            height=max(360, len(_uc_piv) * 30 + 100),
-            paper_bgcolor=PAPER_BG, plot_bgcolor=PAPER_BG,
-            xaxis=dict(
-                title=dict(text="事件類別", font=AXIS_TITLE_FONT),
-                tickfont=dict(size=11, color="#2C3E50", family="Arial"),
-                side="bottom",
-            ),
-            yaxis=dict(
-                title=dict(text="發生單位", font=AXIS_TITLE_FONT),
-                tickfont=dict(size=10, color="#2C3E50", family="Arial"),
-                automargin=True,
-            ),
-            margin=dict(t=20, b=60, l=110, r=80),
-        )
-        st.plotly_chart(fig_uc_hm, use_container_width=True)
+        @memo_figure
+        def _build_fig_uc_hm(_uc_piv, _uc_text):
+            fig_uc_hm = go.Figure(go.Heatmap(
+                z=_uc_piv.values,
+                x=_uc_piv.columns.tolist(),
+                y=_uc_piv.index.tolist(),
+                text=_uc_text,
+                texttemplate="%{text}",
+                textfont=dict(size=11, color="white", family="Arial Bold"),
+                colorscale=[
+                    [0.0, "#F4F6F6"],
+                    [0.15, "#AED6F1"],
+                    [0.5,  "#2471A3"],
+                    [1.0,  "#1A5276"],
+                ],
+                hovertemplate="<b>%{y}</b> × <b>%{x}</b><br>件數：%{z}<extra></extra>",
+                colorbar=dict(
+                    title=dict(text="件數", font=dict(size=11, color="#1C2833")),
+                    tickfont=dict(size=10),
+                    thickness=14, len=0.7,
+                ),
+                xgap=3, ygap=2,
+            ))
+            fig_uc_hm.update_layout(
+                height=max(360, len(_uc_piv) * 30 + 100),
+                xaxis=dict(
+                    title=dict(text="事件類別"),
+                    tickfont=dict(size=11),
+                    side="bottom",
+                ),
+                yaxis=dict(
+                    title=dict(text="發生單位"),
+                    tickfont=dict(size=10),
+                    automargin=True,
+                ),
+                margin=dict(t=20, b=60, l=110, r=80),
+            )
+            return fig_uc_hm
+        fig_uc_hm = _build_fig_uc_hm(_uc_piv, _uc_text)
+        show_chart(fig_uc_hm)
     else:
         st.info("目前篩選條件下無資料。")
 
@@ -1238,8 +1493,10 @@ with _tab1:
     # ════════════════════════════════════════════════════════════
     #  PAGE 1 · 精神科跌倒深度分析（W11 / W12，側邊欄連動）
     # ════════════════════════════════════════════════════════════
-    _PSYCH_WARDS = ["W11", "W12", "W11+W12（精神科）"]
-    if sel_unit in _PSYCH_WARDS:
+    # 精神科節點由設定檔的 "role": "psych" 標記；未標記時不顯示本頁
+    _PSYCH_WARDS = role_members(UNIT_INDEX, PSYCH_ROLE)
+    _sel_wards   = list(spec.wards or [])
+    if _PSYCH_WARDS and _sel_wards and set(_sel_wards) <= set(_PSYCH_WARDS):
 
         st.markdown("<br>", unsafe_allow_html=True)
         st.markdown(f"""
@@ -1247,7 +1504,7 @@ with _tab1:
             padding:14px 22px;border-radius:10px;margin-bottom:14px;
             border-left:5px solid #7D3C98'>
   <h2 style='color:#FFFFFF;margin:0;font-size:18px;font-weight:700'>
-    🧠 精神科跌倒深度分析（{"W11 ＋ W12" if sel_unit == "W11+W12（精神科）" else sel_unit} 專屬）
+    🧠 精神科跌倒深度分析（{" ＋ ".join(_sel_wards)} 專屬）
   </h2>
   <p style='color:#D7BDE2;margin:4px 0 0;font-size:11px'>
     W11・W12 急性精神科病房 · 認知行為風險 · 藥物影響 · 月趨勢追蹤
@@ -1261,9 +1518,8 @@ with _tab1:
             df_fall_base["單位"].isin(_PSYCH_WARDS)
         ].copy()
 
-        _ps, _pe = st.session_state["date_range"]
-        _pf_t = _pf_all[(_pf_all["年月"] >= _ps) & (_pf_all["年月"] <= _pe)].copy()
-        _pf_h = _pf_all[~((_pf_all["年月"] >= _ps) & (_pf_all["年月"] <= _pe))].copy()
+        _pf_t = in_window(_pf_all, spec).copy()
+        _pf_h = _pf_all.drop(index=_pf_t.index)
 
         _nt = len(_pf_t)
         _nh = len(_pf_h)
@@ -1276,13 +1532,14 @@ with _tab1:
                "box-shadow:0 2px 10px rgba(0,0,0,0.09);"
                "border-left:5px solid {c};min-height:96px")
 
-        def _pk(col, title, val, sub, c):
+        def _pk(col, title, val, sub, c, ci=""):
             col.markdown(
                 f"<div style='{_ks.format(c=c)}'>"
                 f"<div style='font-size:11px;color:#5D6D7E;font-weight:700;"
                 f"letter-spacing:0.5px;margin-bottom:6px'>{title}</div>"
                 f"<div style='font-size:28px;font-weight:900;color:#1C2833;"
                 f"line-height:1.1'>{val}</div>"
+                f"<div style='font-size:10.5px;color:#85929E;margin-top:2px'>{ci}</div>"
                 f"<div style='font-size:11px;color:#85929E;margin-top:4px'>{sub}</div>"
                 f"</div>", unsafe_allow_html=True)
 
@@ -1296,13 +1553,17 @@ with _tab1:
         _drug_tp = round(_drug_t / max(_nt, 1) * 100, 0)
         _sed_t   = int(_pf_t["可能原因-鎮靜安眠藥"].fillna(0).sum()) if "可能原因-鎮靜安眠藥" in _pf_t.columns else 0
         _sed_tp  = round(_sed_t / max(_nt, 1) * 100, 0)
+        # 精神科單月件數少：佔比附 Wilson 95% 信賴區間
+        _pk_lo, _pk_hi = _intervals("prop", (_cog_t, _drug_t), (_nt, _nt))
 
         _pk(_kp1, f"🧠 {_cog_flag}意識/認知障礙佔比",
             f"{_cog_tp:.0f}%",
-            f"本期 {_cog_t} 件 ｜ 精神科歷史均 {_cog_hp:.0f}%", "#7D3C98")
+            f"本期 {_cog_t} 件 ｜ 精神科歷史均 {_cog_hp:.0f}%", "#7D3C98",
+            ci_text(_pk_lo[0], _pk_hi[0], digits=0))
         _pk(_kp2, "💊 藥物相關佔比",
             f"{_drug_tp:.0f}%",
-            f"本期 {_drug_t} 件（含鎮靜 {_sed_tp:.0f}%）", "#C0392B")
+            f"本期 {_drug_t} 件（含鎮靜 {_sed_tp:.0f}%）", "#C0392B",
+            ci_text(_pk_lo[1], _pk_hi[1], digits=0))
         _pk(_kp3, "📋 本期跌倒件數",
             f"{_nt} 件",
             f"精神科歷史月均 {_h_avg} 件／月", "#1A5276")
@@ -1335,40 +1596,41 @@ with _tab1:
             _rf_tp.append(round(_n_t / max(_nt, 1) * 100, 1))
             _rf_hp.append(round(_n_h / max(_nh, 1) * 100, 1))
 
-        fig_rf = go.Figure()
-        fig_rf.add_trace(go.Bar(
-            name=f"本期（{start_m}～{end_m}）",
-            x=_rf_lbls, y=_rf_tp,
-            marker=dict(color="#C0392B", opacity=0.88, line=dict(width=0)),
-            text=[f"{v:.0f}%" for v in _rf_tp],
-            textposition="outside",
-            textfont=dict(size=10, color="#1C2833", family="Arial"),
-        ))
-        fig_rf.add_trace(go.Bar(
-            name="精神科歷史均值",
-            x=_rf_lbls, y=_rf_hp,
-            marker=dict(color="#2471A3", opacity=0.55, line=dict(width=0)),
-            text=[f"{v:.0f}%" for v in _rf_hp],
-            textposition="outside",
-            textfont=dict(size=10, color="#1C2833", family="Arial"),
-        ))
-        fig_rf.update_layout(
-            barmode="group", height=360,
-            plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-            xaxis=dict(title=dict(text="風險因子", font=AXIS_TITLE_FONT),
-                       tickfont=dict(size=10, color="#2C3E50", family="Arial"),
-                       showgrid=False),
-            yaxis=dict(title=dict(text="佔比（%）", font=AXIS_TITLE_FONT),
-                       tickfont=AXIS_TICK_FONT,
-                       gridcolor=GRID_COLOR, griddash="dot",
-                       range=[0, max(max(_rf_tp, default=0),
-                                     max(_rf_hp, default=0)) * 1.3 + 5]),
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0,
-                        font=dict(size=11, color="#2C3E50")),
-            margin=dict(t=40, b=60, l=60, r=30),
-            bargap=0.2, bargroupgap=0.05,
-        )
-        st.plotly_chart(fig_rf, use_container_width=True)
+        @memo_figure
+        def _build_fig_rf(_rf_hp, _rf_lbls, _rf_tp, end_m, start_m):
+            fig_rf = go.Figure()
+            fig_rf.add_trace(go.Bar(
+                name=f"本期（{start_m}～{end_m}）",
+                x=_rf_lbls, y=_rf_tp,
+                marker=dict(color="#C0392B", opacity=0.88, line=dict(width=0)),
+                text=[f"{v:.0f}%" for v in _rf_tp],
+                textposition="outside",
+                textfont=dict(size=10, color="#1C2833", family="Arial"),
+            ))
+            fig_rf.add_trace(go.Bar(
+                name="精神科歷史均值",
+                x=_rf_lbls, y=_rf_hp,
+                marker=dict(color="#2471A3", opacity=0.55, line=dict(width=0)),
+                text=[f"{v:.0f}%" for v in _rf_hp],
+                textposition="outside",
+                textfont=dict(size=10, color="#1C2833", family="Arial"),
+            ))
+            fig_rf.update_layout(
+                barmode="group", height=360,
+                xaxis=dict(title=dict(text="風險因子"),
+                           tickfont=dict(size=10),
+                           showgrid=False),
+                yaxis=dict(title=dict(text="佔比（%）"), griddash="dot",
+                           range=[0, max(max(_rf_tp, default=0),
+                                         max(_rf_hp, default=0)) * 1.3 + 5]),
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0,
+                            font=dict(size=11, color="#2C3E50")),
+                margin=dict(t=40, b=60, l=60, r=30),
+                bargap=0.2, bargroupgap=0.05,
+            )
+            return fig_rf
+        fig_rf = _build_fig_rf(_rf_hp, _rf_lbls, _rf_tp, end_m, start_m)
+        show_chart(fig_rf)
 
         st.markdown("<br>", unsafe_allow_html=True)
 
@@ -1380,45 +1642,48 @@ with _tab1:
         _pf_mly = (_pf_all.groupby("年月").size()
                    .reset_index(name="件數").sort_values("年月"))
         _pf_mly["年月顯示"] = _pf_mly["年月"].str.replace("-", "/", regex=False)
-        _pf_mly["目標期"] = (_pf_mly["年月"] >= _ps) & (_pf_mly["年月"] <= _pe)
-
-        fig_pt = go.Figure()
-        fig_pt.add_trace(go.Scatter(
-            x=_pf_mly["年月顯示"], y=_pf_mly["件數"],
-            mode="lines+markers",
-            line=dict(color="#AEB6BF", width=2),
-            marker=dict(size=5, color="#AEB6BF"),
-            name="歷史全期",
-        ))
-        _tgt_mly = _pf_mly[_pf_mly["目標期"]]
-        if not _tgt_mly.empty:
-            fig_pt.add_trace(go.Scatter(
-                x=_tgt_mly["年月顯示"], y=_tgt_mly["件數"],
-                mode="markers",
-                marker=dict(size=11, color="#C0392B", symbol="circle",
-                            line=dict(color="#FFFFFF", width=1.5)),
-                name=f"本期（{start_m}～{end_m}）",
+        _pf_mly["目標期"] = (_pf_mly["年月"] >= spec.start) & (_pf_mly["年月"] <= spec.end)
+
+        @memo_figure
+        def _build_fig_pt(_h_avg, _pf_mly, end_m, start_m):
+            fig_pt = go.Figure()
+            plan = trend_plan(_pf_mly["年月顯示"], [_pf_mly["件數"]])
+            fig_pt.add_trace(trend_trace(
+                x=_pf_mly["年月顯示"], y=_pf_mly["件數"], plan=plan,
+                mode="lines+markers",
+                line=dict(color="#AEB6BF", width=2),
+                marker=dict(size=5, color="#AEB6BF"),
+                name="歷史全期",
             ))
-        fig_pt.add_hline(
-            y=_h_avg, line_dash="dot", line_color="#7D3C98", line_width=1.5,
-            annotation_text=f"月均 {_h_avg} 件",
-            annotation_position="top right",
-            annotation_font=dict(size=10, color="#7D3C98"),
-        )
-        fig_pt.update_layout(
-            height=280, plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-            xaxis=dict(title=dict(text="年月", font=AXIS_TITLE_FONT),
-                       tickfont=dict(size=9, color="#2C3E50", family="Arial"),
-                       tickangle=45, showgrid=False),
-            yaxis=dict(title=dict(text="跌倒件數", font=AXIS_TITLE_FONT),
-                       tickfont=AXIS_TICK_FONT,
-                       gridcolor=GRID_COLOR, griddash="dot",
-                       rangemode="tozero"),
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0,
-                        font=dict(size=11, color="#2C3E50")),
-            margin=dict(t=40, b=70, l=60, r=30),
-        )
-        st.plotly_chart(fig_pt, use_container_width=True)
+            _tgt_mly = _pf_mly[_pf_mly["目標期"]]
+            if not _tgt_mly.empty:
+                fig_pt.add_trace(trend_trace(
+                    x=_tgt_mly["年月顯示"], y=_tgt_mly["件數"], plan=plan,
+                    mode="markers",
+                    marker=dict(size=11, color="#C0392B", symbol="circle",
+                                line=dict(color="#FFFFFF", width=1.5)),
+                    name=f"本期（{start_m}～{end_m}）",
+                ))
+            fig_pt.add_hline(
+                y=_h_avg, line_dash="dot", line_color="#7D3C98", line_width=1.5,
+                annotation_text=f"月均 {_h_avg} 件",
+                annotation_position="top right",
+                annotation_font=dict(size=10, color="#7D3C98"),
+            )
+            fig_pt.update_layout(
+                height=280,
+                xaxis=dict(title=dict(text="年月"),
+                           tickfont=dict(size=9),
+                           tickangle=45, showgrid=False),
+                yaxis=dict(title=dict(text="跌倒件數"), griddash="dot",
+                           rangemode="tozero"),
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0,
+                            font=dict(size=11, color="#2C3E50")),
+                margin=dict(t=40, b=70, l=60, r=30),
+            )
+            return fig_pt
+        fig_pt = _build_fig_pt(_h_avg, _pf_mly, end_m, start_m)
+        show_chart(fig_pt)
 
         st.markdown("<br>", unsafe_allow_html=True)
 
@@ -1438,42 +1703,57 @@ with _tab1:
                 ("⚡執意下床", "可能原因-高危險群病人執意自行下床或活動","#FEF9E7","#7D6608"),
                 ("🔴躁動",     "可能原因-躁動",                     "#FADBD8", "#922B21"),
             ]
-
-            _rows_html = ""
-            for _, row in _pf_t.sort_values("年月", ascending=False).iterrows():
-                _cid  = str(row.get("通報案號", ""))
-                _ym   = str(row.get("年月", ""))
-                _hd   = str(row.get("跌倒事件發生對象-事件發生前是否為跌倒高危險群","")) == "是"
-                _desc = str(row.get("事件說明",""))
-                _desc_s = (_desc[:90] + "…") if len(_desc) > 90 else _desc
-
-                # 產生標籤
-                _tags_html = ""
+            _CASE_PAGE_SIZE = 20
+
+            def _badge(lbl, bg, clr):
+                return (f"<span style='display:inline-block;font-size:10px;"
+                        f"background:{bg};color:{clr};"
+                        f"border-radius:4px;padding:1px 6px;margin:1px 2px'>"
+                        f"{lbl}</span>")
+
+            def _case_rows_html(page):
+                """逐件摘要的 <tr>：標籤逐欄向量化組字串（只處理傳入的一頁）"""
+                def text(col):
+                    return (page[col].astype(str) if col in page.columns
+                            else pd.Series("", index=page.index, dtype=object))
+
+                _hd = text("跌倒事件發生對象-事件發生前是否為跌倒高危險群") == "是"
+                tags = pd.Series(np.where(_hd, _badge("⚠️高危群", "#FADBD8", "#922B21"), ""),
+                                 index=page.index, dtype=object)
                 for _tlbl, _tcol, _tbg, _tclr in _tag_def:
-                    if row.get(_tcol, 0):
-                        _tags_html += (f"<span style='display:inline-block;font-size:10px;"
-                                       f"background:{_tbg};color:{_tclr};"
-                                       f"border-radius:4px;padding:1px 6px;margin:1px 2px'>"
-                                       f"{_tlbl}</span>")
-
-                _hd_badge = (
-                    "<span style='display:inline-block;font-size:10px;"
-                    "background:#FADBD8;color:#922B21;"
-                    "border-radius:4px;padding:1px 6px;margin:1px 2px'>⚠️高危群</span>"
-                ) if _hd else ""
-
-                _rows_html += (
-                    f"<tr style='border-bottom:0.5px solid #EAECEE'>"
-                    f"<td style='padding:8px 10px;font-size:11px;color:#5D6D7E;"
-                    f"white-space:nowrap'>{_ym}</td>"
-                    f"<td style='padding:8px 10px;font-size:11px;color:#2C3E50'>{_cid}</td>"
-                    f"<td style='padding:8px 10px;font-size:11px'>{_hd_badge}{_tags_html}</td>"
-                    f"<td style='padding:8px 10px;font-size:11px;color:#2C3E50;"
-                    f"line-height:1.5'>{_desc_s}</td>"
-                    f"</tr>"
-                )
-
-            st.markdown(f"""
+                    if _tcol in page.columns:
+                        tags = tags + np.where(page[_tcol].astype(bool),
+                                               _badge(_tlbl, _tbg, _tclr), "")
+                desc = text("事件說明")
+                desc = desc.where(desc.str.len() <= 90, desc.str[:90] + "…")
+                rows = ("<tr style='border-bottom:0.5px solid #EAECEE'>"
+                        "<td style='padding:8px 10px;font-size:11px;color:#5D6D7E;"
+                        "white-space:nowrap'>" + text("年月") + "</td>"
+                        "<td style='padding:8px 10px;font-size:11px;color:#2C3E50'>"
+                        + text("通報案號") + "</td>"
+                        "<td style='padding:8px 10px;font-size:11px'>" + tags + "</td>"
+                        "<td style='padding:8px 10px;font-size:11px;color:#2C3E50;"
+                        "line-height:1.5'>" + desc + "</td></tr>")
+                return "".join(rows.tolist())
+
+            @st.fragment
+            def _psych_case_table(pf_t):
+                """分頁顯示；換頁只重跑此區塊，且只組出、送出當頁 HTML"""
+                _pf_sorted = pf_t.sort_values("年月", ascending=False)
+                _n_pages   = max(1, -(-len(_pf_sorted) // _CASE_PAGE_SIZE))
+                # 頁次只經由 session_state 設定（不另給 value），超出頁數時夾回最後一頁
+                st.session_state.setdefault("_psych_case_page", 1)
+                if st.session_state["_psych_case_page"] > _n_pages:
+                    st.session_state["_psych_case_page"] = _n_pages
+                _page = 1
+                if _n_pages > 1:
+                    _page = int(st.number_input(
+                        f"頁次（共 {_n_pages} 頁）", min_value=1, max_value=_n_pages,
+                        step=1, key="_psych_case_page"))
+                _lo = (_page - 1) * _CASE_PAGE_SIZE
+                _rows_html = _case_rows_html(_pf_sorted.iloc[_lo:_lo + _CASE_PAGE_SIZE])
+
+                st.markdown(f"""
 <div style='overflow-x:auto'>
 <table style='width:100%;border-collapse:collapse;font-family:Arial,sans-serif'>
   <thead>
@@ -1487,23 +1767,123 @@ with _tab1:
   <tbody>{_rows_html}</tbody>
 </table>
 </div>""", unsafe_allow_html=True)
-            st.caption(f"共 {_nt} 件；顯示全部本期事件")
+                st.caption(f"共 {len(_pf_sorted)} 件；第 {_lo + 1}–"
+                           f"{min(_lo + _CASE_PAGE_SIZE, len(_pf_sorted))} 件"
+                           f"（每頁 {_CASE_PAGE_SIZE} 件）")
+
+            _psych_case_table(_pf_t)
 
         st.markdown("<br>", unsafe_allow_html=True)
 
 
-with _tab2:
+for _ in lazy_tab(_tab2):
 
+    # ── 跌倒分析專用篩選結果 ─────────────────────────────────
+    dff_fall = filter_falls(df_fall_base, spec)
+    dff_dx   = filter_events(df_all, spec)   # 已含 sel_dept 篩選
 
-    # ════════════════════════════════════════════════════════════
-    #  PAGE 2：跌倒事件分析
-    # ════════════════════════════════════════════════════════════
-    st.markdown(f"""
-    <div style='background:linear-gradient(135deg,#1a2e3d,#2C3E50);
-                padding:14px 22px;border-radius:10px;margin-bottom:14px'>
-      <h2 style='color:#FFFFFF;margin:0;font-size:19px;font-weight:700'>
-        📈 跌倒事件分析
-      </h2>
+    # ── 重運算區塊（診斷 / 科別 / 特徵 Pareto / 高風險因子）────────
+    # 資料準備先丟進背景執行緒，與上方 KPI、趨勢圖的繪製同時進行；
+    # 各區塊到達時才等待結果（見 section_result）
+    # 診斷特徵分析
+    # 診斷分類顯示順序
+    DX_ORDER = ["思覺失調/精神病","雙相/躁症","憂鬱症","失智症","帕金森氏症",
+                "腦血管病","骨折相關","糖尿病","腎病","肝病",
+                "心臟病","呼吸系統","腫瘤/癌症","其他"]
+    INURY_COL_DX = "病人/住民-事件發生後對病人健康的影響程度"
+    # 中度以上傷害：中度、重度、極重度、死亡
+    HIGH_INJURY   = ["中度","重度","極重度","死亡"]
+    # 科別深度分析
+    DEPT_COL    = "病人/住民-所在科別"
+    INJURY_COL  = "病人/住民-事件發生後對病人健康的影響程度"
+    HIGHRISK_COL= "跌倒事件發生對象-事件發生前是否為跌倒高危險群"
+    MOBILITY_COL= "跌倒事件發生對象-事件發生前的獨立活動能力"
+    CONSCI_COL  = "跌倒事件發生對象-當事人當時意識狀況"
+    GETUP_COL   = "可能原因-高危險群病人執意自行下床或活動"
+    # 事件說明特徵萃取
+    FALL_FEAT_NAMES = [
+        "地點_床邊下床","地點_浴廁","地點_走廊行走","地點_椅子輪椅",
+        "機轉_滑倒","機轉_頭暈血壓低","機轉_自行起身未告知","機轉_站不穩腳軟",
+        "發現_護理人員巡視","發現_聲響",
+        "病況_精神症狀","病況_約束相關",
+    ]
+    # 依科別篩選 dff_fall（繼承時間篩選）
+    if sel_dept != "全部科別":
+        dff_fall_feat = dff_fall[
+            dff_fall["病人/住民-所在科別"] == sel_dept].copy()
+    else:
+        dff_fall_feat = dff_fall.copy()
+    feat_cols_exist = [f for f in FALL_FEAT_NAMES if f in dff_fall_feat.columns]
+    _sec_key  = (DATA_VERSION, spec, inc_ltc)
+    _sec_jobs = {}
+    if not dff_dx.empty and "診斷分類" in dff_dx.columns:
+        _sec_jobs["dx"] = submit_section(
+            "dx", _sec_key, dx_injury_summary,
+            dff_dx[["診斷分類", INURY_COL_DX]].copy(), DX_ORDER, INURY_COL_DX, HIGH_INJURY)
+    if not dff_fall.empty and DEPT_COL in dff_fall.columns:
+        _sec_jobs["dept"] = submit_section(
+            "dept", _sec_key, dept_fall_profile, dff_fall, DEPT_COL, INJURY_COL,
+            HIGHRISK_COL, MOBILITY_COL, CONSCI_COL, GETUP_COL)
+    if not dff_fall_feat.empty and feat_cols_exist:
+        _sec_jobs["pareto"] = submit_section(
+            "pareto", _sec_key, feature_pareto, dff_fall_feat, feat_cols_exist)
+    if not dff_fall.empty:
+        _sec_jobs["risk"] = submit_section(
+            "risk", _sec_key, risk_factor_matrix, dff_fall, "病人/住民-所在科別")
+        _sec_jobs["rules"] = submit_section("rules", _sec_key, fall_rules, dff_fall)
+
+    # ── 年度比較指標（側邊欄所選期間；最後兩個為前期 / 本期）──────
+    # 件數陣列已依 data_version 預先建好（analytics.periods）—— 不複製資料表、
+    # 不重新解析年月；護理之家的排除直接作用在陣列的科別維度
+    _pc_fall, _pc_all = period_cubes["fall"], period_cubes["all"]
+    yr_prev, yr_cur   = yr_periods[-2:]
+    lb_prev, lb_cur   = period_label(yr_prev, yr_start), period_label(yr_cur, yr_start)
+    yr_labels = [period_label(p, yr_start) for p in yr_periods]
+    _yr_excl  = {DEPT_COL_YR: EXCLUDE_DEPT}
+
+    # 指標計算
+    # (分子, 分母)：[前期 有傷害, 本期 有傷害, 前期 精神科, 本期 精神科, 前期 中度以上, 本期 中度以上]
+    _kp = period_kpi_parts(_pc_fall, [yr_prev, yr_cur], _yr_excl)
+    _yr_parts = [(int(k[j]), int(n[j])) for k, n in _kp.values() for j in (0, 1)]
+    v_prev_inj, v_cur_inj, v_prev_psych, v_cur_psych, v_prev_mid, v_cur_mid = (
+        safe_pct(k, n) for k, n in _yr_parts)
+    n_prev_harm, n_cur_harm = (int(x) for x in period_counts(
+        _pc_all, [yr_prev, yr_cur], where={"事件大類": ["傷害"]}))
+    # 本期全年傷害件數：已發生 + 剩餘月份季節性預測（資料截止月之後到期末）
+    _data_last  = _all_months[-1]
+    elapsed_cur = period_elapsed(yr_cur, _data_last, yr_start)
+    _harm_fc    = seasonal_forecast(forecasts, ("全院", "傷害"),
+                                    future_months(_data_last, period_months(yr_cur, yr_start)[-1]))
+    harm_est, harm_lo, harm_hi = (round(v) for v in year_total(n_cur_harm, _harm_fc))
+    # 95% 信賴區間：比例以 Wilson、傷害件數以精確 Poisson，整批一次計算
+    _yr_lo, _yr_hi = _intervals("prop", *map(tuple, zip(*_yr_parts)))
+    _harm_lo, _harm_hi = _intervals("count", (n_prev_harm, n_cur_harm), (1, 1))
+    # 本期 − 前期差異的 bootstrap 95% CI：比例以 Binomial 重抽（與事件重抽同分布）、
+    # 傷害件數以 Poisson 重抽（依全年預測 / 已發生件數換算成全年）
+    _yr_boot = _boot_deltas({
+        **{k: ("prop", _yr_parts[2 * i], _yr_parts[2 * i + 1], 100.0, 100.0)
+           for i, k in enumerate(_kp)},
+        "harm": ("count", n_prev_harm, n_cur_harm, 1.0,
+                 harm_est / n_cur_harm if n_cur_harm > 0 else 1.0),
+    })
+
+    def _delta_ci(b, unit="%", digits=2):
+        """bootstrap 差異區間文字；區間跨過 0 時註明未達統計顯著"""
+        if not np.isfinite(b["lo"]):
+            return ""
+        sig = "" if b["lo"] > 0 or b["hi"] < 0 else "，未達顯著"
+        return (f"差異 95% CI {b['lo']:+.{digits}f} ～ {b['hi']:+.{digits}f}{unit}"
+                f"（bootstrap p={b['p']:.2f}{sig}）")
+
+    # ════════════════════════════════════════════════════════════
+    #  PAGE 2：跌倒事件分析
+    # ════════════════════════════════════════════════════════════
+    st.markdown(f"""
+    <div style='background:linear-gradient(135deg,#1a2e3d,#2C3E50);
+                padding:14px 22px;border-radius:10px;margin-bottom:14px'>
+      <h2 style='color:#FFFFFF;margin:0;font-size:19px;font-weight:700'>
+        📈 跌倒事件分析
+      </h2>
       <p style='color:#AED6F1;margin:4px 0 0;font-size:11px'>
         跌倒事件深度分析 · 月趨勢 · 管制圖 · 診斷特徵 · 風險因子
         ｜篩選期間 {start_m} ～ {end_m}
@@ -1516,20 +1896,24 @@ with _tab2:
     <div style='background:linear-gradient(135deg,#1a2e3d,#2C3E50);
                 padding:12px 20px;border-radius:8px;margin-bottom:14px'>
       <h3 style='color:#FFFFFF;margin:0;font-size:17px;font-weight:700'>
-        📅 年度比較分析（2024 vs 2025）
+        📅 年度比較分析（{lb_prev} vs {lb_cur}）
       </h3>
       <p style='color:#AED6F1;margin:4px 0 0;font-size:11px'>
         全院層級・不受科別篩選影響・範圍：{inc_ltc}
+        {"" if yr_start == 1 else f"・年度起始月：{yr_start} 月"}
       </p>
     </div>""", unsafe_allow_html=True)
 
     # ── 4個指標卡（含紅綠燈警示 + Tooltip 定義）────────────────
-    def _kpi_card(label, value, delta_val, delta_txt, up_is_bad=True, tooltip=""):
+    def _kpi_card(label, value, delta_val, delta_txt, up_is_bad=True, tooltip="", ci="",
+                  delta_ci=""):
         """
         醫療專業 KPI 卡片
         - 越低越好 (up_is_bad=True)：上升→紅燈、下降→綠燈
         - 越高越好 (up_is_bad=False)：上升→綠燈、下降→紅燈
         - tooltip: 右上角懸停說明（分子分母定義）
+        - ci: 數值下方的 95% 信賴區間文字
+        - delta_ci: 差異標籤下方的差異信賴區間文字
         """
         if delta_val > 0:
             arrow  = "▲"
@@ -1583,11 +1967,13 @@ with _tab2:
       </div>
       <div style='font-size:32px;font-weight:{val_weight};color:{val_color};
                   line-height:1.1;letter-spacing:-0.5px'>{value}</div>
+      <div style='font-size:10.5px;color:#85929E;margin-top:3px'>{ci}</div>
       <div style='font-size:11px;font-weight:700;color:{d_color};
                   background:{d_bg};border-radius:4px;
                   padding:3px 8px;display:inline-block;margin-top:8px'>
         {arrow} {delta_txt}
       </div>
+      <div style='font-size:10px;color:#85929E;margin-top:4px'>{delta_ci}</div>
     </div>"""
 
     # 指標定義 Tooltip
@@ -1598,183 +1984,230 @@ with _tab2:
 
     mk1, mk2, mk3, mk4 = st.columns(4)
     with mk1:
-        delta_inj = round(v25_inj - v24_inj, 2)
+        delta_inj = round(v_cur_inj - v_prev_inj, 2)
         st.markdown(_kpi_card(
             "跌倒有傷害率",
-            f"{v25_inj:.2f}%",
+            f"{v_cur_inj:.2f}%",
             delta_inj,
-            f"{delta_inj:+.2f}% vs 2024（{v24_inj:.2f}%）",
+            f"{delta_inj:+.2f}% vs {lb_prev}（{v_prev_inj:.2f}%）",
             up_is_bad=True, tooltip=TOOLTIP_INJ,
+            ci=ci_text(_yr_lo[1], _yr_hi[1]),
+            delta_ci=_delta_ci(_yr_boot["inj"]),
         ), unsafe_allow_html=True)
     with mk2:
-        delta_psych = round(v25_psych - v24_psych, 2)
+        delta_psych = round(v_cur_psych - v_prev_psych, 2)
         st.markdown(_kpi_card(
             "精神科跌倒占比",
-            f"{v25_psych:.2f}%",
+            f"{v_cur_psych:.2f}%",
             delta_psych,
-            f"{delta_psych:+.2f}% vs 2024（{v24_psych:.2f}%）",
+            f"{delta_psych:+.2f}% vs {lb_prev}（{v_prev_psych:.2f}%）",
             up_is_bad=True, tooltip=TOOLTIP_PSYCH,
+            ci=ci_text(_yr_lo[3], _yr_hi[3]),
+            delta_ci=_delta_ci(_yr_boot["psych"]),
         ), unsafe_allow_html=True)
     with mk3:
-        delta_mid = round(v25_mid - v24_mid, 2)
+        delta_mid = round(v_cur_mid - v_prev_mid, 2)
         st.markdown(_kpi_card(
             "中度以上傷害率（外科+內科）",
-            f"{v25_mid:.2f}%",
+            f"{v_cur_mid:.2f}%",
             delta_mid,
-            f"{delta_mid:+.2f}% vs 2024（{v24_mid:.2f}%）",
+            f"{delta_mid:+.2f}% vs {lb_prev}（{v_prev_mid:.2f}%）",
             up_is_bad=True, tooltip=TOOLTIP_MID,
+            ci=ci_text(_yr_lo[5], _yr_hi[5]),
+            delta_ci=_delta_ci(_yr_boot["mid"]),
         ), unsafe_allow_html=True)
     with mk4:
-        delta_harm = n25_harm - n24_harm
+        delta_harm = n_cur_harm - n_prev_harm
         st.markdown(_kpi_card(
             "傷害行為年件數",
-            f"{n25_harm} 件",
+            f"{n_cur_harm} 件",
             delta_harm,
-            f"{delta_harm:+d} 件 vs 2024（{n24_harm}件）",
+            f"{delta_harm:+d} 件 vs {lb_prev}（{n_prev_harm}件）",
             up_is_bad=True, tooltip=TOOLTIP_HARM,
+            ci=ci_text(_harm_lo[1], _harm_hi[1], unit=" 件", digits=0),
+            delta_ci=(f"全年預測 {harm_est} 件（95% PI {harm_lo}–{harm_hi}）；"
+                      if _harm_fc is not None and _harm_fc["months"] else "")
+                     + _delta_ci(_yr_boot["harm"], " 件", 0),
         ), unsafe_allow_html=True)
 
     st.markdown("<br>", unsafe_allow_html=True)
 
     # ── 圖①：跌倒月份趨勢比較折線圖 ─────────────────────────
-    st.markdown('<p class="section-title">① 跌倒事件月份趨勢比較（2024 vs 2025 vs 歷年均值）</p>',
+    st.markdown(f'<p class="section-title">① 跌倒事件月份趨勢比較（{" vs ".join(yr_labels)} vs 歷年均值）</p>',
                 unsafe_allow_html=True)
 
-    # 各年月份件數
-    def _monthly_counts(df, yr):
-        sub = df[df["年"] == yr]
-        return sub.groupby("月").size().reindex(range(1,13), fill_value=0)
-
-    cnt24  = _monthly_counts(_fb, 2024)
-    cnt25  = _monthly_counts(_fb, 2025)
-    # 2020-2023 歷年平均
-    hist_mean = pd.Series(0.0, index=range(1,13))
-    hist_yrs  = [y for y in [2020,2021,2022,2023] if y in _fb["年"].values]
-    if hist_yrs:
-        hist_mean = pd.concat(
-            [_monthly_counts(_fb, y) for y in hist_yrs], axis=1
-        ).mean(axis=1)
-
-    MONTHS_ZH = ["1月","2月","3月","4月","5月","6月",
-                 "7月","8月","9月","10月","11月","12月"]
-
-    fig_yr1 = go.Figure()
-    # 歷年均值（灰色虛線）
-    fig_yr1.add_trace(go.Scatter(
-        x=MONTHS_ZH, y=hist_mean.values, name="2020–2023 均值",
-        mode="lines", line=dict(color="#AEB6BF", dash="dash", width=2),
-        hovertemplate="<b>%{x}</b><br>歷年均值：%{y:.1f} 件<extra></extra>",
-    ))
-    # 2024（藍色實線）
-    fig_yr1.add_trace(go.Scatter(
-        x=MONTHS_ZH, y=cnt24.values, name="2024 實際",
-        mode="lines+markers",
-        line=dict(color="#2471A3", width=2.5),
-        marker=dict(size=7, color="#2471A3"),
-        hovertemplate="<b>%{x}</b><br>2024：%{y} 件<extra></extra>",
-    ))
-    # 2025（紅色實線，只畫有資料的月份）
-    last_m25 = int(_fb25["月"].max()) if not _fb25.empty else 0
-    cnt25_plot = cnt25.copy().astype(float)
-    if last_m25 < 12:
-        cnt25_plot.iloc[last_m25:] = None   # 截斷之後月份
-    fig_yr1.add_trace(go.Scatter(
-        x=MONTHS_ZH, y=cnt25_plot.values, name="2025 實際",
-        mode="lines+markers",
-        line=dict(color="#C0392B", width=2.5),
-        marker=dict(size=7, color="#C0392B"),
-        hovertemplate="<b>%{x}</b><br>2025：%{y:.0f} 件<extra></extra>",
-        connectgaps=False,
-    ))
-    fig_yr1.update_layout(
-        title=None,
-        height=380,
-        plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-        legend=dict(orientation="h", y=1.12, x=1, xanchor="right",
-                    font=dict(size=11, color="#2C3E50")),
-        xaxis=dict(
-            title=dict(text="月份", font=AXIS_TITLE_FONT),
-            tickfont=AXIS_TICK_FONT, showgrid=False,
-        ),
-        yaxis=dict(
-            title=dict(text="跌倒件數", font=AXIS_TITLE_FONT),
-            tickfont=AXIS_TICK_FONT,
-            gridcolor=GRID_COLOR, griddash="dot",
-            zeroline=True, zerolinecolor=ZERO_LINE_COLOR,
-            rangemode="tozero",
-        ),
-        hovermode="x unified",
-        margin=dict(t=70, b=60, l=60, r=20),
-    )
-    st.plotly_chart(fig_yr1, use_container_width=True)
+    # 各期間月份件數 (期間, 12)，依期內月序（會計年度時自起始月排起）
+    yr_cnt = period_counts(_pc_fall, yr_periods, exclude=_yr_excl, by="月")
+    # 歷年均值：最早比較期間之前、12 個月資料完整的最近幾個期間
+    hist_periods = baseline_periods(_pc_fall, yr_periods[0], _data_start, _data_last)
+    hist_mean  = (period_counts(_pc_fall, hist_periods, exclude=_yr_excl, by="月").mean(0)
+                  if hist_periods else np.zeros(12))
+    hist_label = (f"{period_label(hist_periods[0], yr_start)}–"
+                  f"{period_label(hist_periods[-1], yr_start)} 均值" if hist_periods else "歷年均值")
+
+    MONTHS_ZH = period_month_labels(yr_start)
+    # 各月件數的精確 Poisson 95% 區間（每 12 個一組，依期間順序）
+    _yr1_lo, _yr1_hi = _intervals("count", tuple(yr_cnt.ravel().tolist()), (1,) * yr_cnt.size)
+    yr1_err = (np.reshape(_yr1_lo, yr_cnt.shape), np.reshape(_yr1_hi, yr_cnt.shape))
+
+    # 各期間畫到資料截止月；本期之後各月以季節性模型預測（analytics.forecast）
+    yr_elapsed = [period_elapsed(p, _data_last, yr_start) for p in yr_periods]
+    fall_fc    = None
+    if elapsed_cur < 12:
+        _fb_months = [m for p in _pc_fall["periods"] for m in period_months(p, yr_start)]
+        _fb_series = pd.Series(
+            period_counts(_pc_fall, _pc_fall["periods"], exclude=_yr_excl, by="月").ravel(),
+            index=_fb_months).loc[_data_start:_data_last]
+        fall_fc = _series_outlook(tuple(_fb_series.tolist()), tuple(_fb_series.index),
+                                  tuple(future_months(_data_last,
+                                                      period_months(yr_cur, yr_start)[-1])))
+
+    @memo_figure
+    def _build_fig_yr1(MONTHS_ZH, yr_labels, yr_cnt, yr_elapsed, hist_mean, hist_label,
+                       yr1_err, fall_fc):
+        fig_yr1 = go.Figure()
+        # 歷年均值（灰色虛線）
+        fig_yr1.add_trace(go.Scatter(
+            x=MONTHS_ZH, y=hist_mean, name=hist_label,
+            mode="lines", line=dict(color="#AEB6BF", dash="dash", width=2),
+            hovertemplate="<b>%{x}</b><br>歷年均值：%{y:.1f} 件<extra></extra>",
+        ))
+        # 各比較期間（實線；前期藍、本期紅，更早的期間依序取其他顏色）
+        n = len(yr_labels)
+        for i, (lab, cnt, el) in enumerate(zip(yr_labels, yr_cnt, yr_elapsed)):
+            color, err, _ = YR_COLORS[max(len(YR_COLORS) - n + i, 0)]
+            y = cnt.astype(float)
+            y[el:] = np.nan                      # 截斷資料截止月之後
+            fig_yr1.add_trace(go.Scatter(
+                x=MONTHS_ZH, y=y, name=f"{lab} 實際",
+                mode="lines+markers",
+                line=dict(color=color, width=2.5),
+                marker=dict(size=7, color=color),
+                error_y=dict(type="data", symmetric=False,
+                             array=yr1_err[1][i] - y, arrayminus=y - yr1_err[0][i],
+                             color=err, thickness=1.2, width=3),
+                hovertemplate=f"<b>%{{x}}</b><br>{lab}：%{{y:.0f}} 件<extra></extra>",
+                connectgaps=False,
+            ))
+        # 本期剩餘月份預測（虛線 + 95% 預測區間帶，自最後實際點接續）
+        if fall_fc is not None and fall_fc["months"]:
+            lab, el = yr_labels[-1], yr_elapsed[-1]
+            _fx = MONTHS_ZH[el:]
+            fig_yr1.add_trace(go.Scatter(
+                x=_fx + _fx[::-1], y=list(fall_fc["hi"]) + list(fall_fc["lo"])[::-1],
+                fill="toself", fillcolor="rgba(192,57,43,0.12)",
+                line=dict(width=0), name=f"{lab} 預測 95% 區間", hoverinfo="skip",
+            ))
+            _x0 = MONTHS_ZH[el - 1:el]
+            _y0 = [yr_cnt[-1][el - 1]] if el > 0 else []
+            fig_yr1.add_trace(go.Scatter(
+                x=_x0 + _fx, y=_y0 + list(fall_fc["mean"]), name=f"{lab} 預測",
+                mode="lines+markers",
+                line=dict(color="#C0392B", width=2, dash="dot"),
+                marker=dict(size=6, color="#FFFFFF", line=dict(color="#C0392B", width=1.5)),
+                customdata=np.column_stack([np.r_[_y0, fall_fc["lo"]],
+                                            np.r_[_y0, fall_fc["hi"]]]),
+                hovertemplate=(f"<b>%{{x}}</b><br>{lab} 預測：%{{y:.1f}} 件"
+                               "（95% PI %{customdata[0]:.0f}–%{customdata[1]:.0f}）<extra></extra>"),
+            ))
+        fig_yr1.update_layout(
+            title=None,
+            height=380,
+            legend=dict(orientation="h", y=1.12, x=1, xanchor="right",
+                        font=dict(size=11, color="#2C3E50")),
+            xaxis=dict(
+                title=dict(text="月份"), showgrid=False,
+            ),
+            yaxis=dict(
+                title=dict(text="跌倒件數"), griddash="dot",
+                zeroline=True,
+                rangemode="tozero",
+            ),
+            hovermode="x unified",
+            margin=dict(t=70, b=60, l=60, r=20),
+        )
+        return fig_yr1
+    fig_yr1 = _build_fig_yr1(MONTHS_ZH, yr_labels, yr_cnt, yr_elapsed, hist_mean, hist_label,
+                             yr1_err, fall_fc)
+    _yr1_note = ""
+    if fall_fc is not None and fall_fc["months"]:
+        _fall_tot = year_total(int(yr_cnt[-1][:elapsed_cur].sum()), fall_fc)
+        _yr1_note = (f"；虛線 = 季節性模型預測（近期加權 Poisson / 負二項 GLM），"
+                     f"{lb_cur} 全年預測 {_fall_tot[0]:.0f} 件（95% PI {_fall_tot[1]:.0f}–{_fall_tot[2]:.0f}）")
+    st.caption("誤差線 = 各月件數的精確 Poisson 95% 信賴區間；各年區間重疊時差異可能只是隨機波動"
+               + _yr1_note)
+    show_chart(fig_yr1)
 
     st.markdown("<hr>", unsafe_allow_html=True)
 
-    # ── 圖②：各科別 2024 vs 2025 分組橫條圖 ────────────
-    st.markdown('<p class="section-title">② 各科別跌倒件數：2024 vs 2025</p>',
+    # ── 圖②：各科別跨年度分組橫條圖 ──────────────────────
+    # 本期未滿 12 個月時，各期間只取相同的期內月份（同期比較）
+    _cmp_m    = max(elapsed_cur, 1)
+    _cmp_note = "" if _cmp_m == 12 else f"（同期 {MONTHS_ZH[0]}–{MONTHS_ZH[_cmp_m - 1]}）"
+    st.markdown(f'<p class="section-title">② 各科別跌倒件數：{" vs ".join(yr_labels)}{_cmp_note}</p>',
                 unsafe_allow_html=True)
 
-    CMP_DEPTS   = ["精神科","外科","內科","復健科"]
-    last_m25_fb = int(_fb25["月"].max()) if not _fb25.empty else 1
-
-    cmp_data = []
-    for dept in CMP_DEPTS:
-        n24 = (_fb24[DEPT_COL_YR] == dept).sum()
-        n25 = (_fb25[DEPT_COL_YR] == dept).sum()
-        cmp_data.append({"科別": dept, "2024": n24, "2025": n25})
-    df_cmp = pd.DataFrame(cmp_data).sort_values("2024", ascending=True)
-
-    fig_yr2 = go.Figure()
-    # 2024（藍色）
-    fig_yr2.add_trace(go.Bar(
-        name="2024",
-        y=df_cmp["科別"],
-        x=df_cmp["2024"],
-        orientation="h",
-        marker_color="#2471A3",
-        marker_opacity=0.85,
-        text=df_cmp["2024"].astype(str) + " 件",
-        textposition="outside",
-        textfont=dict(size=10, color="#1C2833", family="Arial"),
-        hovertemplate="<b>%{y}</b><br>2024：%{x} 件<extra></extra>",
-    ))
-    # 2025（紅色）
-    fig_yr2.add_trace(go.Bar(
-        name="2025",
-        y=df_cmp["科別"],
-        x=df_cmp["2025"],
-        orientation="h",
-        marker_color="#C0392B",
-        marker_opacity=0.80,
-        text=df_cmp["2025"].astype(str) + " 件",
-        textposition="outside",
-        textfont=dict(size=10, color="#C0392B", family="Arial Bold"),
-        hovertemplate="<b>%{y}</b><br>2025：%{x} 件<extra></extra>",
-    ))
-    max_val = max(df_cmp["2024"].max(), df_cmp["2025"].max())
-    fig_yr2.update_layout(
-        title=None,
-        barmode="group",
-        height=380,
-        plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-        legend=dict(orientation="h", y=1.12, x=1, xanchor="right",
-                    font=dict(size=11, color="#2C3E50")),
-        xaxis=dict(
-            title=dict(text="跌倒件數", font=AXIS_TITLE_FONT),
-            tickfont=AXIS_TICK_FONT,
-            range=[0, max_val * 1.4],
-            gridcolor=GRID_COLOR, griddash="dot",
-            zeroline=True, zerolinecolor=ZERO_LINE_COLOR,
-        ),
-        yaxis=dict(
-            title=dict(text="科別", font=AXIS_TITLE_FONT),
-            tickfont=dict(size=12, color="#2C3E50", family="Arial"),
-            automargin=True,
-        ),
-        margin=dict(t=70, b=60, l=80, r=120),
-        hovermode="y unified",
-    )
-    st.plotly_chart(fig_yr2, use_container_width=True)
+    CMP_DEPTS = ["精神科","外科","內科","復健科"]
+    df_cmp = (pd.DataFrame(
+                  period_counts(_pc_fall, yr_periods, by=DEPT_COL_YR, months=_cmp_m).T,
+                  index=_pc_fall["dims"][DEPT_COL_YR], columns=yr_labels)
+              .reindex(CMP_DEPTS, fill_value=0)
+              .rename_axis("科別").reset_index()
+              .sort_values(yr_labels[0], ascending=True))
+    _cmp_lo, _cmp_hi = _intervals("count", tuple(df_cmp[yr_labels].T.to_numpy().ravel().tolist()),
+                                  (1,) * (len(yr_labels) * len(df_cmp)))
+    df_cmp[[f"{lab}下限" for lab in yr_labels]] = np.reshape(_cmp_lo, (len(yr_labels), -1)).T
+    df_cmp[[f"{lab}上限" for lab in yr_labels]] = np.reshape(_cmp_hi, (len(yr_labels), -1)).T
+
+    @memo_figure
+    def _build_fig_yr2(df_cmp, yr_labels):
+        fig_yr2 = go.Figure()
+        n = len(yr_labels)
+        for i, lab in enumerate(yr_labels):
+            color, _, dark = YR_COLORS[max(len(YR_COLORS) - n + i, 0)]
+            cur = i == n - 1                     # 本期：紅色、粗體數字
+            fig_yr2.add_trace(go.Bar(
+                name=lab,
+                y=df_cmp["科別"],
+                x=df_cmp[lab],
+                orientation="h",
+                marker_color=color,
+                marker_opacity=0.80 if cur else 0.85,
+                text=df_cmp[lab].astype(str) + " 件",
+                textposition="outside",
+                textfont=dict(size=10, color=color if cur else "#1C2833",
+                              family="Arial Bold" if cur else "Arial"),
+                error_x=dict(type="data", symmetric=False,
+                             array=df_cmp[f"{lab}上限"] - df_cmp[lab],
+                             arrayminus=df_cmp[lab] - df_cmp[f"{lab}下限"],
+                             color=dark, thickness=1.2, width=3),
+                customdata=df_cmp[[f"{lab}下限", f"{lab}上限"]],
+                hovertemplate=f"<b>%{{y}}</b><br>{lab}：%{{x}} 件"
+                              "（95% CI %{customdata[0]:.0f}–%{customdata[1]:.0f}）<extra></extra>",
+            ))
+        max_val = max(df_cmp[f"{lab}上限"].max() for lab in yr_labels)
+        fig_yr2.update_layout(
+            title=None,
+            barmode="group",
+            height=380,
+            legend=dict(orientation="h", y=1.12, x=1, xanchor="right",
+                        font=dict(size=11, color="#2C3E50")),
+            xaxis=dict(
+                title=dict(text="跌倒件數"),
+                range=[0, max_val * 1.4], griddash="dot",
+                zeroline=True,
+            ),
+            yaxis=dict(
+                title=dict(text="科別"),
+                tickfont=dict(size=12),
+                automargin=True,
+            ),
+            margin=dict(t=70, b=60, l=80, r=120),
+            hovermode="y unified",
+        )
+        return fig_yr2
+    fig_yr2 = _build_fig_yr2(df_cmp, yr_labels)
+    show_chart(fig_yr2)
 
 
 
@@ -1799,138 +2232,142 @@ with _tab2:
     #  圖A：每月件數 + 發生率（雙軸）
     #  軸標題：深色 #1C2833，字體 13px Bold
     # ════════════════════════════════════════════════════════════
-    fig_a = make_subplots(specs=[[{"secondary_y": True}]])
-    fig_a.add_trace(go.Bar(
-        x=mc["年月顯示"], y=mc["件數"], name="發生件數",
-        marker_color="#2C3E50", marker_opacity=0.75,
-        text=mc["件數"],
-        textposition="outside",
-        textfont=dict(size=8, color="#2C3E50", family="Arial"),
-        hovertemplate="<b>%{x}</b><br>件數：%{y} 件<extra></extra>",
-    ), secondary_y=False)
-    fig_a.add_trace(go.Scatter(
-        x=mc["年月顯示"], y=mc["發生率"], name="發生率(‰)",
-        mode="lines+markers", line=dict(color="#E74C3C", width=2.5),
-        marker=dict(size=5, color="#E74C3C"),
-        hovertemplate="<b>%{x}</b><br>發生率：%{y:.2f}‰<extra></extra>",
-    ), secondary_y=True)
-    fig_a.update_layout(
-        title=dict(text="📊 每月發生件數與發生率趨勢", font=TITLE_FONT),
-        height=420, plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-        hovermode="x unified",
-        legend=dict(orientation="h", y=1.1, x=1, xanchor="right",
-                    font=dict(size=11, color="#2C3E50")),
-        xaxis=dict(
-            title=dict(text="年月", font=AXIS_TITLE_FONT),
-            tickangle=-45, showgrid=False, tickfont=AXIS_TICK_FONT,
-            linecolor="#BDC3C7", linewidth=1,
-        ),
-        margin=dict(t=60, b=50),
-        uniformtext=dict(mode="hide", minsize=7),  # 月份過密時自動隱藏標籤
-    )
-    fig_a.update_yaxes(
-        title_text="發生件數",
-        title_font=AXIS_TITLE_FONT,
-        tickfont=AXIS_TICK_FONT,
-        secondary_y=False,
-        gridcolor=GRID_COLOR, gridwidth=1, griddash="dot",
-        zeroline=True, zerolinecolor=ZERO_LINE_COLOR,
-    )
-    fig_a.update_yaxes(
-        title_text="發生率 (‰)",
-        title_font=dict(size=13, color="#C0392B", family="Arial"),  # 右軸與折線同色
-        tickfont=dict(size=10, color="#C0392B", family="Arial"),
-        secondary_y=True,
-    )
-
-    # ── 政策介入標注：2025/05 住院看護費用補助辦法 ────────────
-    _POLICY_X  = "2025/05"
-    _POLICY_LBL = "住院看護費用補助辦法"
-    # 確認此月份存在於 X 軸資料中才加標注
-    if _POLICY_X in mc["年月顯示"].values:
-        fig_a.add_vline(
-        x=_POLICY_X,
-        line_dash="dash", line_color="#1E8449", line_width=1.8,
+    @memo_figure
+    def _build_fig_a(mc, notes):
+        fig_a = make_subplots(specs=[[{"secondary_y": True}]])
+        fig_a.add_trace(go.Bar(
+            x=mc["年月顯示"], y=mc["件數"], name="發生件數",
+            marker_color="#2C3E50", marker_opacity=0.75,
+            text=mc["件數"],
+            textposition="outside",
+            textfont=dict(size=8, color="#2C3E50", family="Arial"),
+            hovertemplate="<b>%{x}</b><br>件數：%{y} 件<extra></extra>",
+        ), secondary_y=False)
+        fig_a.add_trace(go.Scatter(
+            x=mc["年月顯示"], y=mc["發生率"], name="發生率(‰)",
+            mode="lines+markers", line=dict(color="#E74C3C", width=2.5),
+            marker=dict(size=5, color="#E74C3C"),
+            hovertemplate="<b>%{x}</b><br>發生率：%{y:.2f}‰<extra></extra>",
+        ), secondary_y=True)
+        fig_a.update_layout(
+            title=dict(text="📊 每月發生件數與發生率趨勢"),
+            height=420,
+            hovermode="x unified",
+            legend=dict(orientation="h", y=1.1, x=1, xanchor="right",
+                        font=dict(size=11, color="#2C3E50")),
+            xaxis=dict(
+                title=dict(text="年月"),
+                tickangle=-45, showgrid=False,
+                linecolor="#BDC3C7", linewidth=1,
+            ),
+            margin=dict(t=60, b=50),
+            uniformtext=dict(mode="hide", minsize=7),  # 月份過密時自動隱藏標籤
+        )
+        fig_a.update_yaxes(
+            title_text="發生件數",
+            secondary_y=False, gridwidth=1, griddash="dot",
+            zeroline=True,
         )
-        fig_a.add_annotation(
-        x=_POLICY_X, y=0.95, xref="x", yref="paper",
-        text=f"▼ {_POLICY_LBL}",
-        showarrow=False,
-        font=dict(size=11, color="#1E8449", family="Arial"),
-        bgcolor="rgba(255,255,255,0.85)",
-        bordercolor="#1E8449", borderwidth=1,
-        borderpad=4,
-        xanchor="left", yanchor="top",
+        fig_a.update_yaxes(
+            title_text="發生率 (‰)",
+            title_font=dict(size=13, color="#C0392B", family="Arial"),  # 右軸與折線同色
+            tickfont=dict(size=10, color="#C0392B", family="Arial"),
+            secondary_y=True,
         )
 
-    st.plotly_chart(fig_a, use_container_width=True)
+        # ── 政策介入標注（interventions.json）＋ ITS 水準 / 斜率變化估計 ──
+        for _x, _txt in notes:
+            fig_a.add_vline(
+            x=_x,
+            line_dash="dash", line_color="#1E8449", line_width=1.8,
+            )
+            fig_a.add_annotation(
+            x=_x, y=0.95, xref="x", yref="paper",
+            text=_txt, align="left",
+            showarrow=False,
+            font=dict(size=11, color="#1E8449", family="Arial"),
+            bgcolor="rgba(255,255,255,0.85)",
+            bordercolor="#1E8449", borderwidth=1,
+            borderpad=4,
+            xanchor="left", yanchor="top",
+            )
+        return fig_a
+    fig_a = _build_fig_a(mc, mc_its)
+
+    show_chart(fig_a)
 
 
     # ════════════════════════════════════════════════════════════
-    #  圖B：管制圖
+    #  圖B：u 管制圖（逐月界限 ū ± 3√(ū / 住院人日數)，見 analytics.spc）
     #  軸標題：深色，控制線標籤各自使用線條顏色
     # ════════════════════════════════════════════════════════════
-    rates = mc["發生率"].replace(0, np.nan).dropna()
-    if len(rates) >= 3:
-        cl  = float(rates.mean())
-        std = float(rates.std())
-        ucl = cl + 3 * std
-        lcl = max(0.0, cl - 3 * std)
-        mc["異常點"] = mc["發生率"].apply(lambda x: (x > ucl) or (0 < x < lcl))
-
-        fig_b = go.Figure()
-        fig_b.add_trace(go.Scatter(
-            x=list(mc["年月顯示"]) + list(mc["年月顯示"])[::-1],
-            y=[ucl]*len(mc) + [lcl]*len(mc),
-            fill="toself", fillcolor=CTRL_BAND_FILL,
-            line=dict(color="rgba(0,0,0,0)"),
-            name="管制區間", hoverinfo="skip"))
-        fig_b.add_trace(go.Scatter(
-            x=mc["年月顯示"], y=mc["發生率"],
-            mode="lines+markers", name="月發生率",
-            line=dict(color="#3498DB", width=2),
-            marker=dict(size=7,
-                color=mc["異常點"].map({True: OUTLIER_COLOR, False: "#3498DB"}),
-                symbol=mc["異常點"].map({True: "diamond", False: "circle"}),
-                line=dict(width=1.5, color="white")),
-            hovertemplate="<b>%{x}</b><br>%{y:.2f}‰<extra></extra>"))
-        outliers = mc[mc["異常點"]]
-        if not outliers.empty:
+    if mc_spc is not None:
+        cl       = float(mc_spc["CL"].iloc[0])
+        _lim     = mc_spc.dropna(subset=["UCL"])
+        ucl, lcl = float(_lim["UCL"].iloc[-1]), float(_lim["LCL"].iloc[-1])
+        outliers = mc_spc[mc_spc["異常點"]]
+
+        @memo_figure
+        def _build_fig_b(cl, mc_spc, outliers):
+            fig_b = go.Figure()
+            plan  = trend_plan(mc_spc["年月顯示"], [mc_spc["發生率"]])
+            _band = mc_spc.dropna(subset=["UCL"])
+            _ucl, _lcl = (trend_trace(x=_band["年月顯示"], y=_band[_col],
+                                      mode="lines", plan=plan)
+                          for _col in ("UCL", "LCL"))
             fig_b.add_trace(go.Scatter(
-                x=outliers["年月顯示"], y=outliers["發生率"],
-                mode="markers+text", name="⚠️ 超出管制",
-                marker=dict(size=13, color=OUTLIER_COLOR, symbol="diamond",
-                            line=dict(width=2, color="white")),
-                text=outliers["發生率"].round(2).astype(str) + "‰",
-                textposition="top center",
-                textfont=dict(size=10, color="#7B241C", family="Arial Bold"),
-                hovertemplate="⚠️ <b>%{x}</b>：%{y:.2f}‰<extra></extra>"))
-        for y_val, lbl, clr, ds in [
-            (ucl, f"UCL = {ucl:.2f}‰", "#E74C3C", "dash"),
-            (cl,  f"CL  = {cl:.2f}‰",  "#5D6D7E", "solid"),
-            (lcl, f"LCL = {lcl:.2f}‰", "#E74C3C", "dash"),
-        ]:
-            fig_b.add_hline(y=y_val, line_dash=ds, line_color=clr, line_width=2,
-                annotation_text=f"  {lbl}", annotation_position="right",
-                annotation_font=dict(size=11, color=clr, family="Arial Bold"))
-        fig_b.update_layout(
-            title=dict(text="📉 病安發生率統計管制圖（X̄ ± 3σ）", font=TITLE_FONT),
-            height=380, plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-            hovermode="x unified",
-            legend=dict(orientation="h", y=1.1, x=1, xanchor="right",
-                        font=dict(size=11, color="#2C3E50")),
-            xaxis=dict(
-                title=dict(text="年月", font=AXIS_TITLE_FONT),
-                tickangle=-45, showgrid=False, tickfont=AXIS_TICK_FONT,
-            ),
-            yaxis=dict(
-                title=dict(text="發生率 (‰)", font=AXIS_TITLE_FONT),
-                tickfont=AXIS_TICK_FONT,
-                gridcolor=GRID_COLOR, griddash="dot",
-                zeroline=True, zerolinecolor=ZERO_LINE_COLOR,
-            ),
-            margin=dict(t=60, b=50, r=140))
-        st.plotly_chart(fig_b, use_container_width=True)
+                x=list(_ucl.x) + list(_lcl.x)[::-1],
+                y=list(_ucl.y) + list(_lcl.y)[::-1],
+                fill="toself", fillcolor=CTRL_BAND_FILL,
+                line=dict(color="rgba(0,0,0,0)", shape="hvh"),
+                name="管制區間", hoverinfo="skip"))
+            for _col, _nm in [("UCL", "UCL"), ("LCL", "LCL")]:
+                fig_b.add_trace(trend_trace(
+                    x=mc_spc["年月顯示"], y=mc_spc[_col], mode="lines", name=_nm,
+                    plan=plan,
+                    line=dict(color="#E74C3C", width=1.6, dash="dash", shape="hvh"),
+                    showlegend=False,
+                    hovertemplate=f"{_nm} %{{y:.2f}}‰<extra></extra>"))
+            fig_b.add_trace(trend_trace(
+                x=mc_spc["年月顯示"], y=mc_spc["發生率"], plan=plan,
+                mode="lines+markers", name="月發生率",
+                line=dict(color="#3498DB", width=2),
+                marker=dict(size=7,
+                    color=mc_spc["異常點"].map({True: OUTLIER_COLOR, False: "#3498DB"}),
+                    symbol=mc_spc["異常點"].map({True: "diamond", False: "circle"}),
+                    line=dict(width=1.5, color="white")),
+                hovertemplate="<b>%{x}</b><br>%{y:.2f}‰<extra></extra>"))
+            if not outliers.empty:
+                fig_b.add_trace(trend_trace(
+                    x=outliers["年月顯示"], y=outliers["發生率"], plan=plan,
+                    mode="markers+text", name="⚠️ 超出管制",
+                    marker=dict(size=13, color=OUTLIER_COLOR, symbol="diamond",
+                                line=dict(width=2, color="white")),
+                    text=outliers["發生率"].round(2).astype(str) + "‰",
+                    textposition="top center",
+                    textfont=dict(size=10, color="#7B241C", family="Arial Bold"),
+                    hovertemplate="⚠️ <b>%{x}</b>：%{y:.2f}‰<extra></extra>"))
+            fig_b.add_hline(y=cl, line_dash="solid", line_color="#5D6D7E", line_width=2,
+                annotation_text=f"  CL  = {cl:.2f}‰", annotation_position="right",
+                annotation_font=dict(size=11, color="#5D6D7E", family="Arial Bold"))
+            fig_b.update_layout(
+                title=dict(text="📉 病安發生率 u 管制圖（ū ± 3√(ū/住院人日數)）"),
+                height=380,
+                hovermode="x unified",
+                legend=dict(orientation="h", y=1.1, x=1, xanchor="right",
+                            font=dict(size=11, color="#2C3E50")),
+                xaxis=dict(
+                    title=dict(text="年月"),
+                    tickangle=-45, showgrid=False,
+                ),
+                yaxis=dict(
+                    title=dict(text="發生率 (‰)"), griddash="dot",
+                    zeroline=True,
+                ),
+                margin=dict(t=60, b=50, r=140))
+            return fig_b
+        fig_b = _build_fig_b(cl, mc_spc, outliers)
+        show_chart(fig_b)
 
         r1, r2, r3 = st.columns(3)
         r1.markdown(f"""
@@ -1942,19 +2379,69 @@ with _tab2:
         r2.markdown(f"""
     <div style='background:#FFFFFF;border:2px solid #E74C3C;border-radius:10px;
                 padding:14px 18px;box-shadow:0 2px 6px rgba(0,0,0,0.08);text-align:center'>
-      <div style='font-size:12px;color:#922B21;font-weight:600;margin-bottom:6px'>🔴 上管制線 UCL</div>
+      <div style='font-size:12px;color:#922B21;font-weight:600;margin-bottom:6px'>🔴 上管制線 UCL（最近月）</div>
       <div style='font-size:28px;font-weight:900;color:#C0392B'>{ucl:.2f}‰</div>
     </div>""", unsafe_allow_html=True)
         r3.markdown(f"""
     <div style='background:#FFFFFF;border:2px solid #1E8449;border-radius:10px;
                 padding:14px 18px;box-shadow:0 2px 6px rgba(0,0,0,0.08);text-align:center'>
-      <div style='font-size:12px;color:#1A5276;font-weight:600;margin-bottom:6px'>🟢 下管制線 LCL</div>
+      <div style='font-size:12px;color:#1A5276;font-weight:600;margin-bottom:6px'>🟢 下管制線 LCL（最近月）</div>
       <div style='font-size:28px;font-weight:900;color:#1E8449'>{lcl:.2f}‰</div>
     </div>""", unsafe_allow_html=True)
         if not outliers.empty:
             st.markdown(f'<div style="background:#FFF3CD;border-left:4px solid #F39C12;padding:10px 14px;border-radius:4px;color:#7D4700;font-size:13px">⚠️ 共 <b>{len(outliers)}</b> 個月份超出管制界限，請重點追蹤！</div>', unsafe_allow_html=True)
     else:
-        st.info("📌 管制圖需要至少 3 個月資料，請擴大時間區間。")
+        st.info("📌 管制圖需要至少 3 個月（有住院人日數）資料，請擴大時間區間。")
+
+    # ── CUSUM / EWMA（與管制圖同一序列；狀態由資料載入時累積，見 analytics.monitor）──
+    if mc_mon is not None and mc_mon["EWMA界限"].gt(0).any():
+        @memo_figure
+        def _build_fig_b_mon(mc_mon):
+            fig_b_mon = make_subplots(rows=2, cols=1, shared_xaxes=True,
+                                      vertical_spacing=0.12,
+                                      subplot_titles=("EWMA（λ=0.2，標準化 σ）",
+                                                      f"CUSUM（k=0.5，h={CUSUM_H:g}）"))
+            _x = mc_mon["年月顯示"]
+            for _sgn in (1, -1):
+                fig_b_mon.add_trace(go.Scatter(
+                    x=_x, y=_sgn * mc_mon["EWMA界限"], mode="lines",
+                    line=dict(color="#E74C3C", width=1.4, dash="dash"),
+                    name="EWMA 界限", showlegend=_sgn == 1, hoverinfo="skip"), row=1, col=1)
+            fig_b_mon.add_trace(go.Scatter(
+                x=_x, y=mc_mon["EWMA"], mode="lines+markers", name="EWMA",
+                line=dict(color="#3498DB", width=2),
+                marker=dict(size=6, color=mc_mon["EWMA訊號"].map(
+                    {True: OUTLIER_COLOR, False: "#3498DB"})),
+                hovertemplate="<b>%{x}</b><br>EWMA %{y:+.2f}σ<extra></extra>"), row=1, col=1)
+            fig_b_mon.add_trace(go.Scatter(
+                x=_x, y=mc_mon["CUSUM+"], mode="lines", name="CUSUM+（上升）",
+                line=dict(color="#C0392B", width=2),
+                hovertemplate="<b>%{x}</b><br>CUSUM+ %{y:.2f}<extra></extra>"), row=2, col=1)
+            fig_b_mon.add_trace(go.Scatter(
+                x=_x, y=-mc_mon["CUSUM−"], mode="lines", name="CUSUM−（下降）",
+                line=dict(color="#1E8449", width=2),
+                customdata=mc_mon["CUSUM−"],
+                hovertemplate="<b>%{x}</b><br>CUSUM− %{customdata:.2f}<extra></extra>"),
+                row=2, col=1)
+            for _h in (CUSUM_H, -CUSUM_H):
+                fig_b_mon.add_hline(y=_h, line_dash="dash", line_color="#E74C3C",
+                                    line_width=1.4, row=2, col=1)
+            fig_b_mon.add_hline(y=0, line_color="#5D6D7E", line_width=1, row=1, col=1)
+            fig_b_mon.update_layout(
+                height=420, hovermode="x unified",
+                legend=dict(orientation="h", y=1.12, x=1, xanchor="right",
+                            font=dict(size=11, color="#2C3E50")),
+                margin=dict(t=70, b=50, r=40))
+            fig_b_mon.update_xaxes(tickangle=-45, showgrid=False, row=2, col=1)
+            fig_b_mon.update_yaxes(griddash="dot")
+            return fig_b_mon
+        fig_b_mon = _build_fig_b_mon(mc_mon)
+        show_chart(fig_b_mon)
+        _mon_hit = mc_mon[mc_mon["CUSUM訊號"] | mc_mon["EWMA訊號"]]
+        if not _mon_hit.empty:
+            st.caption(f"⚠️ CUSUM / EWMA 共 {len(_mon_hit)} 個月份出現累積偏移訊號"
+                       f"（最近：{_mon_hit['年月顯示'].iloc[-1]}）— 小幅但持續的變化，"
+                       "可能早於單點超出 UCL")
 
 
     # ════════════════════════════════════════════════════════════
@@ -1963,30 +2450,32 @@ with _tab2:
     cat_m = dff.groupby(["年月顯示","事件大類"]).size().reset_index(name="件數")
     if not cat_m.empty:
         piv = cat_m.pivot(index="年月顯示", columns="事件大類", values="件數").fillna(0)
-        fig_e = go.Figure()
-        for cat in piv.columns:
-            fig_e.add_trace(go.Bar(
-                x=piv.index, y=piv[cat], name=cat,
-                marker_color=CATEGORY_COLORS.get(cat, "#7F8C8D"),
-                hovertemplate=f"<b>%{{x}}</b><br>{cat}：%{{y}} 件<extra></extra>"))
-        fig_e.update_layout(
-            title=dict(text="📊 各類別事件每月趨勢（堆疊）", font=TITLE_FONT),
-            barmode="stack", height=380,
-            plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-            legend=dict(orientation="h", y=1.1, x=1, xanchor="right",
-                        font=dict(size=11, color="#2C3E50")),
-            xaxis=dict(
-                title=dict(text="年月", font=AXIS_TITLE_FONT),
-                tickangle=-45, showgrid=False, tickfont=AXIS_TICK_FONT,
-            ),
-            yaxis=dict(
-                title=dict(text="事件件數", font=AXIS_TITLE_FONT),
-                tickfont=AXIS_TICK_FONT,
-                gridcolor=GRID_COLOR, griddash="dot",
-                zeroline=True, zerolinecolor=ZERO_LINE_COLOR,
-            ),
-            hovermode="x unified", margin=dict(t=60, b=60))
-        st.plotly_chart(fig_e, use_container_width=True)
+        @memo_figure
+        def _build_fig_e(piv):
+            fig_e = go.Figure()
+            plan  = trend_plan(piv.index, [piv.sum(axis=1)])
+            for cat in piv.columns:
+                fig_e.add_trace(trend_trace(
+                    x=piv.index, y=piv[cat], name=cat, kind="bar", plan=plan,
+                    marker_color=CATEGORY_COLORS.get(cat, "#7F8C8D"),
+                    hovertemplate=f"<b>%{{x}}</b><br>{cat}：%{{y}} 件<extra></extra>"))
+            fig_e.update_layout(
+                title=dict(text="📊 各類別事件每月趨勢（堆疊）"),
+                barmode="stack", height=380,
+                legend=dict(orientation="h", y=1.1, x=1, xanchor="right",
+                            font=dict(size=11, color="#2C3E50")),
+                xaxis=dict(
+                    title=dict(text="年月"),
+                    tickangle=-45, showgrid=False,
+                ),
+                yaxis=dict(
+                    title=dict(text="事件件數"), griddash="dot",
+                    zeroline=True,
+                ),
+                hovermode="x unified", margin=dict(t=60, b=60))
+            return fig_e
+        fig_e = _build_fig_e(piv)
+        show_chart(fig_e)
 
 
     # ════════════════════════════════════════════════════════════
@@ -2015,40 +2504,41 @@ with _tab2:
                 sen_cnt.columns = ["年資", "件數"]
                 sen_cnt["佔比"] = (sen_cnt["件數"] / sen_cnt["件數"].sum() * 100).round(1)
 
-                fig_h1 = go.Figure(go.Bar(
-                    x=sen_cnt["件數"],
-                    y=sen_cnt["年資"],
-                    orientation="h",
-                    marker=dict(
-                        color=SENIORITY_COLORS,
-                        line=dict(width=0),
-                    ),
-                    text=[f"{v} 件 ({p:.2f}%)"
-                          for v, p in zip(sen_cnt["件數"], sen_cnt["佔比"])],
-                    textposition="outside",
-                    textfont=dict(size=11, color="#1C2833", family="Arial"),
-                    hovertemplate="<b>%{y}</b><br>件數：%{x} 件<br>佔比：%{customdata:.2f}%<extra></extra>",
-                    customdata=sen_cnt["佔比"],
-                ))
-                fig_h1.update_layout(
-                    height=340,
-                    plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-                    xaxis=dict(
-                        title=dict(text="事件件數", font=AXIS_TITLE_FONT),
-                        tickfont=AXIS_TICK_FONT,
-                        gridcolor=GRID_COLOR, griddash="dot",
-                        zeroline=True, zerolinecolor=ZERO_LINE_COLOR,
-                    ),
-                    yaxis=dict(
-                        title=dict(text="工作年資", font=AXIS_TITLE_FONT),
-                        tickfont=dict(size=11, color="#2C3E50", family="Arial"),
-                        categoryorder="array",
-                        categoryarray=SENIORITY_ORDER,
-                        automargin=True,
-                    ),
-                    margin=dict(t=20, b=50, l=80, r=120),
-                )
-                st.plotly_chart(fig_h1, use_container_width=True)
+                @memo_figure
+                def _build_fig_h1(SENIORITY_COLORS, SENIORITY_ORDER, sen_cnt):
+                    fig_h1 = go.Figure(go.Bar(
+                        x=sen_cnt["件數"],
+                        y=sen_cnt["年資"],
+                        orientation="h",
+                        marker=dict(
+                            color=SENIORITY_COLORS,
+                            line=dict(width=0),
+                        ),
+                        text=[f"{v} 件 ({p:.2f}%)"
+                              for v, p in zip(sen_cnt["件數"], sen_cnt["佔比"])],
+                        textposition="outside",
+                        textfont=dict(size=11, color="#1C2833", family="Arial"),
+                        hovertemplate="<b>%{y}</b><br>件數：%{x} 件<br>佔比：%{customdata:.2f}%<extra></extra>",
+                        customdata=sen_cnt["佔比"],
+                    ))
+                    fig_h1.update_layout(
+                        height=340,
+                        xaxis=dict(
+                            title=dict(text="事件件數"), griddash="dot",
+                            zeroline=True,
+                        ),
+                        yaxis=dict(
+                            title=dict(text="工作年資"),
+                            tickfont=dict(size=11),
+                            categoryorder="array",
+                            categoryarray=SENIORITY_ORDER,
+                            automargin=True,
+                        ),
+                        margin=dict(t=20, b=50, l=80, r=120),
+                    )
+                    return fig_h1
+                fig_h1 = _build_fig_h1(SENIORITY_COLORS, SENIORITY_ORDER, sen_cnt)
+                show_chart(fig_h1)
 
             # ── 右：各年資層 SAC 嚴重度堆疊（比較不同年資的嚴重度分布）
             with col_h2:
@@ -2073,44 +2563,45 @@ with _tab2:
                                  .reindex(SENIORITY_ORDER)
                                  .fillna(0))
 
-                    fig_h2 = go.Figure()
-                    for sac_lv in [1, 2, 3, 4]:
-                        if sac_lv in sac_piv.columns:
-                            fig_h2.add_trace(go.Bar(
-                                name=f"SAC {sac_lv} {SAC_DESC[sac_lv]}",
-                                y=sac_piv.index,
-                                x=sac_piv[sac_lv],
-                                orientation="h",
-                                marker_color=SAC_COLORS[sac_lv],
-                                marker_opacity=0.85,
-                                hovertemplate=(
-                                    f"<b>%{{y}}</b><br>"
-                                    f"SAC {sac_lv} {SAC_DESC[sac_lv]}：%{{x}} 件"
-                                    f"<extra></extra>"
-                                ),
-                            ))
-                    fig_h2.update_layout(
-                        barmode="stack",
-                        height=340,
-                        plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-                        legend=dict(orientation="h", y=-0.22, x=0.5,
-                                    xanchor="center",
-                                    font=dict(size=10, color="#2C3E50")),
-                        xaxis=dict(
-                            title=dict(text="事件件數", font=AXIS_TITLE_FONT),
-                            tickfont=AXIS_TICK_FONT,
-                            gridcolor=GRID_COLOR, griddash="dot",
-                        ),
-                        yaxis=dict(
-                            title=dict(text="工作年資", font=AXIS_TITLE_FONT),
-                            tickfont=dict(size=11, color="#2C3E50", family="Arial"),
-                            categoryorder="array",
-                            categoryarray=SENIORITY_ORDER,
-                            automargin=True,
-                        ),
-                        margin=dict(t=20, b=80, l=80, r=20),
-                    )
-                    st.plotly_chart(fig_h2, use_container_width=True)
+                    @memo_figure
+                    def _build_fig_h2(SENIORITY_ORDER, sac_piv):
+                        fig_h2 = go.Figure()
+                        for sac_lv in [1, 2, 3, 4]:
+                            if sac_lv in sac_piv.columns:
+                                fig_h2.add_trace(go.Bar(
+                                    name=f"SAC {sac_lv} {SAC_DESC[sac_lv]}",
+                                    y=sac_piv.index,
+                                    x=sac_piv[sac_lv],
+                                    orientation="h",
+                                    marker_color=SAC_COLORS[sac_lv],
+                                    marker_opacity=0.85,
+                                    hovertemplate=(
+                                        f"<b>%{{y}}</b><br>"
+                                        f"SAC {sac_lv} {SAC_DESC[sac_lv]}：%{{x}} 件"
+                                        f"<extra></extra>"
+                                    ),
+                                ))
+                        fig_h2.update_layout(
+                            barmode="stack",
+                            height=340,
+                            legend=dict(orientation="h", y=-0.22, x=0.5,
+                                        xanchor="center",
+                                        font=dict(size=10, color="#2C3E50")),
+                            xaxis=dict(
+                                title=dict(text="事件件數"), griddash="dot",
+                            ),
+                            yaxis=dict(
+                                title=dict(text="工作年資"),
+                                tickfont=dict(size=11),
+                                categoryorder="array",
+                                categoryarray=SENIORITY_ORDER,
+                                automargin=True,
+                            ),
+                            margin=dict(t=20, b=80, l=80, r=20),
+                        )
+                        return fig_h2
+                    fig_h2 = _build_fig_h2(SENIORITY_ORDER, sac_piv)
+                    show_chart(fig_h2)
 
         else:
             st.info("目前篩選條件下無工作年資資料。")
@@ -2141,10 +2632,7 @@ with _tab2:
     # df_fall_base 在 load_data 中已 merge 傷害程度欄位，直接篩選時間區間
     # 不可再 join df_all，否則欄位名稱產生 _x/_y 衝突導致計算失敗
     # 同時依側邊欄「發生單位」篩選（全院 = 不篩單位）
-    _cf_base = (df_fall_base if sel_unit == "全院"
-                else df_fall_base[df_fall_base["單位"].isin(["W11","W12"])]
-                if sel_unit == "W11+W12（精神科）"
-                else df_fall_base[df_fall_base["單位"] == sel_unit])
+    _cf_base = rows_in_wards(df_fall_base, spec.wards)
     _cf = _cf_base[
         (_cf_base["年月"] >= start_m) & (_cf_base["年月"] <= end_m)
     ].copy()
@@ -2165,6 +2653,7 @@ with _tab2:
     if _COMP_EVENT in _cf.columns and _INJ_SUM in _cf.columns:
         _no_comp_inj = int(((_cf[_COMP_EVENT]=="無") & (_cf[_INJ_SUM]=="有傷害")).sum())
     _no_comp_inj_pct = round(_no_comp_inj / max(_no_comp,1)*100, 1)
+    _cp_lo, _cp_hi = _intervals("prop", (_no_comp, _no_comp_inj), (_cn_total, _no_comp))
 
     # ── KPI 三卡（橘色系）────────────────────────────────────
     _ca1, _ca2, _ca3 = st.columns(3)
@@ -2172,25 +2661,28 @@ with _tab2:
            "box-shadow:0 2px 10px rgba(0,0,0,0.09);"
            "border-left:5px solid {c};min-height:96px")
 
-    def _ck(col, title, val, sub, c):
+    def _ck(col, title, val, sub, c, ci=""):
         col.markdown(
             f"<div style='{_cs.format(c=c)}'>"
             f"<div style='font-size:11px;color:#5D6D7E;font-weight:700;"
             f"letter-spacing:0.5px;margin-bottom:6px'>{title}</div>"
             f"<div style='font-size:28px;font-weight:900;color:#1C2833;"
             f"line-height:1.1'>{val}</div>"
+            f"<div style='font-size:10.5px;color:#85929E;margin-top:2px'>{ci}</div>"
             f"<div style='font-size:11px;color:#85929E;margin-top:4px'>{sub}</div>"
             f"</div>", unsafe_allow_html=True)
 
     _ck(_ca1, "🚷 事發時無陪伴佔比",
         f"{_no_pct:.1f}%",
-        f"共 {_no_comp} 件 ／ 總 {_cn_total} 件", "#E67E22")
+        f"共 {_no_comp} 件 ／ 總 {_cn_total} 件", "#E67E22",
+        ci_text(_cp_lo[0], _cp_hi[0]))
     _ck(_ca2, "⚠️ 陪伴者不在場件數",
         f"{_gap_n} 件",
         "平日有陪伴、事發時卻無陪伴者", "#C0392B")
     _ck(_ca3, "🩹 無陪伴且有傷害",
         f"{_no_comp_inj_pct:.1f}%",
-        f"無陪伴中 {_no_comp_inj}/{_no_comp} 件有傷害", "#7D3C98")
+        f"無陪伴中 {_no_comp_inj}/{_no_comp} 件有傷害", "#7D3C98",
+        ci_text(_cp_lo[1], _cp_hi[1]))
 
     st.markdown("<br>", unsafe_allow_html=True)
 
@@ -2203,10 +2695,7 @@ with _tab2:
     )
 
     if _COMP_EVENT in df_fall_base.columns:
-        _tr_base = (df_fall_base if sel_unit == "全院"
-                    else df_fall_base[df_fall_base["單位"].isin(["W11","W12"])]
-                    if sel_unit == "W11+W12（精神科）"
-                    else df_fall_base[df_fall_base["單位"] == sel_unit])
+        _tr_base = rows_in_wards(df_fall_base, spec.wards)
         _tr_no = (_tr_base[_tr_base[_COMP_EVENT] == "無"]
                   .groupby("年月").size()
                   .reset_index(name="件數")
@@ -2217,73 +2706,80 @@ with _tab2:
         _tr_target = _tr_no[
             (_tr_no["年月"] >= start_m) & (_tr_no["年月"] <= end_m)
         ]
-
-        fig_trend = go.Figure()
-
-        # 全期長條（淡橘）
-        fig_trend.add_trace(go.Bar(
-            x=_tr_no["年月顯示"], y=_tr_no["件數"],
-            name="無陪伴跌倒件數",
-            marker=dict(color="#E67E22", opacity=0.45, line=dict(width=0)),
-            hovertemplate="<b>%{x}</b><br>無陪伴：%{y} 件<extra></extra>",
-        ))
-
-        # 篩選期間長條加深
-        if not _tr_target.empty:
-            fig_trend.add_trace(go.Bar(
-                x=_tr_target["年月顯示"], y=_tr_target["件數"],
-                name=f"本期（{start_m}～{end_m}）",
-                marker=dict(color="#E67E22", opacity=0.92, line=dict(width=0)),
-                hovertemplate="<b>%{x}</b>（本期）<br>無陪伴：%{y} 件<extra></extra>",
+        # 介入效果：無陪伴件數（補齊零件月份）的 ITS，單純月件數模型
+        _tr_full = (_tr_no.set_index("年月")["件數"]
+                    .reindex(month_px["months"], fill_value=0))
+        _tr_notes = its_notes(_tr_no["年月顯示"], its_series_effects(
+            _tr_full, np.ones(len(_tr_full)), _tr_full.index, INTERVENTIONS))
+
+        @memo_figure
+        def _build_fig_trend(_tr_no, _tr_target, end_m, start_m, notes):
+            fig_trend = go.Figure()
+            plan = trend_plan(_tr_no["年月顯示"], [_tr_no["件數"], _tr_no["3月均"]])
+
+            # 全期長條（淡橘）
+            fig_trend.add_trace(trend_trace(
+                x=_tr_no["年月顯示"], y=_tr_no["件數"], kind="bar", plan=plan,
+                name="無陪伴跌倒件數",
+                marker=dict(color="#E67E22", opacity=0.45, line=dict(width=0)),
+                hovertemplate="<b>%{x}</b><br>無陪伴：%{y} 件<extra></extra>",
             ))
 
-        # 3個月移動平均
-        fig_trend.add_trace(go.Scatter(
-            x=_tr_no["年月顯示"], y=_tr_no["3月均"],
-            mode="lines", name="3 個月移動平均",
-            line=dict(color="#7D3C98", width=2),
-            hovertemplate="<b>%{x}</b><br>3月均：%{y:.1f} 件<extra></extra>",
-        ))
+            # 篩選期間長條加深
+            if not _tr_target.empty:
+                fig_trend.add_trace(trend_trace(
+                    x=_tr_target["年月顯示"], y=_tr_target["件數"], kind="bar",
+                    plan=plan,
+                    name=f"本期（{start_m}～{end_m}）",
+                    marker=dict(color="#E67E22", opacity=0.92, line=dict(width=0)),
+                    hovertemplate="<b>%{x}</b>（本期）<br>無陪伴：%{y} 件<extra></extra>",
+                ))
 
-        fig_trend.update_layout(
-            height=320,
-            barmode="overlay",
-            plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-            xaxis=dict(
-                title=dict(text="年月", font=AXIS_TITLE_FONT),
-                tickfont=dict(size=9, color="#2C3E50", family="Arial"),
-                tickangle=45, showgrid=False,
-            ),
-            yaxis=dict(
-                title=dict(text="無陪伴跌倒件數", font=AXIS_TITLE_FONT),
-                tickfont=AXIS_TICK_FONT,
-                gridcolor=GRID_COLOR, griddash="dot",
-                rangemode="tozero",
-            ),
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0,
-                        font=dict(size=11, color="#2C3E50")),
-            margin=dict(t=50, b=70, l=60, r=30),
-            bargap=0.15,
-        )
+            # 3個月移動平均
+            fig_trend.add_trace(trend_trace(
+                x=_tr_no["年月顯示"], y=_tr_no["3月均"], plan=plan,
+                mode="lines", name="3 個月移動平均",
+                line=dict(color="#7D3C98", width=2),
+                hovertemplate="<b>%{x}</b><br>3月均：%{y:.1f} 件<extra></extra>",
+            ))
 
-        # ── 政策標注：2025/05 住院看護費用補助辦法 ─────────────
-        _POLICY_M = "2025/05"
-        if _POLICY_M in _tr_no["年月顯示"].values:
-            fig_trend.add_vline(
-                x=_POLICY_M,
-                line_dash="dash", line_color="#1E8449", line_width=1.8,
-            )
-            fig_trend.add_annotation(
-                x=_POLICY_M, y=0.95, xref="x", yref="paper",
-                text="▼ 住院看護費用補助辦法",
-                showarrow=False,
-                font=dict(size=11, color="#1E8449", family="Arial"),
-                bgcolor="rgba(255,255,255,0.88)",
-                bordercolor="#1E8449", borderwidth=1, borderpad=4,
-                xanchor="left", yanchor="top",
+            fig_trend.update_layout(
+                height=320,
+                barmode="overlay",
+                xaxis=dict(
+                    title=dict(text="年月"),
+                    tickfont=dict(size=9),
+                    tickangle=45, showgrid=False,
+                ),
+                yaxis=dict(
+                    title=dict(text="無陪伴跌倒件數"), griddash="dot",
+                    rangemode="tozero",
+                ),
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0,
+                            font=dict(size=11, color="#2C3E50")),
+                margin=dict(t=50, b=70, l=60, r=30),
+                bargap=0.15,
             )
 
-        st.plotly_chart(fig_trend, use_container_width=True)
+            # ── 政策介入標注（interventions.json）＋ ITS 估計 ─────────
+            for _x, _txt in notes:
+                fig_trend.add_vline(
+                    x=_x,
+                    line_dash="dash", line_color="#1E8449", line_width=1.8,
+                )
+                fig_trend.add_annotation(
+                    x=_x, y=0.95, xref="x", yref="paper",
+                    text=_txt, align="left",
+                    showarrow=False,
+                    font=dict(size=11, color="#1E8449", family="Arial"),
+                    bgcolor="rgba(255,255,255,0.88)",
+                    bordercolor="#1E8449", borderwidth=1, borderpad=4,
+                    xanchor="left", yanchor="top",
+                )
+            return fig_trend
+        fig_trend = _build_fig_trend(_tr_no, _tr_target, end_m, start_m, _tr_notes)
+
+        show_chart(fig_trend)
 
         st.markdown("<div style='margin-top:12px'></div>", unsafe_allow_html=True)
 
@@ -2332,36 +2828,40 @@ with _tab2:
             _pie_df = _pie_df[_pie_df["件數"] > 0]
             _total = _pie_df["件數"].sum()
 
-            fig_pie = go.Figure(go.Pie(
-                labels=_pie_df["傷害等級"],
-                values=_pie_df["件數"],
-                hole=0.45,
-                marker=dict(
-                    colors=[_INJ_COLORS[_INJ_ORDER.index(l)]
-                            for l in _pie_df["傷害等級"]],
-                    line=dict(color="#FFFFFF", width=2),
-                ),
-                textinfo="label+percent",
-                textfont=dict(size=11, color="#1C2833", family="Arial"),
-                hovertemplate="<b>%{label}</b><br>%{value} 件（%{percent}）<extra></extra>",
-                sort=False,
-            ))
-            fig_pie.update_layout(
-                height=280, paper_bgcolor=PAPER_BG, showlegend=False,
-                margin=dict(t=30, b=10, l=10, r=10),
-                annotations=[dict(
-                    text=f"<b>{_total}</b><br>件",
-                    x=0.5, y=0.5,
-                    font=dict(size=16, color="#1C2833", family="Arial"),
-                    showarrow=False,
-                )],
-                title=dict(
-                    text=_label,
-                    font=dict(size=13, color="#2C3E50", family="Arial"),
-                    x=0.5, xanchor="center",
-                ),
-            )
-            _col.plotly_chart(fig_pie, use_container_width=True)
+            @memo_figure
+            def _build_fig_pie(_INJ_COLORS, _INJ_ORDER, _label, _pie_df, _total):
+                fig_pie = go.Figure(go.Pie(
+                    labels=_pie_df["傷害等級"],
+                    values=_pie_df["件數"],
+                    hole=0.45,
+                    marker=dict(
+                        colors=[_INJ_COLORS[_INJ_ORDER.index(l)]
+                                for l in _pie_df["傷害等級"]],
+                        line=dict(color="#FFFFFF", width=2),
+                    ),
+                    textinfo="label+percent",
+                    textfont=dict(size=11, color="#1C2833", family="Arial"),
+                    hovertemplate="<b>%{label}</b><br>%{value} 件（%{percent}）<extra></extra>",
+                    sort=False,
+                ))
+                fig_pie.update_layout(
+                    height=280, showlegend=False,
+                    margin=dict(t=30, b=10, l=10, r=10),
+                    annotations=[dict(
+                        text=f"<b>{_total}</b><br>件",
+                        x=0.5, y=0.5,
+                        font=dict(size=16, color="#1C2833", family="Arial"),
+                        showarrow=False,
+                    )],
+                    title=dict(
+                        text=_label,
+                        font=dict(size=13, color="#2C3E50", family="Arial"),
+                        x=0.5, xanchor="center",
+                    ),
+                )
+                return fig_pie
+            fig_pie = _build_fig_pie(_INJ_COLORS, _INJ_ORDER, _label, _pie_df, _total)
+            show_chart(fig_pie, where=_col)
 
     st.markdown("<br>", unsafe_allow_html=True)
 
@@ -2389,26 +2889,28 @@ with _tab2:
         if not _type_df.empty:
             _type_colors = ["#F39C12" if v==_type_df["件數"].max()
                             else "#FAD7A0" for v in _type_df["件數"]]
-            fig_type = go.Figure(go.Bar(
-                x=_type_df["件數"], y=_type_df["類型"],
-                orientation="h",
-                marker=dict(color=_type_colors, line=dict(width=0)),
-                text=[f"{v} 件" for v in _type_df["件數"]],
-                textposition="outside",
-                textfont=dict(size=11, color="#1C2833", family="Arial"),
-                hovertemplate="<b>%{y}</b>：%{x} 件<extra></extra>",
-            ))
-            fig_type.update_layout(
-                height=220, plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-                xaxis=dict(title=dict(text="件數", font=AXIS_TITLE_FONT),
-                           tickfont=AXIS_TICK_FONT,
-                           gridcolor=GRID_COLOR, griddash="dot",
-                           range=[0, _type_df["件數"].max()*1.35]),
-                yaxis=dict(tickfont=dict(size=11, color="#2C3E50", family="Arial"),
-                           automargin=True),
-                margin=dict(t=10, b=40, l=80, r=70),
-            )
-            st.plotly_chart(fig_type, use_container_width=True)
+            @memo_figure
+            def _build_fig_type(_type_colors, _type_df):
+                fig_type = go.Figure(go.Bar(
+                    x=_type_df["件數"], y=_type_df["類型"],
+                    orientation="h",
+                    marker=dict(color=_type_colors, line=dict(width=0)),
+                    text=[f"{v} 件" for v in _type_df["件數"]],
+                    textposition="outside",
+                    textfont=dict(size=11, color="#1C2833", family="Arial"),
+                    hovertemplate="<b>%{y}</b>：%{x} 件<extra></extra>",
+                ))
+                fig_type.update_layout(
+                    height=220,
+                    xaxis=dict(title=dict(text="件數"), griddash="dot",
+                               range=[0, _type_df["件數"].max()*1.35]),
+                    yaxis=dict(tickfont=dict(size=11),
+                               automargin=True),
+                    margin=dict(t=10, b=40, l=80, r=70),
+                )
+                return fig_type
+            fig_type = _build_fig_type(_type_colors, _type_df)
+            show_chart(fig_type)
 
     with _da2:
         # 不在場落差：平日有陪伴但事發時無陪伴 → 顯示其傷害分布
@@ -2424,30 +2926,34 @@ with _tab2:
                 "有傷害":"#C0392B","無傷害":"#1E8449",
                 "無法判定傷害嚴重程度":"#AEB6BF","跡近錯失":"#F39C12",
             }
-            fig_gap = go.Figure(go.Pie(
-                labels=_gap_inj["傷害"],
-                values=_gap_inj["件數"],
-                hole=0.50,
-                marker=dict(
-                    colors=[_gap_inj_colors.get(v,"#AEB6BF")
-                            for v in _gap_inj["傷害"]],
-                    line=dict(color="#FFFFFF", width=2),
-                ),
-                textinfo="label+percent",
-                textfont=dict(size=10, color="#1C2833"),
-                hovertemplate="<b>%{label}</b>：%{value} 件（%{percent}）<extra></extra>",
-            ))
-            fig_gap.update_layout(
-                height=220, paper_bgcolor=PAPER_BG, showlegend=False,
-                margin=dict(t=10, b=10, l=10, r=10),
-                annotations=[dict(
-                    text=f"<b>{_gap_n}</b><br>件",
-                    x=0.5, y=0.5,
-                    font=dict(size=16, color="#1C2833"),
-                    showarrow=False,
-                )],
-            )
-            st.plotly_chart(fig_gap, use_container_width=True)
+            @memo_figure
+            def _build_fig_gap(_gap_inj, _gap_inj_colors, _gap_n):
+                fig_gap = go.Figure(go.Pie(
+                    labels=_gap_inj["傷害"],
+                    values=_gap_inj["件數"],
+                    hole=0.50,
+                    marker=dict(
+                        colors=[_gap_inj_colors.get(v,"#AEB6BF")
+                                for v in _gap_inj["傷害"]],
+                        line=dict(color="#FFFFFF", width=2),
+                    ),
+                    textinfo="label+percent",
+                    textfont=dict(size=10, color="#1C2833"),
+                    hovertemplate="<b>%{label}</b>：%{value} 件（%{percent}）<extra></extra>",
+                ))
+                fig_gap.update_layout(
+                    height=220, showlegend=False,
+                    margin=dict(t=10, b=10, l=10, r=10),
+                    annotations=[dict(
+                        text=f"<b>{_gap_n}</b><br>件",
+                        x=0.5, y=0.5,
+                        font=dict(size=16, color="#1C2833"),
+                        showarrow=False,
+                    )],
+                )
+                return fig_gap
+            fig_gap = _build_fig_gap(_gap_inj, _gap_inj_colors, _gap_n)
+            show_chart(fig_gap)
 
     st.markdown("<br>", unsafe_allow_html=True)
 
@@ -2468,39 +2974,42 @@ with _tab2:
         _act_text = [[str(v) if v > 0 else "" for v in row]
                      for row in _act_piv.values]
 
-        fig_act = go.Figure(go.Heatmap(
-            z=_act_piv.values,
-            x=_act_piv.columns.tolist(),
-            y=_act_piv.index.tolist(),
-            text=_act_text,
-            texttemplate="%{text}",
-            textfont=dict(size=11, color="white", family="Arial Bold"),
-            colorscale=[
-                [0.0, "#FEF9E7"],
-                [0.2, "#FAD7A0"],
-                [0.5, "#E67E22"],
-                [1.0, "#7E5109"],
-            ],
-            hovertemplate="<b>%{y}</b> × <b>%{x}</b>：%{z} 件<extra></extra>",
-            colorbar=dict(
-                title=dict(text="件數", font=dict(size=11)),
-                tickfont=dict(size=10),
-                thickness=14, len=0.7,
-            ),
-            xgap=3, ygap=2,
-        ))
-        fig_act.update_layout(
-            height=max(340, len(_act_piv)*30 + 80),
-            paper_bgcolor=PAPER_BG, plot_bgcolor=PAPER_BG,
-            xaxis=dict(title=dict(text="事發時陪伴狀態", font=AXIS_TITLE_FONT),
-                       tickfont=dict(size=11, color="#2C3E50", family="Arial"),
-                       side="bottom"),
-            yaxis=dict(title=dict(text="活動情境", font=AXIS_TITLE_FONT),
-                       tickfont=dict(size=10, color="#2C3E50", family="Arial"),
-                       automargin=True),
-            margin=dict(t=20, b=60, l=140, r=80),
-        )
-        st.plotly_chart(fig_act, use_container_width=True)
+        @memo_figure
+        def _build_fig_act(_act_piv, _act_text):
+            fig_act = go.Figure(go.Heatmap(
+                z=_act_piv.values,
+                x=_act_piv.columns.tolist(),
+                y=_act_piv.index.tolist(),
+                text=_act_text,
+                texttemplate="%{text}",
+                textfont=dict(size=11, color="white", family="Arial Bold"),
+                colorscale=[
+                    [0.0, "#FEF9E7"],
+                    [0.2, "#FAD7A0"],
+                    [0.5, "#E67E22"],
+                    [1.0, "#7E5109"],
+                ],
+                hovertemplate="<b>%{y}</b> × <b>%{x}</b>：%{z} 件<extra></extra>",
+                colorbar=dict(
+                    title=dict(text="件數", font=dict(size=11)),
+                    tickfont=dict(size=10),
+                    thickness=14, len=0.7,
+                ),
+                xgap=3, ygap=2,
+            ))
+            fig_act.update_layout(
+                height=max(340, len(_act_piv)*30 + 80),
+                xaxis=dict(title=dict(text="事發時陪伴狀態"),
+                           tickfont=dict(size=11),
+                           side="bottom"),
+                yaxis=dict(title=dict(text="活動情境"),
+                           tickfont=dict(size=10),
+                           automargin=True),
+                margin=dict(t=20, b=60, l=140, r=80),
+            )
+            return fig_act
+        fig_act = _build_fig_act(_act_piv, _act_text)
+        show_chart(fig_act)
 
 
     # ════════════════════════════════════════════════════════════
@@ -2509,10 +3018,7 @@ with _tab2:
     #  篩選器：時間區間 + 側邊欄科別篩選器
     # ════════════════════════════════════════════════════════════
 
-    # 診斷分類顯示順序與配色
-    DX_ORDER = ["思覺失調/精神病","雙相/躁症","憂鬱症","失智症","帕金森氏症",
-                "腦血管病","骨折相關","糖尿病","腎病","肝病",
-                "心臟病","呼吸系統","腫瘤/癌症","其他"]
+    # 診斷分類配色（顯示順序 DX_ORDER 見分頁開頭）
     DX_COLORS = {
         "思覺失調/精神病": "#7B241C",
         "雙相/躁症":      "#C0392B",
@@ -2539,9 +3045,6 @@ with _tab2:
         "極重度":              "#7B241C",
         "無法判定傷害嚴重程度":  "#7F8C8D",
     }
-    INURY_COL_DX = "病人/住民-事件發生後對病人健康的影響程度"
-    # 中度以上傷害：中度、重度、極重度、死亡
-    HIGH_INJURY   = ["中度","重度","極重度","死亡"]
 
     dept_label = sel_dept if sel_dept != "全部科別" else "全院"
     st.markdown(f"""
@@ -2555,64 +3058,58 @@ with _tab2:
       </p>
     </div>""", unsafe_allow_html=True)
 
+    _dx_res = (section_result(_sec_jobs["dx"], "診斷特徵分析")
+               if "dx" in _sec_jobs else None)
     if dff_dx.empty or "診斷分類" not in dff_dx.columns:
         st.info("目前篩選條件下無診斷資料。")
-    else:
-        dx_inj = dff_dx[["診斷分類", INURY_COL_DX]].copy()
+    elif _dx_res is not None:
+        df_dx_sum, inj2_pct, tot2 = _dx_res
 
         # ── 圖1：Treemap（方塊大小=件數，顏色=中度以上傷害率）──
         st.markdown('<p class="section-title">① 診斷分類 Treemap（方塊大小=件數，顏色深=傷害率高）</p>',
                     unsafe_allow_html=True)
 
-        dx_summary = []
-        for dx in DX_ORDER:
-            sub  = dx_inj[dx_inj["診斷分類"] == dx]
-            n    = len(sub)
-            if n == 0:
-                continue
-            hi   = sub[INURY_COL_DX].isin(HIGH_INJURY).sum()
-            rate = round(hi / n * 100, 1)
-            dx_summary.append({"診斷分類": dx, "件數": n,
-                                "中度以上傷害件數": hi, "傷害率": rate})
-        df_dx_sum = pd.DataFrame(dx_summary)
-
         if not df_dx_sum.empty:
-            fig_dx1 = go.Figure(go.Treemap(
-                labels=df_dx_sum["診斷分類"],
-                parents=["診斷分類"] * len(df_dx_sum),
-                values=df_dx_sum["件數"],
-                customdata=df_dx_sum[["件數","中度以上傷害件數","傷害率"]].values,
-                hovertemplate=(
-                    "<b>%{label}</b><br>"
-                    "件數：%{customdata[0]}<br>"
-                    "中度以上傷害：%{customdata[1]} 件<br>"
-                    "傷害率：%{customdata[2]:.2f}%<extra></extra>"
-                ),
-                marker=dict(
-                    colors=df_dx_sum["傷害率"],
-                    colorscale=[
-                        [0.0, "#D5E8D4"],   # 低傷害率→淺綠
-                        [0.3, "#FFE6CC"],   # 中低→淺橙
-                        [0.6, "#F39C12"],   # 中→橙
-                        [1.0, "#7B241C"],   # 高→深紅
-                    ],
-                    showscale=True,
-                    colorbar=dict(
-                        title=dict(text="中度以上<br>傷害率(%)",
-                                   font=dict(size=11, color="#1C2833")),
-                        tickfont=dict(size=10, color="#2C3E50"),
-                        thickness=14, len=0.7,
+            @memo_figure
+            def _build_fig_dx1(df_dx_sum):
+                fig_dx1 = go.Figure(go.Treemap(
+                    labels=df_dx_sum["診斷分類"],
+                    parents=["診斷分類"] * len(df_dx_sum),
+                    values=df_dx_sum["件數"],
+                    customdata=df_dx_sum[["件數","中度以上傷害件數","傷害率"]].values,
+                    hovertemplate=(
+                        "<b>%{label}</b><br>"
+                        "件數：%{customdata[0]}<br>"
+                        "中度以上傷害：%{customdata[1]} 件<br>"
+                        "傷害率：%{customdata[2]:.2f}%<extra></extra>"
                     ),
-                    line=dict(width=2, color="white"),
-                ),
-                textfont=dict(size=13, color="white", family="Arial Bold"),
-                textinfo="label+value",
-            ))
-            fig_dx1.update_layout(
-                height=420, paper_bgcolor=PAPER_BG,
-                margin=dict(t=10, b=10, l=10, r=120),
-            )
-            st.plotly_chart(fig_dx1, use_container_width=True)
+                    marker=dict(
+                        colors=df_dx_sum["傷害率"],
+                        colorscale=[
+                            [0.0, "#D5E8D4"],   # 低傷害率→淺綠
+                            [0.3, "#FFE6CC"],   # 中低→淺橙
+                            [0.6, "#F39C12"],   # 中→橙
+                            [1.0, "#7B241C"],   # 高→深紅
+                        ],
+                        showscale=True,
+                        colorbar=dict(
+                            title=dict(text="中度以上<br>傷害率(%)",
+                                       font=dict(size=11, color="#1C2833")),
+                            tickfont=dict(size=10),
+                            thickness=14, len=0.7,
+                        ),
+                        line=dict(width=2, color="white"),
+                    ),
+                    textfont=dict(size=13, color="white", family="Arial Bold"),
+                    textinfo="label+value",
+                ))
+                fig_dx1.update_layout(
+                    height=420,
+                    margin=dict(t=10, b=10, l=10, r=120),
+                )
+                return fig_dx1
+            fig_dx1 = _build_fig_dx1(df_dx_sum)
+            show_chart(fig_dx1)
 
         st.markdown("<hr>", unsafe_allow_html=True)
 
@@ -2620,65 +3117,51 @@ with _tab2:
         st.markdown('<p class="section-title">② 各診斷分類傷害程度分布（100% 堆疊，件數 ≥ 3）</p>',
                     unsafe_allow_html=True)
 
-        dx_valid = dx_inj.groupby("診斷分類").filter(
-            lambda x: len(x) >= 3)
-        if not dx_valid.empty:
-            inj2 = (dx_valid.groupby(["診斷分類", INURY_COL_DX])
-                    .size().reset_index(name="件數"))
-            inj2_piv = (inj2.pivot(index="診斷分類",
-                                    columns=INURY_COL_DX, values="件數")
-                        .fillna(0))
-            # 排序：依總件數升序
-            inj2_piv["_tot"] = inj2_piv.sum(axis=1)
-            inj2_piv = inj2_piv.sort_values("_tot", ascending=True)
-            tot2     = inj2_piv["_tot"].astype(int)
-            inj2_piv = inj2_piv.drop(columns="_tot")
-            # 轉百分比
-            inj2_pct = inj2_piv.div(inj2_piv.sum(axis=1), axis=0) * 100
-
-            fig_dx2 = go.Figure()
-            for inj_lv in DX_INJ_ORDER:
-                if inj_lv in inj2_pct.columns:
-                    fig_dx2.add_trace(go.Bar(
-                        name=inj_lv,
-                        y=inj2_pct.index,
-                        x=inj2_pct[inj_lv].round(1),
-                        orientation="h",
-                        marker_color=DX_INJ_COLORS[inj_lv],
-                        marker_opacity=0.85,
-                        hovertemplate=(
-                            f"<b>%{{y}}</b><br>{inj_lv}：%{{x:.1f}}%<extra></extra>"
-                        ),
-                    ))
-            # 右側 n= 標籤
-            fig_dx2.add_trace(go.Scatter(
-                y=inj2_pct.index,
-                x=[102] * len(inj2_pct),
-                mode="text",
-                text=["n=" + str(t) for t in tot2],
-                textfont=dict(size=10, color="#2C3E50", family="Arial"),
-                showlegend=False, hoverinfo="skip",
-            ))
-            fig_dx2.update_layout(
-                barmode="stack",
-                height=max(320, len(inj2_pct) * 38 + 80),
-                plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-                legend=dict(orientation="h", y=1.08, x=0.5, xanchor="center",
-                            font=dict(size=11, color="#2C3E50")),
-                xaxis=dict(
-                    title=dict(text="百分比 (%)", font=AXIS_TITLE_FONT),
-                    tickfont=AXIS_TICK_FONT, range=[0, 115],
-                    gridcolor=GRID_COLOR, griddash="dot", ticksuffix="%",
-                ),
-                yaxis=dict(
-                    title=dict(text="診斷分類", font=AXIS_TITLE_FONT),
-                    tickfont=dict(size=11, color="#2C3E50", family="Arial"),
-                    automargin=True,
-                ),
-                margin=dict(t=40, b=60, l=100, r=60),
-                hovermode="y unified",
-            )
-            st.plotly_chart(fig_dx2, use_container_width=True)
+        if inj2_pct is not None:
+            @memo_figure
+            def _build_fig_dx2(DX_INJ_COLORS, DX_INJ_ORDER, inj2_pct, tot2):
+                fig_dx2 = go.Figure()
+                for inj_lv in DX_INJ_ORDER:
+                    if inj_lv in inj2_pct.columns:
+                        fig_dx2.add_trace(go.Bar(
+                            name=inj_lv,
+                            y=inj2_pct.index,
+                            x=inj2_pct[inj_lv].round(1),
+                            orientation="h",
+                            marker_color=DX_INJ_COLORS[inj_lv],
+                            marker_opacity=0.85,
+                            hovertemplate=(
+                                f"<b>%{{y}}</b><br>{inj_lv}：%{{x:.1f}}%<extra></extra>"
+                            ),
+                        ))
+                # 右側 n= 標籤
+                fig_dx2.add_trace(go.Scatter(
+                    y=inj2_pct.index,
+                    x=[102] * len(inj2_pct),
+                    mode="text",
+                    text=["n=" + str(t) for t in tot2],
+                    textfont=dict(size=10, color="#2C3E50", family="Arial"),
+                    showlegend=False, hoverinfo="skip",
+                ))
+                fig_dx2.update_layout(
+                    barmode="stack",
+                    height=max(320, len(inj2_pct) * 38 + 80),
+                    legend=dict(orientation="h", y=1.08, x=0.5, xanchor="center",
+                                font=dict(size=11, color="#2C3E50")),
+                    xaxis=dict(
+                        title=dict(text="百分比 (%)"), range=[0, 115], griddash="dot", ticksuffix="%",
+                    ),
+                    yaxis=dict(
+                        title=dict(text="診斷分類"),
+                        tickfont=dict(size=11),
+                        automargin=True,
+                    ),
+                    margin=dict(t=40, b=60, l=100, r=60),
+                    hovermode="y unified",
+                )
+                return fig_dx2
+            fig_dx2 = _build_fig_dx2(DX_INJ_COLORS, DX_INJ_ORDER, inj2_pct, tot2)
+            show_chart(fig_dx2)
 
 
 
@@ -2691,32 +3174,36 @@ with _tab2:
           .groupby(["年月顯示","單位"]).size().reset_index(name="件數"))
     if not um.empty:
         hp_piv = um.pivot(index="單位", columns="年月顯示", values="件數").fillna(0)
-        fig_f = go.Figure(go.Heatmap(
-            z=hp_piv.values, x=hp_piv.columns.tolist(), y=hp_piv.index.tolist(),
-            colorscale=[
-                [0.0,"#F4F6F6"],[0.35,"#E6B0AA"],
-                [0.70,"#C0392B"],[1.0,"#78281F"],
-            ],
-            hovertemplate="<b>%{y}</b><br>%{x}<br>件數：%{z:.0f}<extra></extra>",
-            colorbar=dict(
-                title=dict(text="件數", font=dict(size=12, color="#1C2833")),
-                tickfont=dict(size=10, color="#2C3E50"),
-                thickness=15, len=0.8),
-            xgap=1, ygap=1))
-        fig_f.update_layout(
-            title=dict(text="🗺️ 各單位每月事件熱力圖（Top 15）", font=TITLE_FONT),
-            height=460, paper_bgcolor=PAPER_BG,
-            xaxis=dict(
-                title=dict(text="年月", font=AXIS_TITLE_FONT),
-                tickangle=-45, tickfont=dict(size=9, color="#2C3E50"),
-                showgrid=False,
-            ),
-            yaxis=dict(
-                title=dict(text="病房 / 單位", font=AXIS_TITLE_FONT),
-                tickfont=dict(size=11, color="#2C3E50"),
-            ),
-            margin=dict(t=60, b=80, l=90, r=90))
-        st.plotly_chart(fig_f, use_container_width=True)
+        @memo_figure
+        def _build_fig_f(hp_piv):
+            fig_f = go.Figure(go.Heatmap(
+                z=hp_piv.values, x=hp_piv.columns.tolist(), y=hp_piv.index.tolist(),
+                colorscale=[
+                    [0.0,"#F4F6F6"],[0.35,"#E6B0AA"],
+                    [0.70,"#C0392B"],[1.0,"#78281F"],
+                ],
+                hovertemplate="<b>%{y}</b><br>%{x}<br>件數：%{z:.0f}<extra></extra>",
+                colorbar=dict(
+                    title=dict(text="件數", font=dict(size=12, color="#1C2833")),
+                    tickfont=dict(size=10),
+                    thickness=15, len=0.8),
+                xgap=1, ygap=1))
+            fig_f.update_layout(
+                title=dict(text="🗺️ 各單位每月事件熱力圖（Top 15）"),
+                height=460,
+                xaxis=dict(
+                    title=dict(text="年月"),
+                    tickangle=-45, tickfont=dict(size=9),
+                    showgrid=False,
+                ),
+                yaxis=dict(
+                    title=dict(text="病房 / 單位"),
+                    tickfont=dict(size=11),
+                ),
+                margin=dict(t=60, b=80, l=90, r=90))
+            return fig_f
+        fig_f = _build_fig_f(hp_piv)
+        show_chart(fig_f)
 
 
     # ── 明細表 ───────────────────────────────────────────────────
@@ -2731,17 +3218,19 @@ with _tab2:
             "發生者資料-年齡":"年齡","發生者資料-性別":"性別",
             "病人/住民-事件發生後對病人健康的影響程度(彙總)":"影響程度"})
 
-        def _hl(val):
-            if val in [1, 1.0]:
-                return "background-color:#FADBD8;color:#7B241C;font-weight:bold"
-            elif val in [2, 2.0]:
-                return "background-color:#FDEBD0;color:#784212;font-weight:bold"
-            elif val in [3, 3.0]:
-                return "background-color:#FEF9E7;color:#6D4C00"
-            return "color:#1C2833"
-
-        st.dataframe(df_show.style.map(_hl, subset=["SAC"]),
-                     use_container_width=True, height=400)
+        _SAC_CSS = {
+            1: "background-color:#FADBD8;color:#7B241C;font-weight:bold",
+            2: "background-color:#FDEBD0;color:#784212;font-weight:bold",
+            3: "background-color:#FEF9E7;color:#6D4C00",
+        }
+
+        def _sac_style(page):
+            """SAC 欄整欄對照上色（只處理當頁）"""
+            return page.style.apply(
+                lambda s: s.map(_SAC_CSS).fillna("color:#1C2833"), subset=["SAC"])
+
+        paged_table(df_show, "sac_detail",
+                    style=_sac_style if "SAC" in df_show.columns else None)
         st.caption("🔴 SAC 1 死亡　🟠 SAC 2 重大傷害　🟡 SAC 3 輕中度　⬜ SAC 4 無傷害")
 
 
@@ -2765,12 +3254,6 @@ with _tab2:
     """.format(start_m=start_m, end_m=end_m, n_fall=len(dff_fall)),
     unsafe_allow_html=True)
 
-    DEPT_COL    = "病人/住民-所在科別"
-    INJURY_COL  = "病人/住民-事件發生後對病人健康的影響程度"
-    HIGHRISK_COL= "跌倒事件發生對象-事件發生前是否為跌倒高危險群"
-    MOBILITY_COL= "跌倒事件發生對象-事件發生前的獨立活動能力"
-    CONSCI_COL  = "跌倒事件發生對象-當事人當時意識狀況"
-    GETUP_COL   = "可能原因-高危險群病人執意自行下床或活動"
 
     # 傷害程度顏色對應（由輕到重）
     INJURY_ORDER  = ["無傷害", "輕度", "中度", "重度", "極重度", "無法判定傷害嚴重程度"]
@@ -2783,12 +3266,12 @@ with _tab2:
         "無法判定傷害嚴重程度":  "#7F8C8D",
     }
 
-    if not dff_fall.empty and DEPT_COL in dff_fall.columns:
+    _dept_res = (section_result(_sec_jobs["dept"], "科別深度分析")
+                 if "dept" in _sec_jobs else None)
+    if _dept_res is not None:
 
         # 只取件數 >= 5 的科別
-        dept_counts = dff_fall[DEPT_COL].value_counts()
-        valid_depts = dept_counts[dept_counts >= 5].index.tolist()
-        df_dept = dff_fall[dff_fall[DEPT_COL].isin(valid_depts)].copy()
+        df_dept = _dept_res["df_dept"]
 
         if df_dept.empty:
             st.info("目前期間內無足夠資料進行科別分析（各科需至少 5 件）。")
@@ -2797,64 +3280,55 @@ with _tab2:
             st.markdown('<p class="section-title">① 各科別傷害程度分布（堆疊百分比）</p>',
                         unsafe_allow_html=True)
 
-            inj_cross = (df_dept.groupby([DEPT_COL, INJURY_COL])
-                         .size().reset_index(name="件數"))
-            inj_piv   = (inj_cross.pivot(index=DEPT_COL, columns=INJURY_COL, values="件數")
-                         .fillna(0))
-            # 計算各科總件數並排序
-            inj_piv["_total"] = inj_piv.sum(axis=1)
-            inj_piv = inj_piv.sort_values("_total", ascending=True)
-            totals   = inj_piv["_total"].astype(int)
-            inj_piv  = inj_piv.drop(columns="_total")
-            # 轉換為百分比
-            inj_pct  = inj_piv.div(inj_piv.sum(axis=1), axis=0) * 100
-
-            fig_dept1 = go.Figure()
-            for injury in INJURY_ORDER:
-                if injury in inj_pct.columns:
-                    fig_dept1.add_trace(go.Bar(
-                        name=injury,
-                        y=inj_pct.index,
-                        x=inj_pct[injury].round(1),
-                        orientation="h",
-                        marker_color=INJURY_COLORS_MAP[injury],
-                        marker_opacity=0.85,
-                        hovertemplate=(
-                            f"<b>%{{y}}</b><br>{injury}：%{{x:.1f}}%"
-                            f"<extra></extra>"
-                        ),
-                    ))
-            # 右側總件數標籤
-            fig_dept1.add_trace(go.Scatter(
-                y=inj_pct.index,
-                x=[102] * len(inj_pct),
-                mode="text",
-                text=["n=" + str(t) for t in totals],
-                textfont=dict(size=10, color="#2C3E50", family="Arial"),
-                showlegend=False, hoverinfo="skip",
-            ))
-            fig_dept1.update_layout(
-                barmode="stack",
-                height=max(320, len(inj_pct) * 38 + 80),
-                plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-                legend=dict(orientation="h", y=1.08, x=0.5, xanchor="center",
-                            font=dict(size=11, color="#2C3E50")),
-                xaxis=dict(
-                    title=dict(text="百分比 (%)", font=AXIS_TITLE_FONT),
-                    tickfont=AXIS_TICK_FONT,
-                    range=[0, 115],
-                    gridcolor=GRID_COLOR, griddash="dot",
-                    ticksuffix="%",
-                ),
-                yaxis=dict(
-                    title=dict(text="科別", font=AXIS_TITLE_FONT),
-                    tickfont=dict(size=11, color="#2C3E50", family="Arial"),
-                    automargin=True,
-                ),
-                margin=dict(t=40, b=60, l=90, r=60),
-                hovermode="y unified",
-            )
-            st.plotly_chart(fig_dept1, use_container_width=True)
+            inj_pct, totals = _dept_res["inj_pct"], _dept_res["totals"]
+
+            @memo_figure
+            def _build_fig_dept1(INJURY_COLORS_MAP, INJURY_ORDER, inj_pct, totals):
+                fig_dept1 = go.Figure()
+                for injury in INJURY_ORDER:
+                    if injury in inj_pct.columns:
+                        fig_dept1.add_trace(go.Bar(
+                            name=injury,
+                            y=inj_pct.index,
+                            x=inj_pct[injury].round(1),
+                            orientation="h",
+                            marker_color=INJURY_COLORS_MAP[injury],
+                            marker_opacity=0.85,
+                            hovertemplate=(
+                                f"<b>%{{y}}</b><br>{injury}：%{{x:.1f}}%"
+                                f"<extra></extra>"
+                            ),
+                        ))
+                # 右側總件數標籤
+                fig_dept1.add_trace(go.Scatter(
+                    y=inj_pct.index,
+                    x=[102] * len(inj_pct),
+                    mode="text",
+                    text=["n=" + str(t) for t in totals],
+                    textfont=dict(size=10, color="#2C3E50", family="Arial"),
+                    showlegend=False, hoverinfo="skip",
+                ))
+                fig_dept1.update_layout(
+                    barmode="stack",
+                    height=max(320, len(inj_pct) * 38 + 80),
+                    legend=dict(orientation="h", y=1.08, x=0.5, xanchor="center",
+                                font=dict(size=11, color="#2C3E50")),
+                    xaxis=dict(
+                        title=dict(text="百分比 (%)"),
+                        range=[0, 115], griddash="dot",
+                        ticksuffix="%",
+                    ),
+                    yaxis=dict(
+                        title=dict(text="科別"),
+                        tickfont=dict(size=11),
+                        automargin=True,
+                    ),
+                    margin=dict(t=40, b=60, l=90, r=60),
+                    hovermode="y unified",
+                )
+                return fig_dept1
+            fig_dept1 = _build_fig_dept1(INJURY_COLORS_MAP, INJURY_ORDER, inj_pct, totals)
+            show_chart(fig_dept1)
 
             st.markdown("<hr>", unsafe_allow_html=True)
 
@@ -2863,65 +3337,49 @@ with _tab2:
                         unsafe_allow_html=True)
 
             # 排序依總件數降序（讓大科在上方）
-            dept_order = dept_counts[dept_counts >= 5].sort_values(ascending=True).index.tolist()
-
-            feat_data = []
-            for dept in dept_order:
-                sub = dff_fall[dff_fall[DEPT_COL] == dept]
-                n   = len(sub)
-                if n == 0:
-                    continue
-                # ① 跌倒高危險群佔比（「是」）
-                r1 = (sub[HIGHRISK_COL] == "是").sum() / n * 100
-                # ② 需協助或完全依賴活動者佔比
-                r2 = (sub[MOBILITY_COL].isin(["需協助","完全依賴"])).sum() / n * 100
-                # ③ 意識混亂或嗜睡佔比
-                r3 = (sub[CONSCI_COL].isin(["意識混亂","嗜睡"])).sum() / n * 100
-                feat_data.append({"科別": dept, "跌倒高危險群": r1,
-                                   "需協助/完全依賴": r2, "意識混亂/嗜睡": r3})
-
-            df_feat = pd.DataFrame(feat_data)
+            dept_order, df_feat = _dept_res["dept_order"], _dept_res["df_feat"]
 
             FEAT_COLORS = {
                 "跌倒高危險群":    "#C0392B",
                 "需協助/完全依賴": "#3498DB",
                 "意識混亂/嗜睡":  "#F39C12",
             }
-            fig_dept2 = go.Figure()
-            for feat, clr in FEAT_COLORS.items():
-                fig_dept2.add_trace(go.Bar(
-                    name=feat,
-                    y=df_feat["科別"],
-                    x=df_feat[feat].round(1),
-                    orientation="h",
-                    marker_color=clr,
-                    marker_opacity=0.80,
-                    hovertemplate=f"<b>%{{y}}</b><br>{feat}：%{{x:.1f}}%<extra></extra>",
-                ))
-            fig_dept2.update_layout(
-                barmode="group",
-                height=max(340, len(df_feat) * 55 + 80),
-                plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-                legend=dict(orientation="h", y=1.08, x=0.5, xanchor="center",
-                            font=dict(size=11, color="#2C3E50")),
-                xaxis=dict(
-                    title=dict(text="佔比 (%)", font=AXIS_TITLE_FONT),
-                    tickfont=AXIS_TICK_FONT,
-                    range=[0, 110],
-                    gridcolor=GRID_COLOR, griddash="dot",
-                    ticksuffix="%",
-                ),
-                yaxis=dict(
-                    title=dict(text="科別", font=AXIS_TITLE_FONT),
-                    tickfont=dict(size=11, color="#2C3E50", family="Arial"),
-                    automargin=True,
-                    categoryorder="array",
-                    categoryarray=dept_order,
-                ),
-                margin=dict(t=40, b=60, l=90, r=30),
-                hovermode="y unified",
-            )
-            st.plotly_chart(fig_dept2, use_container_width=True)
+            @memo_figure
+            def _build_fig_dept2(FEAT_COLORS, dept_order, df_feat):
+                fig_dept2 = go.Figure()
+                for feat, clr in FEAT_COLORS.items():
+                    fig_dept2.add_trace(go.Bar(
+                        name=feat,
+                        y=df_feat["科別"],
+                        x=df_feat[feat].round(1),
+                        orientation="h",
+                        marker_color=clr,
+                        marker_opacity=0.80,
+                        hovertemplate=f"<b>%{{y}}</b><br>{feat}：%{{x:.1f}}%<extra></extra>",
+                    ))
+                fig_dept2.update_layout(
+                    barmode="group",
+                    height=max(340, len(df_feat) * 55 + 80),
+                    legend=dict(orientation="h", y=1.08, x=0.5, xanchor="center",
+                                font=dict(size=11, color="#2C3E50")),
+                    xaxis=dict(
+                        title=dict(text="佔比 (%)"),
+                        range=[0, 110], griddash="dot",
+                        ticksuffix="%",
+                    ),
+                    yaxis=dict(
+                        title=dict(text="科別"),
+                        tickfont=dict(size=11),
+                        automargin=True,
+                        categoryorder="array",
+                        categoryarray=dept_order,
+                    ),
+                    margin=dict(t=40, b=60, l=90, r=30),
+                    hovermode="y unified",
+                )
+                return fig_dept2
+            fig_dept2 = _build_fig_dept2(FEAT_COLORS, dept_order, df_feat)
+            show_chart(fig_dept2)
 
             st.markdown("<hr>", unsafe_allow_html=True)
 
@@ -2929,62 +3387,53 @@ with _tab2:
             st.markdown('<p class="section-title">③ 各科別「執意自行下床」比率（由高到低）</p>',
                         unsafe_allow_html=True)
 
-            getup_data = []
-            for dept in valid_depts:
-                sub = dff_fall[dff_fall[DEPT_COL] == dept]
-                n   = len(sub)
-                if n == 0:
-                    continue
-                rate = sub[GETUP_COL].eq(1).sum() / n * 100
-                getup_data.append({"科別": dept, "比率": round(rate, 1), "總件數": n})
-
-            df_getup = (pd.DataFrame(getup_data)
-                        .sort_values("比率", ascending=True))   # 水平圖低→高由下而上
+            df_getup = _dept_res["df_getup"]   # 水平圖低→高由下而上
 
             bar_colors = [
                 "#C0392B" if r >= 40 else "#3498DB"
                 for r in df_getup["比率"]
             ]
-            fig_dept3 = go.Figure(go.Bar(
-                y=df_getup["科別"],
-                x=df_getup["比率"],
-                orientation="h",
-                marker_color=bar_colors,
-                marker_opacity=0.85,
-                text=[f"{r:.2f}%" for r in df_getup["比率"]],
-                textposition="outside",
-                textfont=dict(size=11, color="#1C2833", family="Arial"),
-                customdata=df_getup["總件數"],
-                hovertemplate=(
-                    "<b>%{y}</b><br>執意自行下床：%{x:.2f}%<br>"
-                    "科別總件數：%{customdata} 件<extra></extra>"
-                ),
-            ))
-            # 40% 警戒線
-            fig_dept3.add_vline(
-                x=40, line_dash="dash", line_color="#E74C3C", line_width=2,
-                annotation_text="  40% 警戒線",
-                annotation_position="top right",
-                annotation_font=dict(size=11, color="#E74C3C", family="Arial Bold"),
-            )
-            fig_dept3.update_layout(
-                height=max(300, len(df_getup) * 40 + 80),
-                plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-                xaxis=dict(
-                    title=dict(text="執意自行下床比率 (%)", font=AXIS_TITLE_FONT),
-                    tickfont=AXIS_TICK_FONT,
-                    range=[0, max(df_getup["比率"].max() * 1.25, 55)],
-                    gridcolor=GRID_COLOR, griddash="dot",
-                    ticksuffix="%",
-                ),
-                yaxis=dict(
-                    title=dict(text="科別", font=AXIS_TITLE_FONT),
-                    tickfont=dict(size=11, color="#2C3E50", family="Arial"),
-                    automargin=True,
-                ),
-                margin=dict(t=40, b=60, l=90, r=60),
-            )
-            st.plotly_chart(fig_dept3, use_container_width=True)
+            @memo_figure
+            def _build_fig_dept3(bar_colors, df_getup):
+                fig_dept3 = go.Figure(go.Bar(
+                    y=df_getup["科別"],
+                    x=df_getup["比率"],
+                    orientation="h",
+                    marker_color=bar_colors,
+                    marker_opacity=0.85,
+                    text=[f"{r:.2f}%" for r in df_getup["比率"]],
+                    textposition="outside",
+                    textfont=dict(size=11, color="#1C2833", family="Arial"),
+                    customdata=df_getup["總件數"],
+                    hovertemplate=(
+                        "<b>%{y}</b><br>執意自行下床：%{x:.2f}%<br>"
+                        "科別總件數：%{customdata} 件<extra></extra>"
+                    ),
+                ))
+                # 40% 警戒線
+                fig_dept3.add_vline(
+                    x=40, line_dash="dash", line_color="#E74C3C", line_width=2,
+                    annotation_text="  40% 警戒線",
+                    annotation_position="top right",
+                    annotation_font=dict(size=11, color="#E74C3C", family="Arial Bold"),
+                )
+                fig_dept3.update_layout(
+                    height=max(300, len(df_getup) * 40 + 80),
+                    xaxis=dict(
+                        title=dict(text="執意自行下床比率 (%)"),
+                        range=[0, max(df_getup["比率"].max() * 1.25, 55)], griddash="dot",
+                        ticksuffix="%",
+                    ),
+                    yaxis=dict(
+                        title=dict(text="科別"),
+                        tickfont=dict(size=11),
+                        automargin=True,
+                    ),
+                    margin=dict(t=40, b=60, l=90, r=60),
+                )
+                return fig_dept3
+            fig_dept3 = _build_fig_dept3(bar_colors, df_getup)
+            show_chart(fig_dept3)
 
             # 超過40%提示
             high_depts = df_getup[df_getup["比率"] >= 40]["科別"].tolist()
@@ -2996,7 +3445,7 @@ with _tab2:
                     f'<b>{"、".join(high_depts)}</b></div>',
                     unsafe_allow_html=True)
 
-    else:
+    elif "dept" not in _sec_jobs:
         st.info("目前期間內無跌倒事件資料，或科別欄位缺失。")
 
     st.markdown('<p class="section-title">🏆 各病房 / 單位事件件數排名（Top 20）</p>',
@@ -3012,54 +3461,61 @@ with _tab2:
     if not unit_stats.empty:
         unit_stats["高嚴重度佔比"] = (
             unit_stats["高嚴重度"] / unit_stats["總件數"] * 100).round(1)
-        fig_g = go.Figure()
-        fig_g.add_trace(go.Bar(
-            y=unit_stats["單位"], x=unit_stats["總件數"],
-            orientation="h", name="總件數",
-            marker_color="#3498DB", marker_opacity=0.45,
-            hovertemplate="<b>%{y}</b><br>總件數：%{x} 件<extra></extra>"))
-        fig_g.add_trace(go.Bar(
-            y=unit_stats["單位"], x=unit_stats["高嚴重度"],
-            orientation="h", name="SAC 1+2（死亡+重大傷害）",
-            marker_color="#E74C3C", marker_opacity=0.85,
-            customdata=unit_stats["高嚴重度佔比"],
-            hovertemplate=(
-                "<b>%{y}</b><br>死亡+重大傷害：%{x} 件<br>"
-                "佔比：%{customdata:.2f}%<extra></extra>")))
-        fig_g.add_trace(go.Scatter(
-            y=unit_stats["單位"], x=unit_stats["總件數"],
-            mode="text", text=unit_stats["總件數"].astype(str) + " 件",
-            textposition="middle right",
-            textfont=dict(size=10, color="#1C2833", family="Arial"),
-            showlegend=False, hoverinfo="skip"))
-        fig_g.update_layout(
-            barmode="overlay",
-            height=max(420, len(unit_stats) * 28 + 120),
-            plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-            legend=dict(orientation="h", y=1.06, x=1, xanchor="right",
-                        font=dict(size=11, color="#2C3E50")),
-            xaxis=dict(
-                title=dict(text="件數", font=AXIS_TITLE_FONT),
-                tickfont=AXIS_TICK_FONT,
-                gridcolor=GRID_COLOR, griddash="dot",
-                zeroline=True, zerolinecolor=ZERO_LINE_COLOR,
-            ),
-            yaxis=dict(
-                title=dict(text="病房 / 單位", font=AXIS_TITLE_FONT),
-                tickfont=dict(size=11, color="#2C3E50", family="Arial"),
-                automargin=True,
-            ),
-            margin=dict(t=50, b=60, l=90, r=90),
-            hovermode="y unified")
-        st.plotly_chart(fig_g, use_container_width=True)
-
-        top10 = (unit_stats.sort_values("總件數", ascending=False)
+        @memo_figure
+        def _build_fig_g(unit_stats):
+            fig_g = go.Figure()
+            fig_g.add_trace(go.Bar(
+                y=unit_stats["單位"], x=unit_stats["總件數"],
+                orientation="h", name="總件數",
+                marker_color="#3498DB", marker_opacity=0.45,
+                hovertemplate="<b>%{y}</b><br>總件數：%{x} 件<extra></extra>"))
+            fig_g.add_trace(go.Bar(
+                y=unit_stats["單位"], x=unit_stats["高嚴重度"],
+                orientation="h", name="SAC 1+2（死亡+重大傷害）",
+                marker_color="#E74C3C", marker_opacity=0.85,
+                customdata=unit_stats["高嚴重度佔比"],
+                hovertemplate=(
+                    "<b>%{y}</b><br>死亡+重大傷害：%{x} 件<br>"
+                    "佔比：%{customdata:.2f}%<extra></extra>")))
+            fig_g.add_trace(go.Scatter(
+                y=unit_stats["單位"], x=unit_stats["總件數"],
+                mode="text", text=unit_stats["總件數"].astype(str) + " 件",
+                textposition="middle right",
+                textfont=dict(size=10, color="#1C2833", family="Arial"),
+                showlegend=False, hoverinfo="skip"))
+            fig_g.update_layout(
+                barmode="overlay",
+                height=max(420, len(unit_stats) * 28 + 120),
+                legend=dict(orientation="h", y=1.06, x=1, xanchor="right",
+                            font=dict(size=11, color="#2C3E50")),
+                xaxis=dict(
+                    title=dict(text="件數"), griddash="dot",
+                    zeroline=True,
+                ),
+                yaxis=dict(
+                    title=dict(text="病房 / 單位"),
+                    tickfont=dict(size=11),
+                    automargin=True,
+                ),
+                margin=dict(t=50, b=60, l=90, r=90),
+                hovermode="y unified")
+            return fig_g
+        fig_g = _build_fig_g(unit_stats)
+        show_chart(fig_g)
+
+        # Top 10 依經驗貝氏校正發生率排序（有住院人日數的病房）；
+        # 無人日數的單位（急診、門診…）排在後面、依件數
+        _eb = unit_rate_frame(month_px, spec)[0][["單位", "EB發生率", "EB下限", "EB上限"]]
+        top10 = (unit_stats.merge(_eb, on="單位", how="left")
+                 .sort_values(["EB發生率", "總件數"], ascending=False, na_position="last")
                  .head(10).reset_index(drop=True))
+        top10[["EB發生率", "EB下限", "EB上限"]] = top10[["EB發生率", "EB下限", "EB上限"]].round(2)
         top10.index += 1
         top10 = top10.rename(columns={
             "單位":"病房/單位","高嚴重度":"SAC 1+2 件數",
-            "高嚴重度佔比":"死亡+重大佔比(%)"})
-        st.caption("📋 Top 10 單位詳細數據")
+            "高嚴重度佔比":"死亡+重大佔比(%)",
+            "EB發生率":"EB校正發生率(‰)","EB下限":"95%下限","EB上限":"95%上限"})
+        st.caption("📋 Top 10 單位詳細數據（依經驗貝氏校正發生率排序）")
         st.dataframe(top10, use_container_width=True, height=310)
 
     # ════════════════════════════════════════════════════════════
@@ -3067,18 +3523,6 @@ with _tab2:
     #  資料：dff_fall（已含 extract_fall_features 布林欄位）
     #  篩選器：時間區間 + 科別篩選器連動
     # ════════════════════════════════════════════════════════════
-    FALL_FEAT_NAMES = [
-        "地點_床邊下床","地點_浴廁","地點_走廊行走","地點_椅子輪椅",
-        "機轉_滑倒","機轉_頭暈血壓低","機轉_自行起身未告知","機轉_站不穩腳軟",
-        "發現_護理人員巡視","發現_聲響",
-        "病況_精神症狀","病況_約束相關",
-    ]
-    # 依科別篩選 dff_fall（繼承時間篩選）
-    if sel_dept != "全部科別":
-        dff_fall_feat = dff_fall[
-            dff_fall["病人/住民-所在科別"] == sel_dept].copy()
-    else:
-        dff_fall_feat = dff_fall.copy()
 
     dept_label_feat = sel_dept if sel_dept != "全部科別" else "全院"
     st.markdown(f"""
@@ -3093,8 +3537,6 @@ with _tab2:
       </p>
     </div>""", unsafe_allow_html=True)
 
-    feat_cols_exist = [f for f in FALL_FEAT_NAMES if f in dff_fall_feat.columns]
-
     if dff_fall_feat.empty or not feat_cols_exist:
         st.info("目前篩選條件下無跌倒事件說明資料。")
     else:
@@ -3105,122 +3547,115 @@ with _tab2:
                     unsafe_allow_html=True)
         st.caption("💡 點擊任一長條，下方將顯示該特徵在各病房的分佈（RCA 根本原因分析）")
 
-        feat_counts = []
-        for feat in feat_cols_exist:
-            cnt = int(dff_fall_feat[feat].sum())
-            pct = round(cnt / n_total * 100, 2)
-            feat_counts.append({"特徵": feat, "件數": cnt, "佔比": pct})
-        df_feat_cnt = (pd.DataFrame(feat_counts)
-                       .sort_values("佔比", ascending=True)   # 水平圖：低→高（視覺上高在上）
-                       .reset_index(drop=True))
-
-        bar_clrs1 = ["#C0392B" if r >= 30 else "#3498DB"
-                     for r in df_feat_cnt["佔比"]]
-
-        fig_feat1 = go.Figure(go.Bar(
-            y=df_feat_cnt["特徵"],
-            x=df_feat_cnt["佔比"],
-            orientation="h",
-            marker_color=bar_clrs1,
-            marker_opacity=0.85,
-            text=[f"{r:.2f}%  (n={c})"
-                  for r, c in zip(df_feat_cnt["佔比"], df_feat_cnt["件數"])],
-            textposition="outside",
-            textfont=dict(size=10, color="#1C2833", family="Arial"),
-            customdata=df_feat_cnt["件數"],
-            hovertemplate=(
-                "<b>%{y}</b><br>件數：%{customdata}<br>"
-                "佔比：%{x:.2f}%<extra></extra>"
-            ),
-        ))
-        # 30% 參考線
-        fig_feat1.add_vline(
-            x=30, line_dash="dash", line_color="#E74C3C", line_width=1.5,
-            annotation_text="  30%",
-            annotation_position="top right",
-            annotation_font=dict(size=10, color="#E74C3C", family="Arial Bold"),
-        )
-        fig_feat1.update_layout(
-            height=520,
-            plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-            xaxis=dict(
-                title=dict(text="佔比 (%)", font=AXIS_TITLE_FONT),
-                tickfont=AXIS_TICK_FONT,
-                range=[0, max(df_feat_cnt["佔比"].max() * 1.35, 45)],
-                gridcolor=GRID_COLOR, griddash="dot", ticksuffix="%",
-                zeroline=True, zerolinecolor=ZERO_LINE_COLOR,
-            ),
-            yaxis=dict(
-                title=dict(text="特徵項目", font=AXIS_TITLE_FONT),
-                tickfont=dict(size=11, color="#2C3E50", family="Arial"),
-                automargin=True,
-            ),
-            margin=dict(t=30, b=60, l=130, r=140),
-        )
-
-        # 點擊事件（on_select 原生，不需第三方套件）
-        pareto_event = st.plotly_chart(
-            fig_feat1, use_container_width=True,
-            on_select="rerun", key="pareto_select"
-        )
-
-        # ── 下鑽：選中特徵後顯示各單位分佈 ────────────────────────
-        selected_feat = None
-        if pareto_event and pareto_event.get("selection"):
-            pts = pareto_event["selection"].get("points", [])
-            if pts:
-                selected_feat = pts[0].get("y")   # 水平圖用 y 取類別
-
-        if selected_feat and selected_feat in dff_fall_feat.columns:
-            st.markdown(f"""
-    <div style='background:#EBF5FB;border-left:4px solid #2E86C1;
-                padding:10px 14px;border-radius:4px;margin:8px 0 12px 0;
-                font-size:13px;color:#1A5276'>
-      🔍 <b>下鑽分析：「{selected_feat}」各病房 / 單位件數排名 Top 20</b>
-      　｜ RCA 根本原因分析
-    </div>""", unsafe_allow_html=True)
+        # 特徵件數與「單位 × 特徵」矩陣於完整重跑時在背景算一次；
+        # 點擊長條只重跑下方 fragment，直接由矩陣取出下鑽欄
+        _pareto_res = section_result(_sec_jobs["pareto"], "事件說明特徵萃取")
+
+        @st.fragment
+        def _feature_pareto_drill(df_feat_cnt, feat_by_unit):
+            """特徵長條圖 + 單位下鑽；點擊只重跑此區塊"""
+            bar_clrs1 = ["#C0392B" if r >= 30 else "#3498DB"
+                         for r in df_feat_cnt["佔比"]]
+
+            @memo_figure
+            def _build_fig_feat1(bar_clrs1, df_feat_cnt):
+                fig_feat1 = go.Figure(go.Bar(
+                    y=df_feat_cnt["特徵"],
+                    x=df_feat_cnt["佔比"],
+                    orientation="h",
+                    marker_color=bar_clrs1,
+                    marker_opacity=0.85,
+                    text=[f"{r:.2f}%  (n={c})"
+                          for r, c in zip(df_feat_cnt["佔比"], df_feat_cnt["件數"])],
+                    textposition="outside",
+                    textfont=dict(size=10, color="#1C2833", family="Arial"),
+                    customdata=df_feat_cnt["件數"],
+                    hovertemplate=(
+                        "<b>%{y}</b><br>件數：%{customdata}<br>"
+                        "佔比：%{x:.2f}%<extra></extra>"
+                    ),
+                ))
+                # 30% 參考線
+                fig_feat1.add_vline(
+                    x=30, line_dash="dash", line_color="#E74C3C", line_width=1.5,
+                    annotation_text="  30%",
+                    annotation_position="top right",
+                    annotation_font=dict(size=10, color="#E74C3C", family="Arial Bold"),
+                )
+                fig_feat1.update_layout(
+                    height=520,
+                    xaxis=dict(
+                        title=dict(text="佔比 (%)"),
+                        range=[0, max(df_feat_cnt["佔比"].max() * 1.35, 45)], griddash="dot", ticksuffix="%",
+                        zeroline=True,
+                    ),
+                    yaxis=dict(
+                        title=dict(text="特徵項目"),
+                        tickfont=dict(size=11),
+                        automargin=True,
+                    ),
+                    margin=dict(t=30, b=60, l=130, r=140),
+                )
+                return fig_feat1
+            fig_feat1 = _build_fig_feat1(bar_clrs1, df_feat_cnt)
 
-            drill_df = dff_fall_feat[dff_fall_feat[selected_feat] == True].copy()
-            if "單位" not in drill_df.columns and "病人/住民-所在科別" in drill_df.columns:
-                drill_df = drill_df.rename(columns={"病人/住民-所在科別": "單位"})
-
-            unit_col = "單位" if "單位" in drill_df.columns else drill_df.columns[0]
-            unit_cnt = (drill_df[unit_col].value_counts()
-                        .head(20).reset_index()
-                        .rename(columns={"index": unit_col, unit_col: "件數",
-                                         "count": "件數"}))
-            if "件數" not in unit_cnt.columns:
-                unit_cnt.columns = [unit_col, "件數"]
-            unit_cnt = unit_cnt.sort_values("件數", ascending=True)
-            total_feat = int(dff_fall_feat[selected_feat].sum())
-
-            fig_drill = go.Figure(go.Bar(
-                x=unit_cnt["件數"],
-                y=unit_cnt[unit_col],
-                orientation="h",
-                marker_color="#1A5276",
-                marker_opacity=0.82,
-                text=[f"{v} 件 ({v/total_feat*100:.1f}%)" for v in unit_cnt["件數"]],
-                textposition="outside",
-                textfont=dict(size=10, color="#1C2833", family="Arial"),
-                hovertemplate="<b>%{y}</b>：%{x} 件<extra></extra>",
-            ))
-            fig_drill.update_layout(
-                height=max(280, len(unit_cnt) * 32 + 80),
-                plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-                xaxis=dict(title=dict(text="件數", font=AXIS_TITLE_FONT),
-                           tickfont=AXIS_TICK_FONT,
-                           gridcolor=GRID_COLOR, griddash="dot",
-                           range=[0, unit_cnt["件數"].max() * 1.35]),
-                yaxis=dict(title=dict(text=unit_col, font=AXIS_TITLE_FONT),
-                           tickfont=dict(size=11, color="#2C3E50", family="Arial"),
-                           automargin=True),
-                margin=dict(t=20, b=40, l=90, r=120),
+            # 點擊事件（on_select 原生，不需第三方套件）
+            pareto_event = show_chart(
+                fig_feat1, on_select="rerun", key="pareto_select"
             )
-            st.plotly_chart(fig_drill, use_container_width=True)
-            st.caption(f"共 {total_feat} 件具備「{selected_feat}」特徵，顯示 Top {len(unit_cnt)} 個單位")
-        elif not selected_feat:
-            st.caption("👆 點擊任一橫條，即可下鑽查看該特徵的單位分佈")
+
+            # ── 下鑽：選中特徵後顯示各單位分佈 ────────────────────────
+            selected_feat = None
+            if pareto_event and pareto_event.get("selection"):
+                pts = pareto_event["selection"].get("points", [])
+                if pts:
+                    selected_feat = pts[0].get("y")   # 水平圖用 y 取類別
+
+            if selected_feat and selected_feat in feat_by_unit.columns:
+                st.markdown(f"""
+        <div style='background:#EBF5FB;border-left:4px solid #2E86C1;
+                    padding:10px 14px;border-radius:4px;margin:8px 0 12px 0;
+                    font-size:13px;color:#1A5276'>
+          🔍 <b>下鑽分析：「{selected_feat}」各病房 / 單位件數排名 Top 20</b>
+          　｜ RCA 根本原因分析
+        </div>""", unsafe_allow_html=True)
+
+                unit_col   = feat_by_unit.index.name
+                unit_cnt   = top_units(feat_by_unit, selected_feat, n=20)
+                total_feat = int(df_feat_cnt.set_index("特徵").at[selected_feat, "件數"])
+
+                @memo_figure
+                def _build_fig_drill(total_feat, unit_cnt, unit_col):
+                    fig_drill = go.Figure(go.Bar(
+                        x=unit_cnt["件數"],
+                        y=unit_cnt[unit_col],
+                        orientation="h",
+                        marker_color="#1A5276",
+                        marker_opacity=0.82,
+                        text=[f"{v} 件 ({v/total_feat*100:.1f}%)" for v in unit_cnt["件數"]],
+                        textposition="outside",
+                        textfont=dict(size=10, color="#1C2833", family="Arial"),
+                        hovertemplate="<b>%{y}</b>：%{x} 件<extra></extra>",
+                    ))
+                    fig_drill.update_layout(
+                        height=max(280, len(unit_cnt) * 32 + 80),
+                        xaxis=dict(title=dict(text="件數"), griddash="dot",
+                                   range=[0, unit_cnt["件數"].max() * 1.35]),
+                        yaxis=dict(title=dict(text=unit_col),
+                                   tickfont=dict(size=11),
+                                   automargin=True),
+                        margin=dict(t=20, b=40, l=90, r=120),
+                    )
+                    return fig_drill
+                fig_drill = _build_fig_drill(total_feat, unit_cnt, unit_col)
+                show_chart(fig_drill)
+                st.caption(f"共 {total_feat} 件具備「{selected_feat}」特徵，顯示 Top {len(unit_cnt)} 個單位")
+            elif not selected_feat:
+                st.caption("👆 點擊任一橫條，即可下鑽查看該特徵的單位分佈")
+
+
+        if _pareto_res is not None:
+            _feature_pareto_drill(*_pareto_res)
 
         # ── feature_tag 互動事件明細表 ────────────────────────────
         st.markdown("<hr>", unsafe_allow_html=True)
@@ -3268,11 +3703,7 @@ with _tab2:
             n_total_fall = len(dff_fall_feat)
             pct_detail = n_detail / n_total_fall * 100 if n_total_fall > 0 else 0
             st.caption(f"共 {n_detail} 件（佔全部跌倒事件 {pct_detail:.1f}%）｜資料已去識別處理")
-            st.dataframe(
-                detail_show.reset_index(drop=True),
-                use_container_width=True,
-                height=min(400, 35 * min(n_detail + 1, 12)),
-            )
+            paged_table(detail_show, "fall_detail")
             if _active_feats and st.button("🔄 清除特徵篩選", key="_btn_clear_feat"):
                 st.session_state["feature_tag"] = []
                 st.rerun()
@@ -3315,46 +3746,47 @@ with _tab2:
                          for d in df_dept_rate["科別"]]
             warn_text = ["⚠️" if r >= 40 else "" for r in df_dept_rate["比率"]]
 
-            fig_fe2 = go.Figure()
-            fig_fe2.add_trace(go.Bar(
-                y=df_dept_rate["科別"],
-                x=df_dept_rate["比率"],
-                orientation="h",
-                marker_color=bar_clrs2,
-                marker_opacity=0.85,
-                text=[f"{r:.2f}% {w}"
-                      for r, w in zip(df_dept_rate["比率"], warn_text)],
-                textposition="outside",
-                textfont=dict(size=11, color="#1C2833", family="Arial"),
-                customdata=df_dept_rate["總件數"],
-                hovertemplate=(
-                    "<b>%{y}</b><br>自行起身未告知：%{x:.2f}%<br>"
-                    "科別總件數：%{customdata} 件<extra></extra>"
-                ),
-            ))
-            fig_fe2.add_vline(
-                x=40, line_dash="dash", line_color="#E74C3C", line_width=2,
-                annotation_text="  40% 警戒線",
-                annotation_position="top right",
-                annotation_font=dict(size=11, color="#E74C3C", family="Arial Bold"),
-            )
-            fig_fe2.update_layout(
-                height=max(300, len(df_dept_rate) * 52 + 80),
-                plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-                xaxis=dict(
-                    title=dict(text="自行起身未告知 比率 (%)", font=AXIS_TITLE_FONT),
-                    tickfont=AXIS_TICK_FONT,
-                    range=[0, max(df_dept_rate["比率"].max() * 1.35, 55)],
-                    gridcolor=GRID_COLOR, griddash="dot", ticksuffix="%",
-                ),
-                yaxis=dict(
-                    title=dict(text="科別", font=AXIS_TITLE_FONT),
-                    tickfont=dict(size=11, color="#2C3E50", family="Arial"),
-                    automargin=True,
-                ),
-                margin=dict(t=40, b=60, l=80, r=120),
-            )
-            st.plotly_chart(fig_fe2, use_container_width=True)
+            @memo_figure
+            def _build_fig_fe2(bar_clrs2, df_dept_rate, warn_text):
+                fig_fe2 = go.Figure()
+                fig_fe2.add_trace(go.Bar(
+                    y=df_dept_rate["科別"],
+                    x=df_dept_rate["比率"],
+                    orientation="h",
+                    marker_color=bar_clrs2,
+                    marker_opacity=0.85,
+                    text=[f"{r:.2f}% {w}"
+                          for r, w in zip(df_dept_rate["比率"], warn_text)],
+                    textposition="outside",
+                    textfont=dict(size=11, color="#1C2833", family="Arial"),
+                    customdata=df_dept_rate["總件數"],
+                    hovertemplate=(
+                        "<b>%{y}</b><br>自行起身未告知：%{x:.2f}%<br>"
+                        "科別總件數：%{customdata} 件<extra></extra>"
+                    ),
+                ))
+                fig_fe2.add_vline(
+                    x=40, line_dash="dash", line_color="#E74C3C", line_width=2,
+                    annotation_text="  40% 警戒線",
+                    annotation_position="top right",
+                    annotation_font=dict(size=11, color="#E74C3C", family="Arial Bold"),
+                )
+                fig_fe2.update_layout(
+                    height=max(300, len(df_dept_rate) * 52 + 80),
+                    xaxis=dict(
+                        title=dict(text="自行起身未告知 比率 (%)"),
+                        range=[0, max(df_dept_rate["比率"].max() * 1.35, 55)], griddash="dot", ticksuffix="%",
+                    ),
+                    yaxis=dict(
+                        title=dict(text="科別"),
+                        tickfont=dict(size=11),
+                        automargin=True,
+                    ),
+                    margin=dict(t=40, b=60, l=80, r=120),
+                )
+                return fig_fe2
+            fig_fe2 = _build_fig_fe2(bar_clrs2, df_dept_rate, warn_text)
+            show_chart(fig_fe2)
 
             warn_depts = df_dept_rate[df_dept_rate["比率"] >= 40]["科別"].tolist()
             if warn_depts:
@@ -3371,89 +3803,57 @@ with _tab2:
         st.markdown('<p class="section-title">③ 發生地點 × 傷害程度 交叉熱力圖（點擊格子下鑽）</p>',
                     unsafe_allow_html=True)
 
-        LOC_FEATS = {
-            "床邊下床": "地點_床邊下床",
-            "浴廁":    "地點_浴廁",
-            "走廊行走": "地點_走廊行走",
-            "椅子輪椅": "地點_椅子輪椅",
-        }
-        INJ_ORDER_HM = ["無傷害","輕度","中度","重度","極重度","無法判定傷害嚴重程度"]
-        INJ_LABEL_HM = {"無法判定傷害嚴重程度": "無法判定"}   # 簡短顯示
-        inj_col_f    = "病人/住民-事件發生後對病人健康的影響程度"
-
-        def get_location(row):
-            for lbl, feat in LOC_FEATS.items():
-                if feat in row and row[feat]:
-                    return lbl
-            return None
-
-        dff_fall_feat2 = dff_fall_feat.copy()
-        dff_fall_feat2["地點"] = dff_fall_feat2.apply(get_location, axis=1)
-        # 傷害程度簡短標籤
-        dff_fall_feat2["傷害程度顯示"] = (dff_fall_feat2[inj_col_f]
-                                           .map(INJ_LABEL_MAP)
-                                           .fillna(dff_fall_feat2[inj_col_f]))
-        hm_data = dff_fall_feat2[
-            dff_fall_feat2["地點"].notna() &
-            dff_fall_feat2[inj_col_f].notna()
-        ].copy()
-
-        if not hm_data.empty:
-            # 顯示用傷害程度排序
-            INJ_ORDER_DISP = [INJ_LABEL_MAP.get(i, i) for i in INJ_ORDER_HM
-                              if INJ_LABEL_MAP.get(i, i) in hm_data["傷害程度顯示"].unique()]
-            loc_order = list(LOC_FEATS.keys())
-
-            hm_cross = (hm_data.groupby(["地點","傷害程度顯示"])
-                        .size().reset_index(name="件數"))
-            hm_piv   = (hm_cross.pivot(index="傷害程度顯示", columns="地點", values="件數")
-                        .reindex(index=INJ_ORDER_DISP, columns=loc_order)
-                        .fillna(0).astype(int))
+        hm_data = location_injury_frame(dff_fall_feat)
 
+        @st.fragment
+        def _location_injury_drill(hm_data, hm_piv, n_fall):
+            """熱力圖 + 個案清單 + 科別分布；點擊格子只重跑此區塊"""
             text_matrix = [[str(v) if v > 0 else "" for v in row]
                            for row in hm_piv.values]
 
-            fig_fe3 = go.Figure(go.Heatmap(
-                z=hm_piv.values,
-                x=hm_piv.columns.tolist(),
-                y=hm_piv.index.tolist(),
-                text=text_matrix,
-                texttemplate="%{text}",
-                textfont=dict(size=14, color="white", family="Arial Bold"),
-                colorscale=[
-                    [0.0, "#F4F6F6"],
-                    [0.3, "#AED6F1"],
-                    [0.6, "#3498DB"],
-                    [1.0, "#1A5276"],
-                ],
-                hovertemplate=(
-                    "<b>地點：%{x}</b><br>"
-                    "傷害程度：%{y}<br>"
-                    "件數：%{z} 件<extra></extra>"
-                ),
-                colorbar=dict(
-                    title=dict(text="件數", font=dict(size=12, color="#1C2833")),
-                    tickfont=dict(size=10, color="#2C3E50"),
-                    thickness=14, len=0.7,
-                ),
-                xgap=3, ygap=3,
-            ))
-            fig_fe3.update_layout(
-                height=320,
-                paper_bgcolor=PAPER_BG, plot_bgcolor=PAPER_BG,
-                xaxis=dict(title=dict(text="發生地點", font=AXIS_TITLE_FONT),
-                           tickfont=dict(size=12, color="#2C3E50", family="Arial"),
-                           side="bottom"),
-                yaxis=dict(title=dict(text="傷害程度", font=AXIS_TITLE_FONT),
-                           tickfont=dict(size=11, color="#2C3E50", family="Arial"),
-                           automargin=True),
-                margin=dict(t=20, b=60, l=100, r=80),
-            )
+            @memo_figure
+            def _build_fig_fe3(hm_piv, text_matrix):
+                fig_fe3 = go.Figure(go.Heatmap(
+                    z=hm_piv.values,
+                    x=hm_piv.columns.tolist(),
+                    y=hm_piv.index.tolist(),
+                    text=text_matrix,
+                    texttemplate="%{text}",
+                    textfont=dict(size=14, color="white", family="Arial Bold"),
+                    colorscale=[
+                        [0.0, "#F4F6F6"],
+                        [0.3, "#AED6F1"],
+                        [0.6, "#3498DB"],
+                        [1.0, "#1A5276"],
+                    ],
+                    hovertemplate=(
+                        "<b>地點：%{x}</b><br>"
+                        "傷害程度：%{y}<br>"
+                        "件數：%{z} 件<extra></extra>"
+                    ),
+                    colorbar=dict(
+                        title=dict(text="件數", font=dict(size=12, color="#1C2833")),
+                        tickfont=dict(size=10),
+                        thickness=14, len=0.7,
+                    ),
+                    xgap=3, ygap=3,
+                ))
+                fig_fe3.update_layout(
+                    height=320,
+                    xaxis=dict(title=dict(text="發生地點"),
+                               tickfont=dict(size=12),
+                               side="bottom"),
+                    yaxis=dict(title=dict(text="傷害程度"),
+                               tickfont=dict(size=11),
+                               automargin=True),
+                    margin=dict(t=20, b=60, l=100, r=80),
+                )
+                return fig_fe3
+            fig_fe3 = _build_fig_fe3(hm_piv, text_matrix)
 
             # 點擊事件（不需第三方套件）
-            hm_event = st.plotly_chart(
-                fig_fe3, use_container_width=True,
-                on_select="rerun", key="hm_loc_inj_select"
+            hm_event = show_chart(
+                fig_fe3, on_select="rerun", key="hm_loc_inj_select"
             )
 
             # 同步點擊結果到 session_state
@@ -3504,7 +3904,7 @@ with _tab2:
 
             n_drill = len(drill3)
             n_all   = len(hm_data)
-            pct_all = n_drill / len(dff_fall_feat) * 100 if len(dff_fall_feat) > 0 else 0
+            pct_all = n_drill / n_fall * 100 if n_fall > 0 else 0
 
             st.caption(
                 f"符合條件：**{n_drill}** 件"
@@ -3530,11 +3930,7 @@ with _tab2:
                                              .str.slice(0, 50)
                                              .str.replace(r'\d{3,}', '***', regex=True)
                                              + "...")
-                st.dataframe(
-                    case_show.reset_index(drop=True),
-                    use_container_width=True,
-                    height=min(380, 35 * min(n_drill + 1, 11)),
-                )
+                paged_table(case_show, "hm_case", max_height=380)
 
             # ── 下鑽：該格在各科別的分布橫條圖 ───────────────────
             if not drill3.empty:
@@ -3556,35 +3952,40 @@ with _tab2:
                         f'各科別分布：{_loc_txt} × {_inj_txt}</p>',
                         unsafe_allow_html=True)
 
-                    fig_drill3 = go.Figure(go.Bar(
-                        x=dept_cnt["件數"],
-                        y=dept_cnt["科別"],
-                        orientation="h",
-                        marker_color="#3498DB",
-                        marker_opacity=0.82,
-                        text=[f"{v} 件 ({v/n_drill*100:.1f}%)"
-                              for v in dept_cnt["件數"]],
-                        textposition="outside",
-                        textfont=dict(size=11, color="#1C2833", family="Arial"),
-                        hovertemplate="<b>%{y}</b>：%{x} 件<extra></extra>",
-                    ))
-                    fig_drill3.update_layout(
-                        height=max(200, len(dept_cnt) * 38 + 70),
-                        plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-                        xaxis=dict(
-                            title=dict(text="件數", font=AXIS_TITLE_FONT),
-                            tickfont=AXIS_TICK_FONT,
-                            gridcolor=GRID_COLOR, griddash="dot",
-                            range=[0, dept_cnt["件數"].max() * 1.35],
-                        ),
-                        yaxis=dict(
-                            title=dict(text="科別", font=AXIS_TITLE_FONT),
-                            tickfont=dict(size=12, color="#2C3E50", family="Arial"),
-                            automargin=True,
-                        ),
-                        margin=dict(t=20, b=40, l=80, r=120),
-                    )
-                    st.plotly_chart(fig_drill3, use_container_width=True)
+                    @memo_figure
+                    def _build_fig_drill3(dept_cnt, n_drill):
+                        fig_drill3 = go.Figure(go.Bar(
+                            x=dept_cnt["件數"],
+                            y=dept_cnt["科別"],
+                            orientation="h",
+                            marker_color="#3498DB",
+                            marker_opacity=0.82,
+                            text=[f"{v} 件 ({v/n_drill*100:.1f}%)"
+                                  for v in dept_cnt["件數"]],
+                            textposition="outside",
+                            textfont=dict(size=11, color="#1C2833", family="Arial"),
+                            hovertemplate="<b>%{y}</b>：%{x} 件<extra></extra>",
+                        ))
+                        fig_drill3.update_layout(
+                            height=max(200, len(dept_cnt) * 38 + 70),
+                            xaxis=dict(
+                                title=dict(text="件數"), griddash="dot",
+                                range=[0, dept_cnt["件數"].max() * 1.35],
+                            ),
+                            yaxis=dict(
+                                title=dict(text="科別"),
+                                tickfont=dict(size=12),
+                                automargin=True,
+                            ),
+                            margin=dict(t=20, b=40, l=80, r=120),
+                        )
+                        return fig_drill3
+                    fig_drill3 = _build_fig_drill3(dept_cnt, n_drill)
+                    show_chart(fig_drill3)
+
+        if not hm_data.empty:
+            _location_injury_drill(hm_data, location_injury_pivot(hm_data),
+                                   len(dff_fall_feat))
         else:
             st.info("目前資料不足以產生交叉熱力圖。")
 
@@ -3594,24 +3995,7 @@ with _tab2:
     #  ⚠️ 高風險因子綜合分析
     #  資料：dff_fall（時間篩選連動）
     # ════════════════════════════════════════════════════════════
-    RISK_DEPTS       = ["精神科","外科","內科","復健科"]
-    RISK_FACTOR_DEFS = {
-        "鎮靜安眠藥":   lambda s: s["可能原因-鎮靜安眠藥"].eq(1),
-        "執意自行下床": lambda s: s["可能原因-高危險群病人執意自行下床或活動"].eq(1),
-        "步態不穩":    lambda s: s["可能原因-步態不穩"].eq(1),
-        "意識混亂":    lambda s: s["跌倒事件發生對象-當事人當時意識狀況"].isin(["意識混亂","嗜睡"]),
-        "無陪伴者":    lambda s: s["跌倒事件發生對象-事件發生時有無陪伴者"].eq("無"),
-        "跌倒高危群":  lambda s: s["跌倒事件發生對象-事件發生前是否為跌倒高危險群"].eq("是"),
-        "曾跌倒史":    lambda s: s["跌倒事件發生對象-最近一年是否曾經跌倒"].eq("有"),
-    }
-    DRUG_FACTOR_DEFS = {
-        "鎮靜安眠藥": "可能原因-鎮靜安眠藥",
-        "降壓藥":    "可能原因-降壓藥",
-        "止痛麻醉劑": "可能原因-止痛麻醉劑",
-        "降血糖藥":  "可能原因-降血糖藥",
-        "抗癲癇藥":  "可能原因-抗癲癇藥",
-        "肌肉鬆弛劑": "可能原因-肌肉鬆弛劑",
-    }
+    DRUG_FACTOR_DEFS = DRUG_FACTORS
 
     st.markdown(f"""
     <div style='background:linear-gradient(135deg,#1a2e3d,#2C3E50);
@@ -3635,74 +4019,177 @@ with _tab2:
             '顏色越深代表該科別病人具有此風險因子的比率越高</p>',
             unsafe_allow_html=True)
 
-        hm_rows, hm_text = [], []
-        valid_depts_risk = []
-        for dept in RISK_DEPTS:
-            sub = dff_fall[dff_fall["病人/住民-所在科別"] == dept]
-            n   = len(sub)
-            if n < 3:
-                continue
-            valid_depts_risk.append(dept)
-            row, txt = [], []
-            for fname, func in RISK_FACTOR_DEFS.items():
-                try:
-                    rate = round(func(sub).sum() / n * 100, 1)
-                except Exception:
-                    rate = 0.0
-                row.append(rate)
-                txt.append(f"{rate:.2f}%<br>(n={n})")
-            hm_rows.append(row)
-            hm_text.append(txt)
+        _risk_res = section_result(_sec_jobs["risk"], "高風險因子熱力矩陣")
+        valid_depts_risk, hm_rows, hm_text = _risk_res or ([], [], [])
 
         if valid_depts_risk:
-            factor_names = list(RISK_FACTOR_DEFS.keys())
+            factor_names = list(RISK_FACTORS)
+
+            @memo_figure
+            def _build_fig_risk1(factor_names, hm_rows, hm_text, valid_depts_risk):
+                fig_risk1 = go.Figure(go.Heatmap(
+                    z=hm_rows,
+                    x=factor_names,
+                    y=valid_depts_risk,
+                    text=hm_text,
+                    texttemplate="%{text}",
+                    textfont=dict(size=12, color="white", family="Arial Bold"),
+                    colorscale=[
+                        [0.0,  "#FEF9E7"],   # 極低 → 淡黃
+                        [0.25, "#F9E4B7"],
+                        [0.5,  "#E59866"],   # 中   → 橙
+                        [0.75, "#C0392B"],   # 中高 → 紅
+                        [1.0,  "#641E16"],   # 極高 → 深紅
+                    ],
+                    zmin=0, zmax=100,
+                    hovertemplate=(
+                        "<b>%{y} — %{x}</b><br>"
+                        "比率：%{z:.2f}%<extra></extra>"
+                    ),
+                    colorbar=dict(
+                        title=dict(text="比率 (%)",
+                                   font=dict(size=11, color="#1C2833")),
+                        tickfont=dict(size=10),
+                        ticksuffix="%",
+                        thickness=14, len=0.75,
+                    ),
+                    xgap=4, ygap=4,
+                ))
+                fig_risk1.update_layout(
+                    height=max(280, 36 * len(valid_depts_risk) + 110),
+                    xaxis=dict(
+                        title=dict(text="高風險因子"),
+                        tickfont=dict(size=12),
+                        side="bottom",
+                    ),
+                    yaxis=dict(
+                        title=dict(text="科別"),
+                        tickfont=dict(size=12),
+                        automargin=True,
+                    ),
+                    margin=dict(t=20, b=70, l=80, r=100),
+                )
+                return fig_risk1
+            fig_risk1 = _build_fig_risk1(factor_names, hm_rows, hm_text, valid_depts_risk)
+            show_chart(fig_risk1)
+        elif _risk_res is not None:
+            st.info("各科別件數不足，無法產生熱力矩陣。")
 
-            fig_risk1 = go.Figure(go.Heatmap(
-                z=hm_rows,
-                x=factor_names,
-                y=valid_depts_risk,
-                text=hm_text,
-                texttemplate="%{text}",
-                textfont=dict(size=12, color="white", family="Arial Bold"),
-                colorscale=[
-                    [0.0,  "#FEF9E7"],   # 極低 → 淡黃
-                    [0.25, "#F9E4B7"],
-                    [0.5,  "#E59866"],   # 中   → 橙
-                    [0.75, "#C0392B"],   # 中高 → 紅
-                    [1.0,  "#641E16"],   # 極高 → 深紅
-                ],
-                zmin=0, zmax=100,
-                hovertemplate=(
-                    "<b>%{y} — %{x}</b><br>"
-                    "比率：%{z:.2f}%<extra></extra>"
-                ),
-                colorbar=dict(
-                    title=dict(text="比率 (%)",
-                               font=dict(size=11, color="#1C2833")),
-                    tickfont=dict(size=10, color="#2C3E50"),
-                    ticksuffix="%",
-                    thickness=14, len=0.75,
-                ),
-                xgap=4, ygap=4,
-            ))
-            fig_risk1.update_layout(
-                height=280,
-                paper_bgcolor=PAPER_BG,
-                xaxis=dict(
-                    title=dict(text="高風險因子", font=AXIS_TITLE_FONT),
-                    tickfont=dict(size=12, color="#2C3E50", family="Arial"),
-                    side="bottom",
-                ),
-                yaxis=dict(
-                    title=dict(text="科別", font=AXIS_TITLE_FONT),
-                    tickfont=dict(size=12, color="#2C3E50", family="Arial"),
-                    automargin=True,
-                ),
-                margin=dict(t=20, b=70, l=80, r=100),
-            )
-            st.plotly_chart(fig_risk1, use_container_width=True)
+        st.markdown("<hr>", unsafe_allow_html=True)
+
+        # ── 圖2：共現因子組合 → 傷害結果（關聯規則）────────────
+        st.markdown('<p class="section-title">② 共現因子組合與傷害結果（關聯規則）</p>',
+                    unsafe_allow_html=True)
+        st.caption(
+            f"事件說明特徵、可能原因與情境因子（夜間、無陪伴…）的組合 → 結果；"
+            f"前項最多 {RULE_MAX_LEN} 個因子、規則件數 ≥ {RULE_MIN_COUNT}。"
+            "信賴度 = 具此組合的跌倒中出現該結果的比率；增益 = 信賴度 ÷ 基準率（> 1 表示組合使風險上升）；"
+            "已排除信賴度不高於其子組合的冗餘規則")
+
+        # 規則於完整重跑時在背景算一次（依篩選條件快取）；切換結果只重跑下方 fragment
+        _rules_res = section_result(_sec_jobs["rules"], "共現因子關聯規則")
+
+        @st.fragment
+        def _fall_rules_view(df_rules):
+            """依所選結果顯示規則泡泡圖與明細表"""
+            _outs = list(dict.fromkeys(df_rules["後項"]))
+            sel_out = st.selectbox("結果（規則後項）", _outs, key="_sb_rule_out")
+            df_r = df_rules[df_rules["後項"] == sel_out].reset_index(drop=True)
+
+            @memo_figure
+            def _build_fig_rules(df_r, sel_out):
+                fig_rules = go.Figure(go.Scatter(
+                    x=df_r["信賴度"], y=df_r["增益"],
+                    mode="markers",
+                    marker=dict(size=df_r["規則件數"], sizemode="area",
+                                sizeref=2 * df_r["規則件數"].max() / 40 ** 2, sizemin=5,
+                                color=df_r["因子數"], colorscale=[[0, "#F5B7B1"], [1, "#922B21"]],
+                                line=dict(color="#FFFFFF", width=1), opacity=0.85,
+                                colorbar=dict(title=dict(text="因子數"), dtick=1,
+                                              thickness=12, len=0.6)),
+                    customdata=df_r[["前項", "規則件數", "前項件數"]],
+                    hovertemplate=("<b>%{customdata[0]}</b><br>→ " + sel_out +
+                                   "<br>信賴度：%{x:.1f}%（%{customdata[1]} / %{customdata[2]} 件）"
+                                   "<br>增益：%{y:.2f}<extra></extra>"),
+                ))
+                fig_rules.add_hline(y=1, line_dash="dash", line_color="#AEB6BF", line_width=1)
+                fig_rules.update_layout(
+                    height=400,
+                    xaxis=dict(title=dict(text="信賴度 (%)"), ticksuffix="%", griddash="dot"),
+                    yaxis=dict(title=dict(text="增益 (lift)"), griddash="dot"),
+                    margin=dict(t=20, b=60, l=60, r=20),
+                )
+                return fig_rules
+            show_chart(_build_fig_rules(df_r, sel_out))
+            st.dataframe(
+                df_r.drop(columns="後項").head(20)
+                    .round({"支持度": 2, "信賴度": 1, "基準率": 1, "增益": 2}),
+                use_container_width=True, hide_index=True)
+
+        if _rules_res is not None and not _rules_res.empty:
+            _fall_rules_view(_rules_res)
+        elif _rules_res is not None:
+            st.info(f"目前期間內沒有件數 ≥ {RULE_MIN_COUNT} 且增益 > 1 的因子組合。")
+
+        st.markdown("<hr>", unsafe_allow_html=True)
+
+        # ── 圖3：傷害風險模型（離線訓練，只讀檔）───────────────
+        st.markdown('<p class="section-title">③ 傷害風險模型：各因子調整後勝算比</p>',
+                    unsafe_allow_html=True)
+        if INJURY_MODEL is None:
+            st.info(f"尚未載入傷害風險模型（{INJURY_MODEL_PATH} 不存在或欄位定義已變更）。"
+                    f"請離線執行：python -m analytics.train_injury_model {EXCEL_PATH}")
         else:
-            st.info("各目標科別件數不足，無法產生熱力矩陣。")
+            _im = INJURY_MODEL
+            _stale = ("；⚠️ 資料已更新至 " + _data_end + "，建議重新訓練"
+                      if _im["period"][1] and _im["period"][1] < _data_end else "")
+            st.caption(
+                f"懲罰式 logistic 迴歸（ridge λ={_im['ridge']}），同時調整高風險因子、藥物、"
+                f"事件說明特徵、科別（參考組：{_im['depts'][0]}）與班別（參考組：白班 08–16 時）。"
+                f"全院模型，不受篩選條件影響；訓練資料 {_im['period'][0]}～{_im['period'][1]} "
+                f"共 {_im['n']} 件，訓練於 {_im['trained_at'][:10]}{_stale}。"
+                "勝算比 > 1 表示其他因子相同時傷害機率較高；僅呈現關聯，不代表因果")
+
+            @st.fragment
+            def _injury_model_view(model):
+                """切換結果只重跑此區塊；勝算比由模型檔的係數與共變異矩陣換算"""
+                sel_o = st.radio("結果", list(model["outcomes"]), horizontal=True,
+                                 key="_rd_model_out")
+                m = model["outcomes"][sel_o]
+                df_or = odds_ratio_frame(model, sel_o)
+
+                @memo_figure
+                def _build_fig_or(df_or):
+                    clrs = ["#C0392B" if lo > 1 else "#1E8449" if hi < 1 else "#7F8C8D"
+                            for lo, hi in zip(df_or["下限"], df_or["上限"])]
+                    ylab = [f"{g}｜{f}" for g, f in zip(df_or["群組"], df_or["因子"])]
+                    fig_or = go.Figure(go.Scatter(
+                        x=df_or["勝算比"], y=ylab, mode="markers",
+                        marker=dict(size=9, color=clrs, symbol="square"),
+                        error_x=dict(type="data", symmetric=False,
+                                     array=df_or["上限"] - df_or["勝算比"],
+                                     arrayminus=df_or["勝算比"] - df_or["下限"],
+                                     color="#5D6D7E", thickness=1.3, width=4),
+                        customdata=df_or[["下限", "上限", "p值", "件數"]],
+                        hovertemplate=("<b>%{y}</b><br>調整後勝算比：%{x:.2f}"
+                                       "（95% CI %{customdata[0]:.2f}–%{customdata[1]:.2f}）"
+                                       "<br>p=%{customdata[2]:.3f}　具此因子 %{customdata[3]} 件"
+                                       "<extra></extra>"),
+                    ))
+                    fig_or.add_vline(x=1, line_dash="dash", line_color="#AEB6BF", line_width=1.5)
+                    fig_or.update_layout(
+                        height=max(360, 22 * len(df_or) + 80),
+                        xaxis=dict(title=dict(text="調整後勝算比（對數尺度）"), type="log",
+                                   griddash="dot"),
+                        yaxis=dict(autorange="reversed", tickfont=dict(size=11), automargin=True),
+                        margin=dict(t=20, b=60, l=80, r=20),
+                    )
+                    return fig_or
+                st.caption(f"{sel_o}：{m['events']} / {model['n']} 件；訓練集 AUC {m['auc']:.3f}、"
+                           f"交叉驗證 AUC {m['cv_auc']:.3f}。紅 = 顯著增加風險、綠 = 顯著降低")
+                show_chart(_build_fig_or(df_or))
+
+            _injury_model_view(_im)
 
 
 
@@ -3710,37 +4197,18 @@ with _tab2:
 # ════════════════════════════════════════════════════════════
 #  TAB 3：藥物安全分析
 # ════════════════════════════════════════════════════════════
-with _tab3:
+for _ in lazy_tab(_tab3):
 
     # ── 載入藥物工作表（使用與主資料相同的 EXCEL_PATH）──────
     @st.cache_data
-    def load_drug_data():
-        xl_d = pd.ExcelFile(EXCEL_PATH)
-        df_d = pd.read_excel(xl_d, sheet_name="109-113藥物")
-        df_d["年月"] = (pd.to_datetime(df_d["發生日期"], errors="coerce")
-                        .dt.to_period("M").astype(str))
-        # 四個主流程欄（0/1 布林加總）
-        for _col, _key in [
-            ("_stage_order", "事件發生階段-醫囑開立與輸入-醫囑開立與輸入"),
-            ("_stage_disp",  "事件發生階段-藥局調劑-藥局調劑"),
-            ("_stage_trans", "事件發生階段-傳送過程-傳送過程"),
-            ("_stage_admin", "事件發生階段-給藥階段-給藥階段"),
-        ]:
-            df_d[_col] = df_d[_key].fillna(0).astype(int) if _key in df_d.columns else 0
-        # 高警訊藥物標記
-        _ha_kw = (r"insulin|Insulin|胰島素|Novomix|NovoRapid|Lantus|Humulin|"
-                  r"Warfarin|warfarin|Heparin|heparin|enoxaparin|"
-                  r"KCl|Kcl|potassium|MgSO4|"
-                  r"Midazolam|midazolam|Lorazepam|Morphine|morphine")
-        df_d["高警訊"] = (df_d["藥物名稱-應給藥名"].fillna("")
-                          .str.contains(_ha_kw, case=False, regex=True))
-        return df_d
-
-    df_drug = load_drug_data()
+    def load_drug_data(data_version):
+        return load_drug_sheet(EXCEL_PATH)
+
+    df_drug = load_drug_data(DATA_VERSION)
 
     # ── 時間篩選（與側邊欄 date_range 連動）─────────────────
-    _ds, _de = st.session_state["date_range"]
-    df_drug_f = df_drug[(df_drug["年月"] >= _ds) & (df_drug["年月"] <= _de)].copy()
+    _ds, _de = spec.start, spec.end
+    df_drug_f = in_window(df_drug, spec).copy()
     _drug_n     = len(df_drug_f)
     _drug_n_all = len(df_drug)
 
@@ -3765,6 +4233,7 @@ with _tab3:
     _admin_pct = round(_admin_n / _drug_n * 100, 1) if _drug_n > 0 else 0
     _disp_n    = int(df_drug_f["_stage_disp"].sum())
     _disp_pct  = round(_disp_n / _drug_n * 100, 1) if _drug_n > 0 else 0
+    _dr_lo, _dr_hi = _intervals("prop", (_admin_n, _disp_n), (_drug_n, _drug_n))
 
     _kc1, _kc2, _kc3, _kc4 = st.columns(4)
     _kpi_s = ("background:#FFFFFF;border-radius:12px;padding:16px 18px;"
@@ -3774,9 +4243,9 @@ with _tab3:
         (_kc1, "💊 藥物事件總件數",  f"{_drug_n} 件",
          f"篩選期 {_drug_n} ／ 全期 {_drug_n_all} 件", "#7D3C98"),
         (_kc2, "🚨 給藥階段佔比",   f"{_admin_pct:.1f}%",
-         f"給藥階段 {_admin_n} 件（最前線風險）", "#C0392B"),
+         f"給藥階段 {_admin_n} 件（最前線風險）<br>{ci_text(_dr_lo[0], _dr_hi[0])}", "#C0392B"),
         (_kc3, "⚗️ 調劑階段佔比",  f"{_disp_pct:.1f}%",
-         f"藥局調劑 {_disp_n} 件（攔截關鍵點）", "#1A5276"),
+         f"藥局調劑 {_disp_n} 件（攔截關鍵點）<br>{ci_text(_dr_lo[1], _dr_hi[1])}", "#1A5276"),
         (_kc4, "⚠️ 高警訊藥物件數", f"{_ha_n} 件",
          "胰島素·抗凝血劑·電解質·鎮靜劑", "#B7950B"),
     ]:
@@ -3818,20 +4287,24 @@ with _tab3:
                     unsafe_allow_html=True)
         st.caption("各環節出現的錯誤件數；給藥階段偏高代表前端屏障需強化")
 
-        fig_funnel = go.Figure(go.Funnel(
-            y=_funnel_stages, x=_funnel_vals,
-            textinfo="value+percent initial",
-            textfont=dict(size=13, color="white", family="Arial"),
-            marker=dict(color=_funnel_colors, line=dict(width=1, color="white")),
-            connector=dict(line=dict(color="#D7BDE2", width=1.5, dash="dot")),
-            hovertemplate="<b>%{y}</b><br>件數：%{x}<extra></extra>",
-        ))
-        fig_funnel.update_layout(
-            height=300, paper_bgcolor=PAPER_BG,
-            margin=dict(t=10, b=20, l=10, r=10),
-            font=dict(family="Arial", color="#1C2833"),
-        )
-        st.plotly_chart(fig_funnel, use_container_width=True)
+        @memo_figure
+        def _build_fig_funnel(_funnel_colors, _funnel_stages, _funnel_vals):
+            fig_funnel = go.Figure(go.Funnel(
+                y=_funnel_stages, x=_funnel_vals,
+                textinfo="value+percent initial",
+                textfont=dict(size=13, color="white", family="Arial"),
+                marker=dict(color=_funnel_colors, line=dict(width=1, color="white")),
+                connector=dict(line=dict(color="#D7BDE2", width=1.5, dash="dot")),
+                hovertemplate="<b>%{y}</b><br>件數：%{x}<extra></extra>",
+            ))
+            fig_funnel.update_layout(
+                height=300,
+                margin=dict(t=10, b=20, l=10, r=10),
+                font=dict(family="Arial", color="#1C2833"),
+            )
+            return fig_funnel
+        fig_funnel = _build_fig_funnel(_funnel_colors, _funnel_stages, _funnel_vals)
+        show_chart(fig_funnel)
 
     with _fr:
         _dosage_map = {
@@ -3857,27 +4330,29 @@ with _tab3:
             _dose_c = ["#7D3C98" if v == _mx_d else
                        "#A569BD" if v >= _q6_d else "#D7BDE2"
                        for v in _dosage_df["件數"]]
-            fig_dosage = go.Figure(go.Bar(
-                x=_dosage_df["件數"], y=_dosage_df["劑型"],
-                orientation="h",
-                marker=dict(color=_dose_c, opacity=0.87,
-                            line=dict(width=0)),
-                text=[f"{v} 件" for v in _dosage_df["件數"]],
-                textposition="outside",
-                textfont=dict(size=11, color="#1C2833", family="Arial"),
-                hovertemplate="<b>%{y}</b>：%{x} 件<extra></extra>",
-            ))
-            fig_dosage.update_layout(
-                height=260, plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-                xaxis=dict(title=dict(text="件數", font=AXIS_TITLE_FONT),
-                           tickfont=AXIS_TICK_FONT,
-                           gridcolor=GRID_COLOR, griddash="dot",
-                           range=[0, _mx_d * 1.35]),
-                yaxis=dict(tickfont=dict(size=11, color="#2C3E50", family="Arial"),
-                           automargin=True),
-                margin=dict(t=10, b=40, l=80, r=80),
-            )
-            st.plotly_chart(fig_dosage, use_container_width=True)
+            @memo_figure
+            def _build_fig_dosage(_dosage_df, _dose_c, _mx_d):
+                fig_dosage = go.Figure(go.Bar(
+                    x=_dosage_df["件數"], y=_dosage_df["劑型"],
+                    orientation="h",
+                    marker=dict(color=_dose_c, opacity=0.87,
+                                line=dict(width=0)),
+                    text=[f"{v} 件" for v in _dosage_df["件數"]],
+                    textposition="outside",
+                    textfont=dict(size=11, color="#1C2833", family="Arial"),
+                    hovertemplate="<b>%{y}</b>：%{x} 件<extra></extra>",
+                ))
+                fig_dosage.update_layout(
+                    height=260,
+                    xaxis=dict(title=dict(text="件數"), griddash="dot",
+                               range=[0, _mx_d * 1.35]),
+                    yaxis=dict(tickfont=dict(size=11),
+                               automargin=True),
+                    margin=dict(t=10, b=40, l=80, r=80),
+                )
+                return fig_dosage
+            fig_dosage = _build_fig_dosage(_dosage_df, _dose_c, _mx_d)
+            show_chart(fig_dosage)
         else:
             st.info("目前篩選期間無劑型資料。")
 
@@ -3923,28 +4398,29 @@ with _tab3:
         st.markdown(f"<div style='font-size:11px;margin-bottom:8px'>{_lg}</div>",
                     unsafe_allow_html=True)
 
-        fig_sub = go.Figure(go.Bar(
-            x=_st_df["件數"],
-            y=_st_df.apply(lambda r: f"[{r['環節']}] {r['錯誤類型']}", axis=1),
-            orientation="h",
-            marker=dict(color=_st_c, opacity=0.87, line=dict(width=0)),
-            text=[f"{v} 件" for v in _st_df["件數"]],
-            textposition="outside",
-            textfont=dict(size=10, color="#1C2833", family="Arial"),
-            hovertemplate="<b>%{y}</b>：%{x} 件<extra></extra>",
-        ))
-        fig_sub.update_layout(
-            height=max(400, len(_st_df) * 28 + 80),
-            plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-            xaxis=dict(title=dict(text="件數", font=AXIS_TITLE_FONT),
-                       tickfont=AXIS_TICK_FONT,
-                       gridcolor=GRID_COLOR, griddash="dot",
-                       range=[0, _st_df["件數"].max() * 1.3]),
-            yaxis=dict(tickfont=dict(size=10, color="#2C3E50", family="Arial"),
-                       automargin=True),
-            margin=dict(t=10, b=40, l=210, r=90),
-        )
-        st.plotly_chart(fig_sub, use_container_width=True)
+        @memo_figure
+        def _build_fig_sub(_st_c, _st_df):
+            fig_sub = go.Figure(go.Bar(
+                x=_st_df["件數"],
+                y=_st_df.apply(lambda r: f"[{r['環節']}] {r['錯誤類型']}", axis=1),
+                orientation="h",
+                marker=dict(color=_st_c, opacity=0.87, line=dict(width=0)),
+                text=[f"{v} 件" for v in _st_df["件數"]],
+                textposition="outside",
+                textfont=dict(size=10, color="#1C2833", family="Arial"),
+                hovertemplate="<b>%{y}</b>：%{x} 件<extra></extra>",
+            ))
+            fig_sub.update_layout(
+                height=max(400, len(_st_df) * 28 + 80),
+                xaxis=dict(title=dict(text="件數"), griddash="dot",
+                           range=[0, _st_df["件數"].max() * 1.3]),
+                yaxis=dict(tickfont=dict(size=10),
+                           automargin=True),
+                margin=dict(t=10, b=40, l=210, r=90),
+            )
+            return fig_sub
+        fig_sub = _build_fig_sub(_st_c, _st_df)
+        show_chart(fig_sub)
     else:
         st.info("目前篩選期間無錯誤子類型資料。")
 
@@ -3992,29 +4468,30 @@ with _tab3:
                   .sort_values("件數", ascending=False).head(20)
                   .sort_values("件數", ascending=True).reset_index(drop=True))
 
-        fig_cause = go.Figure(go.Bar(
-            x=_ca_df["件數"],
-            y=_ca_df.apply(lambda r: f"[{r['原因大類']}] {r['原因']}", axis=1),
-            orientation="h",
-            marker=dict(color=_ca_df["顏色"].tolist(), opacity=0.87,
-                        line=dict(width=0)),
-            text=[f"{v} 件" for v in _ca_df["件數"]],
-            textposition="outside",
-            textfont=dict(size=10, color="#1C2833", family="Arial"),
-            hovertemplate="<b>%{y}</b>：%{x} 件<extra></extra>",
-        ))
-        fig_cause.update_layout(
-            height=max(360, len(_ca_df) * 28 + 80),
-            plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-            xaxis=dict(title=dict(text="歸因件數", font=AXIS_TITLE_FONT),
-                       tickfont=AXIS_TICK_FONT,
-                       gridcolor=GRID_COLOR, griddash="dot",
-                       range=[0, _ca_df["件數"].max() * 1.3]),
-            yaxis=dict(tickfont=dict(size=10, color="#2C3E50", family="Arial"),
-                       automargin=True),
-            margin=dict(t=10, b=40, l=220, r=90),
-        )
-        st.plotly_chart(fig_cause, use_container_width=True)
+        @memo_figure
+        def _build_fig_cause(_ca_df):
+            fig_cause = go.Figure(go.Bar(
+                x=_ca_df["件數"],
+                y=_ca_df.apply(lambda r: f"[{r['原因大類']}] {r['原因']}", axis=1),
+                orientation="h",
+                marker=dict(color=_ca_df["顏色"].tolist(), opacity=0.87,
+                            line=dict(width=0)),
+                text=[f"{v} 件" for v in _ca_df["件數"]],
+                textposition="outside",
+                textfont=dict(size=10, color="#1C2833", family="Arial"),
+                hovertemplate="<b>%{y}</b>：%{x} 件<extra></extra>",
+            ))
+            fig_cause.update_layout(
+                height=max(360, len(_ca_df) * 28 + 80),
+                xaxis=dict(title=dict(text="歸因件數"), griddash="dot",
+                           range=[0, _ca_df["件數"].max() * 1.3]),
+                yaxis=dict(tickfont=dict(size=10),
+                           automargin=True),
+                margin=dict(t=10, b=40, l=220, r=90),
+            )
+            return fig_cause
+        fig_cause = _build_fig_cause(_ca_df)
+        show_chart(fig_cause)
     else:
         st.info("目前篩選期間無可能原因資料。")
 
@@ -4100,43 +4577,18 @@ with _tab3:
 # ════════════════════════════════════════════════════════════
 #  TAB 4：傷害行為分析
 # ════════════════════════════════════════════════════════════
-with _tab4:
+for _ in lazy_tab(_tab4):
 
     @st.cache_data
-    def load_harm_data():
-        xl_h = pd.ExcelFile(EXCEL_PATH)
-        df_h  = pd.read_excel(xl_h, sheet_name="109-113傷害")
-        df_a  = pd.read_excel(xl_h, sheet_name="109-113全部")
-        df_a["單位"] = (df_a["通報者資料-通報者服務單位"]
-                        .astype(str).str.strip().str.upper())
-        df_a["年月"] = (pd.to_datetime(df_a["發生日期"], errors="coerce")
-                        .dt.to_period("M").astype(str))
-        _mc = [c for c in [
-            "通報案號","單位","年月",
-            "發生者資料-門診住院日","發生者資料-年齡",
-            "發生者資料-性別","發生者資料-診斷",
-            "病人/住民-事件發生後對病人健康的影響程度(彙總)","SAC",
-        ] if c in df_a.columns]
-        df_h = df_h.merge(df_a[_mc].drop_duplicates("通報案號"),
-                          on="通報案號", how="left")
-        df_h["年月"] = (pd.to_datetime(df_h["發生日期"], errors="coerce")
-                        .dt.to_period("M").astype(str))
-        df_h["發生日期_dt"] = pd.to_datetime(df_h["發生日期"], errors="coerce")
-        df_h["住院日_dt"]   = pd.to_datetime(
-            df_h["發生者資料-門診住院日"], errors="coerce")
-        df_h["住院後天數"]  = (df_h["發生日期_dt"] - df_h["住院日_dt"]).dt.days
-        return df_h
-
-    df_harm_all = load_harm_data()
-
-    _hs, _he = st.session_state["date_range"]
-    _harm_base = (df_harm_all if sel_unit == "全院"
-                  else df_harm_all[df_harm_all["單位"].isin(["W11","W12"])]
-                  if sel_unit == "W11+W12（精神科）"
-                  else df_harm_all[df_harm_all["單位"] == sel_unit])
-    _hf = _harm_base[
-        (_harm_base["年月"] >= _hs) & (_harm_base["年月"] <= _he)
-    ].copy()
+    def load_harm_data(data_version):
+        return load_harm_sheet(EXCEL_PATH)
+
+    df_harm_all = load_harm_data(DATA_VERSION)
+    adm_cube = _admission_cube(df_harm_all, DATA_VERSION)
+
+    _hs, _he = spec.start, spec.end
+    _harm_base = rows_in_wards(df_harm_all, spec.wards)
+    _hf = in_window(_harm_base, spec).copy()
     _hn = len(_hf)
 
     # ── Page Header ────────────────────────────────────────
@@ -4154,14 +4606,11 @@ with _tab4:
     st.markdown(_h_header, unsafe_allow_html=True)
 
     # ── KPI 四卡 ──────────────────────────────────────────
-    _TC = {
-        "身體攻擊": "傷害類型-身體攻擊",
-        "自傷":     "傷害類型-自傷",
-        "自殺企圖": "傷害類型-自殺/企圖自殺",
-        "言語衝突": "傷害類型-言語衝突",
-    }
+    _TC = HARM_TYPES
     _hkpi = {k: int(_hf[v].fillna(0).sum()) if v in _hf.columns else 0
              for k, v in _TC.items()}
+    _hci = dict(zip(_hkpi, zip(*_intervals("prop", tuple(_hkpi.values()),
+                                           (_hn,) * len(_hkpi)))))
     _hk1, _hk2, _hk3, _hk4 = st.columns(4)
     _hks = ("background:#FFFFFF;border-radius:12px;padding:16px 18px;"
             "box-shadow:0 2px 10px rgba(0,0,0,0.09);"
@@ -4179,13 +4628,13 @@ with _tab4:
          f"篩選期 {_hn} / 全期 {len(df_harm_all)} 件", "#E74C3C")
     _hkc(_hk2, "&#128074; 身體攻擊",
          f"{_hkpi['身體攻擊']} 件",
-         f"佔比 {round(_hkpi['身體攻擊']/max(_hn,1)*100,1)}%", "#C0392B")
+         f"佔比 {round(_hkpi['身體攻擊']/max(_hn,1)*100,1)}%（{ci_text(*_hci['身體攻擊'])}）", "#C0392B")
     _hkc(_hk3, "&#129656; 自傷",
          f"{_hkpi['自傷']} 件",
-         f"佔比 {round(_hkpi['自傷']/max(_hn,1)*100,1)}%", "#7D3C98")
+         f"佔比 {round(_hkpi['自傷']/max(_hn,1)*100,1)}%（{ci_text(*_hci['自傷'])}）", "#7D3C98")
     _hkc(_hk4, "&#128680; 自殺/企圖自殺",
          f"{_hkpi['自殺企圖']} 件",
-         f"佔比 {round(_hkpi['自殺企圖']/max(_hn,1)*100,1)}%", "#922B21")
+         f"佔比 {round(_hkpi['自殺企圖']/max(_hn,1)*100,1)}%（{ci_text(*_hci['自殺企圖'])}）", "#922B21")
 
     st.markdown("<br>", unsafe_allow_html=True)
 
@@ -4207,28 +4656,32 @@ with _tab4:
         ]).sort_values("件數", ascending=True)
         _tc_map = {"身體攻擊":"#C0392B","自傷":"#7D3C98",
                    "言語衝突":"#E67E22","自殺企圖":"#922B21"}
-        fig_type_h = go.Figure(go.Bar(
-            x=_tdf["件數"], y=_tdf["類型"], orientation="h",
-            marker=dict(color=[_tc_map.get(t,"#AEB6BF") for t in _tdf["類型"]],
-                        opacity=0.88, line=dict(width=0)),
-            text=[f"{v} 件" for v in _tdf["件數"]], textposition="outside",
-            textfont=dict(size=11, color="#1C2833", family="Arial"),
-            hovertemplate="<b>%{y}</b>：%{x} 件<extra></extra>",
-        ))
-        fig_type_h.update_layout(
-            height=240, plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-            xaxis=dict(title=dict(text="件數", font=AXIS_TITLE_FONT),
-                       tickfont=AXIS_TICK_FONT, gridcolor=GRID_COLOR, griddash="dot",
-                       range=[0, max(_tdf["件數"].max(),1)*1.35]),
-            yaxis=dict(tickfont=dict(size=11, color="#2C3E50", family="Arial"),
-                       automargin=True),
-            margin=dict(t=10, b=40, l=80, r=80),
-        )
+        @memo_figure
+        def _build_fig_type_h(_tc_map, _tdf):
+            fig_type_h = go.Figure(go.Bar(
+                x=_tdf["件數"], y=_tdf["類型"], orientation="h",
+                marker=dict(color=[_tc_map.get(t,"#AEB6BF") for t in _tdf["類型"]],
+                            opacity=0.88, line=dict(width=0)),
+                text=[f"{v} 件" for v in _tdf["件數"]], textposition="outside",
+                textfont=dict(size=11, color="#1C2833", family="Arial"),
+                hovertemplate="<b>%{y}</b>：%{x} 件<extra></extra>",
+            ))
+            fig_type_h.update_layout(
+                height=240,
+                xaxis=dict(title=dict(text="件數"), griddash="dot",
+                           range=[0, max(_tdf["件數"].max(),1)*1.35]),
+                yaxis=dict(tickfont=dict(size=11),
+                           automargin=True),
+                margin=dict(t=10, b=40, l=80, r=80),
+            )
+            return fig_type_h
+        fig_type_h = _build_fig_type_h(_tc_map, _tdf)
         st.markdown('<p class="section-title">各傷害類型件數</p>',
                     unsafe_allow_html=True)
-        st.plotly_chart(fig_type_h, use_container_width=True)
+        show_chart(fig_type_h)
 
     with _ha2:
+        _TREND_H_PX = int(FULL_WIDTH_PX * 1.4 / 2.4)     # 右欄佔 1.4 / 2.4
         _hf["年月顯示"] = _hf["年月"].str.replace("-", "/", regex=False)
         _m_atk = (_hf.groupby("年月顯示")["傷害類型-身體攻擊"]
                   .sum().reset_index(name="攻擊"))
@@ -4238,43 +4691,51 @@ with _tab4:
         _mtr = (_m_atk.merge(_m_sih, on="年月顯示", how="outer")
                       .merge(_m_tot, on="年月顯示", how="outer")
                       .fillna(0))
-        fig_trend_h = go.Figure()
-        # 總件數（最底層，灰色粗線）
-        fig_trend_h.add_trace(go.Scatter(
-            x=_mtr["年月顯示"], y=_mtr["總件數"],
-            mode="lines+markers", name="傷害總件數",
-            line=dict(color="#5D6D7E", width=2.5, dash="dot"),
-            marker=dict(size=4, color="#5D6D7E"),
-            hovertemplate="<b>%{x}</b><br>總件數：%{y} 件<extra></extra>",
-        ))
-        fig_trend_h.add_trace(go.Scatter(
-            x=_mtr["年月顯示"], y=_mtr["攻擊"],
-            mode="lines+markers", name="身體攻擊",
-            line=dict(color="#C0392B", width=2), marker=dict(size=5),
-            hovertemplate="<b>%{x}</b><br>攻擊：%{y} 件<extra></extra>",
-        ))
-        fig_trend_h.add_trace(go.Scatter(
-            x=_mtr["年月顯示"], y=_mtr["自傷"],
-            mode="lines+markers", name="自傷",
-            line=dict(color="#7D3C98", width=2), marker=dict(size=5),
-            hovertemplate="<b>%{x}</b><br>自傷：%{y} 件<extra></extra>",
-        ))
-        fig_trend_h.update_layout(
-            height=240, plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-            xaxis=dict(title=dict(text="年月", font=AXIS_TITLE_FONT),
-                       tickfont=dict(size=9, color="#2C3E50", family="Arial"),
-                       tickangle=45, showgrid=False),
-            yaxis=dict(title=dict(text="件數", font=AXIS_TITLE_FONT),
-                       tickfont=AXIS_TICK_FONT, gridcolor=GRID_COLOR,
-                       griddash="dot", rangemode="tozero"),
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0,
-                        font=dict(size=11)),
-            margin=dict(t=40, b=70, l=50, r=20),
-        )
+        @memo_figure
+        def _build_fig_trend_h(_mtr):
+            fig_trend_h = go.Figure()
+            plan = trend_plan(_mtr["年月顯示"], [_mtr["總件數"], _mtr["攻擊"], _mtr["自傷"]],
+                              width_px=_TREND_H_PX)
+            # 總件數（最底層，灰色粗線）
+            fig_trend_h.add_trace(trend_trace(
+                x=_mtr["年月顯示"], y=_mtr["總件數"],
+                mode="lines+markers", name="傷害總件數",
+                line=dict(color="#5D6D7E", width=2.5, dash="dot"),
+                marker=dict(size=4, color="#5D6D7E"),
+                hovertemplate="<b>%{x}</b><br>總件數：%{y} 件<extra></extra>",
+                plan=plan,
+            ))
+            fig_trend_h.add_trace(trend_trace(
+                x=_mtr["年月顯示"], y=_mtr["攻擊"],
+                mode="lines+markers", name="身體攻擊",
+                line=dict(color="#C0392B", width=2), marker=dict(size=5),
+                hovertemplate="<b>%{x}</b><br>攻擊：%{y} 件<extra></extra>",
+                plan=plan,
+            ))
+            fig_trend_h.add_trace(trend_trace(
+                x=_mtr["年月顯示"], y=_mtr["自傷"],
+                mode="lines+markers", name="自傷",
+                line=dict(color="#7D3C98", width=2), marker=dict(size=5),
+                hovertemplate="<b>%{x}</b><br>自傷：%{y} 件<extra></extra>",
+                plan=plan,
+            ))
+            fig_trend_h.update_layout(
+                height=240,
+                xaxis=dict(title=dict(text="年月"),
+                           tickfont=dict(size=9),
+                           tickangle=45, showgrid=False),
+                yaxis=dict(title=dict(text="件數"),
+                           griddash="dot", rangemode="tozero"),
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0,
+                            font=dict(size=11)),
+                margin=dict(t=40, b=70, l=50, r=20),
+            )
+            return fig_trend_h
+        fig_trend_h = _build_fig_trend_h(_mtr)
         st.markdown('<p class="section-title">攻擊 vs 自傷月別趨勢</p>',
                     unsafe_allow_html=True)
         st.caption("可觀察是否有季節性規律（文獻：夏末至秋季攻擊事件偏高）")
-        st.plotly_chart(fig_trend_h, use_container_width=True)
+        show_chart(fig_trend_h)
 
     st.markdown("<br>", unsafe_allow_html=True)
 
@@ -4292,79 +4753,159 @@ with _tab4:
 
     _hb1, _hb2 = st.columns([1.2, 1])
     with _hb1:
-        # 入院後天數隨時間區間連動（_hf已篩選）
-        _dv = _hf["住院後天數"].dropna()
-        _dv = _dv[_dv >= 0]
-        _dlbls = ["0-3天(72h内)","4-7天","8-14天","15-30天","31天以上"]
-        _dcnts = [
-            int((_dv <= 3).sum()),
-            int(((_dv > 3)  & (_dv <= 7)).sum()),
-            int(((_dv > 7)  & (_dv <= 14)).sum()),
-            int(((_dv > 14) & (_dv <= 30)).sum()),
-            int((_dv > 30).sum()),
-        ]
-        _dbdf = pd.DataFrame({"天數分組":_dlbls,"件數":_dcnts})
+        # 入院後天數隨時間區間、病房連動（前綴和陣列切片，不掃描事件列）
+        _, _dday = admission_counts(adm_cube, _hs, _he, spec.wards)
+        _dcnts = day_bin_counts(_dday)[0].tolist()
+        _dbdf = pd.DataFrame({"天數分組":list(ADMIT_BINS),"件數":_dcnts})
         _dbcol = ["#E74C3C","#E67E22","#F39C12","#AED6F1","#85929E"]
-        fig_days = go.Figure(go.Bar(
-            x=_dbdf["天數分組"], y=_dbdf["件數"],
-            marker=dict(color=_dbcol, opacity=0.88, line=dict(width=0)),
-            text=_dbdf["件數"], textposition="outside",
-            textfont=dict(size=11, color="#1C2833", family="Arial"),
-            hovertemplate="<b>%{x}</b>：%{y} 件<extra></extra>",
-        ))
-        fig_days.update_layout(
-            height=280, plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-            xaxis=dict(tickfont=dict(size=10, color="#2C3E50", family="Arial"),
-                       showgrid=False),
-            yaxis=dict(title=dict(text="件數", font=AXIS_TITLE_FONT),
-                       tickfont=AXIS_TICK_FONT, gridcolor=GRID_COLOR, griddash="dot",
-                       range=[0, max(_dcnts)*1.25]),
-            margin=dict(t=20, b=50, l=50, r=20),
-        )
+        @memo_figure
+        def _build_fig_days(_dbcol, _dbdf, _dcnts):
+            fig_days = go.Figure(go.Bar(
+                x=_dbdf["天數分組"], y=_dbdf["件數"],
+                marker=dict(color=_dbcol, opacity=0.88, line=dict(width=0)),
+                text=_dbdf["件數"], textposition="outside",
+                textfont=dict(size=11, color="#1C2833", family="Arial"),
+                hovertemplate="<b>%{x}</b>：%{y} 件<extra></extra>",
+            ))
+            fig_days.update_layout(
+                height=280,
+                xaxis=dict(tickfont=dict(size=10),
+                           showgrid=False),
+                yaxis=dict(title=dict(text="件數"), griddash="dot",
+                           range=[0, max(_dcnts)*1.25]),
+                margin=dict(t=20, b=50, l=50, r=20),
+            )
+            return fig_days
+        fig_days = _build_fig_days(_dbcol, _dbdf, _dcnts)
         st.markdown('<p class="section-title">入院後天數分布</p>',
                     unsafe_allow_html=True)
         st.caption("紅色=72小時高風險窗口；灰色=長期住民（31天+）為最大族群 ｜ 隨時間區間篩選連動")
-        st.plotly_chart(fig_days, use_container_width=True)
+        show_chart(fig_days)
 
     with _hb2:
-        _d72   = df_harm_all[df_harm_all["住院後天數"].fillna(99) <= 3]
-        _dlate = df_harm_all[df_harm_all["住院後天數"].fillna(-1) > 3]
-        _n72, _nlt = max(len(_d72),1), max(len(_dlate),1)
+        # 全期全院：各類型在窗口內 / 後的件數，第 0 列為全部傷害（分母）
+        _tlbl, _tday = admission_counts(adm_cube, adm_cube["months"][0],
+                                        adm_cube["months"][-1], None, by="傷害類型")
+        _t72, _tlate = window_counts(_tday)
+        _n72, _nlt = max(int(_t72[0]),1), max(int(_tlate[0]),1)
         _tkl = [
-            ("身體攻擊","傷害類型-身體攻擊","#C0392B"),
-            ("自傷",    "傷害類型-自傷",    "#7D3C98"),
-            ("言語衝突","傷害類型-言語衝突","#E67E22"),
-            ("自殺企圖","傷害類型-自殺/企圖自殺","#922B21"),
+            ("身體攻擊","#C0392B"),
+            ("自傷",    "#7D3C98"),
+            ("言語衝突","#E67E22"),
+            ("自殺企圖","#922B21"),
         ]
-        fig_72 = go.Figure()
-        for lbl, col, color in _tkl:
-            _p72  = round(int(_d72[col].fillna(0).sum())/_n72*100,1) if col in _d72.columns else 0
-            _plt  = round(int(_dlate[col].fillna(0).sum())/_nlt*100,1) if col in _dlate.columns else 0
-            fig_72.add_trace(go.Bar(
-                name=lbl, y=["72h 内","72h 後"],
-                x=[_p72/100, _plt/100], orientation="h",
-                marker=dict(color=color, opacity=0.85, line=dict(width=0)),
-                text=[f"{_p72:.0f}%", f"{_plt:.0f}%"],
-                textposition="inside",
-                textfont=dict(size=10, color="white"),
-                hovertemplate=f"<b>{lbl}</b>：%{{text}}<extra></extra>",
-            ))
-        fig_72.update_layout(
-            barmode="stack", height=200,
-            plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-            xaxis=dict(title=dict(text="佔比", font=AXIS_TITLE_FONT),
-                       tickformat=".0%", tickfont=AXIS_TICK_FONT,
-                       gridcolor=GRID_COLOR, griddash="dot"),
-            yaxis=dict(tickfont=dict(size=11, color="#2C3E50", family="Arial"),
-                       automargin=True),
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0,
-                        font=dict(size=10)),
-            margin=dict(t=40, b=40, l=70, r=20),
-        )
+        _tpct = {lbl: (round(int(_t72[_tlbl.index(lbl)])/_n72*100,1),
+                       round(int(_tlate[_tlbl.index(lbl)])/_nlt*100,1))
+                 for lbl, _ in _tkl}
+        @memo_figure
+        def _build_fig_72(_tpct, _tkl):
+            fig_72 = go.Figure()
+            for lbl, color in _tkl:
+                _p72, _plt = _tpct[lbl]
+                fig_72.add_trace(go.Bar(
+                    name=lbl, y=["72h 内","72h 後"],
+                    x=[_p72/100, _plt/100], orientation="h",
+                    marker=dict(color=color, opacity=0.85, line=dict(width=0)),
+                    text=[f"{_p72:.0f}%", f"{_plt:.0f}%"],
+                    textposition="inside",
+                    textfont=dict(size=10, color="white"),
+                    hovertemplate=f"<b>{lbl}</b>：%{{text}}<extra></extra>",
+                ))
+            fig_72.update_layout(
+                barmode="stack", height=200,
+                xaxis=dict(title=dict(text="佔比"),
+                           tickformat=".0%", griddash="dot"),
+                yaxis=dict(tickfont=dict(size=11),
+                           automargin=True),
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0,
+                            font=dict(size=10)),
+                margin=dict(t=40, b=40, l=70, r=20),
+            )
+            return fig_72
+        fig_72 = _build_fig_72(_tpct, _tkl)
         st.markdown('<p class="section-title">72h 内 vs 72h 後：傷害類型佔比</p>',
                     unsafe_allow_html=True)
         st.caption("自傷在入院早期佔比較高，部分符合文獻急性期高風險描述")
-        st.plotly_chart(fig_72, use_container_width=True)
+        show_chart(fig_72)
+
+    @st.fragment
+    def _admission_curve_view(adm, start, end, wards):
+        """切換分層只重跑此區塊；逐日件數取自前綴和陣列，不重新掃描事件"""
+        by = st.radio("分層", ADMIT_STRATA, horizontal=True, key="_rd_admit_by")
+        labels, counts = admission_counts(adm, start, end, wards, by=by)
+        cv = admission_curves(counts)
+        keep = np.flatnonzero(cv["n"] >= ADMIT_MIN_N)
+        if not len(keep):
+            st.info(f"各{by}的傷害事件皆少於 {ADMIT_MIN_N} 件，無法估計曲線。")
+            return
+        early, _ = window_counts(counts[keep])
+        e_lo, e_hi = _intervals("prop", tuple(early.tolist()),
+                                tuple(cv["n"][keep].astype(int).tolist()))
+        med = median_day(cv)[keep]
+        df_sum = pd.DataFrame({
+            by: [labels[i] for i in keep],
+            "件數": cv["n"][keep].astype(int),
+            "72h內件數": early.astype(int),
+            "72h內佔比(%)": (early / cv["n"][keep] * 100).round(1),
+            "95% CI": [ci_text(lo, hi) for lo, hi in zip(e_lo, e_hi)],
+            "中位天數": [f"{int(m)}" if np.isfinite(m) else f">{ADMIT_MAX_DAY}" for m in med],
+        })
+        df_cv = pd.DataFrame({
+            "分層": np.repeat([labels[i] for i in keep], len(cv["days"])),
+            "天數": np.tile(cv["days"], len(keep)),
+            "累積比例": cv["cum"][keep].ravel(),
+            "下限": cv["lo"][keep].ravel(), "上限": cv["hi"][keep].ravel(),
+            "hazard": cv["hazard"][keep].ravel(),
+        }).round(4)
+        # 階梯曲線只需保留有事件的天數（及首尾兩天），hv 連線後形狀不變
+        df_cv = df_cv[df_cv.groupby("分層")["累積比例"].diff().ne(0)
+                      | df_cv["天數"].eq(ADMIT_MAX_DAY)].reset_index(drop=True)
+
+        @memo_figure
+        def _build_fig_admit(df_cv, by):
+            fig_admit = go.Figure()
+            palette = ["#34495E", "#C0392B", "#7D3C98", "#E67E22", "#922B21",
+                       "#2471A3", "#1E8449", "#B7950B", "#5D6D7E", "#17A589", "#AF601A"]
+            for j, (lbl, g) in enumerate(df_cv.groupby("分層", sort=False)):
+                c = palette[j % len(palette)]
+                fig_admit.add_trace(go.Scatter(
+                    x=np.r_[g["天數"], g["天數"][::-1]],
+                    y=np.r_[g["上限"], g["下限"][::-1]],
+                    fill="toself", fillcolor=c, opacity=0.12, line=dict(width=0),
+                    hoverinfo="skip", showlegend=False, legendgroup=lbl,
+                ))
+                fig_admit.add_trace(go.Scatter(
+                    x=g["天數"], y=g["累積比例"], mode="lines", name=str(lbl),
+                    line=dict(color=c, width=2.2, shape="hv"), legendgroup=lbl,
+                    customdata=g[["下限", "上限", "hazard"]],
+                    hovertemplate=(f"<b>{lbl}</b> 第 %{{x}} 天<br>"
+                                   "累積比例：%{y:.1%}（95% CI %{customdata[0]:.1%}–"
+                                   "%{customdata[1]:.1%}）<br>當日 hazard：%{customdata[2]:.1%}"
+                                   "<extra></extra>"),
+                ))
+            fig_admit.add_vline(x=ADMIT_WINDOW, line_dash="dash", line_color="#E74C3C",
+                                line_width=1.5, annotation_text="72h",
+                                annotation_font=dict(size=10, color="#E74C3C"))
+            fig_admit.update_layout(
+                height=340,
+                xaxis=dict(title=dict(text="入院後天數"), griddash="dot",
+                           range=[0, ADMIT_MAX_DAY]),
+                yaxis=dict(title=dict(text="已發生事件累積比例"), tickformat=".0%",
+                           griddash="dot", range=[0, 1.02]),
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0,
+                            font=dict(size=10), title=dict(text=by)),
+                margin=dict(t=40, b=50, l=60, r=20),
+            )
+            return fig_admit
+        st.markdown('<p class="section-title">入院後累積發生曲線（Kaplan–Meier 型）</p>',
+                    unsafe_allow_html=True)
+        st.caption(f"曲線 = 事件中於入院第 t 天以前發生的比例（陰影為 95% CI）；越早上升代表越集中於入院早期。"
+                   f"僅含有事件者、無在院人數分母，故為時間分布而非發生率；"
+                   f"件數 < {ADMIT_MIN_N} 的{by}不顯示 ｜ 隨時間區間、病房篩選連動")
+        show_chart(_build_fig_admit(df_cv, by))
+        st.dataframe(df_sum, use_container_width=True, hide_index=True)
+
+    _admission_curve_view(adm_cube, _hs, _he, spec.wards)
 
     st.markdown("<br>", unsafe_allow_html=True)
 
@@ -4413,26 +4954,28 @@ with _tab4:
             for g, c, _ in _CGH)
         st.markdown(f"<div style='font-size:11px;margin-bottom:8px'>{_lgh}</div>",
                     unsafe_allow_html=True)
-        fig_cause_h = go.Figure(go.Bar(
-            x=_cah["件數"],
-            y=_cah.apply(lambda r: f"[{r['原因大類']}] {r['原因']}", axis=1),
-            orientation="h",
-            marker=dict(color=_cah["顏色"].tolist(), opacity=0.88, line=dict(width=0)),
-            text=[f"{v} 件" for v in _cah["件數"]], textposition="outside",
-            textfont=dict(size=10, color="#1C2833", family="Arial"),
-            hovertemplate="<b>%{y}</b>：%{x} 件<extra></extra>",
-        ))
-        fig_cause_h.update_layout(
-            height=max(380, len(_cah)*28+80),
-            plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-            xaxis=dict(title=dict(text="件數", font=AXIS_TITLE_FONT),
-                       tickfont=AXIS_TICK_FONT, gridcolor=GRID_COLOR, griddash="dot",
-                       range=[0, _cah["件數"].max()*1.3]),
-            yaxis=dict(tickfont=dict(size=10, color="#2C3E50", family="Arial"),
-                       automargin=True),
-            margin=dict(t=10, b=40, l=200, r=80),
-        )
-        st.plotly_chart(fig_cause_h, use_container_width=True)
+        @memo_figure
+        def _build_fig_cause_h(_cah):
+            fig_cause_h = go.Figure(go.Bar(
+                x=_cah["件數"],
+                y=_cah.apply(lambda r: f"[{r['原因大類']}] {r['原因']}", axis=1),
+                orientation="h",
+                marker=dict(color=_cah["顏色"].tolist(), opacity=0.88, line=dict(width=0)),
+                text=[f"{v} 件" for v in _cah["件數"]], textposition="outside",
+                textfont=dict(size=10, color="#1C2833", family="Arial"),
+                hovertemplate="<b>%{y}</b>：%{x} 件<extra></extra>",
+            ))
+            fig_cause_h.update_layout(
+                height=max(380, len(_cah)*28+80),
+                xaxis=dict(title=dict(text="件數"), griddash="dot",
+                           range=[0, _cah["件數"].max()*1.3]),
+                yaxis=dict(tickfont=dict(size=10),
+                           automargin=True),
+                margin=dict(t=10, b=40, l=200, r=80),
+            )
+            return fig_cause_h
+        fig_cause_h = _build_fig_cause_h(_cah)
+        show_chart(fig_cause_h)
     else:
         st.info("目前篩選期間無可能原因資料。")
 
@@ -4473,35 +5016,37 @@ with _tab4:
         _drl.append({"原因":lbl,"攻擊%":_pa,"自傷%":_ps,"差異":abs(_pa-_ps)})
     _ddf = (pd.DataFrame(_drl).sort_values("差異",ascending=True)
             .reset_index(drop=True))
-    fig_diff = go.Figure()
-    fig_diff.add_trace(go.Bar(
-        name="身體攻擊", x=_ddf["攻擊%"], y=_ddf["原因"], orientation="h",
-        marker=dict(color="#C0392B", opacity=0.85, line=dict(width=0)),
-        text=[f"{v:.0f}%" for v in _ddf["攻擊%"]], textposition="outside",
-        textfont=dict(size=10, color="#1C2833", family="Arial"),
-        hovertemplate="<b>攻擊</b> %{y}：%{x:.1f}%<extra></extra>",
-    ))
-    fig_diff.add_trace(go.Bar(
-        name="自傷", x=_ddf["自傷%"], y=_ddf["原因"], orientation="h",
-        marker=dict(color="#7D3C98", opacity=0.60, line=dict(width=0)),
-        text=[f"{v:.0f}%" for v in _ddf["自傷%"]], textposition="outside",
-        textfont=dict(size=10, color="#1C2833", family="Arial"),
-        hovertemplate="<b>自傷</b> %{y}：%{x:.1f}%<extra></extra>",
-    ))
-    fig_diff.update_layout(
-        barmode="group", height=380,
-        plot_bgcolor=PLOT_BG, paper_bgcolor=PAPER_BG,
-        xaxis=dict(title=dict(text="佔比（%）", font=AXIS_TITLE_FONT),
-                   tickfont=AXIS_TICK_FONT, gridcolor=GRID_COLOR, griddash="dot",
-                   range=[0, 110]),
-        yaxis=dict(tickfont=dict(size=10, color="#2C3E50", family="Arial"),
-                   automargin=True),
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0,
-                    font=dict(size=11)),
-        margin=dict(t=40, b=40, l=140, r=100),
-        bargap=0.2, bargroupgap=0.05,
-    )
-    st.plotly_chart(fig_diff, use_container_width=True)
+    @memo_figure
+    def _build_fig_diff(_ddf):
+        fig_diff = go.Figure()
+        fig_diff.add_trace(go.Bar(
+            name="身體攻擊", x=_ddf["攻擊%"], y=_ddf["原因"], orientation="h",
+            marker=dict(color="#C0392B", opacity=0.85, line=dict(width=0)),
+            text=[f"{v:.0f}%" for v in _ddf["攻擊%"]], textposition="outside",
+            textfont=dict(size=10, color="#1C2833", family="Arial"),
+            hovertemplate="<b>攻擊</b> %{y}：%{x:.1f}%<extra></extra>",
+        ))
+        fig_diff.add_trace(go.Bar(
+            name="自傷", x=_ddf["自傷%"], y=_ddf["原因"], orientation="h",
+            marker=dict(color="#7D3C98", opacity=0.60, line=dict(width=0)),
+            text=[f"{v:.0f}%" for v in _ddf["自傷%"]], textposition="outside",
+            textfont=dict(size=10, color="#1C2833", family="Arial"),
+            hovertemplate="<b>自傷</b> %{y}：%{x:.1f}%<extra></extra>",
+        ))
+        fig_diff.update_layout(
+            barmode="group", height=380,
+            xaxis=dict(title=dict(text="佔比（%）"), griddash="dot",
+                       range=[0, 110]),
+            yaxis=dict(tickfont=dict(size=10),
+                       automargin=True),
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0,
+                        font=dict(size=11)),
+            margin=dict(t=40, b=40, l=140, r=100),
+            bargap=0.2, bargroupgap=0.05,
+        )
+        return fig_diff
+    fig_diff = _build_fig_diff(_ddf)
+    show_chart(fig_diff)
 
     st.markdown("<br>", unsafe_allow_html=True)
 
@@ -4551,43 +5096,46 @@ with _tab4:
         _age_text = [[str(int(v)) if v > 0 else "" for v in row]
                      for row in _age_piv.values]
 
-        fig_age_hm = go.Figure(go.Heatmap(
-            z=_age_piv.values,
-            x=_age_piv.columns.tolist(),
-            y=_age_piv.index.tolist(),
-            text=_age_text,
-            texttemplate="%{text}",
-            textfont=dict(size=13, color="white", family="Arial Bold"),
-            colorscale=[
-                [0.0,  "#F4F6F6"],
-                [0.15, "#D7BDE2"],
-                [0.5,  "#7D3C98"],
-                [1.0,  "#4A235A"],
-            ],
-            hovertemplate="<b>%{y}</b> × <b>%{x}</b>：%{z} 件<extra></extra>",
-            colorbar=dict(
-                title=dict(text="件數", font=dict(size=11, color="#1C2833")),
-                tickfont=dict(size=10, color="#2C3E50"),
-                thickness=14, len=0.7,
-            ),
-            xgap=4, ygap=3,
-        ))
-        fig_age_hm.update_layout(
-            height=320,
-            paper_bgcolor=PAPER_BG, plot_bgcolor=PAPER_BG,
-            xaxis=dict(
-                title=dict(text="傷害類型", font=AXIS_TITLE_FONT),
-                tickfont=dict(size=12, color="#2C3E50", family="Arial"),
-                side="bottom",
-            ),
-            yaxis=dict(
-                title=dict(text="年齡層", font=AXIS_TITLE_FONT),
-                tickfont=dict(size=12, color="#2C3E50", family="Arial"),
-                automargin=True,
-            ),
-            margin=dict(t=20, b=60, l=100, r=80),
-        )
-        st.plotly_chart(fig_age_hm, use_container_width=True)
+        @memo_figure
+        def _build_fig_age_hm(_age_piv, _age_text):
+            fig_age_hm = go.Figure(go.Heatmap(
+                z=_age_piv.values,
+                x=_age_piv.columns.tolist(),
+                y=_age_piv.index.tolist(),
+                text=_age_text,
+                texttemplate="%{text}",
+                textfont=dict(size=13, color="white", family="Arial Bold"),
+                colorscale=[
+                    [0.0,  "#F4F6F6"],
+                    [0.15, "#D7BDE2"],
+                    [0.5,  "#7D3C98"],
+                    [1.0,  "#4A235A"],
+                ],
+                hovertemplate="<b>%{y}</b> × <b>%{x}</b>：%{z} 件<extra></extra>",
+                colorbar=dict(
+                    title=dict(text="件數", font=dict(size=11, color="#1C2833")),
+                    tickfont=dict(size=10),
+                    thickness=14, len=0.7,
+                ),
+                xgap=4, ygap=3,
+            ))
+            fig_age_hm.update_layout(
+                height=320,
+                xaxis=dict(
+                    title=dict(text="傷害類型"),
+                    tickfont=dict(size=12),
+                    side="bottom",
+                ),
+                yaxis=dict(
+                    title=dict(text="年齡層"),
+                    tickfont=dict(size=12),
+                    automargin=True,
+                ),
+                margin=dict(t=20, b=60, l=100, r=80),
+            )
+            return fig_age_hm
+        fig_age_hm = _build_fig_age_hm(_age_piv, _age_text)
+        show_chart(fig_age_hm)
     else:
         st.info("年齡欄位不存在，無法產生熱力圖。")
 
@@ -4600,6 +5148,22 @@ with _tab4:
 
 # ── 頁底 ─────────────────────────────────────────────────────
 st.markdown("---")
+_payload_df = pd.DataFrame(_payload, columns=["圖表", "bytes"])
+_payload_log.info("rerun: %d 張圖，共 %d bytes",
+                  len(_payload_df), _payload_df["bytes"].sum())
+with st.expander("⚙️ 圖表快取與傳輸量", expanded=False):
+    _pc1, _pc2 = st.columns(2)
+    with _pc1:
+        st.caption("圖表快取命中率（跨 session 累計）")
+        st.dataframe(figure_cache_stats(_figure_store()),
+                     use_container_width=True, hide_index=True)
+    with _pc2:
+        st.caption(f"本次載入：{len(_payload_df)} 張圖，"
+                   f"共 {_payload_df['bytes'].sum() / 1024:,.1f} KB")
+        st.dataframe(_payload_df.assign(KB=(_payload_df["bytes"] / 1024).round(1))
+                                .drop(columns="bytes")
+                                .sort_values("KB", ascending=False),
+                     use_container_width=True, hide_index=True)
 st.markdown("""
 <div style='text-align:center;color:#4D5656;font-size:12px;padding:8px 0'>
     🏥 國軍花蓮總醫院 病人安全事件儀表板 v3.3 ｜
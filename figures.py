@@ -0,0 +1,306 @@
+# ============================================================
+#  Plotly 圖表：院內樣板、圖表快取、傳輸量統計
+#  - register_house_template()：字型 / 底色 / 格線 / 軸字型集中在
+#    一個已註冊的樣板（"hps"），各圖不再逐一重複這些設定
+#  - 建圖函數以 @memo_figure 包裝：以「圖名 + 建圖程式碼 + 參數內容指紋
+#    + 引用的樣式常數」為鍵，存放序列化後的 figure JSON。
+#    命中時直接由 JSON 還原（略過逐屬性驗證），未命中才執行建圖。
+#  - payload_bytes()：圖表送往瀏覽器的 JSON 大小（優先取快取內的長度）
+#  - trend_plan() / trend_trace()：長時間序列依圖寬降採樣（同圖各 trace 共用
+#    一組桶，x 對齊），折線點數多時改用 WebGL
+# ============================================================
+import hashlib
+import json
+import marshal
+import pickle
+import threading
+import types
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+FIG_CACHE_MAX = 256          # 最多保留幾張序列化圖（LRU）
+FULL_WIDTH_PX = 1200         # 滿版圖表的繪圖寬度（px）；半版 / 三分版依比例
+GL_THRESHOLD  = 1000         # 單一 trace 超過此點數改用 Scattergl
+
+# ── 院內圖表樣式（軸標題深色，確保可讀）────────────────────
+HOUSE_TEMPLATE   = "hps"
+FONT_FAMILY      = "Arial"
+TEXT_COLOR       = "#2C3E50"
+AXIS_TITLE_FONT  = dict(size=13, color="#1C2833", family="Arial")   # 深黑，最高對比
+AXIS_TICK_FONT   = dict(size=10, color="#2C3E50", family="Arial")   # 深藍灰
+TITLE_FONT       = dict(size=16, color="#2C3E50", family="Arial")
+GRID_COLOR       = "#EAECEE"
+ZERO_LINE_COLOR  = "#BDC3C7"
+PLOT_BG          = "#FFFFFF"
+PAPER_BG         = "#FFFFFF"
+# 未指定顏色的 trace / 色階沿用原 Streamlit 圖表配色
+COLORWAY = ["#0068C9", "#83C9FF", "#FF2B2B", "#FFABAB", "#29B09D",
+            "#7DEFA1", "#FF8700", "#FFD16A", "#6D3FC0", "#D5DAE5"]
+SEQUENTIAL = ["#E4F5FF", "#C7EBFF", "#A6DCFF", "#83C9FF", "#60B4FF",
+              "#3D9DF3", "#1C83E1", "#0068C9", "#0054A3", "#004280"]
+
+
+_TEMPLATE_DIGEST = {}        # 樣板名 → 內容指紋（列入快取鍵，改樣板即失效）
+
+
+def register_house_template(name=HOUSE_TEMPLATE):
+    """
+    註冊院內樣板並設為預設。每張圖的 JSON 只帶這份精簡樣板，
+    取代預設樣板內各 trace 類型的整組色階（每張圖約 8 KB）。
+    圖表須以 theme=None 顯示，否則 Streamlit 主題會覆蓋樣板設定
+    """
+    axis = dict(gridcolor=GRID_COLOR, zerolinecolor=ZERO_LINE_COLOR,
+                linecolor=GRID_COLOR, tickfont=AXIS_TICK_FONT,
+                title=dict(font=AXIS_TITLE_FONT), automargin=True)
+    seq = [[i / (len(SEQUENTIAL) - 1), c] for i, c in enumerate(SEQUENTIAL)]
+    pio.templates[name] = go.layout.Template(layout=dict(
+        font=dict(family=FONT_FAMILY, color=TEXT_COLOR, size=12),
+        title=dict(font=TITLE_FONT, x=0, xanchor="left"),
+        paper_bgcolor=PAPER_BG, plot_bgcolor=PLOT_BG,
+        colorway=COLORWAY, colorscale=dict(sequential=seq),
+        xaxis=axis, yaxis=axis,
+        legend=dict(font=dict(color=TEXT_COLOR)),
+        hoverlabel=dict(font=dict(family=FONT_FAMILY)),
+    ))
+    pio.templates.default = name
+    _TEMPLATE_DIGEST[name] = fingerprint(pio.templates[name].to_plotly_json())
+    return name
+
+
+def _feed(h, obj):
+    """把 obj 的內容（而非 id）餵進雜湊"""
+    if isinstance(obj, pd.DataFrame):
+        h.update(b"D" + repr((obj.shape, list(obj.columns),
+                              [str(t) for t in obj.dtypes])).encode())
+        try:
+            h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+        except TypeError:                       # 儲存格含 list 等不可雜湊物件
+            h.update(pickle.dumps(obj))
+    elif isinstance(obj, (pd.Series, pd.Index)):
+        h.update(b"S" + repr((obj.name, str(obj.dtype), len(obj))).encode())
+        try:
+            h.update(pd.util.hash_pandas_object(obj).to_numpy().tobytes())
+        except TypeError:
+            h.update(pickle.dumps(obj))
+    elif isinstance(obj, np.ndarray):
+        h.update(b"A" + repr((obj.dtype.str, obj.shape)).encode())
+        h.update(pickle.dumps(obj) if obj.dtype == object
+                 else np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"[")
+        for x in obj:
+            _feed(h, x)
+        h.update(b"]")
+    elif isinstance(obj, dict):
+        h.update(b"{")
+        for k in sorted(obj, key=repr):
+            _feed(h, k)
+            _feed(h, obj[k])
+        h.update(b"}")
+    else:
+        h.update(repr(obj).encode())
+
+
+def fingerprint(*parts):
+    """任意參數組合的內容雜湊（DataFrame / Series / ndarray / 容器 / 純量）"""
+    h = hashlib.blake2b(digest_size=16)
+    for p in parts:
+        _feed(h, p)
+    return h.hexdigest()
+
+
+_PLAIN = (str, int, float, bool, type(None), tuple, list, dict)
+
+
+def _spec_globals(code, g, seen=None):
+    """建圖函數引用的模組層純資料常數（字型、顏色、排序表…）→ 列入鍵"""
+    seen = set() if seen is None else seen
+    for name in code.co_names:
+        if name not in seen and isinstance(g.get(name), _PLAIN):
+            seen.add(name)
+    for c in code.co_consts:
+        if isinstance(c, types.CodeType):
+            _spec_globals(c, g, seen)
+    return sorted(seen)
+
+
+def new_figure_store(max_entries=FIG_CACHE_MAX):
+    return {"figs": OrderedDict(), "stats": {}, "max": max_entries,
+            "lock": threading.Lock()}
+
+
+def _tag(fig, name, js):
+    fig._hps_name  = name
+    fig._hps_bytes = len(js.encode())
+    return fig
+
+
+def figure_memo(store):
+    """
+    回傳裝飾器。被裝飾的函數需回傳 go.Figure，且輸出只取決於參數與樣式常數：
+        @memo_figure
+        def _build_fig_x(df, colors): ...
+        fig_x = _build_fig_x(df, colors)
+    命中率以圖名（函數名去掉 _build_ 前綴）分開統計
+    """
+    def deco(build):
+        name = build.__name__.removeprefix("_build_")
+        code = hashlib.blake2b(marshal.dumps(build.__code__),
+                               digest_size=16).hexdigest()
+        spec = _spec_globals(build.__code__, build.__globals__)
+
+        @wraps(build)
+        def wrapper(*args, **kwargs):
+            g   = build.__globals__
+            tpl = pio.templates.default
+            key = (name, fingerprint(code, args, kwargs,
+                                     [(n, g.get(n)) for n in spec],
+                                     _TEMPLATE_DIGEST.get(tpl, tpl)))
+            with store["lock"]:
+                stats = store["stats"].setdefault(name, [0, 0])
+                hit   = store["figs"].get(key)
+                if hit is not None:
+                    store["figs"].move_to_end(key)
+                    stats[0] += 1
+            if hit is not None:
+                return _tag(go.Figure(json.loads(hit), _validate=False),
+                            name, hit)
+
+            fig = build(*args, **kwargs)
+            hit = fig.to_json()
+            with store["lock"]:
+                stats[1] += 1
+                store["figs"][key] = hit
+                while len(store["figs"]) > store["max"]:
+                    store["figs"].popitem(last=False)
+            return _tag(fig, name, hit)
+        return wrapper
+    return deco
+
+
+def figure_cache_stats(store):
+    """各圖命中 / 未命中次數與命中率（%），依圖名排序"""
+    with store["lock"]:
+        rows = [(n, h, m) for n, (h, m) in store["stats"].items()]
+    df = pd.DataFrame(rows, columns=["圖表", "命中", "未命中"])
+    tot = df["命中"] + df["未命中"]
+    df["命中率(%)"] = (df["命中"] / tot.where(tot > 0) * 100).round(1).fillna(0)
+    return df.sort_values("圖表").reset_index(drop=True)
+
+
+# ── 長時間序列：LTTB 降採樣 + WebGL ───────────────────────────
+# 同一張圖的所有 trace 共用一份降採樣計畫（trend_plan），x 點位一致：
+# 長條以桶內加總、折線取 LTTB 代表點、散點取桶內 |y| 最大者
+
+def _lttb_edges(n, n_out):
+    """中間 n_out-2 個桶的邊界；首點、末點各自成桶"""
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(int) + 1
+    edges[-1] = n - 1
+    return edges
+
+
+def lttb_index(y, n_out, x=None):
+    """
+    Largest-Triangle-Three-Buckets：回傳保留點的位置索引（含首尾）。
+    x 省略時以位置為橫軸（類別型年月標籤），NaN 以 0 計算面積
+    """
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+    # 最後一個桶的「下一桶」就是末點
+    edges = _lttb_edges(n, n_out)
+    out = np.empty(n_out, dtype=int)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = hi, (edges[i + 2] if i + 2 < len(edges) else n)
+        ax, ay = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - ax) * (y[lo:hi] - y[a])
+                      - (x[a] - x[lo:hi]) * (ay - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def trend_plan(x, ys, width_px=FULL_WIDTH_PX):
+    """
+    一張圖共用的降採樣計畫。ys：與 x 等長的各序列，各自縮放到 0–1 後相加成
+    合成序列，再以 LTTB 選出每桶的代表點。回傳 dict：x（完整橫軸）、
+    idx（各桶代表點位置）、bucket（每個位置所屬桶）；點數未超過圖寬時回傳 None
+    """
+    n = len(x)
+    if n <= width_px or width_px < 3:
+        return None
+    comb = np.zeros(n)
+    for y in ys:
+        y = np.nan_to_num(np.asarray(y, dtype=float))
+        rng = y.max() - y.min()
+        comb += (y - y.min()) / rng if rng > 0 else 0.0
+    bucket = np.searchsorted(_lttb_edges(n, width_px), np.arange(n), side="right")
+    return {"x": pd.Index(x), "idx": lttb_index(comb, width_px), "bucket": bucket}
+
+
+def _take(v, idx, n):
+    """逐點屬性（與 x 等長的陣列 / Series / list）只保留 idx；巢狀 dict 遞迴處理"""
+    if isinstance(v, dict):
+        return {k: _take(x, idx, n) for k, x in v.items()}
+    if isinstance(v, (pd.Series, pd.Index)) and len(v) == n:
+        return v.iloc[idx] if isinstance(v, pd.Series) else v[idx]
+    if isinstance(v, (list, tuple, np.ndarray)) and len(v) == n:
+        return np.asarray(v, dtype=object if isinstance(v, (list, tuple)) else None)[idx]
+    return v
+
+
+def _is_line(kind, kwargs):
+    return kind != "bar" and "lines" in kwargs.get("mode", "lines")
+
+
+def trend_trace(x, y, kind="scatter", plan=None, **kwargs):
+    """
+    時間序列 trace。plan（trend_plan）給定時依同一組桶降採樣：
+    長條 y 為桶內加總，折線取桶的代表點，只有標記的散點取桶內 |y| 最大者；
+    x 一律換成桶代表點的 x，圖內各 trace 對齊。逐點屬性（marker 顏色、text、
+    customdata…）隨保留列取樣。折線點數超過 GL_THRESHOLD 才用 Scattergl。
+    plan=None（點數少，如目前的月資料）時原樣回傳 go.Scatter / go.Bar
+    """
+    n = len(x)
+    if plan is not None and n:
+        full = plan["x"].get_indexer(pd.Index(x))
+        b = plan["bucket"][full]
+        yv = np.nan_to_num(np.asarray(y, dtype=float))
+        if kind == "bar":
+            keep, rows = np.unique(b, return_index=True)
+            y = np.bincount(b, weights=yv)[keep]
+        else:
+            if _is_line(kind, kwargs):
+                rows = np.flatnonzero(np.isin(full, plan["idx"]))
+            else:
+                order = np.lexsort((-np.abs(yv), b))
+                rows = np.sort(order[np.r_[True, b[order][1:] != b[order][:-1]]])
+            y, keep = _take(y, rows, n), b[rows]
+        kwargs = _take(kwargs, rows, n)
+        x = plan["x"][plan["idx"][keep]]
+    if kind == "bar":
+        return go.Bar(x=x, y=y, **kwargs)
+    return (go.Scattergl if _is_line(kind, kwargs) and len(x) > GL_THRESHOLD
+            else go.Scatter)(x=x, y=y, **kwargs)
+
+
+def payload_bytes(fig):
+    """
+    (圖名, 序列化位元組數)。經 @memo_figure 產生的圖直接取快取 JSON 的長度，
+    不必再序列化一次；其他圖才現場 to_json()
+    """
+    name = getattr(fig, "_hps_name", None)
+    size = getattr(fig, "_hps_bytes", None)
+    if size is None:
+        size = len(fig.to_json().encode())
+    return name, size